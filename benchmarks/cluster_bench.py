@@ -0,0 +1,363 @@
+# benchmarks/cluster_bench.py - Carga sintética contra un clúster completo en loopback
+"""
+Levanta un DNS General, N ServidorDistribuido (cada uno en su proceso) y un
+DNS local sintético por servidor, siembra archivos y lanza muchos clientes
+concurrentes con una mezcla de acciones. Imprime un JSON con throughput y
+latencias p50/p95/p99 por acción.
+
+Uso:
+    python benchmarks/cluster_bench.py --servidores 3 --clientes 16 --duracion 20 \\
+        --mezcla consultar=40,leer=40,escribir=10,listar_archivos=10 --salida resultado.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from src.network.peer_conector import PeerConnector
+from src.network.transport import ReliableTransport
+
+HOST = "127.0.0.1"
+BASE_PORT = 42000                    # DNS General; servidores en BASE_PORT + 10 + i, DNS locales en BASE_PORT + 100 + i
+OPERATIONS = ("consultar", "leer", "escribir", "listar_archivos")
+DEFAULT_MIX = "consultar=40,leer=40,escribir=10,listar_archivos=10"
+PERCENTILES = (50, 95, 99)
+READY_TIMEOUT = 30                   # segundos esperando que todos los servidores se registren
+REQUEST_TIMEOUT = 10                 # segundos por petición antes de contarla como error
+SUCCESS_STATUSES = {"ACK", "EXITO"}  # consultar/listar responden ACK; leer/escribir, EXITO
+CONNECT_RETRIES = 5
+
+# --- Utilidades puras (probadas en tests/test_cluster_bench.py) ---
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """"consultar=40,leer=60" -> {"consultar": 0.4, "leer": 0.6}"""
+    pesos = {}
+    for parte in spec.split(","):
+        if not parte.strip():
+            continue
+        accion, _, peso = parte.partition("=")
+        accion = accion.strip()
+        if accion not in OPERATIONS:
+            raise ValueError(f"Acción '{accion}' no soportada; use {', '.join(OPERATIONS)}")
+        pesos[accion] = float(peso or 1)
+    total = sum(pesos.values())
+    if total <= 0:
+        raise ValueError("La mezcla no tiene ninguna acción con peso positivo")
+    return {accion: peso / total for accion, peso in pesos.items() if peso > 0}
+
+def percentile(ordenados: List[float], p: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not ordenados:
+        return 0.0
+    rango = max(1, -(-len(ordenados) * p // 100))
+    return ordenados[int(rango) - 1]
+
+def summarize(latencias: Dict[str, List[float]], errores: Dict[str, int], duracion: float,
+              mensajes: Dict[str, str] = None) -> Dict:
+    """Throughput y percentiles de latencia (ms) por acción y del total."""
+    operaciones = {}
+    for accion in sorted(set(latencias) | set(errores)):
+        valores = sorted(latencias.get(accion, []))
+        operaciones[accion] = {
+            "ops": len(valores),
+            "errores": errores.get(accion, 0),
+            "ops_por_segundo": round(len(valores) / duracion, 2) if duracion else 0.0,
+            "latencia_ms": {
+                **{f"p{p}": round(percentile(valores, p) * 1000, 3) for p in PERCENTILES},
+                "media": round(sum(valores) / len(valores) * 1000, 3) if valores else 0.0,
+                "max": round(valores[-1] * 1000, 3) if valores else 0.0
+            }
+        }
+        if mensajes and accion in mensajes:
+            operaciones[accion]["ejemplo_error"] = mensajes[accion]
+    ops = sum(o["ops"] for o in operaciones.values())
+    fallos = sum(o["errores"] for o in operaciones.values())
+    return {
+        "total": {
+            "ops": ops,
+            "errores": fallos,
+            "ops_por_segundo": round(ops / duracion, 2) if duracion else 0.0,
+            "tasa_errores": round(fallos / (ops + fallos), 4) if ops + fallos else 0.0
+        },
+        "operaciones": operaciones
+    }
+
+# --- Clúster ---
+
+def server_port(base: int, i: int) -> int:
+    return base + 10 + i
+
+def local_dns_port(base: int, i: int) -> int:
+    return base + 100 + i
+
+def dataset(servidores: int, archivos: int) -> Dict[str, List[str]]:
+    """{server_id: [nombres de archivo]} sembrados en cada carpeta"""
+    return {f"BENCH{i}": [f"bench{i}_{k:03d}.txt" for k in range(archivos)] for i in range(servidores)}
+
+def serve_local_dns(sock: socket.socket, carpeta: str, stop: threading.Event):
+    """DNS local sintético: publica todos los archivos de la carpeta del servidor."""
+    sock.settimeout(0.5)
+    while not stop.is_set():
+        try:
+            _, addr = sock.recvfrom(8192)
+        except socket.timeout:
+            continue
+        except OSError:
+            break
+        archivos = [{"nombre_archivo": nombre, "publicado": True, "ttl": 3600}
+                    for nombre in sorted(os.listdir(carpeta)) if not nombre.startswith(".")]
+        sock.sendto(json.dumps({"status": "ACK", "archivos": archivos}).encode('utf-8'), addr)
+
+def wait_registered(dns_addr: Tuple[str, int], esperados: int, timeout: float) -> bool:
+    """Espera a que el DNS General vea vivos a todos los servidores."""
+    limite = time.time() + timeout
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(1)
+    try:
+        while time.time() < limite:
+            try:
+                sock.sendto(json.dumps({"accion": "estado_vida"}).encode('utf-8'), dns_addr)
+                data, _ = sock.recvfrom(65535)
+                if len(json.loads(data.decode('utf-8')).get("servidores", {})) >= esperados:
+                    return True
+            except (socket.timeout, ConnectionError, ValueError):
+                pass
+            time.sleep(0.2)
+        return False
+    finally:
+        sock.close()
+
+def run_server(server_id: str, port: int, dns_local_port: int, carpeta: str):
+    """Proceso hijo: un ServidorDistribuido apuntando al DNS local sintético."""
+    from server_distributed import ServidorDistribuido
+    ServidorDistribuido(server_id, HOST, port, HOST, dns_local_port, carpeta).start()
+
+# --- Clientes ---
+
+class BenchClient:
+    """Cliente mínimo por el canal seguro: una petición en vuelo y espera activa de la respuesta."""
+
+    def __init__(self, server_addr: Tuple[str, int]):
+        self.server_addr = server_addr
+        self.response = None
+        self.transport = ReliableTransport(HOST, 0)
+        self.connector = PeerConnector(self.transport, f"bench-{os.getpid()}-{id(self)}", self._on_message)
+
+    def _on_message(self, response: Dict, addr: Tuple[str, int]):
+        self.response = response
+
+    def connect(self, timeout: float = REQUEST_TIMEOUT) -> bool:
+        for _ in range(CONNECT_RETRIES):
+            self.connector.connect_and_secure(self.server_addr)
+            limite = time.time() + timeout
+            while time.time() < limite:
+                if self.server_addr in self.connector.sessions:
+                    return True
+                payload, addr = self.transport.listen()
+                if payload and addr:
+                    self.connector.handle_incoming_packet(payload, addr)
+            self.transport.connections.pop(self.server_addr, None)
+        return False
+
+    def request(self, solicitud: Dict, timeout: float = REQUEST_TIMEOUT) -> Dict:
+        self.response = None
+        self.connector.send_message(solicitud, self.server_addr)
+        limite = time.time() + timeout
+        while self.response is None and time.time() < limite:
+            payload, addr = self.transport.listen()
+            if payload and addr:
+                self.connector.handle_incoming_packet(payload, addr)
+        return self.response or {"status": "ERROR", "mensaje": "Timeout esperando respuesta"}
+
+    def close(self):
+        self.connector.stop()
+
+def build_request(accion: str, archivos: List[str], tamano: int, rng: random.Random) -> Dict:
+    solicitud = {"accion": accion, "nombre_archivo": rng.choice(archivos) if accion != "listar_archivos" else ""}
+    if accion == "escribir":
+        solicitud["contenido"] = "".join(rng.choice("abcdefghij") for _ in range(tamano))
+    solicitud["timestamp"] = time.time()
+    return solicitud
+
+def run_clients(args: Dict) -> Dict:
+    """Proceso de carga: varios clientes en hilos hasta args["fin"]; solo mide desde args["medir_desde"]."""
+    latencias = {accion: [] for accion in args["mezcla"]}
+    errores = {accion: 0 for accion in args["mezcla"]}
+    sin_conexion = []
+    mensajes = {}  # primer mensaje de error por acción, para el informe
+    lock = threading.Lock()
+    acciones, pesos = zip(*args["mezcla"].items())
+
+    def cliente(indice: int, server_addr: Tuple[str, int]):
+        rng = random.Random(args["semilla"] * 1000 + indice)
+        bench = BenchClient(server_addr)
+        try:
+            if not bench.connect():
+                sin_conexion.append(server_addr)
+                return
+            while time.time() < args["fin"]:
+                accion = rng.choices(acciones, pesos)[0]
+                solicitud = build_request(accion, args["archivos"], args["tamano"], rng)
+                inicio = time.perf_counter()
+                respuesta = bench.request(solicitud)
+                duracion = time.perf_counter() - inicio
+                if time.time() < args["medir_desde"]:
+                    continue
+                with lock:
+                    if respuesta.get("status") in SUCCESS_STATUSES:
+                        latencias[accion].append(duracion)
+                    else:
+                        errores[accion] += 1
+                        mensajes.setdefault(accion, respuesta.get("mensaje"))
+        finally:
+            bench.close()
+
+    hilos = [threading.Thread(target=cliente, args=(indice, tuple(addr)), daemon=True)
+             for indice, addr in args["clientes"]]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return {"latencias": latencias, "errores": errores, "mensajes": mensajes,
+            "conexiones_fallidas": len(sin_conexion)}
+
+# --- Orquestación ---
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de carga del clúster en loopback")
+    parser.add_argument("--servidores", type=int, default=3)
+    parser.add_argument("--clientes", type=int, default=16, help="clientes concurrentes en total")
+    parser.add_argument("--procesos", type=int, default=min(4, os.cpu_count() or 1), help="procesos generadores de carga")
+    parser.add_argument("--duracion", type=float, default=20, help="segundos medidos")
+    parser.add_argument("--calentamiento", type=float, default=3, help="segundos de carga sin medir")
+    parser.add_argument("--mezcla", default=DEFAULT_MIX, help="acción=peso separados por comas")
+    parser.add_argument("--archivos", type=int, default=20, help="archivos sembrados por servidor")
+    parser.add_argument("--tamano", type=int, default=1024, help="bytes por archivo y por escritura")
+    parser.add_argument("--puerto-base", type=int, default=BASE_PORT)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--salida", help="además de imprimirlo, guardar el JSON en este archivo")
+    parser.add_argument("--max-errores", type=float, default=0.05, help="tasa de errores que hace fallar la ejecución")
+    parser.add_argument("--conservar", action="store_true", help="no borrar la carpeta de trabajo (registros y archivos)")
+    parser.add_argument("--rol-servidor", nargs=4, metavar=("ID", "PUERTO", "PUERTO_DNS_LOCAL", "CARPETA"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.rol_servidor:
+        server_id, port, dns_port, carpeta = args.rol_servidor
+        run_server(server_id, int(port), int(dns_port), carpeta)
+        return 0
+
+    mezcla = parse_mix(args.mezcla)
+    trabajo = tempfile.mkdtemp(prefix="dfs_bench_")
+    dns_addr = (HOST, args.puerto_base)
+    env = {**os.environ, "DNS_GENERAL_NODES": f"{HOST}:{args.puerto_base}", "PYTHONPATH": ROOT}
+    procesos: List[subprocess.Popen] = []
+    stop = threading.Event()
+    sockets_dns = []
+
+    def lanzar(comando: List[str], nombre: str) -> subprocess.Popen:
+        registro = open(os.path.join(trabajo, f"{nombre}.out"), "w")
+        proceso = subprocess.Popen(comando, cwd=trabajo, env=env, stdout=registro, stderr=subprocess.STDOUT)
+        procesos.append(proceso)
+        return proceso
+
+    try:
+        # 1. Datos y DNS locales sintéticos
+        archivos_por_servidor = dataset(args.servidores, args.archivos)
+        contenido = "x" * args.tamano
+        for i, (server_id, nombres) in enumerate(archivos_por_servidor.items()):
+            carpeta = os.path.join(trabajo, server_id.lower())
+            os.makedirs(carpeta)
+            for nombre in nombres:
+                with open(os.path.join(carpeta, nombre), "w", encoding="utf-8") as f:
+                    f.write(contenido)
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((HOST, local_dns_port(args.puerto_base, i)))
+            sockets_dns.append(sock)
+            threading.Thread(target=serve_local_dns, args=(sock, carpeta, stop), daemon=True).start()
+
+        # 2. DNS General y servidores
+        lanzar([sys.executable, os.path.join(ROOT, "dns_general.py"), f"{HOST}:{args.puerto_base}"], "dns_general")
+        time.sleep(0.5)
+        for i, server_id in enumerate(archivos_por_servidor):
+            lanzar([sys.executable, os.path.abspath(__file__), "--rol-servidor", server_id,
+                    str(server_port(args.puerto_base, i)), str(local_dns_port(args.puerto_base, i)),
+                    server_id.lower()], server_id.lower())
+        if not wait_registered(dns_addr, args.servidores, READY_TIMEOUT):
+            print(f"El clúster no arrancó a tiempo; registros en {trabajo}", file=sys.stderr)
+            args.conservar = True
+            return 2
+
+        # 3. Carga: clientes repartidos entre servidores y procesos
+        archivos = [nombre for nombres in archivos_por_servidor.values() for nombre in nombres]
+        clientes = [(j, (HOST, server_port(args.puerto_base, j % args.servidores))) for j in range(args.clientes)]
+        n_procesos = max(1, min(args.procesos, args.clientes))
+        medir_desde = time.time() + args.calentamiento + 1
+        fin = medir_desde + args.duracion
+        tareas = [{"clientes": clientes[p::n_procesos], "mezcla": mezcla, "archivos": archivos,
+                   "tamano": args.tamano, "semilla": args.semilla, "medir_desde": medir_desde, "fin": fin}
+                  for p in range(n_procesos)]
+        latencias: Dict[str, List[float]] = {}
+        errores: Dict[str, int] = {}
+        mensajes: Dict[str, str] = {}
+        conexiones_fallidas = 0
+        with ProcessPoolExecutor(n_procesos, mp_context=get_context("spawn")) as pool:
+            for parcial in pool.map(run_clients, tareas):
+                for accion, valores in parcial["latencias"].items():
+                    latencias.setdefault(accion, []).extend(valores)
+                for accion, n in parcial["errores"].items():
+                    errores[accion] = errores.get(accion, 0) + n
+                for accion, mensaje in parcial["mensajes"].items():
+                    mensajes.setdefault(accion, mensaje)
+                conexiones_fallidas += parcial["conexiones_fallidas"]
+
+        # 4. Informe
+        informe = {
+            "config": {
+                "servidores": args.servidores, "clientes": args.clientes, "procesos": n_procesos,
+                "duracion": args.duracion, "calentamiento": args.calentamiento, "mezcla": mezcla,
+                "archivos_por_servidor": args.archivos, "tamano": args.tamano, "semilla": args.semilla,
+                "python": sys.version.split()[0]
+            },
+            **summarize(latencias, errores, args.duracion, mensajes)
+        }
+        informe["total"]["conexiones_fallidas"] = conexiones_fallidas
+        texto = json.dumps(informe, indent=2, ensure_ascii=False)
+        print(texto)
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as f:
+                f.write(texto + "\n")
+        total = informe["total"]
+        return 0 if total["ops"] and not conexiones_fallidas and total["tasa_errores"] <= args.max_errores else 1
+
+    finally:
+        stop.set()
+        for proceso in procesos:
+            proceso.terminate()
+        for proceso in procesos:
+            try:
+                proceso.wait(5)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+        for sock in sockets_dns:
+            sock.close()
+        if args.conservar:
+            print(f"Carpeta de trabajo: {trabajo}", file=sys.stderr)
+        else:
+            shutil.rmtree(trabajo, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+# benchmarks/micro_bench.py - Micro-benchmarks de los caminos calientes con línea base
+"""
+Mide por separado el cifrado del canal seguro (prf_keystream, xor_bytes,
+SecureSession.encrypt/decrypt), el enmarcado del transporte (_jsend +
+listen sobre loopback, y una ráfaga de DATA con y sin recvmmsg/sendmmsg)
+y la actualización del índice del DNS General
+(_update_global_index) en varios tamaños. Cada caso se calibra como timeit
+(bucles hasta superar MIN_TIME) y se repite REPEAT veces; se compara la
+mediana por llamada con la línea base guardada y falla si algún caso es
+más lento que su umbral.
+
+Uso:
+    python benchmarks/micro_bench.py                   # tamaños rápidos, compara con baseline.json
+    python benchmarks/micro_bench.py --completo        # 64 B .. 16 MB y 1k .. 1M archivos
+    python benchmarks/micro_bench.py --guardar-base    # actualiza la línea base con esta ejecución
+    python benchmarks/micro_bench.py --filtro seguridad --salida resultado.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 1.25             # más de un 25 % más lento que la línea base = regresión
+MIN_TIME = 0.1                       # segundos mínimos por repetición (se calibra el número de bucles)
+REPEAT = 5
+
+# Tamaños: los rápidos se usan por defecto (CI); --completo añade los grandes
+PAYLOAD_SIZES = {"rapido": [64, 1024, 64 * 1024], "completo": [64, 1024, 64 * 1024, 1024 ** 2, 16 * 1024 ** 2]}
+DATAGRAM_SIZES = {"rapido": [64, 1024, 16 * 1024], "completo": [64, 1024, 16 * 1024, 30 * 1024]}
+INDEX_SIZES = {"rapido": [1000, 10000], "completo": [1000, 10000, 100000, 1000000]}
+BURST = 32                           # datagramas por ráfaga en el caso de E/S por lotes
+
+def size_label(n: int) -> str:
+    for unidad, factor in (("MB", 1024 ** 2), ("KB", 1024)):
+        if n >= factor and n % factor == 0:
+            return f"{n // factor}{unidad}"
+    return f"{n}B"
+
+def count_label(n: int) -> str:
+    return f"{n // 1000000}M" if n >= 1000000 else f"{n // 1000}k" if n >= 1000 else str(n)
+
+# --- Medición ---
+
+def measure(fn: Callable[[], object], min_time: float = MIN_TIME, repeat: int = REPEAT) -> Dict:
+    """Segundos por llamada: bucles calibrados como timeit.autorange y `repeat` repeticiones."""
+    bucles = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(bucles):
+            fn()
+        transcurrido = time.perf_counter() - inicio
+        if transcurrido >= min_time or bucles >= 1 << 20:
+            break
+        bucles *= 10 if transcurrido < min_time / 10 else 2
+    tiempos = [transcurrido / bucles]
+    for _ in range(repeat - 1):
+        inicio = time.perf_counter()
+        for _ in range(bucles):
+            fn()
+        tiempos.append((time.perf_counter() - inicio) / bucles)
+    return {
+        "mediana": statistics.median(tiempos),
+        "min": min(tiempos),
+        "desviacion": statistics.stdev(tiempos) if len(tiempos) > 1 else 0.0,
+        "bucles": bucles,
+        "repeticiones": len(tiempos)
+    }
+
+def compare(resultados: Dict[str, Dict], base: Dict, umbral: float = DEFAULT_THRESHOLD) -> Dict[str, Dict]:
+    """Relación mediana actual / línea base por caso; regresión si supera el umbral del caso o el global."""
+    comparacion = {}
+    referencias = base.get("resultados", {})
+    for nombre, actual in resultados.items():
+        ref = referencias.get(nombre)
+        if not ref:
+            comparacion[nombre] = {"estado": "sin_base"}
+            continue
+        limite = ref.get("umbral", base.get("umbral", umbral))
+        relacion = actual["mediana"] / ref["mediana"]
+        comparacion[nombre] = {
+            "relacion": round(relacion, 3),
+            "umbral": limite,
+            "estado": "regresion" if relacion > limite else "mejora" if relacion < 1 / limite else "igual"
+        }
+    return comparacion
+
+# --- Casos ---
+
+def security_cases(sizes: List[int]) -> Iterator[Tuple[str, Callable[[], Callable]]]:
+    from src.network.security import SecureSession, prf_keystream, xor_bytes
+
+    def sesion() -> SecureSession:
+        s = SecureSession()
+        s.derive_keys(123456789, "cliente", "servidor")
+        return s
+
+    for n in sizes:
+        etiqueta = size_label(n)
+
+        def keystream(n=n):
+            clave, nonce = os.urandom(32), os.urandom(20)
+            return lambda: prf_keystream(clave, nonce, n)
+
+        def xor(n=n):
+            a, b = os.urandom(n), os.urandom(n)
+            return lambda: xor_bytes(a, b)
+
+        def cifrar(n=n):
+            s, datos = sesion(), os.urandom(n)
+            return lambda: s.encrypt(datos)
+
+        def descifrar(n=n):
+            emisor, receptor, datos = sesion(), sesion(), os.urandom(n)
+            registro = emisor.encrypt(datos)
+            return lambda: receptor.decrypt(registro)
+
+        yield f"seguridad.prf_keystream[{etiqueta}]", keystream
+        yield f"seguridad.xor_bytes[{etiqueta}]", xor
+        yield f"seguridad.encrypt[{etiqueta}]", cifrar
+        yield f"seguridad.decrypt[{etiqueta}]", descifrar
+
+def transport_cases(sizes: List[int]) -> Iterator[Tuple[str, Callable[[], Callable]]]:
+    from src.network.transport import ConnectionState, ReliableTransport
+
+    for n in sizes:
+        def enmarcado(n=n):
+            emisor = ReliableTransport("127.0.0.1", 0)
+            receptor = ReliableTransport("127.0.0.1", 0)
+            origen, destino = emisor.sock.getsockname(), receptor.sock.getsockname()
+            # Conexión ya establecida en el receptor: se mide solo el enmarcado DATA -> payload (+ su ACK)
+            st = ConnectionState(origen, 1000, 2000)
+            st.state = "ESTABLISHED"
+            receptor.connections[origen] = st
+            # Como un registro cifrado: hex de n/2 bytes
+            msg = {"type": "DATA", "seq": 1, "cid": 1000, "sid": 2000,
+                   "payload": {"seq": 0, "ct": os.urandom(n // 2).hex(), "tag": "00" * 32}}
+
+            def ida_y_vuelta():
+                msg["seq"] += 1  # seq nuevo: el receptor descarta los DATA ya entregados
+                emisor._jsend(msg, destino)
+                payload, _ = receptor.listen()
+                assert payload is not None
+                emisor.sock.recvfrom(65535)  # ACK del receptor (en loopback ya está en el búfer)
+            return ida_y_vuelta
+
+        yield f"transporte.jsend_listen[{size_label(n)}]", enmarcado
+
+    # Ráfaga de DATA pequeños: lectura y ACK de uno en uno frente a recvmmsg/sendmmsg por lotes
+    for lote in (0, BURST):
+        def rafaga(lote=lote):
+            import socket
+            emisor = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            emisor.bind(("127.0.0.1", 0))
+            emisor.setblocking(False)
+            receptor = ReliableTransport("127.0.0.1", 0, batch=lote)
+            origen, destino = emisor.getsockname(), receptor.sock.getsockname()
+            st = ConnectionState(origen, 1000, 2000)
+            st.state = "ESTABLISHED"
+            receptor.connections[origen] = st
+            seq = [0]
+
+            def ronda():
+                for _ in range(BURST):
+                    seq[0] += 1
+                    msg = {"type": "DATA", "seq": seq[0], "cid": 1000, "sid": 2000, "payload": {"seq": 0, "ct": "ab" * 16}}
+                    emisor.sendto((json.dumps(msg) + "\n").encode("utf-8"), destino)
+                for _ in range(BURST):
+                    assert receptor.listen()[0] is not None
+                for _ in range(BURST):
+                    emisor.recvfrom(65535)  # ACKs
+            return ronda
+
+        yield f"transporte.rafaga[{BURST}x,lote={lote}]", rafaga
+
+def index_cases(sizes: List[int]) -> Iterator[Tuple[str, Callable[[], Callable]]]:
+    def reregistro(n: int):
+        from dns_general import DNSGeneral
+        dns = DNSGeneral("127.0.0.1", 0)
+        archivos = [{"nombre_archivo": f"archivo_{i:07d}.txt", "publicado": True, "ttl": 3600, "version": 1}
+                    for i in range(n)]
+        dns._update_global_index("S1", archivos, "127.0.0.1", 5001)
+        dns._update_global_index("S2", archivos[: n // 10], "127.0.0.1", 5002)
+        # Caso estable: un servidor vuelve a registrar la misma lista (re-registro tras reinicio o cambio)
+        return lambda: dns._update_global_index("S1", archivos, "127.0.0.1", 5001)
+
+    for n in sizes:
+        yield f"dns.update_global_index[{count_label(n)}]", lambda n=n: reregistro(n)
+
+def all_cases(modo: str) -> Iterator[Tuple[str, Callable[[], Callable]]]:
+    yield from security_cases(PAYLOAD_SIZES[modo])
+    yield from transport_cases(DATAGRAM_SIZES[modo])
+    yield from index_cases(INDEX_SIZES[modo])
+
+# --- Línea de comandos ---
+
+def load_baseline(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de cifrado, transporte e índice")
+    parser.add_argument("--completo", action="store_true", help="incluir los tamaños grandes (16 MB, 1M archivos)")
+    parser.add_argument("--filtro", default="", help="solo los casos cuyo nombre contiene este texto")
+    parser.add_argument("--base", default=BASELINE_FILE, help="archivo de línea base")
+    parser.add_argument("--guardar-base", action="store_true", help="escribir estos resultados en la línea base")
+    parser.add_argument("--umbral", type=float, default=DEFAULT_THRESHOLD,
+                        help="relación actual/base que se considera regresión (si la base no fija otra)")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--salida", help="guardar el JSON de resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    modo = "completo" if args.completo else "rapido"
+    resultados = {}
+    for nombre, preparar in all_cases(modo):
+        if args.filtro not in nombre:
+            continue
+        resultados[nombre] = measure(preparar(), args.min_time, args.repeat)
+        print(f"{nombre:45s} {resultados[nombre]['mediana'] * 1e6:14.2f} µs", file=sys.stderr)
+
+    base = load_baseline(args.base)
+    comparacion = compare(resultados, base, args.umbral)
+    informe = {
+        "entorno": {"python": platform.python_version(), "plataforma": platform.platform(), "modo": modo},
+        "resultados": resultados,
+        "comparacion": comparacion
+    }
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    print(texto)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+
+    if args.guardar_base:
+        # Se conservan los casos no medidos ahora y los umbrales fijados a mano
+        nueva = {"umbral": base.get("umbral", args.umbral), "entorno": informe["entorno"],
+                 "resultados": dict(base.get("resultados", {}))}
+        for nombre, actual in resultados.items():
+            previo = nueva["resultados"].get(nombre, {})
+            nueva["resultados"][nombre] = {"mediana": actual["mediana"],
+                                           **({"umbral": previo["umbral"]} if "umbral" in previo else {})}
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump(nueva, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return 0
+
+    regresiones = [nombre for nombre, c in comparacion.items() if c["estado"] == "regresion"]
+    for nombre in regresiones:
+        c = comparacion[nombre]
+        print(f"REGRESIÓN {nombre}: x{c['relacion']} (umbral x{c['umbral']})", file=sys.stderr)
+    return 1 if regresiones else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,7 @@ sys.path.append(project_root)
 
 from src.network.peer_conector import PeerConnector
 from src.network.transport import ReliableTransport
+from src.core.tracing import Tracer, inject
 
 # Configuración de DNS disponibles (expandida)
 DNS_SERVERS = [
@@ -72,6 +73,10 @@ class ClienteDistribuido:
         # Buffer para respuestas asíncronas
         self.waiting_for_response = False
         self.last_response = None
+        
+        # Cada acción abre una traza que recorre servidor, DNS General y propietario
+        self.tracer = Tracer("cliente")
+        self.ultima_traza = None
     
     def _handle_secure_response(self, response: dict, peer_addr: tuple):
         """Maneja respuestas seguras del servidor"""
@@ -254,14 +259,18 @@ class ClienteDistribuido:
         
         solicitud["timestamp"] = time.time()
         
-        respuesta = self.enviar_solicitud_segura(solicitud)
+        with self.tracer.span(f"cliente {accion}", nombre_archivo=nombre_archivo) as span:
+            self.ultima_traza = span["trace_id"]
+            respuesta = self.enviar_solicitud_segura(inject(solicitud))
+            span["atributos"]["status"] = respuesta.get("status")
         
         # Reintento para listar si está vacío
         if accion == "listar_archivos" and respuesta.get("status") == "ACK" and len(respuesta.get("archivos", [])) == 0:
             print("Esperando actualización del servidor...")
             time.sleep(2)
             solicitud["timestamp"] = time.time()
-            respuesta = self.enviar_solicitud_segura(solicitud)
+            with self.tracer.span(f"cliente {accion}", nombre_archivo=nombre_archivo):
+                respuesta = self.enviar_solicitud_segura(inject(solicitud))
         
         return respuesta
 
@@ -5,134 +5,420 @@ import threading
 import time
 import logging
 import os
+import sys
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 from datetime import datetime
 
+from src.core.replication import TokenBucket, plan_replicas
+from src.core.lock_manager import LockManager, READ, WRITE
+from src.core.index_feed import IndexFeed, SNAPSHOT_PAGE_BYTES, index_view
+from src.core.singleflight import SingleFlight
+from src.core.hash_ring import HashRing
+from src.core.raft import RaftNode, NotLeader
+from src.core.liveness import LivenessTracker
+from src.core.log_pipeline import setup_logging, log_fields
+from src.core.metrics import MetricsRegistry, serve_prometheus
+from src.core.tracing import Tracer, inject, extract
+from src.core.profiler import SamplingProfiler
+from src.network.dns_ring import node_id, parse_node, seeds_from_env, SENDER_FIELDS
+
 # Configuración
 DNS_GENERAL_IP = "127.0.0.5"
 DNS_GENERAL_PORT = 50005
 LOG_FILE = "dns_general.log"
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+# Replicación
+DEFAULT_REPLICATION_FACTOR = 1       # 1 = sin copias adicionales
+REPLICATION_BANDWIDTH = 256 * 1024   # bytes/s para copias en segundo plano
+REPLICATION_INTERVAL = 30            # segundos entre revisiones periódicas
+
+# Escrituras replicadas
+WRITE_QUORUM = None                  # None = mayoría de las réplicas
+WRITE_TIMEOUT = 10                   # segundos máximos esperando el quórum
+REPAIR_RETRY_DELAY = 5               # segundos antes de reintentar una reparación
+# Con almacén de bloques el escritor envía el manifiesto en lugar del contenido y cada réplica
+# pide a origen_ip:origen_port solo los bloques que le faltan
+MANIFEST_FIELDS = ("bloques", "tamano", "origen_ip", "origen_port")
+
+# Bloqueos
+LOCK_LEASE = 30                      # segundos de lease; el escritor lo renueva mientras trabaja
+MAX_LOCK_WAIT = 120                  # espera máxima en la cola de un bloqueo (segundos)
+LOCK_MODES = {"lectura": READ, "escritura": WRITE}  # modos que aceptan las peticiones
+
+# Lecturas: se atienden en paralelo y las idénticas se agrupan en una sola transferencia
+READ_WORKERS = 16
+READ_CACHE_WINDOW = 0.5              # segundos que se reutiliza una lectura recién terminada
+CONCURRENT_ACTIONS = {"leer"}        # acciones que no bloquean el bucle principal
+
+# Particionado: acciones sobre un archivo que solo atiende el nodo dueño según el anillo
+PARTITIONED_ACTIONS = {
+    "consultar", "leer", "escribir", "checkout_archivo", "checkin_archivo", "archivo_eliminado",
+    "solicitar_remoto", "solicitar_bloqueo", "renovar_bloqueo", "liberar_bloqueo", "verificar_bloqueo",
+    "archivo_modificado"
+}
+
+# Vida de los servidores: cualquier petición cuenta como heartbeat; el intervalo se adapta a la carga
+HEARTBEAT_TARGET_RATE = 20           # heartbeats por segundo que el DNS General quiere recibir como máximo
+HEARTBEAT_MIN_INTERVAL = 30          # segundos
+HEARTBEAT_MAX_INTERVAL = 120         # segundos
+SUSPICION_THRESHOLD = 8.0            # nivel phi a partir del cual un servidor se da por muerto
+LIVENESS_CHECK_INTERVAL = 1          # segundos entre barridos de plazos vencidos (coste O(vencidos))
+QUIET_ACTIONS = {"heartbeat", "heartbeat_batch"}  # no se anotan una a una en el log
+
+# Métricas: acción "metricas" y texto de Prometheus en http://host:(puerto + 3000)/metrics
+METRICS_PORT_OFFSET = 3000
+
+# Trazas: span por petición y por salto a servidores; la acción "trazas" los exporta (eventos de Chrome)
+UNTRACED_ACTIONS = QUIET_ACTIONS | {"metricas", "trazas", "perfilar"}
+TRACE_EXPORT_LIMIT = 200             # spans por respuesta (cabe en un datagrama)
+
+# Grupo replicado (Raft) por partición: escrituras en el líder, consultas también desde seguidores al día
+RAFT_PORT_OFFSET = 2000              # puerto del protocolo Raft = puerto del DNS General + 2000
+RAFT_DATA_DIR = ".raft"              # término, voto, log e instantánea de cada nodo (subcarpeta ip_puerto)
+MAX_READ_STALENESS = 2.0             # segundos sin contacto con el líder que tolera una consulta
+GROUP_COMMIT_TIMEOUT = 5             # segundos esperando que la mayoría confirme un cambio
+LEADER_CONFIRM_TIMEOUT = 1           # segundos para que la mayoría confirme al líder sin lease vigente
+GROUP_FLUSH_WINDOW = 0.1             # segundos para agrupar cambios de fondo en una entrada del log
+FOLLOWER_READ_ACTIONS = {"consultar", "listar_archivos"}
+GROUP_LOCAL_ACTIONS = {"miembros_anillo", "estado_grupo", "metricas", "trazas", "perfilar"}
+REPLICATED_ACTIONS = {
+    "registrar_servidor", "checkout_archivo", "checkin_archivo", "archivo_eliminado", "escribir",
+    "archivo_modificado", "solicitar_bloqueo", "renovar_bloqueo", "liberar_bloqueo", "actualizar_anillo",
+    "configurar_replicacion"
+}
+
+# Notificaciones de cambios del índice
+INDEX_FEED_INTERVAL = 5              # publicación periódica aunque nadie avise de cambios
+INDEX_BATCH_WINDOW = 0.2             # segundos para agrupar cambios seguidos en un lote
+
+# Configuración de logging: se encola en el hilo que atiende y un hilo escritor vuelca por lotes
+REQUEST_LOG_SAMPLE = 50              # se anota una de cada N peticiones de cada acción
+setup_logging(LOG_FILE)
 
 class DNSGeneral:
-    def __init__(self, host=DNS_GENERAL_IP, port=DNS_GENERAL_PORT):
+    def __init__(self, host=DNS_GENERAL_IP, port=DNS_GENERAL_PORT,
+                 replication_factor=DEFAULT_REPLICATION_FACTOR, replication_bandwidth=REPLICATION_BANDWIDTH,
+                 write_quorum=WRITE_QUORUM, lock_lease=LOCK_LEASE, cluster_nodes: List[str] = None,
+                 group_nodes: List[str] = None):
         self.host = host
         self.port = port
         self.running = True
         
+        # Grupo replicado de esta partición; el anillo la identifica por su primer miembro
+        self.node_id = node_id((host, port))
+        self.group = sorted(set(group_nodes or []) | {self.node_id})
+        self.partition_id = self.group[0]
+        
+        # Anillo de hashing consistente: este nodo solo indexa los archivos de sus tramos
+        self.ring = HashRing(set(cluster_nodes or []) | {self.partition_id})
+        
         # Registro de servidores conectados
         self.registered_servers = {}  # {server_id: {"ip": ip, "port": port, "archivos": [], "last_update": timestamp}}
+        self.liveness = LivenessTracker(HEARTBEAT_MIN_INTERVAL, SUSPICION_THRESHOLD)  # phi-accrual sobre una rueda de tiempos
         
         # Índice global de archivos
         self.global_file_index = {}  # {nombre_archivo: [{"server_id": id, "ip": ip, "port": port, "ttl": ttl}]}
+        # Índice inverso (superconjunto): basta con revisar estos archivos al quitar o re-registrar un servidor
+        self.server_files = {}  # {server_id: set(nombre_archivo)}
+        
+        # Sistema de bloqueos de archivos para escritura exclusiva (leases con tokens de fencing)
+        # Los tokens siguen creciendo sin depender del reloj: el mayor emitido viaja en el estado del grupo
+        # (Raft lo guarda en disco) y cada servidor reporta al registrarse el mayor que vio por archivo,
+        # lo que cubre un reinicio sin grupo y los archivos que llegan de otro nodo del anillo
+        self.lock_manager = LockManager(lock_lease, on_expire=self._on_lock_expired, on_change=self._on_lock_change)
+        # Servidores suscritos a los eventos de bloqueo de sus archivos (tabla local de bloqueos)
+        self.lock_subscribers = set()  # {server_id}
+        self.lock_events = queue.Queue()  # (nombre_archivo, evento, info) pendientes de publicar
         
-        # Sistema de bloqueos de archivos para escritura exclusiva
-        self.file_locks = {}  # {nombre_archivo: {"locked_by": server_id, "client_id": client_id, "timestamp": time, "operation": "write"}}
+        # Servidores suscritos a los deltas del índice (lotes numerados para detectar huecos)
+        self.index_feed = IndexFeed()
+        self.index_subscribers = set()  # {server_id}
+        self.index_changed = threading.Event()
         
         self.lock = threading.Lock()
+        self.sock = None  # socket principal, también usado para avisos push
+        
+        # Replicación: factor global, excepciones por archivo y copias creadas por el DNS General
+        self.replication_factor = max(1, replication_factor)
+        self.replication_overrides = {}  # {nombre_archivo: factor}
+        self.replica_placements = {}  # {nombre_archivo: set(server_id)} copias (bandera 1)
+        self.replication_bucket = TokenBucket(replication_bandwidth)
+        self.replication_event = threading.Event()
+        self._read_rr = {}  # {nombre_archivo: contador round-robin de lecturas}
+        
+        # Versiones: cada entrada del índice guarda la versión que tiene esa réplica
+        self.file_versions = {}  # {nombre_archivo: última versión confirmada}
+        # Versiones reservadas por escrituras en curso: se publican en file_versions al alcanzar el quórum
+        self.version_reservations = {}  # {nombre_archivo: última versión reservada}
+        self.write_quorum = write_quorum
+        self.write_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="escritura")
+        self.repair_queue = queue.Queue()  # (nombre_archivo, server_id) réplicas atrasadas
+        
+        # Lecturas concurrentes agrupadas por (acción, archivo, versión)
+        self.read_executor = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix="lectura")
+        self.read_flights = SingleFlight(READ_CACHE_WINDOW)
+        
+        # Replicación del estado en el grupo: el líder propone el estado de lo que cambió
+        self.raft = None
+        if len(self.group) > 1:
+            peers = {n: (parse_node(n)[0], parse_node(n)[1] + RAFT_PORT_OFFSET) for n in self.group}
+            self.raft = RaftNode(self.node_id, peers, apply=self._aplicar_estado, snapshot=self._estado_completo,
+                                 restore=self._restaurar_estado, on_leader=self._al_ser_lider,
+                                 data_dir=os.path.join(RAFT_DATA_DIR, self.node_id.replace(":", "_")), log=self.log)
+        self.dirty_files = set()  # archivos cuyo estado falta proponer al grupo
+        self.dirty_servers = set()
+        self.dirty_ring = False
+        self.dirty_lock = threading.Lock()
+        self.dirty_event = threading.Event()
+        self.propose_lock = threading.Lock()  # el estado se captura y se propone en orden
+        self.last_proposed = 0
         
-    def solicitar_bloqueo_archivo(self, request: Dict) -> Dict:
-        """Solicita bloqueo exclusivo de un archivo para escritura"""
+        # Contadores, medidores e histogramas de latencia por acción y por salto a servidores
+        self.metrics = MetricsRegistry(nodo=self.node_id)
+        self.metrics.gauge("dns_servidores_registrados", fn=lambda: len(self.registered_servers))
+        self.metrics.gauge("dns_archivos_indice", fn=lambda: len(self.global_file_index))
+        self.metrics.gauge("dns_es_lider", fn=lambda: int(self._es_lider()))
+        self.metrics_server = None
+        self.tracer = Tracer(f"dns_general {self.node_id}")
+        # Perfilado en caliente (acción "perfilar"): pilas colapsadas de todos los hilos del nodo
+        self.profiler = SamplingProfiler()
+        
+    def solicitar_bloqueo_archivo(self, request: Dict, addr: Tuple = None) -> Dict:
+        """Solicita un bloqueo de lectura (compartido) o escritura (exclusivo) con lease renovable.
+        Con "esperar" la petición entra en la cola FIFO del archivo y la concesión se avisa por push."""
         nombre_archivo = request.get("nombre_archivo")
         server_solicitante = request.get("requesting_server")
         client_id = request.get("client_id", f"{server_solicitante}_client")
+        modo = LOCK_MODES.get(request.get("modo", "escritura"))
+        if modo is None:
+            return {"status": "ERROR", "mensaje": f"Modo de bloqueo '{request.get('modo')}' no válido"}
+        esperar = min(float(request.get("esperar") or 0), MAX_LOCK_WAIT)
         
-        with self.lock:
-            # Verificar si el archivo ya está bloqueado
-            if nombre_archivo in self.file_locks:
-                lock_info = self.file_locks[nombre_archivo]
-                current_time = time.time()
-                
-                # Verificar si el bloqueo ha expirado (10 minutos)
-                if current_time - lock_info["timestamp"] > 600:
-                    self.log(f"Bloqueo expirado para {nombre_archivo}, liberando...")
-                    del self.file_locks[nombre_archivo]
-                else:
-                    # Archivo bloqueado por otro cliente
-                    return {
-                        "status": "BLOQUEADO",
-                        "mensaje": f"Archivo '{nombre_archivo}' bloqueado para escritura",
-                        "bloqueado_por": lock_info["locked_by"],
-                        "desde": lock_info["timestamp"]
-                    }
-            
-            # Crear bloqueo
-            self.file_locks[nombre_archivo] = {
-                "locked_by": server_solicitante,
-                "client_id": client_id,
-                "timestamp": time.time(),
-                "operation": "write"
+        on_grant = None
+        if esperar and addr:
+            on_grant = lambda status, info: self._avisar_bloqueo(addr, nombre_archivo, status, info)
+        
+        info = self.lock_manager.acquire(nombre_archivo, server_solicitante, client_id, mode=modo,
+                                         wait_timeout=esperar if on_grant else None, on_grant=on_grant)
+        if info.get("queued"):
+            self.log(f"{server_solicitante} en cola para '{nombre_archivo}' ({request.get('modo', 'escritura')}, posición {info['posicion']})")
+            return {
+                "status": "EN_COLA",
+                "mensaje": f"Archivo '{nombre_archivo}' bloqueado, petición encolada",
+                "posicion": info["posicion"],
+                "ticket": info["ticket"],
+                "bloqueado_por": info.get("locked_by"),
+                "espera_maxima": esperar
             }
-            
-            self.log(f"Archivo '{nombre_archivo}' bloqueado para escritura por {server_solicitante}")
-            
+        if not info["granted"]:
+            # Archivo bloqueado por otro cliente
             return {
-                "status": "BLOQUEO_CONCEDIDO",
-                "mensaje": f"Archivo '{nombre_archivo}' bloqueado exitosamente",
-                "expira_en": 600  # 10 minutos
+                "status": "BLOQUEADO",
+                "mensaje": f"Archivo '{nombre_archivo}' bloqueado para {'escritura' if info.get('operation') == WRITE else 'lectura'}",
+                "bloqueado_por": info.get("locked_by"),
+                "desde": info.get("timestamp"),
+                "expira_en": max(0, info.get("expires_at", 0) - time.time())
             }
+        
+        self.log(f"Archivo '{nombre_archivo}' bloqueado ({request.get('modo', 'escritura')}) por {server_solicitante} (token {info['token']})")
+        
+        return {
+            "status": "BLOQUEO_CONCEDIDO",
+            "mensaje": f"Archivo '{nombre_archivo}' bloqueado exitosamente",
+            "nombre_archivo": nombre_archivo,
+            "token": info["token"],
+            "expira_en": self.lock_manager.lease_seconds
+        }
+    
+    def _avisar_bloqueo(self, addr: Tuple, nombre_archivo: str, status: str, info: Dict):
+        """Avisa por push a quien esperaba en la cola (concesión o tiempo agotado)"""
+        if self.sock is None or not self._es_lider():
+            return
+        aviso = {"status": status, "nombre_archivo": nombre_archivo}
+        if status == "BLOQUEO_CONCEDIDO":
+            aviso.update({"token": info["token"], "expira_en": self.lock_manager.lease_seconds})
+            self.log(f"Bloqueo de '{nombre_archivo}' concedido desde la cola a {info['locked_by']} (token {info['token']})")
+        self.sock.sendto(json.dumps(aviso).encode('utf-8'), addr)
+    
+    def renovar_bloqueo_archivo(self, request: Dict) -> Dict:
+        """Extiende el lease de un bloqueo vigente"""
+        nombre_archivo = request.get("nombre_archivo")
+        server_solicitante = request.get("requesting_server")
+        token = request.get("token")
+        
+        info = self.lock_manager.renew(nombre_archivo, server_solicitante, token)
+        if info is None:
+            return {
+                "status": "ERROR",
+                "mensaje": f"El bloqueo de '{nombre_archivo}' expiró o pertenece a otro escritor"
+            }
+        return {
+            "status": "BLOQUEO_RENOVADO",
+            "token": token,
+            "expira_en": self.lock_manager.lease_seconds
+        }
     
     def liberar_bloqueo_archivo(self, request: Dict) -> Dict:
         """Libera el bloqueo de un archivo"""
         nombre_archivo = request.get("nombre_archivo")
         server_solicitante = request.get("requesting_server")
+        token = request.get("token")
         
-        with self.lock:
-            if nombre_archivo in self.file_locks:
-                lock_info = self.file_locks[nombre_archivo]
-                
-                # Verificar que sea el mismo servidor que lo bloqueó
-                if lock_info["locked_by"] == server_solicitante:
-                    del self.file_locks[nombre_archivo]
-                    self.log(f"Bloqueo liberado para '{nombre_archivo}' por {server_solicitante}")
-                    
-                    return {
-                        "status": "BLOQUEO_LIBERADO",
-                        "mensaje": f"Archivo '{nombre_archivo}' desbloqueado"
-                    }
-                else:
-                    return {
-                        "status": "ERROR",
-                        "mensaje": f"Solo {lock_info['locked_by']} puede liberar este bloqueo"
-                    }
-            else:
+        # Verificar que sea el mismo servidor (y el mismo lease) que lo bloqueó
+        if self.lock_manager.release(nombre_archivo, server_solicitante, token) is None:
+            titulares = self.lock_manager.holders(nombre_archivo)
+            if not titulares:
                 return {
                     "status": "ERROR",
                     "mensaje": f"Archivo '{nombre_archivo}' no está bloqueado"
                 }
+            return {
+                "status": "ERROR",
+                "mensaje": "Solo " + ", ".join(f"{t['locked_by']} (token {t['token']})" for t in titulares) + " puede liberar este bloqueo"
+            }
+        
+        self.log(f"Bloqueo liberado para '{nombre_archivo}' por {server_solicitante}")
+        return {
+            "status": "BLOQUEO_LIBERADO",
+            "mensaje": f"Archivo '{nombre_archivo}' desbloqueado"
+        }
     
     def verificar_bloqueo_archivo(self, request: Dict) -> Dict:
-        """Verifica si un archivo está bloqueado"""
+        """Verifica si un archivo está bloqueado para escritura"""
         nombre_archivo = request.get("nombre_archivo")
         
+        info = self.lock_manager.check(nombre_archivo)
+        lectores = sum(1 for t in self.lock_manager.holders(nombre_archivo) if t["operation"] == READ)
+        en_cola = self.lock_manager.queue_length(nombre_archivo)
+        if info is None:
+            return {"status": "LIBRE", "bloqueado": False, "lectores": lectores, "en_cola": en_cola}
+        
+        return {
+            "status": "BLOQUEADO",
+            "bloqueado": True,
+            "bloqueado_por": info["locked_by"],
+            "desde": info["timestamp"],
+            "expira_en": max(0, info["expires_at"] - time.time()),
+            "token": info["token"],
+            "lectores": lectores,
+            "en_cola": en_cola
+        }
+    
+    def _on_lock_expired(self, nombre_archivo: str, info: Dict):
+        """Llamado por el barredor cuando vence un lease sin renovar"""
+        self.log(f"Lease de '{nombre_archivo}' (token {info['token']}, {info['locked_by']}) expiró, liberando...")
+    
+    def _on_lock_change(self, nombre_archivo: str, evento: str, info: Dict):
+        """Encola los cambios de bloqueos de escritura para avisar a los servidores suscritos"""
+        if not self._es_lider():
+            return  # los seguidores copian los bloqueos del líder; avisa solo él
+        self._marcar_pendiente(archivos=[nombre_archivo])
+        if info["operation"] == WRITE:
+            self.lock_events.put((nombre_archivo, evento, info))
+    
+    def _evento_bloqueo(self, nombre_archivo: str, evento: str, info: Dict) -> Dict:
+        return {
+            "accion": "evento_bloqueo",
+            "nombre_archivo": nombre_archivo,
+            "evento": evento,
+            "token": info["token"],
+            "bloqueado_por": info["locked_by"],
+            "expira_en": max(0, info["expires_at"] - time.time()),
+            "via_dns_general": True
+        }
+    
+    def suscribir_bloqueos(self, request: Dict) -> Dict:
+        """Suscribe un servidor a los eventos de bloqueo de sus archivos y le envía el estado actual"""
+        server_id = request.get("server_id")
+        if server_id not in self.registered_servers:
+            return {"status": "ERROR", "mensaje": "Servidor no registrado"}
+        
         with self.lock:
-            if nombre_archivo in self.file_locks:
-                lock_info = self.file_locks[nombre_archivo]
-                current_time = time.time()
-                
-                # Verificar si el bloqueo ha expirado
-                if current_time - lock_info["timestamp"] > 600:
-                    del self.file_locks[nombre_archivo]
-                    return {"status": "LIBRE", "bloqueado": False}
-                
-                return {
-                    "status": "BLOQUEADO",
-                    "bloqueado": True,
-                    "bloqueado_por": lock_info["locked_by"],
-                    "desde": lock_info["timestamp"],
-                    "expira_en": 600 - (current_time - lock_info["timestamp"])
-                }
-            else:
-                return {"status": "LIBRE", "bloqueado": False}
+            self.lock_subscribers.add(server_id)
+            propios = [
+                nombre for nombre, entries in self.global_file_index.items()
+                if any(e["server_id"] == server_id for e in entries)
+            ]
+        bloqueos = []
+        for nombre_archivo in propios:
+            info = self.lock_manager.check(nombre_archivo)
+            if info:
+                bloqueos.append(self._evento_bloqueo(nombre_archivo, "adquirido", info))
+        
+        self.log(f"{server_id} suscrito a eventos de bloqueo ({len(bloqueos)} bloqueos vigentes)")
+        return {"status": "ACK", "bloqueos": bloqueos}
+    
+    def suscribir_indice(self, request: Dict) -> Dict:
+        """Suscribe un servidor a los deltas del índice. Con desde_seq se reenvían solo los lotes perdidos
+        (los que quepan en la respuesta); si no, la vista completa se entrega por páginas con cursor."""
+        server_id = request.get("server_id")
+        if server_id not in self.registered_servers:
+            return {"status": "ERROR", "mensaje": "Servidor no registrado"}
+        
+        with self.lock:
+            self.index_subscribers.add(server_id)
+        
+        desde_seq = request.get("desde_seq")
+        if desde_seq is not None:
+            lotes = self.index_feed.since(desde_seq, SNAPSHOT_PAGE_BYTES)
+            if lotes is not None:
+                self.log(f"{server_id} recupera {len(lotes)} lotes del índice desde seq {desde_seq}")
+                return {"status": "ACK", "nodo": self.partition_id, "seq": self.index_feed.seq, "lotes": lotes}
+        
+        cursor = request.get("cursor")
+        pagina = self.index_feed.snapshot_page(cursor)
+        if cursor is None:
+            self.log(f"{server_id} suscrito al índice (vista completa, seq {pagina['seq']})")
+        return {"status": "ACK", "nodo": self.partition_id, **pagina}
+    
+    def index_feed_loop(self):
+        """Publica por push los cambios del índice, agrupados en lotes numerados"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        while self.running:
+            if self.index_changed.wait(INDEX_FEED_INTERVAL):
+                time.sleep(INDEX_BATCH_WINDOW)  # agrupar cambios seguidos
+            self.index_changed.clear()
+            if not self._es_lider():
+                continue
+            try:
+                with self.lock:
+                    view = index_view(self.global_file_index, self.file_versions)
+                    destinos = [
+                        (self.registered_servers[s]["ip"], self.registered_servers[s]["port"] + 1000)
+                        for s in self.index_subscribers if s in self.registered_servers
+                    ]
+                for lote in self.index_feed.publish(view):
+                    # Cambios de fondo (reparaciones, réplicas nuevas) también llegan al grupo
+                    self._marcar_pendiente(archivos=[d["nombre_archivo"] for d in lote["deltas"]])
+                    mensaje = json.dumps({"accion": "delta_indice", "via_dns_general": True, "nodo": self.partition_id, **lote}).encode('utf-8')
+                    for destino in destinos:
+                        sock.sendto(mensaje, destino)
+            except Exception as e:
+                self.log(f"Error publicando cambios del índice: {e}")
+        sock.close()
+    
+    def lock_event_loop(self):
+        """Publica por push los eventos de bloqueo a los servidores suscritos que tienen el archivo"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        while self.running:
+            try:
+                nombre_archivo, evento, info = self.lock_events.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                with self.lock:
+                    destinos = [
+                        (e["ip"], e["port"] + 1000) for e in self.global_file_index.get(nombre_archivo, [])
+                        if e["server_id"] in self.lock_subscribers
+                    ]
+                mensaje = json.dumps(self._evento_bloqueo(nombre_archivo, evento, info)).encode('utf-8')
+                for destino in destinos:
+                    sock.sendto(mensaje, destino)
+            except Exception as e:
+                self.log(f"Error publicando evento de bloqueo de '{nombre_archivo}': {e}")
+        sock.close()
         
     def log(self, message):
         logging.info(message)
@@ -157,14 +443,28 @@ class DNSGeneral:
             
             # Actualizar índice global
             self._update_global_index(server_id, archivos, ip, port)
-            
+        # Los próximos tokens de fencing superan a los que el servidor ya aceptó
+        self.lock_manager.advance_tokens(max([a.get("token_fencing") or 0 for a in archivos] + [0]))
+        self._marcar_vivo(server_id)
+        
         self.log(f"Servidor {server_id} registrado con {len(archivos)} archivos")
         return {"status": "ACK", "mensaje": f"Servidor {server_id} registrado correctamente"}
     
     def _update_global_index(self, server_id: str, archivos: List[Dict], ip: str, port: int):
         """Actualiza el índice global con archivos de un servidor"""
+        # Solo los archivos de la partición de este nodo
+        archivos = [a for a in archivos if self._es_responsable(a.get("nombre_archivo", ""))]
+        
+        # Conservar la versión que ya tenía cada réplica de este servidor
+        previos = [n for n in self.server_files.pop(server_id, ()) if n in self.global_file_index]
+        versiones_previas = {
+            nombre_archivo: entry.get("version", 0)
+            for nombre_archivo in previos
+            for entry in self.global_file_index[nombre_archivo] if entry["server_id"] == server_id
+        }
+        
         # Limpiar archivos antiguos de este servidor
-        for nombre_archivo in list(self.global_file_index.keys()):
+        for nombre_archivo in previos:
             self.global_file_index[nombre_archivo] = [
                 entry for entry in self.global_file_index[nombre_archivo] 
                 if entry["server_id"] != server_id
@@ -172,6 +472,12 @@ class DNSGeneral:
             if not self.global_file_index[nombre_archivo]:
                 del self.global_file_index[nombre_archivo]
         
+        # Olvidar réplicas que el servidor ya no reporta
+        reportados = {a.get("nombre_archivo") for a in archivos if a.get("publicado", False)}
+        for nombre_archivo, servidores in self.replica_placements.items():
+            if nombre_archivo not in reportados:
+                servidores.discard(server_id)
+        
         # Añadir archivos nuevos
         for archivo in archivos:
             if archivo.get("publicado", False):
@@ -179,13 +485,32 @@ class DNSGeneral:
                 if nombre_archivo not in self.global_file_index:
                     self.global_file_index[nombre_archivo] = []
                 
-                self.global_file_index[nombre_archivo].append({
+                es_replica = server_id in self.replica_placements.get(nombre_archivo, ())
+                entry = {
                     "server_id": server_id,
                     "ip": ip,
                     "port": port,
                     "ttl": archivo.get("ttl", 3600),
-                    "bandera": archivo.get("bandera", 0)
-                })
+                    "bandera": 1 if es_replica else archivo.get("bandera", 0),
+                    "version": versiones_previas.get(
+                        nombre_archivo, archivo.get("version") or self.file_versions.get(nombre_archivo, 0)
+                    )
+                }
+                # Un archivo recién llegado a la partición trae la versión que reporta el servidor
+                if entry["version"] > self.file_versions.get(nombre_archivo, 0):
+                    self.file_versions[nombre_archivo] = entry["version"]
+                
+                # Las réplicas van al final para que el propietario siga siendo el primero
+                entries = self.global_file_index[nombre_archivo]
+                if es_replica:
+                    entries.append(entry)
+                else:
+                    pos = next((i for i, e in enumerate(entries) if e["bandera"] == 1), len(entries))
+                    entries.insert(pos, entry)
+                self._indexar_locked(nombre_archivo)
+        
+        self.replication_event.set()
+        self.index_changed.set()
     
     def consultar_archivo(self, request: Dict) -> Dict:
         """Consulta dónde se encuentra un archivo específico"""
@@ -202,7 +527,8 @@ class DNSGeneral:
                     "puerto": archivo_info["port"],
                     "server_id": archivo_info["server_id"],
                     "ttl": archivo_info["ttl"],
-                    "bandera": archivo_info["bandera"]
+                    "bandera": archivo_info["bandera"],
+                    "version": self.file_versions.get(nombre_archivo, 0)
                 }
             else:
                 return {
@@ -255,9 +581,12 @@ class DNSGeneral:
                 "accion": accion,
                 "nombre_archivo": request.get("nombre_archivo"),
                 "contenido": request.get("contenido"),
+                "version": request.get("version"),
+                "token_bloqueo": request.get("token_bloqueo"),
                 "via_dns_general": True,
                 "origen_request": request.get("origen_server_id", "DNS_GENERAL")
             }
+            remote_request.update({k: request[k] for k in MANIFEST_FIELDS if k in request})
             
             # Conectar al puerto UDP del servidor (puerto original + 1000)
             server_udp_port = server_info["port"] + 1000
@@ -265,16 +594,19 @@ class DNSGeneral:
             
             self.log(f"Enviando petición {accion} a {server_id} via UDP {server_addr}")
             
-            sock.sendto(json.dumps(remote_request).encode('utf-8'), server_addr)
-            
-            # Esperar respuesta
-            data, addr = sock.recvfrom(8192)
+            with self.metrics.timer("dns_salto_segundos", destino="servidor", accion=accion), \
+                    self.tracer.span(f"salto {accion}", destino=server_id):
+                sock.sendto(json.dumps(inject(remote_request)).encode('utf-8'), server_addr)
+                
+                # Esperar respuesta
+                data, addr = sock.recvfrom(8192)
             response = json.loads(data.decode('utf-8'))
             
             self.log(f"Respuesta de {server_id}: {response.get('status', 'UNKNOWN')}")
             return response
             
         except Exception as e:
+            self.metrics.counter("dns_saltos_fallidos_total", destino="servidor", accion=accion).inc()
             self.log(f"Error en solicitud remota a {server_id}: {e}")
             return {"status": "ERROR", "mensaje": f"Error comunicándose con servidor {server_id}: {e}"}
         finally:
@@ -284,114 +616,169 @@ class DNSGeneral:
     def leer_archivo_distribuido(self, request: Dict) -> Dict:
         """Lee un archivo que puede estar en cualquier servidor del sistema"""
         nombre_archivo = request.get("nombre_archivo")
+        version_minima = request.get("version_minima", 0) or 0
+        
+        # Un escritor tiene el archivo: el servidor que lee esperará turno en la cola
+        bloqueo = self.lock_manager.check(nombre_archivo)
+        if bloqueo and bloqueo["locked_by"] != request.get("requesting_server"):
+            return {
+                "status": "BLOQUEADO",
+                "mensaje": f"Archivo '{nombre_archivo}' bloqueado para escritura",
+                "bloqueado_por": bloqueo["locked_by"]
+            }
         
-        # Buscar dónde está el archivo
+        # Lecturas idénticas en curso (o recién terminadas) comparten una sola transferencia
+        origen = request.get("requesting_server", "DNS_GENERAL")
+        clave = ("leer", nombre_archivo, self.file_versions.get(nombre_archivo, 0))
+        response, compartida = self.read_flights.do(
+            clave,
+            lambda: self._leer_de_replicas(nombre_archivo, version_minima, origen),
+            cacheable=lambda r: r.get("status") == "EXITO"
+        )
+        if compartida and response.get("status") == "EXITO" and response.get("version", 0) < version_minima:
+            # El resultado compartido no alcanza la versión que pide este lector
+            response, compartida = self._leer_de_replicas(nombre_archivo, version_minima, origen), False
+        
+        response = dict(response)
+        if compartida:
+            response["lectura_compartida"] = True
+        return response
+    
+    def _leer_de_replicas(self, nombre_archivo: str, version_minima: int, origen: str) -> Dict:
+        """Lee el archivo de alguna réplica con la versión pedida, rotando entre copias"""
+        # Buscar dónde está el archivo (solo réplicas con la versión pedida o superior)
         with self.lock:
-            if nombre_archivo in self.global_file_index:
-                # Tomar el primer servidor que tenga el archivo
-                archivo_info = self.global_file_index[nombre_archivo][0]
-                server_id = archivo_info["server_id"]
-                
-                # Solicitar la lectura al servidor correspondiente
-                read_request = {
-                    "server_id": server_id,
-                    "accion": "leer",
-                    "nombre_archivo": nombre_archivo,
-                    "origen_server_id": request.get("requesting_server", "DNS_GENERAL")
-                }
-                
-                response = self.solicitar_accion_remota(read_request)
-                
-                if response.get("status") == "EXITO":
-                    # Añadir información sobre dónde se leyó el archivo
-                    response["servidor_origen"] = server_id
-                    response["via_dns_general"] = True
-                
-                return response
-            else:
+            entries = [
+                dict(e) for e in self.global_file_index.get(nombre_archivo, [])
+                if e.get("version", 0) >= version_minima and not e.get("revertir")
+            ]
+            existe = nombre_archivo in self.global_file_index
+            inicio = self._read_rr.get(nombre_archivo, 0) % len(entries) if entries else 0
+            self._read_rr[nombre_archivo] = inicio + 1
+        
+        if not entries:
+            if existe:
                 return {
                     "status": "ERROR",
-                    "mensaje": f"Archivo '{nombre_archivo}' no encontrado en el sistema"
+                    "mensaje": f"Ninguna réplica de '{nombre_archivo}' tiene la versión {version_minima}"
                 }
+            return {
+                "status": "ERROR",
+                "mensaje": f"Archivo '{nombre_archivo}' no encontrado en el sistema"
+            }
+        
+        # Repartir lecturas entre las copias y pasar a la siguiente si una falla
+        response = None
+        for archivo_info in entries[inicio:] + entries[:inicio]:
+            server_id = archivo_info["server_id"]
+            
+            # Solicitar la lectura al servidor correspondiente
+            read_request = {
+                "server_id": server_id,
+                "accion": "leer",
+                "nombre_archivo": nombre_archivo,
+                "origen_server_id": origen
+            }
+            
+            response = self.solicitar_accion_remota(read_request)
+            
+            if response.get("status") == "EXITO":
+                # Añadir información sobre dónde se leyó el archivo
+                response["servidor_origen"] = server_id
+                response["via_dns_general"] = True
+                response["version"] = archivo_info.get("version", 0)
+                return response
+            
+            self.log(f"Lectura de '{nombre_archivo}' falló en {server_id}, probando otra copia")
+        
+        return response
     
     def escribir_archivo_distribuido(self, request: Dict) -> Dict:
         """Escribe un archivo que puede estar en cualquier servidor del sistema"""
         nombre_archivo = request.get("nombre_archivo")
         contenido = request.get("contenido", "")
+        manifiesto = {k: request[k] for k in MANIFEST_FIELDS if k in request}
+        solicitante = request.get("requesting_server")
+        token = request.get("token_bloqueo")
+        
+        # Un archivo bloqueado solo lo escribe quien presenta el token de escritura vigente
+        titulares = self.lock_manager.holders(nombre_archivo)
+        if titulares and not (token is not None and self.lock_manager.validate(nombre_archivo, solicitante, token, WRITE)):
+            return {
+                "status": "BLOQUEADO",
+                "mensaje": f"Archivo '{nombre_archivo}' bloqueado",
+                "bloqueado_por": titulares[0]["locked_by"]
+            }
         
         # Buscar si el archivo ya existe
         with self.lock:
-            if nombre_archivo in self.global_file_index:
-                # El archivo existe, escribir en el servidor que lo tiene
-                archivo_info = self.global_file_index[nombre_archivo][0]
-                server_id = archivo_info["server_id"]
+            existe = nombre_archivo in self.global_file_index
+        
+        if existe:
+            # El archivo existe, escribir en todas sus réplicas con quórum
+            response = self._escritura_replicada(nombre_archivo, contenido, solicitante or "DNS_GENERAL", token, manifiesto)
+            
+            if response.get("status") == "EXITO":
+                response["via_dns_general"] = True
+                response["tipo_operacion"] = "modificacion"
+            
+            return response
+        
+        with self.lock:
+            # El archivo no existe, se puede crear en cualquier servidor
+            # Por simplicidad, usar el primer servidor disponible
+            if self.registered_servers:
+                server_id = list(self.registered_servers.keys())[0]
                 
                 write_request = {
                     "server_id": server_id,
-                    "accion": "escribir", 
+                    "accion": "escribir",
                     "nombre_archivo": nombre_archivo,
                     "contenido": contenido,
+                    **manifiesto,
+                    "version": 1,
                     "origen_server_id": request.get("requesting_server", "DNS_GENERAL")
                 }
                 
                 response = self.solicitar_accion_remota(write_request)
                 
                 if response.get("status") == "EXITO":
-                    response["servidor_destino"] = server_id
-                    response["via_dns_general"] = True
-                    response["tipo_operacion"] = "modificacion"
-                
-                return response
-            else:
-                # El archivo no existe, se puede crear en cualquier servidor
-                # Por simplicidad, usar el primer servidor disponible
-                if self.registered_servers:
-                    server_id = list(self.registered_servers.keys())[0]
-                    
-                    write_request = {
-                        "server_id": server_id,
-                        "accion": "escribir",
+                    # Actualizar el índice global con el nuevo archivo
+                    server_info = self.registered_servers[server_id]
+                    nuevo_archivo = {
                         "nombre_archivo": nombre_archivo,
-                        "contenido": contenido,
-                        "origen_server_id": request.get("requesting_server", "DNS_GENERAL")
+                        "extension": os.path.splitext(nombre_archivo)[1],
+                        "publicado": True,
+                        "ttl": 3600,
+                        "bandera": 0
                     }
                     
-                    response = self.solicitar_accion_remota(write_request)
+                    if nombre_archivo not in self.global_file_index:
+                        self.global_file_index[nombre_archivo] = []
                     
-                    if response.get("status") == "EXITO":
-                        # Actualizar el índice global con el nuevo archivo
-                        server_info = self.registered_servers[server_id]
-                        nuevo_archivo = {
-                            "nombre_archivo": nombre_archivo,
-                            "extension": os.path.splitext(nombre_archivo)[1],
-                            "publicado": True,
-                            "ttl": 3600,
-                            "bandera": 0
-                        }
-                        
-                        if nombre_archivo not in self.global_file_index:
-                            self.global_file_index[nombre_archivo] = []
-                        
-                        self.global_file_index[nombre_archivo].append({
-                            "server_id": server_id,
-                            "ip": server_info["ip"],
-                            "port": server_info["port"],
-                            "ttl": 3600,
-                            "bandera": 0
-                        })
-                        
-                        response["servidor_destino"] = server_id
-                        response["via_dns_general"] = True
-                        response["tipo_operacion"] = "creacion"
-                        
-                        self.log(f"Nuevo archivo '{nombre_archivo}' creado en servidor {server_id}")
+                    self.global_file_index[nombre_archivo].append({
+                        "server_id": server_id,
+                        "ip": server_info["ip"],
+                        "port": server_info["port"],
+                        "ttl": 3600,
+                        "bandera": 0,
+                        "version": 1
+                    })
+                    self._indexar_locked(nombre_archivo)
+                    self.file_versions[nombre_archivo] = 1
                     
-                    return response
-                else:
-                    return {
-                        "status": "ERROR",
-                        "mensaje": "No hay servidores disponibles para crear el archivo"
-                    }
+                    response["servidor_destino"] = server_id
+                    response["via_dns_general"] = True
+                    response["tipo_operacion"] = "creacion"
+                    
+                    self.log(f"Nuevo archivo '{nombre_archivo}' creado en servidor {server_id}")
+                
+                return response
+            else:
+                return {
+                    "status": "ERROR",
+                    "mensaje": "No hay servidores disponibles para crear el archivo"
+                }
 
     def solicitar_checkout_archivo(self, request: Dict) -> Dict:
         """Solicita checkout de un archivo para edición (crea copia temporal)"""
@@ -463,7 +850,24 @@ class DNSGeneral:
         """Procesa el check-in de un archivo editado"""
         nombre_archivo = request.get("nombre_archivo")
         contenido = request.get("contenido")
+        manifiesto = {k: request[k] for k in MANIFEST_FIELDS if k in request}
         server_solicitante = request.get("requesting_server")
+        token = request.get("token_bloqueo")
+
+        # Un archivo bloqueado solo admite el check-in de quien tiene el bloqueo de escritura
+        if token is None and self.lock_manager.holders(nombre_archivo):
+            self.log(f"Check-in rechazado para '{nombre_archivo}': {server_solicitante} no presentó token y el archivo está bloqueado")
+            return {
+                "status": "ERROR",
+                "mensaje": f"El archivo '{nombre_archivo}' está bloqueado: el check-in requiere el token del bloqueo de escritura"
+            }
+        # Rechazo barato de escritores obsoletos: el token debe ser el del lease vigente
+        if token is not None and not self.lock_manager.validate(nombre_archivo, server_solicitante, token, WRITE):
+            self.log(f"Check-in rechazado para '{nombre_archivo}': token {token} de {server_solicitante} obsoleto")
+            return {
+                "status": "ERROR",
+                "mensaje": f"El bloqueo de '{nombre_archivo}' expiró o fue tomado por otro escritor (token {token})"
+            }
 
         # --- LÓGICA DE CORRECCIÓN ---
         # Primero, verificamos si el archivo existe en el índice global
@@ -492,13 +896,21 @@ class DNSGeneral:
                         self.global_file_index[nombre_archivo] = []
                     
                     # Añadir la nueva entrada del propietario
+                    nueva_version = self._reservar_version_locked(nombre_archivo)
+                    self._publicar_version_locked(nombre_archivo, nueva_version)
                     self.global_file_index[nombre_archivo].insert(0, {
                         "server_id": server_solicitante,
                         "ip": server_info["ip"],
                         "port": server_info["port"],
                         "ttl": 3600,
-                        "bandera": 0
+                        "bandera": 0,
+                        "version": nueva_version
                     })
+                    self._indexar_locked(nombre_archivo)
+                    
+                    # Las demás copias quedaron atrasadas
+                    for entry in self.global_file_index[nombre_archivo][1:]:
+                        self._programar_reparacion(nombre_archivo, entry["server_id"])
             
             # Limpiar cualquier checkout activo que pudiera haber quedado
             checkout_key = f"{server_solicitante}:{nombre_archivo}"
@@ -508,20 +920,13 @@ class DNSGeneral:
             return {
                 "status": "CHECKIN_NUEVO_PROPIETARIO",
                 "mensaje": f"Archivo original perdido. {server_solicitante} es ahora el propietario",
-                "servidor_final": server_solicitante
+                "servidor_final": server_solicitante,
+                "version": self.file_versions.get(nombre_archivo, 0)
             }
 
-        # Si el archivo original SÍ existe, procedemos con la escritura normal
+        # Si el archivo original SÍ existe, escribimos en todas las réplicas con quórum
         else:
-            write_request = {
-                "server_id": server_origen,
-                "accion": "escribir",
-                "nombre_archivo": nombre_archivo,
-                "contenido": contenido,
-                "origen_server_id": "DNS_GENERAL"
-            }
-            
-            response = self.solicitar_accion_remota(write_request)
+            response = self._escritura_replicada(nombre_archivo, contenido, "DNS_GENERAL", token, manifiesto)
             
             if response.get("status") == "EXITO":
                 # Limpiar checkout
@@ -529,15 +934,230 @@ class DNSGeneral:
                 if hasattr(self, 'checkouts_activos') and checkout_key in self.checkouts_activos:
                     del self.checkouts_activos[checkout_key]
                 
-                self.log(f"Check-in exitoso: {nombre_archivo} actualizado en {server_origen}")
+                self.log(f"Check-in exitoso: {nombre_archivo} v{response['version']} confirmado por {response['confirmado_por']}")
                 
                 return {
                     "status": "CHECKIN_EXITOSO",
                     "mensaje": f"Archivo actualizado en servidor original {server_origen}",
                     "servidor_final": server_origen,
+                    "version": response["version"],
+                    "confirmado_por": response["confirmado_por"]
                 }
             else:
                 return response
+    
+    def _quorum_para(self, replicas: int) -> int:
+        """W de N: configurado explícitamente o mayoría simple"""
+        if self.write_quorum is None:
+            return replicas // 2 + 1
+        return max(1, min(self.write_quorum, replicas))
+    
+    def _marcar_version(self, nombre_archivo: str, server_id: str, version: int):
+        """Registra que una réplica tiene al menos la versión indicada (y, si estaba por revertir, ya no lo está)"""
+        with self.lock:
+            for entry in self.global_file_index.get(nombre_archivo, []):
+                if entry["server_id"] != server_id:
+                    continue
+                if entry.get("revertir") and version >= self.file_versions.get(nombre_archivo, 0):
+                    del entry["revertir"]
+                    entry["version"] = version
+                    self.index_changed.set()
+                elif entry.get("version", 0) < version:
+                    entry["version"] = version
+                    self.index_changed.set()
+    
+    def _reservar_version_locked(self, nombre_archivo: str) -> int:
+        """Número para una escritura nueva. Dos escrituras en curso nunca comparten número,
+        pero file_versions no avanza hasta que una se confirma. Debe llamarse con self.lock tomado."""
+        version = max(self.file_versions.get(nombre_archivo, 0), self.version_reservations.get(nombre_archivo, 0)) + 1
+        self.version_reservations[nombre_archivo] = version
+        return version
+    
+    def _publicar_version_locked(self, nombre_archivo: str, version: int):
+        if version > self.file_versions.get(nombre_archivo, 0):
+            self.file_versions[nombre_archivo] = version
+    
+    def _marcar_reversion(self, nombre_archivo: str, server_id: str):
+        """Una réplica aplicó una escritura que no llegó al quórum: deja de servir lecturas y
+        la reparación la devuelve a la versión publicada"""
+        with self.lock:
+            for entry in self.global_file_index.get(nombre_archivo, []):
+                if entry["server_id"] == server_id:
+                    entry["revertir"] = True
+        self._marcar_pendiente(archivos=[nombre_archivo])
+        self._programar_reparacion(nombre_archivo, server_id)
+    
+    def _programar_reparacion(self, nombre_archivo: str, server_id: str):
+        """Encola una réplica atrasada para ponerla al día en segundo plano"""
+        self.repair_queue.put((nombre_archivo, server_id))
+    
+    def _escritura_replicada(self, nombre_archivo: str, contenido: str, origen_server_id: str,
+                             token_bloqueo: int = None, manifiesto: Dict = None) -> Dict:
+        """Escribe en paralelo en todas las réplicas y confirma al alcanzar W de N.
+        La versión se reserva al empezar y solo se publica con el quórum; si no se alcanza,
+        las réplicas que sí la aplicaron quedan marcadas para revertirse.
+        Con manifiesto las réplicas copian por bloques desde el escritor en vez de recibir el contenido."""
+        with self.lock:
+            entries = [dict(e) for e in self.global_file_index.get(nombre_archivo, [])]
+            if not entries:
+                return {"status": "ERROR", "mensaje": f"Archivo '{nombre_archivo}' no encontrado en el sistema"}
+            version = self._reservar_version_locked(nombre_archivo)
+        
+        replicas = len(entries)
+        quorum = self._quorum_para(replicas)
+        confirmados, fallidos, respuestas = [], [], {}
+        decision = {}  # "publicada": True/False una vez resuelto el quórum
+        cond = threading.Condition()
+        
+        def on_done(future, server_id):
+            try:
+                response = future.result()
+            except Exception as e:
+                response = {"status": "ERROR", "mensaje": str(e)}
+            exito = response.get("status") == "EXITO"
+            
+            with cond:
+                (confirmados if exito else fallidos).append(server_id)
+                respuestas[server_id] = response
+                publicada = decision.get("publicada")
+                cond.notify_all()
+            
+            # Las confirmaciones tardías siguen la suerte de la escritura ya resuelta
+            if not exito:
+                self._programar_reparacion(nombre_archivo, server_id)
+            elif publicada is True:
+                self._marcar_version(nombre_archivo, server_id, version)
+            elif publicada is False:
+                self._marcar_reversion(nombre_archivo, server_id)
+        
+        for entry in entries:
+            write_request = {
+                "server_id": entry["server_id"],
+                "accion": "escribir",
+                "nombre_archivo": nombre_archivo,
+                "contenido": contenido,
+                **(manifiesto or {}),
+                "version": version,
+                "token_bloqueo": token_bloqueo,
+                "origen_server_id": origen_server_id
+            }
+            future = self.write_executor.submit(self.solicitar_accion_remota, write_request)
+            future.add_done_callback(lambda f, sid=entry["server_id"]: on_done(f, sid))
+        
+        # Esperar hasta tener quórum o hasta que ya sea imposible alcanzarlo
+        with cond:
+            cond.wait_for(
+                lambda: len(confirmados) >= quorum or len(fallidos) > replicas - quorum,
+                timeout=WRITE_TIMEOUT
+            )
+            confirmados_ahora = list(confirmados)
+            ultima_respuesta = respuestas.get(fallidos[-1]) if fallidos else None
+            decision["publicada"] = len(confirmados_ahora) >= quorum
+        
+        if decision["publicada"]:
+            with self.lock:
+                self._publicar_version_locked(nombre_archivo, version)
+            for server_id in confirmados_ahora:
+                self._marcar_version(nombre_archivo, server_id, version)
+            return {
+                "status": "EXITO",
+                "mensaje": f"Archivo '{nombre_archivo}' escrito en {len(confirmados_ahora)}/{replicas} réplicas",
+                "version": version,
+                "quorum": quorum,
+                "confirmado_por": confirmados_ahora,
+                "servidor_destino": entries[0]["server_id"]
+            }
+        
+        self.log(f"Quórum no alcanzado para '{nombre_archivo}' v{version}: {len(confirmados_ahora)}/{quorum}")
+        for server_id in confirmados_ahora:
+            self._marcar_reversion(nombre_archivo, server_id)
+        return {
+            "status": "ERROR",
+            "mensaje": f"Quórum no alcanzado ({len(confirmados_ahora)}/{quorum}): "
+                       f"{(ultima_respuesta or {}).get('mensaje', 'sin respuesta de las réplicas')}",
+            "version": version
+        }
+    
+    def registrar_modificacion_local(self, request: Dict) -> Dict:
+        """Un servidor modificó localmente su copia: nueva versión y reparar las demás"""
+        nombre_archivo = request.get("nombre_archivo")
+        server_id = request.get("server_id")
+        
+        with self.lock:
+            entries = self.global_file_index.get(nombre_archivo, [])
+            if not any(e["server_id"] == server_id for e in entries):
+                return {"status": "ERROR", "mensaje": f"{server_id} no tiene registrada una copia de '{nombre_archivo}'"}
+            
+            version = self._reservar_version_locked(nombre_archivo)
+            self._publicar_version_locked(nombre_archivo, version)  # la copia del servidor ya la tiene
+            atrasados = []
+            for entry in entries:
+                if entry["server_id"] == server_id:
+                    entry["version"] = version
+                else:
+                    atrasados.append(entry["server_id"])
+        
+        for atrasado in atrasados:
+            self._programar_reparacion(nombre_archivo, atrasado)
+        
+        return {"status": "ACK", "version": version, "replicas_a_reparar": len(atrasados)}
+    
+    def repair_loop(self):
+        """Hilo que pone al día las réplicas que no confirmaron una escritura"""
+        while self.running:
+            try:
+                nombre_archivo, server_id = self.repair_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            
+            try:
+                with self.lock:
+                    entries = self.global_file_index.get(nombre_archivo, [])
+                    objetivo = self.file_versions.get(nombre_archivo, 0)
+                    destino = next((e for e in entries if e["server_id"] == server_id), None)
+                    origen = next(
+                        (e for e in entries
+                         if e.get("version", 0) >= objetivo and not e.get("revertir")
+                         and e["server_id"] in self.registered_servers and e["server_id"] != server_id),
+                        None
+                    )
+                
+                # Réplica eliminada o ya al día (una marcada para revertir no lo está aunque tenga más versión)
+                revertir = destino is not None and destino.get("revertir", False)
+                if destino is None or (not revertir and destino.get("version", 0) >= objetivo):
+                    continue
+                if origen is None:
+                    self.log(f"Sin réplica actualizada de '{nombre_archivo}' para reparar {server_id}")
+                    continue
+                
+                espera = self.replication_bucket.wait_time()
+                if espera > 0:
+                    time.sleep(espera)
+                
+                response = self._enviar_replicar(nombre_archivo, origen["server_id"], server_id, revertir)
+                if response.get("status") == "EXITO" and revertir:
+                    self._marcar_revertida(nombre_archivo, server_id, response.get("version", objetivo))
+                    self.log(f"Réplica {server_id} de '{nombre_archivo}' revertida a v{objetivo}")
+                elif response.get("status") == "EXITO":
+                    self._marcar_version(nombre_archivo, server_id, response.get("version", objetivo))
+                    self.log(f"Réplica {server_id} de '{nombre_archivo}' reparada a v{objetivo}")
+                elif server_id in self.registered_servers:
+                    # Reintentar más tarde sin bloquear el resto de la cola
+                    threading.Timer(
+                        REPAIR_RETRY_DELAY, self._programar_reparacion, (nombre_archivo, server_id)
+                    ).start()
+            except Exception as e:
+                self.log(f"Error reparando réplica {server_id} de '{nombre_archivo}': {e}")
+
+    def _marcar_revertida(self, nombre_archivo: str, server_id: str, version: int):
+        """La réplica volvió a la copia publicada: vuelve a servir lecturas con esa versión"""
+        with self.lock:
+            for entry in self.global_file_index.get(nombre_archivo, []):
+                if entry["server_id"] == server_id:
+                    entry.pop("revertir", None)
+                    entry["version"] = version
+                    self.index_changed.set()
+        self._marcar_pendiente(archivos=[nombre_archivo])
 
     def manejar_archivo_eliminado(self, request: Dict) -> Dict:
         """Maneja la eliminación de un archivo y busca copias en otros servidores"""
@@ -563,8 +1183,14 @@ class DNSGeneral:
                 # Hay copias en otros servidores, asignar nuevo propietario
                 nuevo_propietario = copias_encontradas[0]  # Tomar el primero
                 
+                # La réplica promovida pasa a ser original
+                nuevo_propietario["bandera"] = 0
+                self.replica_placements.get(nombre_archivo, set()).discard(nuevo_propietario["server_id"])
+                
                 # Actualizar índice global
                 self.global_file_index[nombre_archivo] = copias_encontradas
+                self.replication_event.set()
+                self.index_changed.set()
                 
                 self.log(f"Archivo '{nombre_archivo}' eliminado de {server_eliminador}. Nuevo propietario: {nuevo_propietario['server_id']}")
                 
@@ -577,6 +1203,7 @@ class DNSGeneral:
             else:
                 # No hay copias, eliminar definitivamente
                 del self.global_file_index[nombre_archivo]
+                self.replica_placements.pop(nombre_archivo, None)
                 
                 self.log(f"Archivo '{nombre_archivo}' eliminado definitivamente del sistema")
                 
@@ -605,13 +1232,16 @@ class DNSGeneral:
             server_udp_port = server_info["port"] + 1000
             server_addr = (server_info["ip"], server_udp_port)
             
-            sock.sendto(json.dumps(verify_request).encode('utf-8'), server_addr)
-            data, addr = sock.recvfrom(4096)
+            with self.metrics.timer("dns_salto_segundos", destino="servidor", accion="verificar_existencia"), \
+                    self.tracer.span("salto verificar_existencia", destino=server_id):
+                sock.sendto(json.dumps(inject(verify_request)).encode('utf-8'), server_addr)
+                data, addr = sock.recvfrom(4096)
             response = json.loads(data.decode('utf-8'))
             
             return response.get("exists", False)
             
         except Exception as e:
+            self.metrics.counter("dns_saltos_fallidos_total", destino="servidor", accion="verificar_existencia").inc()
             self.log(f"Error verificando existencia en {server_id}: {e}")
             return False
         finally:
@@ -619,9 +1249,54 @@ class DNSGeneral:
                 sock.close()
 
     def handle_request(self, request: Dict, addr: Tuple) -> Dict:
-        """Maneja peticiones recibidas"""
+        """Maneja peticiones recibidas y anota su latencia por acción"""
         accion = request.get("accion")
+        inicio = time.perf_counter()
+        if accion in UNTRACED_ACTIONS:
+            response = self._enrutar(request, addr)
+        else:
+            with self.tracer.span(f"dns_general {accion}", parent=extract(request),
+                                  nombre_archivo=request.get("nombre_archivo")) as span:
+                response = self._enrutar(request, addr)
+                span["atributos"]["status"] = (response or {}).get("status")
+        self.metrics.histogram("dns_peticion_segundos", accion=accion).record(time.perf_counter() - inicio)
+        self.metrics.counter("dns_peticiones_total", accion=accion, status=(response or {}).get("status")).inc()
+        return response
+    
+    def _enrutar(self, request: Dict, addr: Tuple) -> Dict:
+        accion = request.get("accion")
+        
+        # Archivos de otra partición: indicar el nodo dueño y el anillo vigente
+        nombre_archivo = request.get("nombre_archivo")
+        if accion in PARTITIONED_ACTIONS and nombre_archivo and not self._es_responsable(nombre_archivo):
+            return {
+                "status": "REDIRECT",
+                "mensaje": f"'{nombre_archivo}' pertenece a otro nodo del DNS General",
+                "nodo": self.ring.node_for(nombre_archivo),
+                "anillo": self.ring.nodes
+            }
+        
+        # Grupo replicado: el líder atiende todo; un seguidor al día también responde consultas
+        if self.raft is not None and accion not in GROUP_LOCAL_ACTIONS and not self.raft.is_leader():
+            if accion not in FOLLOWER_READ_ACTIONS or self.raft.staleness() > MAX_READ_STALENESS:
+                return self._redirigir_al_lider()
+        elif self.raft is not None and accion in FOLLOWER_READ_ACTIONS:
+            # Lectura en el líder (read-index): que siga siéndolo y que lo ya propuesto esté confirmado
+            indice = self.last_proposed
+            if not self._confirmar_liderazgo() or not self.raft.wait_committed(indice, GROUP_COMMIT_TIMEOUT):
+                return self._sin_liderazgo()
         
+        # Toda petición de un servidor registrado cuenta como heartbeat
+        for campo in SENDER_FIELDS:
+            if request.get(campo) in self.registered_servers:
+                self._marcar_vivo(request[campo])
+                break
+        if self.raft is not None and accion in REPLICATED_ACTIONS:
+            return self._atender_replicado(request, addr)
+        return self._despachar(request, addr)
+    
+    def _despachar(self, request: Dict, addr: Tuple) -> Dict:
+        accion = request.get("accion")
         if accion == "registrar_servidor":
             return self.register_server(request)
         elif accion == "consultar":
@@ -642,51 +1317,551 @@ class DNSGeneral:
             return self.solicitar_accion_remota(request)
         # AGREGAR ESTAS LÍNEAS PARA MANEJAR BLOQUEOS:
         elif accion == "solicitar_bloqueo":
-            return self.solicitar_bloqueo_archivo(request)
+            return self.solicitar_bloqueo_archivo(request, addr)
+        elif accion == "renovar_bloqueo":
+            return self.renovar_bloqueo_archivo(request)
         elif accion == "liberar_bloqueo":
             return self.liberar_bloqueo_archivo(request)
         elif accion == "verificar_bloqueo":
             return self.verificar_bloqueo_archivo(request)
+        elif accion == "suscribir_bloqueos":
+            return self.suscribir_bloqueos(request)
+        elif accion == "suscribir":
+            return self.suscribir_indice(request)
+        elif accion == "miembros_anillo":
+            return {"status": "ACK", "nodo": self.partition_id, "nodos": self.ring.nodes, "grupo": self.group,
+                    "lider": self.raft.leader() if self.raft else self.node_id}
+        elif accion == "estado_grupo":
+            if self.raft is None:
+                return {"status": "ACK", "grupo": self.group, "rol": "unico"}
+            return {"status": "ACK", "grupo": self.group, **self.raft.status(), "antiguedad": self.raft.staleness()}
+        elif accion == "actualizar_anillo":
+            return self.actualizar_anillo(request)
         # FIN DE LÍNEAS AGREGADAS
+        elif accion == "configurar_replicacion":
+            return self.configurar_replicacion(request)
+        elif accion == "estado_replicacion":
+            return self.estado_replicacion()
+        elif accion == "archivo_modificado":
+            return self.registrar_modificacion_local(request)
+        elif accion == "heartbeat_batch":
+            return self.heartbeat_batch(request)
+        elif accion == "estado_vida":
+            return self.estado_vida()
+        elif accion == "metricas":
+            return self.obtener_metricas(request)
+        elif accion == "trazas":
+            return self.obtener_trazas(request)
+        elif accion == "perfilar":
+            return {"nodo": self.node_id, **self.profiler.handle(request)}
         elif accion == "heartbeat":
+            # La señal de vida ya se anotó al recibir la petición
             server_id = request.get("server_id")
             if server_id in self.registered_servers:
-                self.registered_servers[server_id]["last_update"] = datetime.now().timestamp()
-                return {"status": "ACK", "mensaje": "Heartbeat recibido"}
+                return {
+                    "status": "ACK",
+                    "mensaje": "Heartbeat recibido",
+                    "intervalo_heartbeat": self._intervalo_heartbeat(),
+                    "anillo": self.ring.nodes,
+                    "grupo": self.group,
+                    "suscrito_bloqueos": server_id in self.lock_subscribers,
+                    "suscrito_indice": server_id in self.index_subscribers,
+                    "seq_indice": self.index_feed.seq
+                }
             return {"status": "ERROR", "mensaje": "Servidor no registrado"}
         else:
             return {"status": "ERROR", "mensaje": f"Acción '{accion}' no reconocida"}
     
+    def _intervalo_heartbeat(self) -> float:
+        """Intervalo que se pide a los servidores para no pasar de HEARTBEAT_TARGET_RATE señales por segundo"""
+        intervalo = len(self.registered_servers) / HEARTBEAT_TARGET_RATE
+        return max(HEARTBEAT_MIN_INTERVAL, min(HEARTBEAT_MAX_INTERVAL, intervalo))
+    
+    def _marcar_vivo(self, server_id: str):
+        self.liveness.touch(server_id, self._intervalo_heartbeat())
+    
+    def obtener_metricas(self, request: Dict) -> Dict:
+        """Métricas de este nodo: dict por defecto o texto de Prometheus si se pide el formato prometheus"""
+        if request.get("formato") == "prometheus":
+            return {"status": "ACK", "nodo": self.node_id, "texto": self.metrics.prometheus()}
+        return {"status": "ACK", "nodo": self.node_id, "metricas": self.metrics.snapshot()}
+    
+    def obtener_trazas(self, request: Dict) -> Dict:
+        """Spans recientes de este nodo (o de una traza) como eventos de traza de Chrome"""
+        limite = min(int(request.get("limite") or TRACE_EXPORT_LIMIT), TRACE_EXPORT_LIMIT)
+        return {"status": "ACK", "nodo": self.node_id,
+                "trazas": self.tracer.export(request.get("trace_id"), limite)}
+    
+    def estado_vida(self) -> Dict:
+        """Sospecha phi y segundos sin señales de cada servidor registrado"""
+        with self.lock:
+            servidores = list(self.registered_servers)
+        estado = {}
+        for server_id in servidores:
+            phi = self.liveness.phi(server_id)
+            estado[server_id] = {
+                "phi": None if phi is None else round(phi, 2),
+                "inactivo": self.liveness.idle(server_id)
+            }
+        return {"status": "ACK", "umbral": SUSPICION_THRESHOLD, "servidores": estado}
+    
+    def _indexar_locked(self, nombre_archivo: str):
+        """Anota en el índice inverso los servidores con entrada para el archivo. Debe llamarse con self.lock tomado."""
+        for entry in self.global_file_index.get(nombre_archivo, ()):
+            self.server_files.setdefault(entry["server_id"], set()).add(nombre_archivo)
+    
+    def heartbeat_batch(self, request: Dict) -> Dict:
+        """Heartbeat de un proxy por todos los servidores que tiene detrás: un datagrama por lote"""
+        vivos, desconocidos = [], []
+        for server_id in request.get("servidores", []):
+            if server_id in self.registered_servers:
+                self._marcar_vivo(server_id)
+                vivos.append(server_id)
+            else:
+                desconocidos.append(server_id)
+        return {
+            "status": "ACK",
+            "vivos": len(vivos),
+            "desconocidos": desconocidos,
+            "intervalo_heartbeat": self._intervalo_heartbeat(),
+            "anillo": self.ring.nodes,
+            "grupo": self.group
+        }
+    
+    def _es_responsable(self, nombre_archivo: str) -> bool:
+        return self.ring.node_for(nombre_archivo) == self.partition_id
+    
+    def _adoptar_anillo_locked(self, nodos: List[str]) -> List[str]:
+        """Cambia el anillo y descarta los archivos que pasan a otro nodo. Debe llamarse con self.lock tomado."""
+        self.ring = HashRing(nodos)
+        movidos = [nombre for nombre in self.global_file_index if not self._es_responsable(nombre)]
+        for nombre_archivo in movidos:
+            del self.global_file_index[nombre_archivo]
+            self.replica_placements.pop(nombre_archivo, None)
+            self.file_versions.pop(nombre_archivo, None)
+            self.version_reservations.pop(nombre_archivo, None)
+            self._read_rr.pop(nombre_archivo, None)
+        return movidos
+    
+    def actualizar_anillo(self, request: Dict) -> Dict:
+        """Adopta nuevos miembros del anillo (un nodo se unió o salió) y suelta lo que ya no le toca"""
+        nodos = sorted(set(request.get("nodos", [])) | {self.partition_id})
+        if nodos == self.ring.nodes:
+            return {"status": "ACK", "nodos": self.ring.nodes, "movidos": 0}
+        
+        with self.lock:
+            movidos = self._adoptar_anillo_locked(nodos)
+            servidores = [(info["ip"], info["port"] + 1000) for info in self.registered_servers.values()]
+        self.index_changed.set()
+        self.log(f"Anillo actualizado: {nodos} ({len(movidos)} archivos cedidos a otros nodos)")
+        
+        # Avisar a los servidores para que se registren de nuevo y cada archivo llegue a su dueño
+        aviso = json.dumps({"accion": "anillo_actualizado", "nodos": nodos, "via_dns_general": True}).encode('utf-8')
+        if self.sock is not None:
+            for destino in servidores:
+                self.sock.sendto(aviso, destino)
+        return {"status": "ACK", "nodos": nodos, "movidos": len(movidos)}
+    
+    def _anunciar_anillo(self, nodos: List[str]):
+        """Envía la nueva lista de miembros a los demás nodos (al unirse o al salir)"""
+        mensaje = json.dumps({"accion": "actualizar_anillo", "nodos": nodos}).encode('utf-8')
+        for nodo in nodos:
+            if nodo == self.partition_id:
+                continue
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sock.settimeout(2)
+                sock.sendto(mensaje, parse_node(nodo))
+                data, _ = sock.recvfrom(4096)
+                response = json.loads(data.decode('utf-8'))
+                # La partición es un grupo y respondió un seguidor: el cambio lo hace su líder
+                if response.get("status") == "REDIRECT_LIDER" and response.get("lider"):
+                    sock.sendto(mensaje, parse_node(response["lider"]))
+                    sock.recvfrom(4096)
+            except Exception as e:
+                self.log(f"No se pudo avisar al nodo {nodo}: {e}")
+            finally:
+                sock.close()
+    
+    # --- Grupo replicado ---
+    
+    def _es_lider(self) -> bool:
+        return self.raft is None or self.raft.is_leader()
+    
+    def _redirigir_al_lider(self) -> Dict:
+        return {
+            "status": "REDIRECT_LIDER",
+            "mensaje": "Este nodo del grupo no es el líder",
+            "nodo": self.partition_id,
+            "lider": self.raft.leader(),
+            "grupo": self.group
+        }
+    
+    def _confirmar_liderazgo(self) -> bool:
+        """Lease del líder vigente o, si no, confirmado con la mayoría del grupo"""
+        try:
+            self.raft.read_index(LEADER_CONFIRM_TIMEOUT)
+        except NotLeader:
+            return False
+        return True
+    
+    def _sin_liderazgo(self) -> Dict:
+        if self.raft.is_leader():
+            return {"status": "ERROR", "mensaje": "La mayoría del grupo no confirmó a este líder", "lider": None}
+        return self._redirigir_al_lider()
+    
+    def _atender_replicado(self, request: Dict, addr: Tuple) -> Dict:
+        """
+        Atiende una escritura en el líder y responde cuando la mayoría del grupo tiene el nuevo estado.
+        Las acciones hablan con servidores y avisan por push, así que el líder las ejecuta y propone
+        el estado resultante (no la petición): antes confirma su lease, para que un líder depuesto no
+        aplique nada; si después la mayoría no confirma la entrada, deja el liderazgo y lo que aplicó
+        se descarta al instalar el estado del nuevo líder (needs_state en RaftNode).
+        """
+        if not self._confirmar_liderazgo():
+            return self._sin_liderazgo()
+        accion = request.get("accion")
+        archivos = {request["nombre_archivo"]} if request.get("nombre_archivo") else set()
+        servidores = set()
+        if accion == "registrar_servidor":
+            server_id = request.get("server_id")
+            servidores.add(server_id)
+            archivos |= {a.get("nombre_archivo") for a in request.get("archivos", []) if a.get("nombre_archivo")}
+            with self.lock:
+                archivos |= {n for n, entries in self.global_file_index.items() if any(e["server_id"] == server_id for e in entries)}
+        
+        response = self._despachar(request, addr)
+        self._marcar_pendiente(archivos, servidores, anillo=(accion == "actualizar_anillo"))
+        if not self._replicar_pendientes(esperar=True):
+            self.raft.step_down()
+            return {"status": "ERROR", "mensaje": "El grupo del DNS General no confirmó el cambio", "lider": self.raft.leader()}
+        return response
+    
+    def _marcar_pendiente(self, archivos=(), servidores=(), anillo: bool = False):
+        if self.raft is None:
+            return
+        with self.dirty_lock:
+            self.dirty_files.update(archivos)
+            self.dirty_servers.update(servidores)
+            self.dirty_ring = self.dirty_ring or anillo
+        self.dirty_event.set()
+    
+    def _estado_de(self, archivos, servidores, anillo: bool = False) -> Dict:
+        """Estado actual de esos archivos y servidores (None = ya no existe), como entrada del log"""
+        with self.lock:
+            estado = {
+                "archivos": {
+                    nombre: {
+                        "entradas": self.global_file_index.get(nombre),
+                        "version": self.file_versions.get(nombre),
+                        "ubicaciones": sorted(self.replica_placements.get(nombre, ())),
+                        "factor": self.replication_overrides.get(nombre)
+                    }
+                    for nombre in archivos
+                },
+                "servidores": {server_id: self.registered_servers.get(server_id) for server_id in servidores},
+                "factor_global": self.replication_factor,
+                "ultimo_token": self.lock_manager.last_token
+            }
+            if anillo:
+                estado["anillo"] = self.ring.nodes
+            # Copia: el log no debe cambiar si después cambia el índice
+            estado = json.loads(json.dumps(estado))
+        for nombre, datos in estado["archivos"].items():
+            datos["bloqueos"] = self.lock_manager.holders(nombre)
+        return estado
+    
+    def _replicar_pendientes(self, esperar: bool = True) -> bool:
+        """Propone al grupo el estado de lo que cambió; con esperar, hasta que lo confirme la mayoría"""
+        if self.raft is None:
+            return True
+        with self.propose_lock:
+            with self.dirty_lock:
+                archivos, servidores, anillo = self.dirty_files, self.dirty_servers, self.dirty_ring
+                self.dirty_files, self.dirty_servers, self.dirty_ring = set(), set(), False
+            indice = self.last_proposed
+            if archivos or servidores or anillo:
+                estado = self._estado_de(archivos, servidores, anillo)
+                estado["origen"] = self.node_id
+                try:
+                    indice = self.last_proposed = self.raft.propose(estado)
+                except NotLeader:
+                    return False
+        return not esperar or self.raft.wait_committed(indice, GROUP_COMMIT_TIMEOUT)
+    
+    def _aplicar_estado(self, estado: Dict):
+        """Aplica una entrada confirmada del log: los seguidores copian el estado que propuso el líder"""
+        if estado.get("origen") == self.node_id and self._es_lider():
+            return  # el líder ya tiene ese estado
+        with self.lock:
+            if "anillo" in estado:
+                self._adoptar_anillo_locked(estado["anillo"])
+            if "factor_global" in estado:
+                self.replication_factor = estado["factor_global"]
+            for server_id, info in estado.get("servidores", {}).items():
+                if info is None:
+                    self.registered_servers.pop(server_id, None)
+                else:
+                    self.registered_servers[server_id] = info
+            for nombre, datos in estado.get("archivos", {}).items():
+                if datos["entradas"]:
+                    self.global_file_index[nombre] = datos["entradas"]
+                    self._indexar_locked(nombre)
+                else:
+                    self.global_file_index.pop(nombre, None)
+                if datos["version"] is None:
+                    self.file_versions.pop(nombre, None)
+                else:
+                    self.file_versions[nombre] = datos["version"]
+                if datos["ubicaciones"]:
+                    self.replica_placements[nombre] = set(datos["ubicaciones"])
+                else:
+                    self.replica_placements.pop(nombre, None)
+                if datos.get("factor") is None:
+                    self.replication_overrides.pop(nombre, None)
+                else:
+                    self.replication_overrides[nombre] = datos["factor"]
+        for nombre, datos in estado.get("archivos", {}).items():
+            self.lock_manager.restore(nombre, datos.get("bloqueos", []))
+        # Un seguidor que pase a líder no reutiliza tokens ya emitidos, aunque sus bloqueos hayan vencido
+        self.lock_manager.advance_tokens(estado.get("ultimo_token", 0))
+        self.index_changed.set()
+    
+    def _estado_completo(self) -> Dict:
+        """Todo el estado replicado, para un seguidor que se quedó demasiado atrás"""
+        with self.lock:
+            archivos = set(self.global_file_index) | set(self.file_versions) | set(self.replication_overrides)
+            servidores = list(self.registered_servers)
+        archivos |= set(self.lock_manager.snapshot())
+        return self._estado_de(archivos, servidores, anillo=True)
+    
+    def _restaurar_estado(self, estado: Dict):
+        with self.lock:
+            self.global_file_index.clear()
+            self.server_files.clear()
+            self.file_versions.clear()
+            self.replica_placements.clear()
+            self.replication_overrides.clear()
+            self.registered_servers.clear()
+        for nombre in self.lock_manager.snapshot():
+            self.lock_manager.restore(nombre, [])
+        self._aplicar_estado(estado)
+    
+    def _al_ser_lider(self):
+        """Este nodo pasa a líder: los servidores tienen un margen para llegarle con sus heartbeats"""
+        with self.lock:
+            servidores = list(self.registered_servers)
+        for server_id in servidores:
+            self._marcar_vivo(server_id)
+        self.log(f"Líder del grupo de la partición {self.partition_id}: {self.group}")
+        self.index_changed.set()
+        self.replication_event.set()
+        if len(self.ring.nodes) > 1:
+            self._anunciar_anillo(self.ring.nodes)
+    
+    def group_flush_loop(self):
+        """Propone al grupo los cambios hechos fuera de una petición (leases vencidos, reparaciones)"""
+        while self.running:
+            if not self.dirty_event.wait(1):
+                continue
+            time.sleep(GROUP_FLUSH_WINDOW)
+            self.dirty_event.clear()
+            if self._es_lider():
+                self._replicar_pendientes(esperar=False)
+    
+    def _responder(self, request: Dict, addr: Tuple):
+        """Atiende una petición fuera del bucle principal y responde por el socket principal"""
+        try:
+            response = self.handle_request(request, addr)
+        except Exception as e:
+            self.log(f"Error procesando petición de {addr}: {e}")
+            response = {"status": "ERROR", "mensaje": str(e)}
+        self.sock.sendto(json.dumps(response).encode('utf-8'), addr)
+    
     def cleanup_inactive_servers(self):
-        """Limpia servidores inactivos (más de 5 minutos sin heartbeat)"""
-        current_time = datetime.now().timestamp()
-        inactive_threshold = 300  # 5 minutos
+        """Limpia servidores cuya sospecha phi superó el umbral (solo se visitan sus archivos)"""
+        vencidos = self.liveness.expired()
         
+        afectados = set()
         with self.lock:
-            inactive_servers = []
-            for server_id, server_info in self.registered_servers.items():
-                if current_time - server_info["last_update"] > inactive_threshold:
-                    inactive_servers.append(server_id)
+            inactive_servers = [server_id for server_id in vencidos if server_id in self.registered_servers]
             
             for server_id in inactive_servers:
                 self.log(f"Eliminando servidor inactivo: {server_id}")
                 del self.registered_servers[server_id]
+                self.lock_subscribers.discard(server_id)
+                self.index_subscribers.discard(server_id)
                 
                 # Limpiar del índice global
-                for nombre_archivo in list(self.global_file_index.keys()):
+                for nombre_archivo in self.server_files.pop(server_id, ()):
+                    if nombre_archivo not in self.global_file_index:
+                        continue
+                    if any(e["server_id"] == server_id for e in self.global_file_index[nombre_archivo]):
+                        afectados.add(nombre_archivo)
                     self.global_file_index[nombre_archivo] = [
                         entry for entry in self.global_file_index[nombre_archivo]
                         if entry["server_id"] != server_id
                     ]
+                    self.replica_placements.get(nombre_archivo, set()).discard(server_id)
                     if not self.global_file_index[nombre_archivo]:
                         del self.global_file_index[nombre_archivo]
+                    elif self.global_file_index[nombre_archivo][0]["bandera"] == 1:
+                        # El propietario murió: la primera réplica pasa a ser original
+                        promovido = self.global_file_index[nombre_archivo][0]
+                        promovido["bandera"] = 0
+                        self.replica_placements.get(nombre_archivo, set()).discard(promovido["server_id"])
+            
+            if inactive_servers:
+                # Re-replicar lo que quedó por debajo del factor
+                self.replication_event.set()
+                self.index_changed.set()
+        self._marcar_pendiente(afectados, inactive_servers)
+    
+    def _replication_factor_for(self, nombre_archivo: str) -> int:
+        return self.replication_overrides.get(nombre_archivo, self.replication_factor)
+    
+    def configurar_replicacion(self, request: Dict) -> Dict:
+        """Configura el factor de replicación global o de un archivo específico"""
+        try:
+            factor = int(request.get("factor"))
+        except (TypeError, ValueError):
+            return {"status": "ERROR", "mensaje": "Factor de replicación inválido"}
+        if factor < 1:
+            return {"status": "ERROR", "mensaje": "El factor de replicación debe ser al menos 1"}
+        
+        nombre_archivo = request.get("nombre_archivo")
+        with self.lock:
+            if nombre_archivo:
+                self.replication_overrides[nombre_archivo] = factor
+            else:
+                self.replication_factor = factor
+        
+        self.replication_event.set()
+        destino = f"'{nombre_archivo}'" if nombre_archivo else "global"
+        self.log(f"Factor de replicación {destino} configurado en {factor}")
+        return {"status": "ACK", "mensaje": f"Factor de replicación {destino}: {factor}"}
+    
+    def estado_replicacion(self) -> Dict:
+        """Resume cuántos archivos están por debajo de su factor de replicación"""
+        with self.lock:
+            pendientes = plan_replicas(self.global_file_index, self.registered_servers, self._replication_factor_for)
+            return {
+                "status": "ACK",
+                "factor_global": self.replication_factor,
+                "factores_por_archivo": dict(self.replication_overrides),
+                "copias_pendientes": len(pendientes),
+                "archivos_subreplicados": sorted({p["nombre_archivo"] for p in pendientes})
+            }
+    
+    def _enviar_replicar(self, nombre_archivo: str, origen_id: str, destino_id: str, revertir: bool = False) -> Dict:
+        """Pide al servidor destino que copie el archivo directamente desde el origen
+        (con revertir, aunque la versión del origen sea menor que la suya)"""
+        with self.lock:
+            origen = self.registered_servers.get(origen_id)
+            destino = self.registered_servers.get(destino_id)
+        if not origen or not destino:
+            return {"status": "ERROR", "mensaje": "Servidor origen o destino no registrado"}
+        
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.settimeout(10)
+            
+            replicar_request = {
+                "accion": "replicar",
+                "nombre_archivo": nombre_archivo,
+                "origen_server_id": origen_id,
+                "origen_ip": origen["ip"],
+                "origen_port": origen["port"],
+                "revertir": revertir,
+                "via_dns_general": True
+            }
+            with self.metrics.timer("dns_salto_segundos", destino="servidor", accion="replicar"), \
+                    self.tracer.span("salto replicar", destino=destino_id):
+                sock.sendto(json.dumps(inject(replicar_request)).encode('utf-8'), (destino["ip"], destino["port"] + 1000))
+                data, addr = sock.recvfrom(8192)
+            response = json.loads(data.decode('utf-8'))
+        except Exception as e:
+            self.metrics.counter("dns_saltos_fallidos_total", destino="servidor", accion="replicar").inc()
+            self.log(f"Error replicando '{nombre_archivo}' en {destino_id}: {e}")
+            return {"status": "ERROR", "mensaje": str(e)}
+        finally:
+            if 'sock' in locals():
+                sock.close()
+        
+        self.replication_bucket.consume(response.get("bytes_transferidos", 0))
+        if response.get("status") != "EXITO":
+            self.log(f"Réplica de '{nombre_archivo}' en {destino_id} falló: {response.get('mensaje')}")
+        return response
+    
+    def _copiar_replica(self, copia: Dict) -> bool:
+        """Crea una réplica nueva y la añade al índice"""
+        nombre_archivo = copia["nombre_archivo"]
+        
+        # Copiar desde la réplica más actualizada, no necesariamente el propietario
+        with self.lock:
+            vivas = [
+                e for e in self.global_file_index.get(nombre_archivo, [])
+                if e["server_id"] in self.registered_servers
+            ]
+            if vivas:
+                copia["origen"] = max(vivas, key=lambda e: e.get("version", 0))["server_id"]
+        
+        response = self._enviar_replicar(nombre_archivo, copia["origen"], copia["destino"])
+        if response.get("status") != "EXITO":
+            return False
+        
+        with self.lock:
+            destino = self.registered_servers.get(copia["destino"])
+            if nombre_archivo not in self.global_file_index or destino is None:
+                return False
+            self.replica_placements.setdefault(nombre_archivo, set()).add(copia["destino"])
+            entries = self.global_file_index[nombre_archivo]
+            entries[:] = [e for e in entries if e["server_id"] != copia["destino"]]
+            entries.append({
+                "server_id": copia["destino"],
+                "ip": destino["ip"],
+                "port": destino["port"],
+                "ttl": entries[0]["ttl"] if entries else 3600,
+                "bandera": 1,
+                "version": response.get("version", 0)
+            })
+            self._indexar_locked(nombre_archivo)
+        
+        self.log(f"Réplica de '{nombre_archivo}' creada en {copia['destino']} desde {copia['origen']}")
+        return True
+    
+    def replication_loop(self):
+        """Hilo que mantiene el factor de replicación copiando en segundo plano"""
+        while self.running:
+            self.replication_event.wait(REPLICATION_INTERVAL)
+            self.replication_event.clear()
+            if not self.running:
+                break
+            if not self._es_lider():
+                continue
+            
+            try:
+                with self.lock:
+                    plan = plan_replicas(self.global_file_index, self.registered_servers, self._replication_factor_for)
+                
+                for copia in plan:
+                    if not self.running:
+                        break
+                    # Respetar el ancho de banda asignado a la replicación
+                    espera = self.replication_bucket.wait_time()
+                    if espera > 0:
+                        time.sleep(espera)
+                    self._copiar_replica(copia)
+            except Exception as e:
+                self.log(f"Error en replicación: {e}")
     
     def cleanup_loop(self):
         """Hilo de limpieza periódica"""
         while self.running:
             try:
-                time.sleep(60)  # Cada minuto
-                self.cleanup_inactive_servers()
+                time.sleep(LIVENESS_CHECK_INTERVAL)  # la rueda solo devuelve los plazos vencidos
+                if self._es_lider():
+                    self.cleanup_inactive_servers()
             except Exception as e:
                 self.log(f"Error en cleanup: {e}")
     
@@ -696,9 +1871,41 @@ class DNSGeneral:
         cleanup_thread = threading.Thread(target=self.cleanup_loop, daemon=True)
         cleanup_thread.start()
         
+        # Iniciar hilo de replicación
+        replication_thread = threading.Thread(target=self.replication_loop, daemon=True)
+        replication_thread.start()
+        
+        # Iniciar barredor de leases de bloqueo y publicador de eventos de bloqueo
+        self.lock_manager.start()
+        lock_event_thread = threading.Thread(target=self.lock_event_loop, daemon=True)
+        lock_event_thread.start()
+        
+        # Iniciar publicador de cambios del índice
+        index_feed_thread = threading.Thread(target=self.index_feed_loop, daemon=True)
+        index_feed_thread.start()
+        
+        # Iniciar hilo de reparación de réplicas atrasadas
+        repair_thread = threading.Thread(target=self.repair_loop, daemon=True)
+        repair_thread.start()
+        
         # Crear socket UDP
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         sock.bind((self.host, self.port))
+        self.sock = sock
+        
+        if self.raft is not None:
+            # Grupo replicado: el líder electo anuncia la partición al resto del anillo
+            self.raft.start()
+            threading.Thread(target=self.group_flush_loop, daemon=True).start()
+            self.log(f"Grupo de la partición {self.partition_id}: {self.group}")
+        elif len(self.ring.nodes) > 1:
+            # Unirse al anillo: los demás nodos ceden los archivos que ahora nos tocan
+            self._anunciar_anillo(self.ring.nodes)
+        
+        try:
+            self.metrics_server = serve_prometheus(self.metrics, self.host, self.port + METRICS_PORT_OFFSET)
+        except OSError as e:
+            self.log(f"Sin endpoint de métricas en el puerto {self.port + METRICS_PORT_OFFSET}: {e}")
         
         self.log(f"DNS General iniciado en {self.host}:{self.port}")
         self.log("Esperando registros de servidores...")
@@ -706,10 +1913,19 @@ class DNSGeneral:
         try:
             while self.running:
                 try:
-                    data, addr = sock.recvfrom(8192)
+                    # Datagrama completo: un check-in por bloques trae el manifiesto entero
+                    data, addr = sock.recvfrom(65535)
                     request = json.loads(data.decode('utf-8'))
                     
-                    self.log(f"Petición de {addr}: {request.get('accion', 'UNKNOWN')}")
+                    accion = request.get("accion", "UNKNOWN")
+                    if accion not in QUIET_ACTIONS:
+                        logging.info("Petición de %s: %s", addr, accion, extra=log_fields(
+                            REQUEST_LOG_SAMPLE, accion, accion=accion, origen=next((request[c] for c in SENDER_FIELDS if c in request), None)))
+                    
+                    # Las lecturas pueden tardar (transferencia desde otro servidor): atenderlas en paralelo
+                    if request.get("accion") in CONCURRENT_ACTIONS:
+                        self.read_executor.submit(self._responder, request, addr)
+                        continue
                     
                     response = self.handle_request(request, addr)
                     
@@ -731,6 +1947,13 @@ class DNSGeneral:
             self.log(f"Error en DNS General: {e}")
         finally:
             self.running = False
+            # Salir del anillo: nuestros tramos pasan a los nodos vecinos (un grupo sigue con los demás miembros)
+            if self.raft is not None:
+                self.raft.stop()
+            elif len(self.ring.nodes) > 1:
+                self._anunciar_anillo([n for n in self.ring.nodes if n != self.partition_id])
+            if self.metrics_server is not None:
+                self.metrics_server.shutdown()
             sock.close()
             self.log("DNS General detenido")
 
@@ -740,5 +1963,13 @@ if __name__ == "__main__":
     print("Mantiene índice global de archivos")
     print("Ctrl+C para detener\n")
     
-    dns_general = DNSGeneral()
+    # Uso: python dns_general.py [ip:puerto] [ip:puerto,ip:puerto,...]
+    #   1er argumento: dirección de este nodo; 2do: miembros de su grupo replicado (3 o 5 nodos)
+    #   DNS_GENERAL_NODES="ip:puerto,..." lista las particiones del anillo (primer miembro de cada grupo)
+    host, port = parse_node(sys.argv[1]) if len(sys.argv) > 1 else (DNS_GENERAL_IP, DNS_GENERAL_PORT)
+    grupo = [n.strip() for n in sys.argv[2].split(",")] if len(sys.argv) > 2 else []
+    particion = min(grupo + [node_id((host, port))])
+    nodos = [node_id(addr) for addr in seeds_from_env([parse_node(particion)])]
+    
+    dns_general = DNSGeneral(host, port, cluster_nodes=nodos, group_nodes=grupo)
     dns_general.start()
\ No newline at end of file
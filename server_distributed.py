@@ -5,26 +5,73 @@ import os
 import logging
 import time
 import sys
-from typing import List, Dict, Tuple
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
 # Importaciones del sistema de red seguro
 sys.path.append('src/network')
 from src.network.peer_conector import PeerConnector
 from src.network.transport import ReliableTransport
+from src.core.block_store import BlockStore, STORE_DIR, chunk_id
+from src.core.index_feed import IndexReplica
+from src.core.location_cache import LocationCache
+from src.network.dns_ring import DNSGeneralRing, seeds_from_env
+from src.core.log_pipeline import setup_logging
+from src.core.metrics import MetricsRegistry, serve_prometheus
+from src.core.tracing import Tracer, inject, extract
+from src.core.profiler import SamplingProfiler
 
 # Configuración
 DNS_GENERAL_IP = "127.0.0.5"
 DNS_GENERAL_PORT = 50005
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Escritura con quórum de un archivo con copia local: el DNS General espera hasta 10 s a las réplicas
+REPLICATED_WRITE_TIMEOUT = 15
+
+# Presupuesto de bytes (base64) por respuesta de obtener_bloques, para no exceder un datagrama
+BLOCK_TRANSFER_BUDGET = 48 * 1024
+# Hashes por petición de obtener_bloques: ~70 bytes cada uno, la petición sigue siendo un datagrama pequeño
+BLOCK_REQUEST_BATCH = 64
+
+# Caché de ubicaciones: sin suscripción al índice nadie la invalida, así que el TTL se acota
+LOCATION_CACHE_SIZE = 1024
+LOCATION_NEGATIVE_TTL = 5
+LOCATION_UNSUBSCRIBED_MAX_TTL = 30
+
+# Segundos que una lectura o escritura espera en la cola de un bloqueo antes de rendirse
+LOCK_WAIT_TIMEOUT = 30
+
+# Peticiones seguras que pueden esperar turno en un bloqueo o al DNS General: se atienden en hilos
+# aparte para que no frenen el bucle de escucha (el resto de clientes y los ACK del transporte)
+CONCURRENT_SECURE_ACTIONS = {"consultar", "listar_archivos", "leer", "escribir"}
+SECURE_WORKERS = 32
+
+# Heartbeat: intervalo inicial (luego el que pide cada nodo del DNS General); cualquier petición
+# identificada que atendió el nodo dentro del intervalo ya cuenta como señal de vida
+HEARTBEAT_INTERVAL = 30
+HEARTBEAT_CHECK_INTERVAL = 1
+HEARTBEAT_RETRY_DELAY = 5
+
+# Métricas: acción "metricas" y texto de Prometheus en http://host:(puerto + 3000)/metrics
+METRICS_PORT_OFFSET = 3000
+
+# Trazas: span por petición atendida y por salto; la acción "trazas" los exporta (eventos de Chrome)
+UNTRACED_ACTIONS = {"metricas", "trazas", "perfilar", "evento_bloqueo", "delta_indice"}
+TRACE_EXPORT_LIMIT = 200
+
+# Transporte seguro: datagramas por llamada al sistema (recvmmsg/sendmmsg donde existan; 0 = uno por llamada).
+# Desactivado por defecto: solo compensa donde cada llamada al sistema es cara (ver transporte.rafaga en
+# benchmarks/micro_bench.py); en loopback sin mitigaciones el coste por datagrama de ctypes lo anula
+TRANSPORT_BATCH = 0
+
+# Configuración de logging: escritura por lotes en un hilo aparte
+setup_logging()
 
 class ServidorDistribuido:
-    def __init__(self, server_id: str, host: str, port: int, dns_local_ip: str, dns_local_port: int, folder_path: str = "archivos"):
+    def __init__(self, server_id: str, host: str, port: int, dns_local_ip: str, dns_local_port: int, folder_path: str = "archivos",
+                 storage_engine: str = "archivos"):
         self.server_id = server_id
         self.host = host
         self.port = port
@@ -38,25 +85,66 @@ class ServidorDistribuido:
         self.local_files_lock = threading.Lock()
         
         # Cache de archivos remotos conocidos
-        self.remote_files_cache = {}  # {nombre_archivo: {"server_id": id, "ip": ip, "port": port}}
+        self.remote_files_cache = LocationCache(LOCATION_CACHE_SIZE, LOCATION_NEGATIVE_TTL)  # {nombre_archivo: {"server_id": id, "ip": ip, "port": port}}
+        
+        # Versión de cada archivo local según el DNS General (rechaza escrituras obsoletas)
+        self.file_versions = {}  # {nombre_archivo: version}
+        self.file_versions_lock = threading.Lock()
+        # Comprobar la versión, escribir y registrarla va junto: la versión solo avanza con los datos en disco
+        self.file_write_locks = {}  # {nombre_archivo: threading.Lock}
+        
+        # Bloqueos propios en curso y tokens de fencing más altos vistos por archivo
+        self.held_locks = {}  # {nombre_archivo: {"token": token, "stop": threading.Event}}
+        self.fencing_tokens = {}  # {nombre_archivo: token}
+        
+        # Tabla local de bloqueos de escritura de nuestros archivos, mantenida por avisos push del DNS General
+        self.lock_table = {}  # {nombre_archivo: {"token", "bloqueado_por", "expires_at", "activo"}}
+        self.lock_table_lock = threading.Lock()
+        self.lock_subscription_active = False
+        
+        # Copia local del índice global por nodo del DNS General, mantenida con sus deltas push
+        self.index_replicas = {}  # {nodo: IndexReplica}
+        self.heartbeat_intervals = {}  # {nodo: segundos pedidos por ese nodo del DNS General}
+        self.heartbeat_retry = {}  # {nodo: instante del próximo intento tras un fallo}
+        self.index_resync_lock = threading.Lock()
+        
+        # Métricas del servidor, compartidas con su transporte, el canal seguro y el cliente del DNS General
+        self.metrics = MetricsRegistry(servidor=server_id)
+        self.metrics.gauge("servidor_archivos_locales", fn=lambda: len(self.local_files))
+        self.metrics.gauge("servidor_bloqueos_propios", fn=lambda: len(self.held_locks))
+        self.metrics_server = None
+        self.tracer = Tracer(f"servidor {server_id}")
+        # Perfilado en caliente (acción "perfilar"): pilas colapsadas de todos los hilos del servidor
+        self.profiler = SamplingProfiler()
         
         # Componentes de red seguros
-        self.transport = ReliableTransport(host, port)
+        self.transport = ReliableTransport(host, port, metrics=self.metrics, batch=TRANSPORT_BATCH)
         self.peer_connector = PeerConnector(
             self.transport, 
             f"{host}:{port}", 
             self._handle_secure_message
         )
+        self.secure_executor = ThreadPoolExecutor(max_workers=SECURE_WORKERS, thread_name_prefix="peticion_segura")
         
         # Crear carpeta si no existe
         if not os.path.exists(self.folder_path):
             os.makedirs(self.folder_path)
+        
+        # Motor de almacenamiento: "archivos" (carpeta plana) o "bloques" (deduplicado)
+        self.block_store = BlockStore(self.folder_path) if storage_engine == "bloques" else None
             
         # Inicializar
         self._scan_local_files()
+        # Nodos del DNS General (anillo de hashing consistente por nombre de archivo)
+        self.dns_ring = DNSGeneralRing(seeds_from_env([(DNS_GENERAL_IP, DNS_GENERAL_PORT)]), metrics=self.metrics,
+                                       tracer=self.tracer)
+        self.dns_ring.refresh()
+        
         self._register_with_dns_general()
         self._start_heartbeat()
         self._start_udp_listener()
+        self._suscribir_bloqueos()
+        self._suscribir_indice()
         self._start_file_monitor()
         """Inicia el monitor de archivos para detectar cambios locales"""
         def file_monitor():
@@ -72,15 +160,10 @@ class ServidorDistribuido:
                     changes_detected = False
                     
                     # Escanear archivos actuales
-                    if os.path.exists(self.folder_path):
-                        for filename in os.listdir(self.folder_path):
-                            if filename.endswith('.temp_checkout'):
-                                continue  # Ignorar archivos temporales
-                            
-                            filepath = os.path.join(self.folder_path, filename)
-                            if os.path.isfile(filepath):
-                                mtime = os.path.getmtime(filepath)
-                                current_files[filename] = mtime
+                    for filename in self._listar_archivos_fisicos():
+                        if filename.endswith('.temp_checkout'):
+                            continue  # Ignorar archivos temporales
+                        current_files[filename] = self._archivo_local_mtime(filename)
                     
                     # Detectar archivos nuevos
                     nuevos_archivos = set(current_files.keys()) - set(last_scan.keys())
@@ -159,18 +242,13 @@ class ServidorDistribuido:
     def _notificar_archivo_eliminado(self, nombre_archivo: str):
         """Notifica al DNS General que un archivo fue eliminado"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(5)
-            
             notification = {
                 "accion": "archivo_eliminado",
                 "nombre_archivo": nombre_archivo,
                 "server_id": self.server_id
             }
             
-            sock.sendto(json.dumps(notification).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(4096)
-            response = json.loads(data.decode('utf-8'))
+            response = self.dns_ring.request(notification, timeout=5)
             
             if response.get("status") == "ACK":
                 self.log(f"DNS General notificado sobre eliminación de '{nombre_archivo}'")
@@ -181,9 +259,6 @@ class ServidorDistribuido:
             
         except Exception as e:
             self.log(f"Error notificando eliminación: {e}")
-        finally:
-            if 'sock' in locals():
-                sock.close()
         
     def _start_udp_listener(self):
         """Inicia un listener UDP para peticiones directas del DNS General"""
@@ -197,17 +272,19 @@ class ServidorDistribuido:
                 
                 while self.running:
                     try:
-                        data, addr = sock.recvfrom(8192)
+                        # Datagrama completo: una escritura por bloques trae el manifiesto entero
+                        data, addr = sock.recvfrom(65535)
                         request = json.loads(data.decode('utf-8'))
                         
                         # Procesar petición directa
-                        if request.get("via_dns_general"):
+                        if request.get("via_dns_general") or request.get("accion") in ("metricas", "trazas", "perfilar"):
                             response = self._process_dns_general_request(request)
                         else:
                             response = {"status": "ERROR", "mensaje": "Petición no reconocida"}
                         
-                        # Enviar respuesta
-                        sock.sendto(json.dumps(response).encode('utf-8'), addr)
+                        # Enviar respuesta (los avisos push no la esperan)
+                        if response is not None:
+                            sock.sendto(json.dumps(response).encode('utf-8'), addr)
                         
                     except json.JSONDecodeError:
                         error_response = {"status": "ERROR", "mensaje": "JSON inválido"}
@@ -230,7 +307,22 @@ class ServidorDistribuido:
         thread.start()
         
     def _process_dns_general_request(self, request: Dict) -> Dict:
-        """Procesa peticiones que llegan del DNS General"""
+        """Procesa peticiones que llegan del DNS General y anota su latencia por acción"""
+        accion = request.get("accion")
+        inicio = time.perf_counter()
+        if accion in UNTRACED_ACTIONS:
+            response = self._despachar_udp(request)
+        else:
+            with self.tracer.span(f"servidor {accion}", parent=extract(request), canal="udp",
+                                  nombre_archivo=request.get("nombre_archivo")) as span:
+                response = self._despachar_udp(request)
+                span["atributos"]["status"] = (response or {}).get("status")
+        self.metrics.histogram("servidor_peticion_segundos", accion=accion, canal="udp").record(time.perf_counter() - inicio)
+        if response is not None:
+            self.metrics.counter("servidor_peticiones_total", accion=accion, canal="udp", status=response.get("status")).inc()
+        return response
+    
+    def _despachar_udp(self, request: Dict) -> Dict:
         accion = request.get("accion")
         
         if accion == "leer":
@@ -241,15 +333,32 @@ class ServidorDistribuido:
             return self._handle_eliminar_temporal(request)
         elif accion == "verificar_existencia":
             return self._handle_verificar_existencia(request)
+        elif accion == "obtener_manifiesto":
+            return self._handle_obtener_manifiesto(request)
+        elif accion == "obtener_bloques":
+            return self._handle_obtener_bloques(request)
+        elif accion == "replicar":
+            return self._handle_replicar(request)
+        elif accion == "evento_bloqueo":
+            return self._handle_evento_bloqueo(request)
+        elif accion == "delta_indice":
+            return self._handle_delta_indice(request)
+        elif accion == "anillo_actualizado":
+            return self._handle_anillo_actualizado(request)
+        elif accion == "metricas":
+            return self._handle_metricas(request)
+        elif accion == "trazas":
+            return self._handle_trazas(request)
+        elif accion == "perfilar":
+            return self._handle_perfilar(request)
         else:
             return {"status": "ERROR", "mensaje": f"Acción {accion} no soportada vía UDP"}
     
     def _handle_verificar_existencia(self, request: Dict) -> Dict:
         """Verifica si un archivo existe localmente"""
         nombre_archivo = request.get("nombre_archivo")
-        file_path = os.path.join(self.folder_path, nombre_archivo)
         
-        exists = os.path.exists(file_path) and not nombre_archivo.endswith('.temp_checkout')
+        exists = self._archivo_local_existe(nombre_archivo) and not nombre_archivo.endswith('.temp_checkout')
         
         return {
             "status": "ACK",
@@ -258,18 +367,292 @@ class ServidorDistribuido:
             "server_id": self.server_id
         }
     
+    def _handle_obtener_manifiesto(self, request: Dict) -> Dict:
+        """Devuelve la lista de bloques de un archivo (solo con almacén de bloques)"""
+        nombre_archivo = request.get("nombre_archivo")
+        if self.block_store is None:
+            return {"status": "ERROR", "mensaje": "Este servidor no usa almacén de bloques"}
+        
+        manifest = self.block_store.get_manifest(nombre_archivo)
+        if manifest is None:
+            return {"status": "ERROR", "mensaje": f"Archivo '{nombre_archivo}' no encontrado"}
+        
+        return {
+            "status": "EXITO",
+            "nombre_archivo": nombre_archivo,
+            "bloques": manifest["bloques"],
+            "tamano": manifest["tamano"],
+            "version": self.file_versions.get(nombre_archivo, 0)
+        }
+    
+    def _handle_obtener_bloques(self, request: Dict) -> Dict:
+        """Envía el contenido de los bloques pedidos que quepan en un datagrama"""
+        if self.block_store is None:
+            return {"status": "ERROR", "mensaje": "Este servidor no usa almacén de bloques"}
+        
+        bloques = {}
+        pendientes = []
+        usados = 0
+        for digest in request.get("bloques", [])[:BLOCK_REQUEST_BATCH]:
+            if pendientes:
+                pendientes.append(digest)
+                continue
+            try:
+                codificado = base64.b64encode(self.block_store.read_chunk(digest)).decode('ascii')
+            except FileNotFoundError:
+                return {"status": "ERROR", "mensaje": f"Bloque {digest} no encontrado"}
+            if bloques and usados + len(codificado) > BLOCK_TRANSFER_BUDGET:
+                pendientes.append(digest)
+                continue
+            bloques[digest] = codificado
+            usados += len(codificado)
+        
+        return {"status": "EXITO", "bloques": bloques, "pendientes": pendientes}
+    
+    def _udp_request(self, addr: Tuple[str, int], request: Dict, timeout: float = 10) -> Dict:
+        """Envía una petición UDP y espera una única respuesta JSON"""
+        accion = request.get("accion")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.settimeout(timeout)
+            with self.metrics.timer("salto_segundos", destino="servidor", accion=accion), \
+                    self.tracer.span(f"salto {accion}", destino=f"{addr[0]}:{addr[1]}"):
+                sock.sendto(json.dumps(inject(request)).encode('utf-8'), addr)
+                data, _ = sock.recvfrom(65535)
+            return json.loads(data.decode('utf-8'))
+        except Exception:
+            self.metrics.counter("saltos_fallidos_total", destino="servidor", accion=accion).inc()
+            raise
+        finally:
+            sock.close()
+    
+    def _handle_metricas(self, request: Dict) -> Dict:
+        """Métricas de este servidor: dict por defecto o texto de Prometheus si se pide el formato prometheus"""
+        if request.get("formato") == "prometheus":
+            return {"status": "ACK", "servidor": self.server_id, "texto": self.metrics.prometheus()}
+        return {"status": "ACK", "servidor": self.server_id, "metricas": self.metrics.snapshot()}
+    
+    def _handle_trazas(self, request: Dict) -> Dict:
+        """Spans recientes de este servidor (o de una traza) como eventos de traza de Chrome"""
+        limite = min(int(request.get("limite") or TRACE_EXPORT_LIMIT), TRACE_EXPORT_LIMIT)
+        return {"status": "ACK", "servidor": self.server_id,
+                "trazas": self.tracer.export(request.get("trace_id"), limite)}
+    
+    def _handle_perfilar(self, request: Dict) -> Dict:
+        """Inicia, detiene o consulta el perfilador por muestreo; devuelve pilas colapsadas para flamegraphs"""
+        return {"servidor": self.server_id, **self.profiler.handle(request)}
+    
+    def _descargar_por_bloques(self, server_ip: str, server_port: int, nombre_archivo: str,
+                               revertir: bool = False) -> Dict:
+        """Copia un archivo desde otro servidor transfiriendo solo los bloques que faltan"""
+        if self.block_store is None:
+            return {"status": "ERROR", "mensaje": "Este servidor no usa almacén de bloques"}
+        
+        remote_addr = (server_ip, server_port + 1000)
+        manifest = self._udp_request(remote_addr, {
+            "accion": "obtener_manifiesto",
+            "nombre_archivo": nombre_archivo,
+            "via_dns_general": True
+        })
+        if manifest.get("status") != "EXITO":
+            return manifest
+        
+        with self._candado_archivo(nombre_archivo):
+            if self._version_obsoleta(nombre_archivo, manifest.get("version", 0), revertir):
+                return {"status": "EXITO", "omitido": True, "mensaje": "Versión local más reciente"}
+            
+            faltantes = self.block_store.missing_chunks(manifest["bloques"])
+            resultado = self._traer_bloques(remote_addr, faltantes, self.block_store.put_chunk)
+            if resultado.get("status") != "EXITO":
+                return resultado
+            
+            try:
+                self.block_store.put_manifest(nombre_archivo, manifest["bloques"], manifest["tamano"])
+            except ValueError as e:
+                # Un borrado concurrente liberó bloques sueltos antes de referenciarlos: la reparación reintenta
+                return {"status": "ERROR", "mensaje": str(e)}
+            self._aceptar_version(nombre_archivo, manifest.get("version", 0), revertir)
+        self.log(f"'{nombre_archivo}' copiado por bloques: {len(faltantes)}/{len(manifest['bloques'])} transferidos")
+        return {
+            "status": "EXITO",
+            "bloques_totales": len(manifest["bloques"]),
+            "bloques_transferidos": len(faltantes)
+        }
+    
+    def _traer_bloques(self, remote_addr: Tuple[str, int], digests: List[str], guardar) -> Dict:
+        """Pide a otro servidor los bloques indicados y entrega cada uno, verificado, a guardar(chunk)"""
+        faltantes = list(digests)
+        while faltantes:
+            # Como mucho BLOCK_REQUEST_BATCH hashes por ida y vuelta; el resto se pide en las siguientes
+            lote = faltantes[:BLOCK_REQUEST_BATCH]
+            response = self._udp_request(remote_addr, {
+                "accion": "obtener_bloques",
+                "bloques": lote,
+                "via_dns_general": True
+            })
+            recibidos = response.get("bloques") or {}
+            if response.get("status") != "EXITO" or not recibidos:
+                return {"status": "ERROR", "mensaje": f"Error obteniendo bloques: {response.get('mensaje')}"}
+            
+            for digest, codificado in recibidos.items():
+                chunk = base64.b64decode(codificado)
+                if digest not in lote or chunk_id(chunk) != digest:
+                    return {"status": "ERROR", "mensaje": f"Bloque {digest} corrupto"}
+                guardar(chunk)
+            faltantes = [d for d in faltantes if d not in recibidos]
+        return {"status": "EXITO"}
+    
+    def _escribir_desde_origen(self, nombre_archivo: str, request: Dict) -> Dict:
+        """Escribe el contenido de una petición: incluido en ella o, si trae el manifiesto,
+        pidiendo al servidor de origen solo los bloques que aquí faltan"""
+        bloques = request.get("bloques")
+        if bloques is None:
+            self._escribir_archivo_local(nombre_archivo, request.get("contenido", ""))
+            return {"status": "EXITO"}
+        
+        remote_addr = (request.get("origen_ip"), request.get("origen_port", 0) + 1000)
+        if self.block_store is None:
+            # Sin almacén propio se piden todos los bloques y se reconstruye el archivo
+            recibidos = {}
+            resultado = self._traer_bloques(remote_addr, list(dict.fromkeys(bloques)),
+                                            lambda chunk: recibidos.setdefault(chunk_id(chunk), chunk))
+            if resultado.get("status") == "EXITO":
+                self._escribir_archivo_local(nombre_archivo, b"".join(recibidos[d] for d in bloques).decode('utf-8'))
+            return resultado
+        
+        resultado = self._traer_bloques(remote_addr, self.block_store.missing_chunks(bloques), self.block_store.put_chunk)
+        if resultado.get("status") == "EXITO":
+            self.block_store.put_manifest(nombre_archivo, bloques, request.get("tamano", 0))
+        return resultado
+    
+    def _datos_para_replicas(self, nombre_archivo: str, contenido: str) -> Dict:
+        """Campos de la escritura que viajan a las réplicas. Con almacén de bloques el contenido se
+        deja en una copia temporal y solo viaja su manifiesto: cada réplica pide aquí los bloques que
+        le faltan. Sin él viaja el contenido completo."""
+        if self.block_store is None:
+            return {"contenido": contenido}
+        manifest = self.block_store.put_file(nombre_archivo + ".temp_editing", contenido.encode('utf-8'))
+        return {
+            "bloques": manifest["bloques"],
+            "tamano": manifest["tamano"],
+            "origen_ip": self.host,
+            "origen_port": self.port
+        }
+    
+    def _descartar_temporal_replicas(self, nombre_archivo: str):
+        if self.block_store is not None:
+            self.block_store.delete_file(nombre_archivo + ".temp_editing")
+    
+    def _handle_replicar(self, request: Dict) -> Dict:
+        """Crea una réplica local copiando el archivo directamente desde su propietario"""
+        nombre_archivo = request.get("nombre_archivo")
+        origen_ip = request.get("origen_ip")
+        origen_port = request.get("origen_port")
+        revertir = bool(request.get("revertir"))  # la copia local tiene una escritura sin quórum
+        if not all([nombre_archivo, origen_ip, origen_port]):
+            return {"status": "ERROR", "mensaje": "Información de réplica incompleta"}
+        
+        try:
+            # Con almacén de bloques solo se transfieren los bloques que faltan
+            if self.block_store is not None:
+                resultado = self._descargar_por_bloques(origen_ip, origen_port, nombre_archivo, revertir)
+                if resultado.get("status") == "EXITO" and resultado.get("omitido"):
+                    return {
+                        "status": "EXITO",
+                        "bytes_transferidos": 0,
+                        "version": self.file_versions.get(nombre_archivo, 0),
+                        "procesado_por": self.server_id
+                    }
+                if resultado.get("status") == "EXITO":
+                    bytes_transferidos = self.block_store.get_manifest(nombre_archivo)["tamano"]
+                    if resultado["bloques_totales"]:
+                        bytes_transferidos = bytes_transferidos * resultado["bloques_transferidos"] // resultado["bloques_totales"]
+                    self._agregar_replica_local(nombre_archivo)
+                    return {
+                        "status": "EXITO",
+                        "bytes_transferidos": bytes_transferidos,
+                        "version": self.file_versions.get(nombre_archivo, 0),
+                        "procesado_por": self.server_id
+                    }
+            
+            response = self._udp_request((origen_ip, origen_port + 1000), {
+                "accion": "leer",
+                "nombre_archivo": nombre_archivo,
+                "via_dns_general": True
+            })
+            if response.get("status") != "EXITO":
+                return {"status": "ERROR", "mensaje": f"Origen no entregó el archivo: {response.get('mensaje')}"}
+            
+            contenido = response.get("contenido", "")
+            version = response.get("version", 0)
+            with self._candado_archivo(nombre_archivo):
+                if self._version_obsoleta(nombre_archivo, version, revertir):
+                    # Ya tenemos una versión más nueva que la del origen
+                    return {
+                        "status": "EXITO",
+                        "bytes_transferidos": 0,
+                        "version": self.file_versions.get(nombre_archivo, 0),
+                        "procesado_por": self.server_id
+                    }
+                self._escribir_archivo_local(nombre_archivo, contenido)
+                self._aceptar_version(nombre_archivo, version, revertir)
+            self._agregar_replica_local(nombre_archivo)
+            return {
+                "status": "EXITO",
+                "bytes_transferidos": len(contenido.encode('utf-8')),
+                "version": version,
+                "procesado_por": self.server_id
+            }
+        except Exception as e:
+            return {"status": "ERROR", "mensaje": f"Error creando réplica: {e}"}
+    
+    def _candado_archivo(self, nombre_archivo: str) -> threading.Lock:
+        """Candado de escritura del archivo: se toma para comprobar la versión, escribir y registrarla"""
+        with self.file_versions_lock:
+            return self.file_write_locks.setdefault(nombre_archivo, threading.Lock())
+    
+    def _version_obsoleta(self, nombre_archivo: str, version: int, revertir: bool = False) -> bool:
+        """True si la versión es anterior a la local (con revertir nunca lo es)"""
+        with self.file_versions_lock:
+            return not revertir and version < self.file_versions.get(nombre_archivo, 0)
+    
+    def _aceptar_version(self, nombre_archivo: str, version: int, revertir: bool = False) -> bool:
+        """Registra la versión si no es anterior a la local; False si es obsoleta.
+        Con revertir se acepta aunque sea menor (la local no llegó al quórum).
+        Se llama cuando los datos de esa versión ya están escritos."""
+        with self.file_versions_lock:
+            if not revertir and version < self.file_versions.get(nombre_archivo, 0):
+                return False
+            self.file_versions[nombre_archivo] = version
+            return True
+    
+    def _agregar_replica_local(self, nombre_archivo: str):
+        """Añade una réplica a la lista local sin re-registrar (el DNS General ya la conoce)"""
+        with self.local_files_lock:
+            if any(a["nombre_archivo"] == nombre_archivo for a in self.local_files):
+                return
+            name, ext = os.path.splitext(nombre_archivo)
+            self.local_files.append({
+                "nombre_archivo": nombre_archivo,
+                "extension": ext,
+                "publicado": True,
+                "ttl": 3600,
+                "bandera": 1,  # Copia
+                "ip_origen": self.host
+            })
+        self.log(f"Réplica de '{nombre_archivo}' almacenada localmente")
+    
     def _handle_leer_directo(self, request: Dict) -> Dict:
         """Lee archivo local directamente (para peticiones del DNS General)"""
         nombre_archivo = request.get("nombre_archivo")
-        file_path = os.path.join(self.folder_path, nombre_archivo)
         
-        if os.path.exists(file_path):
+        if self._archivo_local_existe(nombre_archivo):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    contenido = f.read()
+                contenido = self._leer_archivo_local(nombre_archivo)
                 return {
                     "status": "EXITO", 
                     "contenido": contenido,
+                    "version": self.file_versions.get(nombre_archivo, 0),
                     "servidor_origen": self.server_id,
                     "procesado_por": self.server_id
                 }
@@ -281,14 +664,39 @@ class ServidorDistribuido:
     def _handle_escribir_directo(self, request: Dict) -> Dict:
         """Escribe archivo local directamente (para peticiones del DNS General)"""
         nombre_archivo = request.get("nombre_archivo")
-        contenido = request.get("contenido", "")
-        file_path = os.path.join(self.folder_path, nombre_archivo)
+        version = request.get("version")
         
-        es_nuevo_archivo = not os.path.exists(file_path)
+        es_nuevo_archivo = not self._archivo_local_existe(nombre_archivo)
+        
+        # Fencing: rechazar escritores cuyo token es menor que el más alto ya visto
+        token = request.get("token_bloqueo")
+        if token is not None:
+            with self.file_versions_lock:
+                if token < self.fencing_tokens.get(nombre_archivo, 0):
+                    return {
+                        "status": "TOKEN_OBSOLETO",
+                        "mensaje": f"Token de bloqueo {token} obsoleto para '{nombre_archivo}'",
+                        "procesado_por": self.server_id
+                    }
+                self.fencing_tokens[nombre_archivo] = token
         
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(contenido)
+            with self._candado_archivo(nombre_archivo):
+                # Rechazar escrituras con una versión anterior a la que ya tenemos
+                if version is not None and self._version_obsoleta(nombre_archivo, version):
+                    return {
+                        "status": "VERSION_OBSOLETA",
+                        "mensaje": f"'{nombre_archivo}' ya está en la versión {self.file_versions.get(nombre_archivo)}",
+                        "version": self.file_versions.get(nombre_archivo),
+                        "procesado_por": self.server_id
+                    }
+                
+                resultado = self._escribir_desde_origen(nombre_archivo, request)
+                if resultado.get("status") != "EXITO":
+                    return dict(resultado, procesado_por=self.server_id)
+                # La versión avanza solo con los datos ya en disco
+                if version is not None:
+                    self._aceptar_version(nombre_archivo, version)
             
             # Si es un archivo nuevo, actualizar lista local y registro
             if es_nuevo_archivo:
@@ -334,17 +742,19 @@ class ServidorDistribuido:
                 
                 while self.running:
                     try:
-                        data, addr = sock.recvfrom(8192)
+                        # Datagrama completo: una escritura por bloques trae el manifiesto entero
+                        data, addr = sock.recvfrom(65535)
                         request = json.loads(data.decode('utf-8'))
                         
                         # Procesar petición directa
-                        if request.get("via_dns_general"):
+                        if request.get("via_dns_general") or request.get("accion") in ("metricas", "trazas", "perfilar"):
                             response = self._process_dns_general_request(request)
                         else:
                             response = {"status": "ERROR", "mensaje": "Petición no reconocida"}
                         
-                        # Enviar respuesta
-                        sock.sendto(json.dumps(response).encode('utf-8'), addr)
+                        # Enviar respuesta (los avisos push no la esperan)
+                        if response is not None:
+                            sock.sendto(json.dumps(response).encode('utf-8'), addr)
                         
                     except json.JSONDecodeError:
                         error_response = {"status": "ERROR", "mensaje": "JSON inválido"}
@@ -364,23 +774,76 @@ class ServidorDistribuido:
         
     def log(self, message):
         logging.info(f"[{self.server_id}] {message}")
+    
+    # --- Acceso al almacenamiento local (carpeta plana o almacén de bloques) ---
+    
+    def _listar_archivos_fisicos(self) -> List[str]:
+        """Lista los archivos guardados localmente según el motor de almacenamiento"""
+        if not os.path.exists(self.folder_path):
+            return []
+        
+        planos = [
+            f for f in os.listdir(self.folder_path)
+            if f != STORE_DIR and os.path.isfile(os.path.join(self.folder_path, f))
+        ]
+        if self.block_store is None:
+            return planos
+        
+        # Los archivos dejados en la carpeta se importan al almacén de bloques
+        for filename in planos:
+            if filename.endswith('.temp_checkout') or filename.endswith('.temp_editing'):
+                continue
+            try:
+                with open(os.path.join(self.folder_path, filename), 'rb') as f:
+                    self.block_store.put_file(filename, f.read())
+                os.remove(os.path.join(self.folder_path, filename))
+                self.log(f"Archivo '{filename}' importado al almacén de bloques")
+            except Exception as e:
+                self.log(f"Error importando '{filename}' al almacén de bloques: {e}")
+        # Las copias temporales de una escritura en curso no son archivos publicables
+        return [f for f in self.block_store.list_files() if not f.endswith('.temp_editing')]
+    
+    def _archivo_local_existe(self, nombre_archivo: str) -> bool:
+        if self.block_store is not None:
+            return self.block_store.exists(nombre_archivo)
+        return os.path.exists(os.path.join(self.folder_path, nombre_archivo))
+    
+    def _archivo_local_mtime(self, nombre_archivo: str) -> float:
+        if self.block_store is not None:
+            return self.block_store.modified_time(nombre_archivo) or 0.0
+        return os.path.getmtime(os.path.join(self.folder_path, nombre_archivo))
+    
+    def _leer_archivo_local(self, nombre_archivo: str) -> str:
+        if self.block_store is not None:
+            data = self.block_store.get_file(nombre_archivo)
+            if data is None:
+                raise FileNotFoundError(nombre_archivo)
+            return data.decode('utf-8')
+        with open(os.path.join(self.folder_path, nombre_archivo), 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def _escribir_archivo_local(self, nombre_archivo: str, contenido: str):
+        if self.block_store is not None:
+            self.block_store.put_file(nombre_archivo, contenido.encode('utf-8'))
+            return
+        with open(os.path.join(self.folder_path, nombre_archivo), 'w', encoding='utf-8') as f:
+            f.write(contenido)
         
     def _scan_local_files(self):
         """Escanea archivos locales"""
         with self.local_files_lock:
             self.local_files = []
             try:
-                for filename in os.listdir(self.folder_path):
-                    if os.path.isfile(os.path.join(self.folder_path, filename)):
-                        name, ext = os.path.splitext(filename)
-                        self.local_files.append({
-                            "nombre_archivo": filename,
-                            "extension": ext,
-                            "publicado": True,  # Por defecto publicado
-                            "ttl": 3600,
-                            "bandera": 0,  # Original
-                            "ip_origen": self.host
-                        })
+                for filename in self._listar_archivos_fisicos():
+                    name, ext = os.path.splitext(filename)
+                    self.local_files.append({
+                        "nombre_archivo": filename,
+                        "extension": ext,
+                        "publicado": True,  # Por defecto publicado
+                        "ttl": 3600,
+                        "bandera": 0,  # Original
+                        "ip_origen": self.host
+                    })
                         
                 self.log(f"Escaneados {len(self.local_files)} archivos locales")
             except Exception as e:
@@ -388,58 +851,232 @@ class ServidorDistribuido:
     
     def _register_with_dns_general(self):
         """Registra el servidor con el DNS General"""
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(5)
-            
-            register_request = {
-                "accion": "registrar_servidor",
-                "server_id": self.server_id,
-                "ip": self.host,
-                "port": self.port,
-                "archivos": self.local_files
-            }
-            
-            sock.sendto(json.dumps(register_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(4096)
-            response = json.loads(data.decode('utf-8'))
-            
+        # La versión y el mayor token de fencing aceptado viajan con cada archivo: un nodo que recibe
+        # la partición (o que se reinició) no los conoce y sus tokens deben superar al último
+        with self.file_versions_lock:
+            archivos = [
+                {**archivo, "version": self.file_versions.get(archivo.get("nombre_archivo"), 0),
+                 "token_fencing": self.fencing_tokens.get(archivo.get("nombre_archivo"), 0)}
+                for archivo in self.local_files
+            ]
+        register_request = {
+            "accion": "registrar_servidor",
+            "server_id": self.server_id,
+            "ip": self.host,
+            "port": self.port,
+            "archivos": archivos
+        }
+        
+        # Cada nodo del anillo indexa solo los archivos de su partición
+        for nodo, response in self.dns_ring.broadcast(register_request, timeout=5).items():
             if response.get("status") == "ACK":
-                self.log("Registrado exitosamente en DNS General")
+                self.log(f"Registrado exitosamente en DNS General {nodo}")
             else:
-                self.log(f"Error registrando en DNS General: {response}")
-                
-        except Exception as e:
-            self.log(f"Error conectando con DNS General: {e}")
-        finally:
-            if 'sock' in locals():
-                sock.close()
+                self.log(f"Error registrando en DNS General {nodo}: {response}")
     
     def _send_heartbeat(self):
-        """Envía heartbeat al DNS General"""
+        """Envía heartbeat a los nodos del DNS General que no tuvieron noticias nuestras en su intervalo"""
+        heartbeat_request = {
+            "accion": "heartbeat",
+            "server_id": self.server_id
+        }
+        
+        ahora = time.time()
+        pendientes = [
+            f"{ip}:{port}" for ip, port in self.dns_ring.members()
+            if self.dns_ring.idle(f"{ip}:{port}") >= self.heartbeat_intervals.get(f"{ip}:{port}", HEARTBEAT_INTERVAL)
+            and self.heartbeat_retry.get(f"{ip}:{port}", 0) <= ahora
+        ]
+        if not pendientes:
+            return
+        
+        respuestas = self.dns_ring.broadcast(heartbeat_request, timeout=3, nodos=pendientes)
+        for nodo, response in respuestas.items():
+            if response.get("status") != "ACK":
+                self.log(f"Error enviando heartbeat a {nodo}: {response.get('mensaje')}")
+                self.heartbeat_retry[nodo] = ahora + HEARTBEAT_RETRY_DELAY
+                continue
+            
+            # Intervalo adaptativo: el nodo lo alarga cuando tiene muchos servidores
+            self.heartbeat_intervals[nodo] = response.get("intervalo_heartbeat", HEARTBEAT_INTERVAL)
+            
+            # Algún nodo cambió el anillo (se unió o salió otro nodo)
+            if self.dns_ring.update_members(response.get("anillo", [])):
+                self.log(f"Anillo del DNS General actualizado: {response.get('anillo')}")
+                threading.Thread(target=self._reincorporar_al_anillo, daemon=True).start()
+                return
+            
+            # El nodo olvidó la suscripción (p. ej. se reinició): volver a suscribirse
+            if not response.get("suscrito_bloqueos"):
+                self.lock_subscription_active = False
+                self._suscribir_bloqueos()
+            
+            # Suscripción al índice perdida, o se perdieron los últimos lotes (hueco al final)
+            seq_local = self._index_replica(nodo).seq
+            if not response.get("suscrito_indice"):
+                self._suscribir_indice(nodo)
+            elif seq_local is not None and seq_local < response.get("seq_indice", 0):
+                self._suscribir_indice(nodo, seq_local)
+    
+    def _handle_anillo_actualizado(self, request: Dict):
+        """Aviso push de cambio de miembros del DNS General"""
+        if self.dns_ring.update_members(request.get("nodos", [])):
+            self.log(f"Anillo del DNS General actualizado: {request.get('nodos')}")
+            threading.Thread(target=self._reincorporar_al_anillo, daemon=True).start()
+        return None
+    
+    def _reincorporar_al_anillo(self):
+        """Tras un cambio del anillo cada archivo tiene otro nodo dueño: registrarse y suscribirse de nuevo"""
+        nodos = {f"{ip}:{port}" for ip, port in self.dns_ring.members()}
+        for nodo in [n for n in self.index_replicas if n not in nodos]:
+            self.index_replicas.pop(nodo, None)
+        self.remote_files_cache.clear()
+        self._register_with_dns_general()
+        self.lock_subscription_active = False
+        self._suscribir_bloqueos()
+        for nodo in nodos:
+            self._suscribir_indice(nodo)
+    
+    def _index_replica(self, nodo: str) -> IndexReplica:
+        return self.index_replicas.setdefault(nodo, IndexReplica())
+    
+    def _suscribir_bloqueos(self):
+        """Se suscribe a los eventos de bloqueo de nuestros archivos y carga el estado vigente"""
+        # La tabla local solo es fiable si todos los nodos del anillo nos envían sus eventos
+        respuestas = self.dns_ring.broadcast({
+            "accion": "suscribir_bloqueos",
+            "server_id": self.server_id
+        }, timeout=5)
+        vigentes = 0
+        for nodo, response in respuestas.items():
+            if response.get("status") != "ACK":
+                self.log(f"No se pudo suscribir a eventos de bloqueo en {nodo}: {response.get('mensaje')}")
+                return
+            for evento in response.get("bloqueos", []):
+                self._handle_evento_bloqueo(evento)
+            vigentes += len(response.get("bloqueos", []))
+        self.lock_subscription_active = True
+        self.log(f"Suscrito a eventos de bloqueo ({vigentes} bloqueos vigentes)")
+    
+    def _handle_evento_bloqueo(self, request: Dict):
+        """Aplica un aviso push de bloqueo a la tabla local (ignora avisos atrasados)"""
+        nombre_archivo = request.get("nombre_archivo")
+        token = request.get("token", 0)
+        with self.lock_table_lock:
+            actual = self.lock_table.get(nombre_archivo)
+            if actual and (token < actual["token"] or (token == actual["token"] and not actual["activo"])):
+                return None
+            self.lock_table[nombre_archivo] = {
+                "token": token,
+                "bloqueado_por": request.get("bloqueado_por"),
+                "expires_at": time.time() + request.get("expira_en", 0),
+                "activo": request.get("evento") != "liberado"
+            }
+        return None
+    
+    def _suscribir_indice(self, nodo: str = None, desde_seq: int = None):
+        """Se suscribe a los deltas del índice de un nodo (o de todos); con desde_seq pide solo los lotes perdidos"""
+        if nodo is None:
+            for ip, port in self.dns_ring.members():
+                self._suscribir_indice(f"{ip}:{port}")
+            return
+        replica = self._index_replica(nodo)
+        ip, port = nodo.rsplit(":", 1)
+        
+        def pedir(**extra) -> Dict:
+            request = {"accion": "suscribir", "server_id": self.server_id, **extra}
+            return self._udp_request((ip, int(port)), request, timeout=5)
+        
+        with self.index_resync_lock:
+            try:
+                response = pedir(desde_seq=desde_seq) if desde_seq is not None else pedir()
+                if response.get("status") != "ACK":
+                    self.log(f"No se pudo suscribir al índice de {nodo}: {response.get('mensaje')}")
+                    return
+                if "indice" in response:
+                    # Vista completa por páginas; las posteriores pueden ir por delante de la primera
+                    vista, seq_base = dict(response["indice"]), response["seq"]
+                    while response.get("cursor") is not None:
+                        response = pedir(cursor=response["cursor"])
+                        if response.get("status") != "ACK" or "indice" not in response:
+                            self.log(f"Vista del índice de {nodo} incompleta: {response.get('mensaje')}")
+                            return
+                        vista.update(response["indice"])
+                    replica.load({"seq": seq_base, "indice": vista})
+                    self.remote_files_cache.clear()
+                    self.log(f"Índice de {nodo} cargado ({len(vista)} archivos, seq {seq_base})")
+                    if response["seq"] == seq_base:
+                        return
+                    # Reaplicar los lotes desde la primera página deja la vista al día
+                    response = pedir(desde_seq=seq_base)
+                # Los lotes llegan por tramos: se vuelve a pedir desde el último aplicado
+                while response.get("status") == "ACK" and response.get("lotes"):
+                    for lote in response["lotes"]:
+                        if replica.apply_batch(lote) == "aplicado":
+                            self._invalidar_por_deltas(lote["deltas"])
+                    if replica.seq >= response.get("seq", 0):
+                        break
+                    response = pedir(desde_seq=replica.seq)
+                self.log(f"Índice de {nodo} al día (seq {replica.seq})")
+            except Exception as e:
+                self.log(f"Error suscribiendo al índice de {nodo}: {e}")
+    
+    def _handle_delta_indice(self, request: Dict):
+        """Aplica un lote de deltas del índice; ante un hueco de secuencia pide los lotes que faltan"""
+        nodo = request.get("nodo", f"{DNS_GENERAL_IP}:{DNS_GENERAL_PORT}")
+        replica = self._index_replica(nodo)
+        resultado = replica.apply_batch(request)
+        if resultado == "aplicado":
+            self._invalidar_por_deltas(request["deltas"])
+        elif resultado == "hueco":
+            self.log(f"Hueco en deltas del índice de {nodo} (local {replica.seq}, recibido {request.get('seq')}), resincronizando")
+            threading.Thread(target=self._suscribir_indice, args=(nodo, replica.seq), daemon=True).start()
+        elif resultado == "sin_base":
+            threading.Thread(target=self._suscribir_indice, args=(nodo,), daemon=True).start()
+        return None
+    
+    def _invalidar_por_deltas(self, deltas: List[Dict]):
+        """Los archivos que cambiaron en el índice salen de la caché de ubicaciones"""
+        for delta in deltas:
+            self.remote_files_cache.invalidate(delta["nombre_archivo"])
+    
+    def _bloqueo_local(self, nombre_archivo: str):
+        """True/False según la tabla local; None si no es fiable y hay que preguntar al DNS General"""
+        if not self._archivo_local_existe(nombre_archivo):
+            return False  # la lectura remota pasa por el DNS General, que verifica el bloqueo
+        if not self.lock_subscription_active:
+            return None
+        with self.lock_table_lock:
+            entry = self.lock_table.get(nombre_archivo)
+        if entry is None or not entry["activo"]:
+            return False
+        if entry["expires_at"] > time.time():
+            return True
+        return None  # se perdió la renovación o la liberación
+    
+    def _verificar_bloqueo_remoto(self, nombre_archivo: str) -> Optional[bool]:
+        """Pregunta al DNS General si el archivo está bloqueado para escritura (None si no hay respuesta válida)"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(3)
-            
-            heartbeat_request = {
-                "accion": "heartbeat",
-                "server_id": self.server_id
+            bloqueo_request = {
+                "accion": "verificar_bloqueo",
+                "nombre_archivo": nombre_archivo
             }
             
-            sock.sendto(json.dumps(heartbeat_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(1024)
-            
+            response = self.dns_ring.request(bloqueo_request, timeout=5)
         except Exception as e:
-            self.log(f"Error enviando heartbeat: {e}")
-        finally:
-            if 'sock' in locals():
-                sock.close()
+            self.log(f"Error verificando bloqueo: {e}")
+            return None
+        if response.get("status") not in ["LIBRE", "BLOQUEADO"]:
+            # Un REDIRECT sin resolver o un error no dicen nada del bloqueo
+            self.log(f"Bloqueo de '{nombre_archivo}' sin verificar: {response.get('status')} {response.get('mensaje', '')}")
+            return None
+        return response["bloqueado"]
     
     def _start_heartbeat(self):
         """Inicia el hilo de heartbeat"""
         def heartbeat_loop():
             while self.running:
-                time.sleep(30)  # Cada 30 segundos
+                time.sleep(HEARTBEAT_CHECK_INTERVAL)
                 if self.running:
                     self._send_heartbeat()
         
@@ -460,44 +1097,45 @@ class ServidorDistribuido:
                         "port": self.port
                     }
         
+        # Después la caché de ubicaciones (incluye NACK recientes)
+        encontrado, ubicacion = self.remote_files_cache.get(nombre_archivo)
+        if encontrado:
+            return ubicacion if ubicacion else {"found": False}
+        
         # Si no está local, consultar DNS General
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(5)
-            
             query_request = {
                 "accion": "consultar",
                 "nombre_archivo": nombre_archivo
             }
             
-            sock.sendto(json.dumps(query_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(4096)
-            response = json.loads(data.decode('utf-8'))
+            response = self.dns_ring.request(query_request, timeout=5)
             
             if response.get("status") == "ACK":
-                return {
+                ubicacion = {
                     "found": True,
                     "local": False,
                     "server_id": response["server_id"],
                     "ip": response["ip"],
                     "port": response["puerto"]
                 }
+                ttl = response.get("ttl", 0)
+                if self._index_replica(self.dns_ring.owner(nombre_archivo)).seq is None:
+                    ttl = min(ttl, LOCATION_UNSUBSCRIBED_MAX_TTL)
+                self.remote_files_cache.put(nombre_archivo, ubicacion, ttl)
+                return ubicacion
             else:
+                if response.get("status") == "NACK":
+                    self.remote_files_cache.put_negative(nombre_archivo)
                 return {"found": False}
                 
         except Exception as e:
             self.log(f"Error consultando DNS General: {e}")
             return {"found": False, "error": str(e)}
-        finally:
-            if 'sock' in locals():
-                sock.close()
     
     def _request_remote_action(self, server_id: str, accion: str, nombre_archivo: str, contenido: str = None) -> Dict:
         """Solicita una acción a un servidor remoto a través del DNS General"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(10)
-            
             remote_request = {
                 "accion": "solicitar_remoto",
                 "server_id": server_id,
@@ -509,45 +1147,79 @@ class ServidorDistribuido:
             if contenido is not None:
                 remote_request["contenido"] = contenido
             
-            sock.sendto(json.dumps(remote_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(8192)
-            response = json.loads(data.decode('utf-8'))
+            response = self.dns_ring.request(remote_request, timeout=10)
             
+            if response.get("status") not in ["EXITO", "ACK"]:
+                self._invalidar_ubicacion(nombre_archivo, response.get("mensaje"))
             return response
             
         except Exception as e:
             self.log(f"Error en petición remota: {e}")
+            self._invalidar_ubicacion(nombre_archivo, str(e))
             return {"status": "ERROR", "mensaje": str(e)}
-        finally:
-            if 'sock' in locals():
-                sock.close()
+    
+    def _invalidar_ubicacion(self, nombre_archivo: str, motivo: str = None):
+        """Olvida la ubicación cacheada de un archivo (el propietario pudo haber cambiado)"""
+        if self.remote_files_cache.invalidate(nombre_archivo):
+            self.log(f"Ubicación de '{nombre_archivo}' invalidada: {motivo}")
     
     def _handle_secure_message(self, request: Dict, peer_addr: Tuple[str, int]):
-        """Maneja mensajes seguros recibidos de peers"""
+        """Maneja mensajes seguros recibidos de peers (se llama desde el bucle de escucha)"""
+        if request.get("accion") in CONCURRENT_SECURE_ACTIONS:
+            self.secure_executor.submit(self._responder_seguro, request, peer_addr, self._responder_desde_hilo)
+            return
+        self._responder_seguro(request, peer_addr, self.peer_connector.reply)
+    
+    def _responder_desde_hilo(self, request: Dict, response: Dict, peer_addr: Tuple[str, int]):
+        """La sesión y el transporte solo se tocan desde el bucle de escucha: la respuesta se envía en él"""
+        self.transport.reactor.call_soon_threadsafe(self.peer_connector.reply, request, response, peer_addr)
+    
+    def _responder_seguro(self, request: Dict, peer_addr: Tuple[str, int], reply):
         try:
             accion = request.get("accion")
             self.log(f"Mensaje seguro de {peer_addr}: {accion}")
+            inicio = time.perf_counter()
+            response = self._atender_seguro(accion, request, peer_addr)
+            self.metrics.histogram("servidor_peticion_segundos", accion=accion, canal="seguro").record(time.perf_counter() - inicio)
+            self.metrics.counter("servidor_peticiones_total", accion=accion, canal="seguro", status=response.get("status")).inc()
             
-            if accion == "consultar":
-                response = self._handle_consultar(request)
-            elif accion == "listar_archivos":
-                response = self._handle_listar_archivos()
-            elif accion == "leer":
-                response = self._handle_leer(request)
-            elif accion == "escribir":
-                response = self._handle_escribir(request)
-            elif accion == "salir":
-                response = {"status": "ACK", "mensaje": "Desconexión confirmada"}
-            else:
-                response = {"status": "ERROR", "mensaje": f"Acción '{accion}' no reconocida"}
-            
-            # Enviar respuesta cifrada
-            self.peer_connector.send_message(response, peer_addr)
+            # Enviar respuesta cifrada (con el id de la petición, si lo traía)
+            reply(request, response, peer_addr)
             
         except Exception as e:
             self.log(f"Error procesando mensaje seguro: {e}")
             error_response = {"status": "ERROR", "mensaje": str(e)}
-            self.peer_connector.send_message(error_response, peer_addr)
+            reply(request, error_response, peer_addr)
+    
+    def _atender_seguro(self, accion: str, request: Dict, peer_addr: Tuple[str, int]) -> Dict:
+        if accion in UNTRACED_ACTIONS:
+            return self._despachar_seguro(accion, request)
+        with self.tracer.span(f"servidor {accion}", parent=extract(request), canal="seguro",
+                              cliente=f"{peer_addr[0]}:{peer_addr[1]}",
+                              nombre_archivo=request.get("nombre_archivo")) as span:
+            response = self._despachar_seguro(accion, request)
+            span["atributos"]["status"] = response.get("status")
+            return response
+    
+    def _despachar_seguro(self, accion: str, request: Dict) -> Dict:
+        if accion == "consultar":
+            return self._handle_consultar(request)
+        elif accion == "listar_archivos":
+            return self._handle_listar_archivos()
+        elif accion == "leer":
+            return self._handle_leer(request)
+        elif accion == "escribir":
+            return self._handle_escribir(request)
+        elif accion == "salir":
+            return {"status": "ACK", "mensaje": "Desconexión confirmada"}
+        elif accion == "metricas":
+            return self._handle_metricas(request)
+        elif accion == "trazas":
+            return self._handle_trazas(request)
+        elif accion == "perfilar":
+            return self._handle_perfilar(request)
+        else:
+            return {"status": "ERROR", "mensaje": f"Acción '{accion}' no reconocida"}
     
     def _handle_consultar(self, request: Dict) -> Dict:
         """Maneja consulta de archivo específico"""
@@ -577,13 +1249,8 @@ class ServidorDistribuido:
         """Lista todos los archivos disponibles (locales + remotos conocidos)"""
         try:
             # Obtener lista actualizada del DNS General
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(5)
-            
-            list_request = {"accion": "listar_archivos"}
-            sock.sendto(json.dumps(list_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(8192)
-            response = json.loads(data.decode('utf-8'))
+            # Listado unido de todas las particiones del DNS General
+            response = self.dns_ring.listar(timeout=5)
             
             if response.get("status") == "ACK":
                 return response
@@ -616,56 +1283,59 @@ class ServidorDistribuido:
         """Maneja lectura de archivo CON VERIFICACIÓN DE BLOQUEO"""
         nombre_archivo = request.get("nombre_archivo")
         
-        # VERIFICAR SI EL ARCHIVO ESTÁ BLOQUEADO ANTES DE LEER
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(5)
-            
-            bloqueo_request = {
-                "accion": "verificar_bloqueo",
-                "nombre_archivo": nombre_archivo
+        # VERIFICAR SI EL ARCHIVO ESTÁ BLOQUEADO ANTES DE LEER (tabla local; DNS General solo si no es fiable)
+        bloqueado = self._bloqueo_local(nombre_archivo)
+        if bloqueado is None:
+            bloqueado = self._verificar_bloqueo_remoto(nombre_archivo)
+        
+        # Sin confirmar que está libre, la lectura pasa por la cola de bloqueos
+        if bloqueado is False:
+            response = self._leer_sin_bloqueo(request)
+            if response.get("status") != "BLOQUEADO":
+                return response
+        
+        # Si hay un escritor, esperar turno en la cola con un bloqueo de lectura compartido
+        response = self._solicitar_bloqueo(nombre_archivo, "lectura", LOCK_WAIT_TIMEOUT)
+        if response.get("status") == "ERROR":
+            return {"status": "ERROR", "mensaje": f"No se pudo verificar el bloqueo de '{nombre_archivo}': {response.get('mensaje')}"}
+        if response.get("status") != "BLOQUEO_CONCEDIDO":
+            return {
+                "status": "ERROR", 
+                "mensaje": f"Archivo '{nombre_archivo}' bloqueado para escritura por {response.get('bloqueado_por', 'otro servidor')}. No disponible para lectura."
             }
-            
-            sock.sendto(json.dumps(bloqueo_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(4096)
-            response = json.loads(data.decode('utf-8'))
-            
-            # Si está bloqueado, denegar lectura
-            if response.get("bloqueado"):
-                sock.close()
-                return {
-                    "status": "ERROR", 
-                    "mensaje": f"Archivo '{nombre_archivo}' bloqueado para escritura por {response.get('bloqueado_por')}. No disponible para lectura."
-                }
-            
-            sock.close()
-        except Exception as e:
-            self.log(f"Error verificando bloqueo: {e}")
+        try:
+            return self._leer_sin_bloqueo(request)
+        finally:
+            self._liberar_bloqueo_archivo(nombre_archivo, response["token"])
+    
+    def _leer_sin_bloqueo(self, request: Dict) -> Dict:
+        """Lee el archivo localmente o vía DNS General (el bloqueo ya fue resuelto)"""
+        nombre_archivo = request.get("nombre_archivo")
         
-        # Primero intentar leer localmente
-        file_path = os.path.join(self.folder_path, nombre_archivo)
-        if os.path.exists(file_path):
+        # Primero intentar leer localmente (si la copia local cumple la versión pedida)
+        version_minima = request.get("version_minima", 0) or 0
+        if self._archivo_local_existe(nombre_archivo) and self.file_versions.get(nombre_archivo, 0) >= version_minima:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    contenido = f.read()
-                return {"status": "EXITO", "contenido": contenido, "fuente": "local"}
+                contenido = self._leer_archivo_local(nombre_archivo)
+                return {
+                    "status": "EXITO",
+                    "contenido": contenido,
+                    "fuente": "local",
+                    "version": self.file_versions.get(nombre_archivo, 0)
+                }
             except Exception as e:
                 return {"status": "ERROR", "mensaje": f"Error leyendo archivo local: {e}"}
         
         # Si no está local, solicitar al DNS General que maneje la lectura distribuida
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(10)
-            
             read_request = {
                 "accion": "leer",
                 "nombre_archivo": nombre_archivo,
-                "requesting_server": self.server_id
+                "requesting_server": self.server_id,
+                "version_minima": request.get("version_minima", 0)
             }
             
-            sock.sendto(json.dumps(read_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(8192)
-            response = json.loads(data.decode('utf-8'))
+            response = self.dns_ring.request(read_request, timeout=10)
             
             # Añadir información de que vino del sistema distribuido
             if response.get("status") == "EXITO":
@@ -676,84 +1346,94 @@ class ServidorDistribuido:
         except Exception as e:
             self.log(f"Error solicitando lectura distribuida: {e}")
             return {"status": "ERROR", "mensaje": f"Archivo no encontrado: {e}"}
-        finally:
-            if 'sock' in locals():
-                sock.close()
     
     def _handle_escribir(self, request: Dict) -> Dict:
         """Maneja escritura de archivo con sistema de checkout/check-in"""
         nombre_archivo = request.get("nombre_archivo")
         contenido = request.get("contenido", "")
         
-        # Si el archivo existe localmente, escribir directamente
-        file_path = os.path.join(self.folder_path, nombre_archivo)
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(contenido)
-                
-                self.log(f"Archivo '{nombre_archivo}' modificado localmente")
-                return {
-                    "status": "EXITO", 
-                    "mensaje": f"Archivo '{nombre_archivo}' guardado localmente",
-                    "fuente": "local"
-                }
-                
-            except Exception as e:
-                return {"status": "ERROR", "mensaje": f"Error escribiendo archivo: {e}"}
+        # Si hay copia local, la escritura igual pasa por el DNS General: respeta el bloqueo
+        # vigente y se confirma con quórum en todas las réplicas (esta incluida)
+        if self._archivo_local_existe(nombre_archivo):
+            return self._escritura_local_replicada(nombre_archivo, contenido)
         
         # Si no existe localmente, iniciar proceso de checkout/check-in
         return self._handle_escritura_remota(nombre_archivo, contenido)
     
+    def _escritura_local_replicada(self, nombre_archivo: str, contenido: str) -> Dict:
+        """Escritura de un archivo con copia local mediante la escritura con quórum del DNS General"""
+        datos = self._datos_para_replicas(nombre_archivo, contenido)
+        def escribir(token):
+            return self.dns_ring.request({
+                "accion": "escribir",
+                "nombre_archivo": nombre_archivo,
+                **datos,
+                "requesting_server": self.server_id,
+                "token_bloqueo": token
+            }, timeout=REPLICATED_WRITE_TIMEOUT)
+        
+        try:
+            response = escribir(self.held_locks.get(nombre_archivo, {}).get("token"))
+            if response.get("status") == "BLOQUEADO":
+                # Como en la escritura remota: esperar turno en la cola y escribir con el token concedido
+                bloqueo = self._solicitar_bloqueo(nombre_archivo, "escritura", LOCK_WAIT_TIMEOUT)
+                if bloqueo.get("status") != "BLOQUEO_CONCEDIDO":
+                    return {
+                        "status": "ERROR",
+                        "mensaje": f"Archivo bloqueado para escritura por {bloqueo.get('bloqueado_por', response.get('bloqueado_por', 'otro servidor'))}. Intente más tarde."
+                    }
+                try:
+                    response = escribir(bloqueo.get("token"))
+                finally:
+                    self._liberar_bloqueo_archivo(nombre_archivo, bloqueo.get("token"))
+        except Exception as e:
+            self.log(f"Escritura de '{nombre_archivo}' no confirmada: {e}")
+            return {"status": "ERROR", "mensaje": f"DNS General no disponible, escritura no confirmada: {e}"}
+        finally:
+            self._descartar_temporal_replicas(nombre_archivo)
+        
+        if response.get("status") != "EXITO":
+            return response
+        
+        self.log(f"Archivo '{nombre_archivo}' modificado (v{response.get('version')}, quórum {response.get('quorum')})")
+        return {
+            "status": "EXITO",
+            "mensaje": f"Archivo '{nombre_archivo}' guardado en {len(response.get('confirmado_por', []))} réplicas",
+            "fuente": "quorum",
+            "version": response.get("version"),
+            "confirmado_por": response.get("confirmado_por", [])
+        }
+    
     def _handle_escritura_remota(self, nombre_archivo: str, contenido: str) -> Dict:
         """Maneja escritura con sistema de BLOQUEO EXCLUSIVO mejorado"""
         try:
-            # Paso 1: SOLICITAR BLOQUEO EXCLUSIVO
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(10)
-            
-            bloqueo_request = {
-                "accion": "solicitar_bloqueo",
-                "nombre_archivo": nombre_archivo,
-                "requesting_server": self.server_id,
-                "client_id": f"{self.server_id}_client_{int(time.time())}"
-            }
+            # Paso 1: SOLICITAR BLOQUEO EXCLUSIVO (esperando turno en la cola si está ocupado)
+            response = self._solicitar_bloqueo(nombre_archivo, "escritura", LOCK_WAIT_TIMEOUT)
             
-            sock.sendto(json.dumps(bloqueo_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(4096)
-            response = json.loads(data.decode('utf-8'))
-            
-            if response.get("status") == "BLOQUEADO":
-                sock.close()
+            if response.get("status") in ["BLOQUEADO", "BLOQUEO_TIMEOUT"]:
                 return {
                     "status": "ERROR",
-                    "mensaje": f"Archivo bloqueado para escritura por {response.get('bloqueado_por')}. Intente más tarde."
+                    "mensaje": f"Archivo bloqueado para escritura por {response.get('bloqueado_por', 'otro servidor')}. Intente más tarde."
                 }
             elif response.get("status") != "BLOQUEO_CONCEDIDO":
-                sock.close()
                 return {"status": "ERROR", "mensaje": f"No se pudo obtener bloqueo: {response.get('mensaje')}"}
             
-            sock.close()
-            self.log(f"BLOQUEO CONCEDIDO para '{nombre_archivo}' por 10 minutos")
+            self._iniciar_renovacion_bloqueo(nombre_archivo, response.get("token"), response.get("expira_en", 30))
+            self.log(f"BLOQUEO CONCEDIDO para '{nombre_archivo}' (token {response.get('token')}, lease {response.get('expira_en')}s)")
             
             # Paso 2: REALIZAR CHECKOUT (obtener copia para edición)
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(10)
-            
             checkout_request = {
                 "accion": "checkout_archivo",
                 "nombre_archivo": nombre_archivo,
                 "requesting_server": self.server_id
             }
             
-            sock.sendto(json.dumps(checkout_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(8192)
-            response = json.loads(data.decode('utf-8'))
-            sock.close()
+            response = self.dns_ring.request(checkout_request, timeout=10)
             
             if response.get("status") not in ["CHECKOUT_EXITOSO", "NUEVO_ARCHIVO"]:
                 # Liberar bloqueo si checkout falla
                 self._liberar_bloqueo_archivo(nombre_archivo)
+                self._invalidar_ubicacion(nombre_archivo, "checkout fallido")
                 return {"status": "ERROR", "mensaje": f"Error en checkout: {response.get('mensaje')}"}
             
             # Paso 3: CREAR COPIA LOCAL TEMPORAL
@@ -782,6 +1462,10 @@ class ServidorDistribuido:
                 # Liberar bloqueo
                 self._liberar_bloqueo_archivo(nombre_archivo)
                 
+                # Un check-in fallido o que cambió de propietario deja obsoleta la ubicación cacheada
+                if checkin_response.get("status") != "EXITO" or checkin_response.get("fuente", "").startswith("local"):
+                    self._invalidar_ubicacion(nombre_archivo, checkin_response.get("mensaje"))
+                
                 return checkin_response
                 
             except Exception as e:
@@ -802,19 +1486,15 @@ class ServidorDistribuido:
     def _realizar_checkin_con_bloqueo(self, nombre_archivo: str, contenido: str) -> Dict:
         """Realiza check-in verificando si el archivo original aún existe"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(10)
-            
             checkin_request = {
                 "accion": "checkin_archivo",
                 "nombre_archivo": nombre_archivo,
-                "contenido": contenido,
-                "requesting_server": self.server_id
+                **self._datos_para_replicas(nombre_archivo, contenido),
+                "requesting_server": self.server_id,
+                "token_bloqueo": self.held_locks.get(nombre_archivo, {}).get("token")
             }
             
-            sock.sendto(json.dumps(checkin_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(8192)
-            response = json.loads(data.decode('utf-8'))
+            response = self.dns_ring.request(checkin_request, timeout=10)
             
             if response.get("status") == "CHECKIN_EXITOSO":
                 return {
@@ -824,10 +1504,10 @@ class ServidorDistribuido:
                 }
             elif response.get("status") == "CHECKIN_NUEVO_PROPIETARIO":
                 # CASO ESPECIAL: El archivo original desapareció, este servidor se vuelve propietario
-                file_path = os.path.join(self.folder_path, nombre_archivo)
                 try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(contenido)
+                    with self._candado_archivo(nombre_archivo):
+                        self._escribir_archivo_local(nombre_archivo, contenido)
+                        self._aceptar_version(nombre_archivo, response.get("version", 0))
                     
                     # Actualizar lista local
                     with self.local_files_lock:
@@ -863,10 +1543,8 @@ class ServidorDistribuido:
             elif response.get("status") == "EXITO" and response.get("tipo_operacion") == "creacion":
                 self.log(f"Check-in resultó en creación. '{nombre_archivo}' ahora es propiedad de este servidor.")
                # CASO ESPECIAL: El archivo original desapareció, este servidor se vuelve propietario
-                file_path = os.path.join(self.folder_path, nombre_archivo)
                 try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(contenido)
+                    self._escribir_archivo_local(nombre_archivo, contenido)
                     
                     # Actualizar lista local
                     with self.local_files_lock:
@@ -907,24 +1585,87 @@ class ServidorDistribuido:
             self.log(f"Error en check-in: {e}")
             return {"status": "ERROR", "mensaje": f"Error en check-in: {e}"}
         finally:
-            if 'sock' in locals():
-                sock.close()
+            self._descartar_temporal_replicas(nombre_archivo)
     
-    def _liberar_bloqueo_archivo(self, nombre_archivo: str):
-        """Libera el bloqueo de un archivo"""
+    def _solicitar_bloqueo(self, nombre_archivo: str, modo: str, espera: float) -> Dict:
+        """Pide un bloqueo al DNS General; si queda en cola espera el aviso push de concesión"""
         try:
+            bloqueo_request = {
+                "accion": "solicitar_bloqueo",
+                "nombre_archivo": nombre_archivo,
+                "requesting_server": self.server_id,
+                "client_id": f"{self.server_id}_client_{int(time.time())}",
+                "modo": modo,
+                "esperar": espera
+            }
+            
+            # Sale de este socket (siguiendo REDIRECT y REDIRECT_LIDER): el aviso de concesión llega a él
             sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(5)
+            response = self.dns_ring.request(bloqueo_request, timeout=10, sock=sock)
+            if response.get("status") != "EN_COLA":
+                return response
             
+            self.log(f"'{nombre_archivo}' ocupado por {response.get('bloqueado_por')}, en cola ({modo}, posición {response.get('posicion')})")
+            bloqueado_por = response.get("bloqueado_por")
+            # Margen extra: el DNS General avisa él mismo cuando vence la espera
+            deadline = time.time() + response.get("espera_maxima", espera) + 2
+            while time.time() < deadline:
+                sock.settimeout(max(0.1, deadline - time.time()))
+                try:
+                    data, addr = sock.recvfrom(4096)
+                except socket.timeout:
+                    break
+                aviso = json.loads(data.decode('utf-8'))
+                if aviso.get("nombre_archivo") == nombre_archivo and aviso.get("status") in ["BLOQUEO_CONCEDIDO", "BLOQUEO_TIMEOUT"]:
+                    aviso.setdefault("bloqueado_por", bloqueado_por)
+                    return aviso
+            return {"status": "BLOQUEO_TIMEOUT", "mensaje": "Sin aviso del DNS General", "bloqueado_por": bloqueado_por}
+        except Exception as e:
+            self.log(f"Error solicitando bloqueo de '{nombre_archivo}': {e}")
+            return {"status": "ERROR", "mensaje": str(e)}
+        finally:
+            if 'sock' in locals():
+                sock.close()
+    
+    def _iniciar_renovacion_bloqueo(self, nombre_archivo: str, token: int, lease: float):
+        """Renueva el lease en segundo plano mientras dura el trabajo sobre el archivo"""
+        stop = threading.Event()
+        self.held_locks[nombre_archivo] = {"token": token, "stop": stop}
+        
+        def renew_loop():
+            while not stop.wait(max(1.0, lease / 3)):
+                try:
+                    response = self.dns_ring.request({
+                        "accion": "renovar_bloqueo",
+                        "nombre_archivo": nombre_archivo,
+                        "requesting_server": self.server_id,
+                        "token": token
+                    }, timeout=3)
+                    if response.get("status") != "BLOQUEO_RENOVADO":
+                        self.log(f"Lease de '{nombre_archivo}' perdido: {response.get('mensaje')}")
+                        return
+                except Exception as e:
+                    self.log(f"Error renovando bloqueo de '{nombre_archivo}': {e}")
+        
+        thread = threading.Thread(target=renew_loop, daemon=True)
+        thread.start()
+    
+    def _liberar_bloqueo_archivo(self, nombre_archivo: str, token: int = None):
+        """Libera el bloqueo de un archivo (el de escritura propio, o el del token indicado)"""
+        if token is None:
+            held = self.held_locks.pop(nombre_archivo, None)
+            if held:
+                held["stop"].set()
+                token = held["token"]
+        try:
             liberar_request = {
                 "accion": "liberar_bloqueo",
                 "nombre_archivo": nombre_archivo,
-                "requesting_server": self.server_id
+                "requesting_server": self.server_id,
+                "token": token
             }
             
-            sock.sendto(json.dumps(liberar_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(4096)
-            response = json.loads(data.decode('utf-8'))
+            response = self.dns_ring.request(liberar_request, timeout=5)
             
             if response.get("status") == "BLOQUEO_LIBERADO":
                 self.log(f"Bloqueo liberado exitosamente para '{nombre_archivo}'")
@@ -932,27 +1673,20 @@ class ServidorDistribuido:
                 self.log(f"Error liberando bloqueo para '{nombre_archivo}': {response.get('mensaje')}")
                 
         except Exception as e:
-            self.log(f"Error liberando bloqueo: {e}")
-        finally:
-            if 'sock' in locals():
-                sock.close()# server_distributed.py - Servidor que se conecta al DNS General
+            self.log(f"Error liberando bloqueo: {e}")# server_distributed.py - Servidor que se conecta al DNS General
     
     def _realizar_checkin(self, nombre_archivo: str, contenido: str) -> Dict:
         """Realiza check-in del archivo editado"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(10)
-            
             checkin_request = {
                 "accion": "checkin_archivo",
                 "nombre_archivo": nombre_archivo,
-                "contenido": contenido,
-                "requesting_server": self.server_id
+                **self._datos_para_replicas(nombre_archivo, contenido),
+                "requesting_server": self.server_id,
+                "token_bloqueo": self.held_locks.get(nombre_archivo, {}).get("token")
             }
             
-            sock.sendto(json.dumps(checkin_request).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(8192)
-            response = json.loads(data.decode('utf-8'))
+            response = self.dns_ring.request(checkin_request, timeout=10)
             
             if response.get("status") == "CHECKIN_EXITOSO":
                 return {
@@ -962,10 +1696,10 @@ class ServidorDistribuido:
                 }
             elif response.get("status") == "CHECKIN_NUEVO_PROPIETARIO":
                 # El servidor actual se convirtió en propietario, mantener archivo localmente
-                file_path = os.path.join(self.folder_path, nombre_archivo)
                 try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(contenido)
+                    with self._candado_archivo(nombre_archivo):
+                        self._escribir_archivo_local(nombre_archivo, contenido)
+                        self._aceptar_version(nombre_archivo, response.get("version", 0))
                     
                     # Actualizar lista local
                     with self.local_files_lock:
@@ -1002,8 +1736,7 @@ class ServidorDistribuido:
             self.log(f"Error en check-in: {e}")
             return {"status": "ERROR", "mensaje": f"Error en check-in: {e}"}
         finally:
-            if 'sock' in locals():
-                sock.close()
+            self._descartar_temporal_replicas(nombre_archivo)
     
     def _handle_eliminar_temporal(self, request: Dict) -> Dict:
         """Elimina archivo temporal tras check-in exitoso"""
@@ -1038,15 +1771,10 @@ class ServidorDistribuido:
                     changes_detected = False
                     
                     # Escanear archivos físicos locales
-                    if os.path.exists(self.folder_path):
-                        for filename in os.listdir(self.folder_path):
-                            if filename.endswith('.temp_checkout') or filename.endswith('.temp_editing'):
-                                continue  # Ignorar archivos temporales
-                            
-                            filepath = os.path.join(self.folder_path, filename)
-                            if os.path.isfile(filepath):
-                                mtime = os.path.getmtime(filepath)
-                                current_files[filename] = mtime
+                    for filename in self._listar_archivos_fisicos():
+                        if filename.endswith('.temp_checkout') or filename.endswith('.temp_editing'):
+                            continue  # Ignorar archivos temporales
+                        current_files[filename] = self._archivo_local_mtime(filename)
                     
                     # Sincronizar con archivos del DNS local
                     archivos_dns_names = set()
@@ -1201,18 +1929,13 @@ class ServidorDistribuido:
     def _notificar_archivo_eliminado(self, nombre_archivo: str):
         """Notifica al DNS General que un archivo fue eliminado"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(5)
-            
             notification = {
                 "accion": "archivo_eliminado",
                 "nombre_archivo": nombre_archivo,
                 "server_id": self.server_id
             }
             
-            sock.sendto(json.dumps(notification).encode('utf-8'), (DNS_GENERAL_IP, DNS_GENERAL_PORT))
-            data, addr = sock.recvfrom(4096)
-            response = json.loads(data.decode('utf-8'))
+            response = self.dns_ring.request(notification, timeout=5)
             
             if response.get("status") == "ACK":
                 self.log(f"DNS General notificado sobre eliminación de '{nombre_archivo}'")
@@ -1223,16 +1946,17 @@ class ServidorDistribuido:
             
         except Exception as e:
             self.log(f"Error notificando eliminación: {e}")
-        finally:
-            if 'sock' in locals():
-                sock.close()
     
     def start(self):
         """Inicia el servidor distribuido"""
         self.log(f"Servidor distribuido iniciado en {self.host}:{self.port}")
         self.log(f"DNS Local: {self.dns_local_ip}:{self.dns_local_port}")
-        self.log(f"DNS General: {DNS_GENERAL_IP}:{DNS_GENERAL_PORT}")
+        self.log(f"DNS General: {', '.join(f'{ip}:{port}' for ip, port in self.dns_ring.members())}")
         self.log(f"Carpeta local: {os.path.abspath(self.folder_path)}")
+        try:
+            self.metrics_server = serve_prometheus(self.metrics, self.host, self.port + METRICS_PORT_OFFSET)
+        except OSError as e:
+            self.log(f"Sin endpoint de métricas en el puerto {self.port + METRICS_PORT_OFFSET}: {e}")
         
         try:
             # Bucle principal de escucha segura
@@ -1252,6 +1976,11 @@ class ServidorDistribuido:
     def stop(self):
         """Detiene el servidor de manera limpia"""
         self.running = False
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server = None
+        # Las esperas en curso terminan solas (sus respuestas ya no salen); no se aceptan nuevas
+        self.secure_executor.shutdown(wait=False)
         if self.peer_connector:
             self.peer_connector.stop()
         self.log("Servidor detenido")
@@ -1,10 +1,13 @@
 import os
 import json
+import logging
 import threading
 import time
 import socket
 from datetime import datetime
 
+from src.core.log_pipeline import setup_logging, log_fields
+
 CONFIG_FILE = "config_marco.json"
 LOG_FILE = "server.log"
 
@@ -17,6 +20,10 @@ DNS_PORT = 50000
 SERVER_IP = "127.0.0.8"
 SERVER_PORT = 5005
 
+# El log va solo al archivo (la consola es para los avisos interactivos) y se escribe por lotes
+REQUEST_LOG_SAMPLE = 50  # se anota una de cada N peticiones de cada acción
+setup_logging(LOG_FILE, console=False)
+
 
 class FileEntry:
     def __init__(self, name, extension, ttl):
@@ -65,8 +72,7 @@ class FileManager:
                 json.dump(data, f, indent=4)
 
     def log(self, message):
-        with open(LOG_FILE, "a") as log:
-            log.write(f"[{datetime.now().isoformat()}] {message}\n")
+        logging.info(message)
 
     def scan_folder(self):
         """Escanea la carpeta y actualiza la lista de archivos."""
@@ -152,7 +158,8 @@ class UDPServer(threading.Thread):
                 request = json.loads(data.decode())
                 action = request.get("accion")
                 
-                print(f"Petición recibida de {addr}: {request}")
+                logging.info("Petición recibida de %s: %s", addr, action,
+                             extra=log_fields(REQUEST_LOG_SAMPLE, action, accion=action, nombre=request.get("name")))
 
                 if action == "consultar":
                     name = request.get("name")
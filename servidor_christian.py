@@ -1,9 +1,11 @@
 import os
 import json
+import logging
 import threading
 import time
 import socket
-from datetime import datetime
+
+from src.core.log_pipeline import setup_logging
 
 CONFIG_FILE = "file_permissions_config.json_chris"
 LOG_FILE = "file_server.log"
@@ -15,6 +17,9 @@ SERVER_PORT=5002
 
 lock = threading.Lock()
 
+# El hilo que registra solo encola; el archivo se escribe por lotes en segundo plano
+setup_logging(LOG_FILE)
+
 class FileEntry:
     def __init__(self, name, extension, ttl, can_publish):
         self.name = name
@@ -43,9 +48,7 @@ class FileServer:
         self.running = True
     
     def log(self, message):
-        with open(LOG_FILE, "a") as f:
-            f.write(f"[{datetime.now().isoformat()}] {message}\n")
-        print(message)
+        logging.info(message)
     
     def load_config(self):
         if os.path.exists(CONFIG_FILE):
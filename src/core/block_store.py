@@ -0,0 +1,290 @@
+# /src/core/block_store.py
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+# Parámetros del chunking definido por contenido (estilo FastCDC con gear hash)
+MIN_CHUNK = 2 * 1024
+AVG_CHUNK_BITS = 13          # ~8 KB de tamaño medio
+MAX_CHUNK = 32 * 1024       # en base64 cabe en un datagrama UDP
+CHUNK_MASK = (1 << AVG_CHUNK_BITS) - 1
+
+STORE_DIR = ".bloques"
+INDEX_FILE = "indice.json"
+
+def _build_gear_table() -> List[int]:
+    """Tabla gear determinística: todos los servidores cortan en los mismos puntos."""
+    return [
+        int.from_bytes(hashlib.sha256(i.to_bytes(2, "big")).digest()[:8], "big")
+        for i in range(256)
+    ]
+
+GEAR = _build_gear_table()
+MASK_64 = (1 << 64) - 1
+
+# h & CHUNK_MASK solo depende de los últimos AVG_CHUNK_BITS bytes: (g << k) no toca los bits bajos
+# para k >= AVG_CHUNK_BITS. Eso permite calcular de una vez, con aritmética de enteros grandes, qué
+# posiciones cortarían, en lugar de recorrer byte a byte en Python.
+_WINDOW = AVG_CHUNK_BITS
+_FIELD_BITS = 32                      # cada posición ocupa un campo; la suma nunca desborda 2^26
+_SEGMENT = 1 << 20                    # bytes por pasada: acota la memoria de los enteros intermedios
+_GEAR_LO = bytes(g & 0xFF for g in GEAR)
+_GEAR_HI = bytes((g & CHUNK_MASK) >> 8 for g in GEAR)
+_HI_ZERO = bytes(0 if b & (CHUNK_MASK >> 8) == 0 else 1 for b in range(256))
+# Multiplicar por este polinomio suma en cada campo i los valores gear de i-k desplazados k bits
+_WINDOW_POLY = sum(1 << (k * (_FIELD_BITS + 1)) for k in range(_WINDOW))
+
+def _cut_candidates(data: bytes) -> bytes:
+    """Un byte por posición: 0 donde la ventana de _WINDOW bytes que termina ahí deja h & CHUNK_MASK == 0."""
+    field = _FIELD_BITS // 8
+    partes = []
+    for inicio in range(0, len(data), _SEGMENT):
+        desde = max(0, inicio - _WINDOW + 1)  # los bytes previos completan las primeras ventanas
+        trozo = data[desde:inicio + _SEGMENT]
+        campos = bytearray(len(trozo) * field)
+        campos[0::field] = trozo.translate(_GEAR_LO)
+        campos[1::field] = trozo.translate(_GEAR_HI)
+        suma = int.from_bytes(campos, "little") * _WINDOW_POLY
+        suma = suma.to_bytes(len(campos) + _WINDOW * field, "little")[:len(campos)]
+        # Una posición es candidata si su byte bajo y los bits altos de la máscara valen cero
+        bajos = int.from_bytes(suma[0::field], "little")
+        altos = int.from_bytes(suma[1::field].translate(_HI_ZERO), "little")
+        partes.append((bajos | altos).to_bytes(len(trozo), "little")[inicio - desde:])
+    return b"".join(partes)
+
+def chunk_boundaries(data: bytes) -> List[int]:
+    """Devuelve las posiciones de corte (exclusivas) de cada chunk."""
+    cuts = []
+    start = 0
+    n = len(data)
+    candidatos = None
+    while start < n:
+        end = min(start + MAX_CHUNK, n)
+        if end - start <= MIN_CHUNK:
+            cuts.append(end)
+            break
+        h = 0
+        cut = end
+        # El hash arranca en cero tras MIN_CHUNK: hasta llenar la ventana se calcula byte a byte
+        desde = start + MIN_CHUNK
+        for i in range(desde, min(desde + _WINDOW - 1, end)):
+            h = ((h << 1) + GEAR[data[i]]) & MASK_64
+            if h & CHUNK_MASK == 0:
+                cut = i + 1
+                break
+        else:
+            if candidatos is None:
+                candidatos = _cut_candidates(data)
+            i = candidatos.find(0, desde + _WINDOW - 1, end)
+            if i >= 0:
+                cut = i + 1
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+def split_chunks(data: bytes) -> List[bytes]:
+    """Divide los datos en chunks definidos por contenido."""
+    chunks = []
+    start = 0
+    for cut in chunk_boundaries(data):
+        chunks.append(data[start:cut])
+        start = cut
+    return chunks
+
+def chunk_id(chunk: bytes) -> str:
+    return hashlib.sha256(chunk).hexdigest()
+
+class BlockStore:
+    """
+    Almacén de bloques direccionado por contenido (SHA-256).
+    Los archivos se guardan como manifiestos (lista de bloques) con conteo de
+    referencias, de modo que archivos y versiones idénticas o parecidas
+    comparten almacenamiento.
+    """
+
+    def __init__(self, folder_path: str, max_versiones: int = 3):
+        self.root = os.path.join(folder_path, STORE_DIR)
+        self.chunks_dir = os.path.join(self.root, "chunks")
+        self.index_path = os.path.join(self.root, INDEX_FILE)
+        self.max_versiones = max(1, max_versiones)
+        self.lock = threading.Lock()
+
+        # {nombre: {"versiones": [{"bloques": [...], "tamano": n, "modificado": ts}]}}
+        self.archivos: Dict[str, Dict] = {}
+        # {hash: referencias}
+        self.refcounts: Dict[str, int] = {}
+
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        self._load_index()
+
+    # --- Persistencia del índice ---
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.archivos = data.get("archivos", {})
+            self.refcounts = data.get("refcounts", {})
+        except Exception as e:
+            log.warning("[BlockStore] Error cargando índice, se inicia vacío: %s", e)
+            self.archivos, self.refcounts = {}, {}
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"archivos": self.archivos, "refcounts": self.refcounts}, f)
+        os.replace(tmp_path, self.index_path)
+
+    # --- Bloques ---
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def has_chunk(self, digest: str) -> bool:
+        return digest in self.refcounts or os.path.exists(self._chunk_path(digest))
+
+    def missing_chunks(self, digests: List[str]) -> List[str]:
+        """Bloques de la lista que este almacén todavía no tiene."""
+        with self.lock:
+            return [d for d in dict.fromkeys(digests) if not self.has_chunk(d)]
+
+    def read_chunk(self, digest: str) -> bytes:
+        with open(self._chunk_path(digest), 'rb') as f:
+            return f.read()
+
+    def put_chunk(self, chunk: bytes) -> str:
+        """Guarda un bloque suelto (sin referencias) si no existe. Devuelve su hash."""
+        with self.lock:
+            return self._put_chunk_locked(chunk)
+
+    def _put_chunk_locked(self, chunk: bytes) -> str:
+        # Con el lock tomado un _decref concurrente no borra el bloque entre la comprobación y la escritura
+        digest = chunk_id(chunk)
+        path = self._chunk_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(chunk)
+            os.replace(tmp_path, path)
+        return digest
+
+    def _incref(self, digests: List[str]):
+        for d in digests:
+            self.refcounts[d] = self.refcounts.get(d, 0) + 1
+
+    def _decref(self, digests: List[str]):
+        for d in digests:
+            count = self.refcounts.get(d, 0) - 1
+            if count > 0:
+                self.refcounts[d] = count
+                continue
+            self.refcounts.pop(d, None)
+            try:
+                os.remove(self._chunk_path(d))
+            except FileNotFoundError:
+                pass
+
+    # --- Archivos ---
+
+    def put_file(self, nombre: str, data: bytes) -> Dict:
+        """Guarda una nueva versión del archivo y devuelve su manifiesto."""
+        chunks = split_chunks(data)
+        # Escritura de bloques y referencias en una sola sección crítica: ningún borrado se cuela entre ambas
+        with self.lock:
+            digests = [self._put_chunk_locked(chunk) for chunk in chunks]
+            return self._put_manifest_locked(nombre, digests, len(data))
+
+    def put_manifest(self, nombre: str, digests: List[str], tamano: int) -> Dict:
+        """Registra una versión a partir de bloques que ya están en el almacén."""
+        with self.lock:
+            return self._put_manifest_locked(nombre, digests, tamano)
+
+    def _put_manifest_locked(self, nombre: str, digests: List[str], tamano: int) -> Dict:
+        faltantes = [d for d in digests if not os.path.exists(self._chunk_path(d))]
+        if faltantes:
+            raise ValueError(f"Faltan {len(faltantes)} bloques para '{nombre}'")
+
+        manifest = {"bloques": digests, "tamano": tamano, "modificado": time.time()}
+        entry = self.archivos.setdefault(nombre, {"versiones": []})
+        ultima = entry["versiones"][-1] if entry["versiones"] else None
+
+        # Reescribir el mismo contenido no crea una versión nueva
+        if ultima and ultima["bloques"] == digests:
+            ultima["modificado"] = manifest["modificado"]
+        else:
+            self._incref(digests)
+            entry["versiones"].append(manifest)
+            while len(entry["versiones"]) > self.max_versiones:
+                self._decref(entry["versiones"].pop(0)["bloques"])
+
+        self._save_index()
+        return dict(entry["versiones"][-1])
+
+    def get_manifest(self, nombre: str, version: int = -1) -> Optional[Dict]:
+        with self.lock:
+            entry = self.archivos.get(nombre)
+            if not entry or not entry["versiones"]:
+                return None
+            try:
+                return dict(entry["versiones"][version])
+            except IndexError:
+                return None
+
+    def get_file(self, nombre: str, version: int = -1) -> Optional[bytes]:
+        """Materializa el archivo concatenando sus bloques."""
+        manifest = self.get_manifest(nombre, version)
+        if manifest is None:
+            return None
+        return b"".join(self.read_chunk(d) for d in manifest["bloques"])
+
+    def exists(self, nombre: str) -> bool:
+        with self.lock:
+            return nombre in self.archivos
+
+    def list_files(self) -> List[str]:
+        with self.lock:
+            return list(self.archivos.keys())
+
+    def modified_time(self, nombre: str) -> Optional[float]:
+        manifest = self.get_manifest(nombre)
+        return manifest["modificado"] if manifest else None
+
+    def delete_file(self, nombre: str) -> bool:
+        """Elimina todas las versiones del archivo y libera bloques sin referencias."""
+        with self.lock:
+            entry = self.archivos.pop(nombre, None)
+            if entry is None:
+                return False
+            for manifest in entry["versiones"]:
+                self._decref(manifest["bloques"])
+            self._save_index()
+            return True
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            logico = sum(
+                m["tamano"] for entry in self.archivos.values() for m in entry["versiones"]
+            )
+            bloques = list(self.refcounts.keys())
+        fisico = 0
+        for d in bloques:
+            try:
+                fisico += os.path.getsize(self._chunk_path(d))
+            except OSError:
+                pass
+        return {
+            "archivos": len(self.archivos),
+            "bloques": len(bloques),
+            "bytes_logicos": logico,
+            "bytes_fisicos": fisico,
+            "razon_deduplicacion": round(logico / fisico, 3) if fisico else 1.0
+        }
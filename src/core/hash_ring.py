@@ -0,0 +1,61 @@
+# /src/core/hash_ring.py
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+# Nodos virtuales por nodo real: reparten la carga y suavizan los movimientos al unirse o salir
+DEFAULT_VNODES = 64
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], "big")
+
+class HashRing:
+    """
+    Anillo de hashing consistente con nodos virtuales. Cada clave (nombre de
+    archivo) pertenece al primer punto del anillo en sentido horario; al
+    agregar o quitar un nodo solo cambian de dueño las claves de sus tramos.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = DEFAULT_VNODES):
+        self.vnodes = vnodes
+        self.points: List[int] = []
+        self.owners: Dict[int, str] = {}
+        self.nodes: List[str] = []
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        self.nodes.sort()
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            # Colisión improbable: se queda el nodo de menor id para que todos coincidan
+            if point in self.owners:
+                self.owners[point] = min(self.owners[point], node)
+                continue
+            bisect.insort(self.points, point)
+            self.owners[point] = node
+
+    def remove_node(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        restantes = self.nodes
+        self.points, self.owners, self.nodes = [], {}, []
+        for n in restantes:
+            self.add_node(n)
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self.points:
+            return None
+        i = bisect.bisect(self.points, _hash(key)) % len(self.points)
+        return self.owners[self.points[i]]
+
+    def distribution(self, keys: Iterable[str]) -> Dict[str, int]:
+        """Cuántas de las claves le tocan a cada nodo."""
+        conteo = {node: 0 for node in self.nodes}
+        for key in keys:
+            conteo[self.node_for(key)] += 1
+        return conteo
@@ -0,0 +1,197 @@
+# /src/core/index_feed.py
+import bisect
+import json
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+# Bytes (JSON) de deltas por lote: con el sobre de delta_indice cabe en el recvfrom(8192) del servidor
+MAX_BATCH_BYTES = 6 * 1024
+# Bytes por página de la vista completa y por respuesta de recuperación (responde a un recvfrom(65535))
+SNAPSHOT_PAGE_BYTES = 32 * 1024
+# Lotes recientes que se guardan para reenviar huecos
+DELTA_LOG_SIZE = 256
+
+def _encoded_size(obj) -> int:
+    return len(json.dumps(obj).encode('utf-8'))
+
+def index_view(global_file_index: Dict[str, List[Dict]], file_versions: Dict[str, int] = None) -> Dict[str, Dict[str, Dict]]:
+    """Vista compacta del índice global: {nombre: {server_id: {"ip", "port", "bandera", "version"}}}"""
+    file_versions = file_versions or {}
+    return {
+        nombre: {
+            e["server_id"]: {
+                "ip": e["ip"],
+                "port": e["port"],
+                "bandera": e.get("bandera", 0),
+                "version": e.get("version", file_versions.get(nombre, 0))
+            }
+            for e in entries
+        }
+        for nombre, entries in global_file_index.items()
+    }
+
+def diff_index(anterior: Dict[str, Dict[str, Dict]], actual: Dict[str, Dict[str, Dict]]) -> List[Dict]:
+    """
+    Cambios entre dos vistas del índice. Tipos: "agregado" (nueva copia),
+    "eliminado" (copia o archivo completo si server_id es None),
+    "propietario" (cambió la bandera de una copia) y "version".
+    """
+    deltas = []
+    for nombre, copias in actual.items():
+        previas = anterior.get(nombre, {})
+        for server_id, entry in copias.items():
+            previa = previas.get(server_id)
+            if previa is None:
+                tipo = "agregado"
+            elif previa["bandera"] != entry["bandera"]:
+                tipo = "propietario"
+            elif previa["version"] != entry["version"]:
+                tipo = "version"
+            else:
+                continue
+            deltas.append({"tipo": tipo, "nombre_archivo": nombre, "server_id": server_id, **entry})
+        if nombre in anterior:
+            for server_id in previas.keys() - copias.keys():
+                deltas.append({"tipo": "eliminado", "nombre_archivo": nombre, "server_id": server_id})
+    for nombre in anterior.keys() - actual.keys():
+        deltas.append({"tipo": "eliminado", "nombre_archivo": nombre, "server_id": None})
+    return deltas
+
+def apply_delta(view: Dict[str, Dict[str, Dict]], delta: Dict):
+    """Aplica un delta sobre una vista del índice (in situ)."""
+    nombre = delta["nombre_archivo"]
+    server_id = delta.get("server_id")
+    if delta["tipo"] == "eliminado":
+        if server_id is None:
+            view.pop(nombre, None)
+            return
+        copias = view.get(nombre, {})
+        copias.pop(server_id, None)
+        if not copias:
+            view.pop(nombre, None)
+        return
+    view.setdefault(nombre, {})[server_id] = {
+        "ip": delta["ip"], "port": delta["port"], "bandera": delta["bandera"], "version": delta["version"]
+    }
+
+class IndexFeed:
+    """
+    Lado del DNS General: calcula los deltas del índice desde la última
+    publicación, los agrupa en lotes numerados y conserva los recientes para
+    que un suscriptor con un hueco pueda ponerse al día sin la vista completa.
+    Los lotes y las páginas de la vista se cortan por tamaño codificado, no
+    por número de entradas, para que cada uno quepa en un datagrama.
+    """
+
+    def __init__(self, log_size: int = DELTA_LOG_SIZE):
+        self.seq = 0
+        self.view: Dict[str, Dict[str, Dict]] = {}
+        self.log = deque(maxlen=log_size)
+        self.lock = threading.Lock()
+
+    def publish(self, view: Dict[str, Dict[str, Dict]]) -> List[Dict]:
+        """Registra la vista actual y devuelve los lotes nuevos ({"seq", "deltas"})."""
+        with self.lock:
+            deltas = diff_index(self.view, view)
+            self.view = view
+            lotes = []
+            actual, usados = [], 0
+            for delta in deltas:
+                tamano = _encoded_size(delta) + 2
+                if actual and usados + tamano > MAX_BATCH_BYTES:
+                    lotes.append(self._append_locked(actual))
+                    actual, usados = [], 0
+                actual.append(delta)
+                usados += tamano
+            if actual:
+                lotes.append(self._append_locked(actual))
+            return lotes
+
+    def _append_locked(self, deltas: List[Dict]) -> Dict:
+        self.seq += 1
+        lote = {"seq": self.seq, "deltas": deltas}
+        self.log.append(lote)
+        return lote
+
+    def since(self, seq: int, max_bytes: int = None) -> Optional[List[Dict]]:
+        """
+        Lotes posteriores a seq, o None si ya no están en el registro (hay que
+        enviar la vista). Con max_bytes solo los primeros que quepan (al menos uno):
+        el suscriptor vuelve a pedir desde el último que aplicó.
+        """
+        with self.lock:
+            if seq == self.seq:
+                return []
+            if seq > self.seq or not self.log or self.log[0]["seq"] > seq + 1:
+                return None
+            lotes, usados = [], 0
+            for lote in self.log:
+                if lote["seq"] <= seq:
+                    continue
+                if max_bytes is not None:
+                    usados += _encoded_size(lote) + 2
+                    if lotes and usados > max_bytes:
+                        break
+                lotes.append(lote)
+            return lotes
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {"seq": self.seq, "indice": self.view}
+
+    def snapshot_page(self, cursor: str = None, max_bytes: int = SNAPSHOT_PAGE_BYTES) -> Dict:
+        """
+        Página de la vista con los archivos posteriores a cursor (por nombre).
+        Devuelve {"seq", "indice", "cursor"}; cursor es None en la última página.
+        Las páginas pueden venir de seqs distintos: el suscriptor aplica después
+        los lotes desde el seq de la primera, y como cada delta fija el estado
+        completo de una copia, reaplicarlos deja la vista al día.
+        """
+        with self.lock:
+            nombres = sorted(self.view)
+            inicio = bisect.bisect_right(nombres, cursor) if cursor is not None else 0
+            pagina, usados = {}, 0
+            for nombre in nombres[inicio:]:
+                usados += _encoded_size({nombre: self.view[nombre]})
+                if pagina and usados > max_bytes:
+                    return {"seq": self.seq, "indice": pagina, "cursor": ultimo}
+                pagina[nombre] = self.view[nombre]
+                ultimo = nombre
+            return {"seq": self.seq, "indice": pagina, "cursor": None}
+
+class IndexReplica:
+    """
+    Lado del servidor: copia local del índice mantenida con los lotes push.
+    apply_batch detecta duplicados y huecos por número de secuencia.
+    """
+
+    def __init__(self):
+        self.seq: Optional[int] = None
+        self.view: Dict[str, Dict[str, Dict]] = {}
+        self.lock = threading.Lock()
+
+    def load(self, snapshot: Dict):
+        with self.lock:
+            self.view = {nombre: dict(copias) for nombre, copias in snapshot["indice"].items()}
+            self.seq = snapshot["seq"]
+
+    def apply_batch(self, lote: Dict) -> str:
+        """Devuelve "aplicado", "duplicado", "hueco" o "sin_base"."""
+        with self.lock:
+            if self.seq is None:
+                return "sin_base"
+            if lote["seq"] <= self.seq:
+                return "duplicado"
+            if lote["seq"] != self.seq + 1:
+                return "hueco"
+            for delta in lote["deltas"]:
+                apply_delta(self.view, delta)
+            self.seq = lote["seq"]
+            return "aplicado"
+
+    def lookup(self, nombre_archivo: str) -> Optional[Dict[str, Dict]]:
+        """Copias conocidas del archivo ({server_id: entrada}) o None."""
+        with self.lock:
+            copias = self.view.get(nombre_archivo)
+            return dict(copias) if copias else None
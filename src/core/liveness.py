@@ -0,0 +1,176 @@
+# /src/core/liveness.py
+import math
+import threading
+import time
+from collections import deque
+from statistics import NormalDist
+from typing import Callable, Deque, Dict, Hashable, List, Optional
+
+# Resolución y tamaño de la rueda: 512 ranuras de 1 s cubren más de 8 minutos por vuelta
+DEFAULT_TICK = 1.0
+DEFAULT_SLOTS = 512
+
+# Detector phi-accrual: nivel de sospecha a partir del cual se da por muerto, muestras recordadas,
+# desviación mínima (jitter de red y de planificación) y pausa tolerada además de la estadística
+PHI_THRESHOLD = 8.0
+PHI_WINDOW = 100
+MIN_STD = 0.5
+ACCEPTABLE_PAUSE = 2.0
+MAX_MISSES = 3  # tope: nunca se espera más de 3 intervalos comprometidos
+
+class TimingWheel:
+    """
+    Rueda de tiempos con hash: cada clave vive en la ranura de su plazo
+    (plazo / tick módulo ranuras). Reprogramar o cancelar es O(1) y avanzar
+    solo recorre las ranuras de los ticks transcurridos; las claves con
+    plazo en vueltas posteriores se quedan en su ranura.
+    """
+
+    def __init__(self, tick: float = DEFAULT_TICK, slots: int = DEFAULT_SLOTS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.tick = tick
+        self.slots: List[Dict[Hashable, float]] = [{} for _ in range(slots)]
+        self.deadlines: Dict[Hashable, float] = {}
+        self.current = int(clock() // tick)
+
+    def _slot(self, deadline: float) -> Dict[Hashable, float]:
+        return self.slots[int(deadline // self.tick) % len(self.slots)]
+
+    def schedule(self, key: Hashable, deadline: float):
+        self.cancel(key)
+        self._slot(deadline)[key] = deadline
+        self.deadlines[key] = deadline
+
+    def cancel(self, key: Hashable):
+        deadline = self.deadlines.pop(key, None)
+        if deadline is not None:
+            self._slot(deadline).pop(key, None)
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Saca y devuelve las claves con plazo vencido."""
+        objetivo = int(now // self.tick)
+        vencidas = []
+        # Si pasó más de una vuelta basta con recorrer cada ranura una vez
+        for t in range(max(self.current, objetivo - len(self.slots) + 1), objetivo + 1):
+            slot = self.slots[t % len(self.slots)]
+            for key, deadline in list(slot.items()):
+                if deadline <= now:
+                    del slot[key]
+                    del self.deadlines[key]
+                    vencidas.append(key)
+        self.current = objetivo
+        return vencidas
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def __contains__(self, key):
+        return key in self.deadlines
+
+class LivenessTracker:
+    """
+    Vida de los servidores con un detector phi-accrual. Cada señal
+    (heartbeat o cualquier petición del servidor) alimenta la estadística
+    de llegadas de ese servidor y reprograma en la rueda el instante en
+    que su sospecha phi superaría el umbral; expired() devuelve solo los
+    que llegaron a ese plazo, sin recorrer a todos.
+    """
+
+    def __init__(self, interval: float, threshold: float = PHI_THRESHOLD, tick: float = DEFAULT_TICK,
+                 slots: int = DEFAULT_SLOTS, clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self.threshold = threshold
+        self.clock = clock
+        self.wheel = TimingWheel(tick, slots, clock)
+        self.last_seen: Dict[Hashable, float] = {}
+        self.intervals: Dict[Hashable, float] = {}  # intervalo máximo comprometido por cada servidor
+        self.history: Dict[Hashable, Deque[float]] = {}  # llegadas recientes (segundos entre señales)
+        self.sums: Dict[Hashable, List[float]] = {}  # [suma, suma de cuadrados] de history
+        self.z = NormalDist().inv_cdf(1 - 10 ** -threshold)
+        self.lock = threading.Lock()
+
+    def touch(self, key: Hashable, interval: Optional[float] = None):
+        """Anota una señal; interval es el máximo que el servidor se compromete a esperar entre señales."""
+        now = self.clock()
+        with self.lock:
+            previo = self.last_seen.get(key)
+            if previo is not None:
+                self._add_sample_locked(key, now - previo)
+            self.last_seen[key] = now
+            self.intervals[key] = interval or self.interval
+            self.wheel.schedule(key, now + self._timeout_locked(key))
+
+    def _add_sample_locked(self, key: Hashable, muestra: float):
+        historia = self.history.setdefault(key, deque())
+        sumas = self.sums.setdefault(key, [0.0, 0.0])
+        if len(historia) == PHI_WINDOW:
+            vieja = historia.popleft()
+            sumas[0] -= vieja
+            sumas[1] -= vieja * vieja
+        historia.append(muestra)
+        sumas[0] += muestra
+        sumas[1] += muestra * muestra
+
+    def _stats_locked(self, key: Hashable):
+        """(media, desviación) de las llegadas; sin muestras se supone el intervalo comprometido."""
+        historia = self.history.get(key)
+        if not historia:
+            media = self.intervals.get(key, self.interval)
+            return media, media / 4
+        suma, cuadrados = self.sums[key]
+        media = suma / len(historia)
+        varianza = max(0.0, cuadrados / len(historia) - media * media)
+        return media, max(MIN_STD, math.sqrt(varianza))
+
+    def _timeout_locked(self, key: Hashable) -> float:
+        intervalo = self.intervals.get(key, self.interval)
+        media, desviacion = self._stats_locked(key)
+        # Nunca antes del intervalo comprometido (llegadas en ráfaga) ni después de MAX_MISSES intervalos
+        umbral = max(intervalo, media + self.z * desviacion) + ACCEPTABLE_PAUSE
+        return min(umbral, intervalo * MAX_MISSES)
+
+    def phi(self, key: Hashable) -> Optional[float]:
+        """Nivel de sospecha actual (0 = recién visto, >= umbral = se da por muerto)."""
+        with self.lock:
+            visto = self.last_seen.get(key)
+            if visto is None:
+                return None
+            media, desviacion = self._stats_locked(key)
+        transcurrido = self.clock() - visto
+        # Aproximación logística de la cola de la normal (evita log(0) en colas lejanas)
+        y = max(-8.0, min(8.0, (transcurrido - media) / desviacion))
+        e = math.exp(-y * (1.5976 + 0.070566 * y * y))
+        if transcurrido > media:
+            return -math.log10(e / (1.0 + e))
+        return -math.log10(1.0 - 1.0 / (1.0 + e))
+
+    def remove(self, key: Hashable):
+        with self.lock:
+            self._forget_locked(key)
+            self.wheel.cancel(key)
+
+    def _forget_locked(self, key: Hashable):
+        self.last_seen.pop(key, None)
+        self.intervals.pop(key, None)
+        self.history.pop(key, None)
+        self.sums.pop(key, None)
+
+    def expired(self) -> List[Hashable]:
+        """Claves cuya sospecha superó el umbral (dejan de seguirse)."""
+        with self.lock:
+            vencidas = self.wheel.advance(self.clock())
+            for key in vencidas:
+                self._forget_locked(key)
+            return vencidas
+
+    def idle(self, key: Hashable) -> Optional[float]:
+        """Segundos desde la última señal, o None si no se sigue."""
+        with self.lock:
+            visto = self.last_seen.get(key)
+        return None if visto is None else self.clock() - visto
+
+    def __len__(self):
+        return len(self.last_seen)
+
+    def __contains__(self, key):
+        return key in self.last_seen
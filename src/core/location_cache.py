@@ -0,0 +1,73 @@
+# /src/core/location_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Parámetros por defecto de la caché de ubicaciones
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_NEGATIVE_TTL = 5  # segundos que se recuerda un NACK
+
+class LocationCache:
+    """
+    Caché de ubicaciones de archivos remotos con TTL por entrada, tamaño
+    acotado y expulsión LRU. Los NACK se guardan como entradas negativas de
+    vida corta para no repetir consultas de archivos inexistentes.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max(1, max_entries)
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.entries: "OrderedDict[str, Tuple[float, Optional[Dict]]]" = OrderedDict()  # {nombre: (expira, ubicacion o None)}
+        self.lock = threading.Lock()
+        self.stats = {"aciertos": 0, "aciertos_negativos": 0, "fallos": 0, "expulsiones": 0, "invalidaciones": 0}
+
+    def get(self, nombre_archivo: str) -> Tuple[bool, Optional[Dict]]:
+        """(encontrado, ubicacion). Una entrada negativa devuelve (True, None)."""
+        with self.lock:
+            entry = self.entries.get(nombre_archivo)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self.entries[nombre_archivo]
+                self.stats["fallos"] += 1
+                return False, None
+            self.entries.move_to_end(nombre_archivo)
+            if entry[1] is None:
+                self.stats["aciertos_negativos"] += 1
+                return True, None
+            self.stats["aciertos"] += 1
+            return True, dict(entry[1])
+
+    def put(self, nombre_archivo: str, ubicacion: Dict, ttl: float):
+        if ttl <= 0:
+            return
+        self._store(nombre_archivo, dict(ubicacion), ttl)
+
+    def put_negative(self, nombre_archivo: str):
+        self._store(nombre_archivo, None, self.negative_ttl)
+
+    def _store(self, nombre_archivo: str, valor: Optional[Dict], ttl: float):
+        with self.lock:
+            self.entries[nombre_archivo] = (self.clock() + ttl, valor)
+            self.entries.move_to_end(nombre_archivo)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["expulsiones"] += 1
+
+    def invalidate(self, nombre_archivo: str) -> bool:
+        with self.lock:
+            if self.entries.pop(nombre_archivo, None) is None:
+                return False
+            self.stats["invalidaciones"] += 1
+            return True
+
+    def clear(self):
+        with self.lock:
+            self.stats["invalidaciones"] += len(self.entries)
+            self.entries.clear()
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {"entradas": len(self.entries), **self.stats}
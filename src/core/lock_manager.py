@@ -0,0 +1,289 @@
+# /src/core/lock_manager.py
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+# Duración por defecto de un lease de bloqueo (se renueva mientras dure el trabajo)
+DEFAULT_LEASE = 30
+
+# Modos de bloqueo: lectura compartida y escritura exclusiva
+READ = "read"
+WRITE = "write"
+
+class LockManager:
+    """
+    Bloqueos de lectura (compartidos) y escritura (exclusivos) basados en leases
+    cortos y renovables. Las expiraciones se ordenan en un min-heap y un hilo
+    barredor las libera en cuanto vencen. Cada concesión recibe un token de
+    fencing creciente que los servidores propietarios usan para rechazar
+    escritores obsoletos. Las peticiones incompatibles pueden esperar en una
+    cola FIFO por archivo y se avisan con on_grant al concederse o al agotar
+    su tiempo de espera. on_change(nombre, evento, info) recibe cada concesión,
+    renovación y liberación ("adquirido", "renovado", "liberado") para quien
+    mantenga copias del estado de bloqueos.
+    """
+
+    def __init__(self, lease_seconds: float = DEFAULT_LEASE, on_expire: Optional[Callable[[str, Dict], None]] = None,
+                 clock: Callable[[], float] = time.time,
+                 on_change: Optional[Callable[[str, str, Dict], None]] = None, first_token: int = 1):
+        self.lease_seconds = lease_seconds
+        self.on_expire = on_expire
+        self.on_change = on_change
+        self.clock = clock
+        self.locks: Dict[str, Dict[int, Dict]] = {}  # {nombre_archivo: {token: {"locked_by", "client_id", "token", "timestamp", "expires_at", "operation"}}}
+        self.waiters: Dict[str, deque] = {}  # {nombre_archivo: deque([peticion en espera])}
+        self.expiry_heap: List = []  # [(expires_at, token, nombre_archivo)] con borrado perezoso
+        self.wait_heap: List = []  # [(deadline, ticket, nombre_archivo)] con borrado perezoso
+        self.last_token = first_token - 1  # mayor token emitido o visto
+        self.ticket_counter = itertools.count(1)
+        self.cond = threading.Condition()
+        self.running = False
+
+    # --- Operaciones ---
+
+    def acquire(self, nombre_archivo: str, owner: str, client_id: str = None, lease: float = None,
+                mode: str = WRITE, wait_timeout: float = None,
+                on_grant: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+        """
+        Intenta conceder el bloqueo. Solo se concede al momento si es compatible con los
+        titulares actuales y nadie espera antes (FIFO). Con wait_timeout la petición queda
+        en cola y on_grant(status, info) se llama con BLOQUEO_CONCEDIDO o BLOQUEO_TIMEOUT.
+        """
+        lease = lease or self.lease_seconds
+        with self.cond:
+            now = self.clock()
+            self._expire_locked(now)
+            holders = self.locks.get(nombre_archivo, {})
+            if not self.waiters.get(nombre_archivo) and self._compatible(holders, mode):
+                info = self._grant_locked(nombre_archivo, owner, client_id, lease, mode, now)
+                return {"granted": True, **info}
+
+            actual = self._blocking_holder(holders)
+            if not wait_timeout:
+                return {"granted": False, "queued": False, **actual}
+
+            waiter = {
+                "ticket": next(self.ticket_counter),
+                "owner": owner,
+                "client_id": client_id,
+                "lease": lease,
+                "operation": mode,
+                "deadline": now + wait_timeout,
+                "on_grant": on_grant
+            }
+            cola = self.waiters.setdefault(nombre_archivo, deque())
+            cola.append(waiter)
+            heapq.heappush(self.wait_heap, (waiter["deadline"], waiter["ticket"], nombre_archivo))
+            self.cond.notify()
+            return {"granted": False, "queued": True, "ticket": waiter["ticket"], "posicion": len(cola), **actual}
+
+    def renew(self, nombre_archivo: str, owner: str, token: int, lease: float = None) -> Optional[Dict]:
+        """Extiende el lease si el solicitante sigue siendo el titular con ese token."""
+        lease = lease or self.lease_seconds
+        with self.cond:
+            now = self.clock()
+            self._expire_locked(now)
+            info = self.locks.get(nombre_archivo, {}).get(token)
+            if info is None or info["locked_by"] != owner:
+                return None
+            info["expires_at"] = now + lease
+            heapq.heappush(self.expiry_heap, (info["expires_at"], token, nombre_archivo))
+            self._changed(nombre_archivo, "renovado", info)
+            return dict(info)
+
+    def release(self, nombre_archivo: str, owner: str, token: int = None) -> Optional[Dict]:
+        """Libera un bloqueo del titular. Si se indica token, debe coincidir con uno vigente."""
+        with self.cond:
+            holders = self.locks.get(nombre_archivo, {})
+            if token is None:
+                token = next((t for t, info in holders.items() if info["locked_by"] == owner), None)
+            info = holders.get(token)
+            if info is None or info["locked_by"] != owner:
+                return None
+            self._remove_holder_locked(nombre_archivo, token, self.clock())
+            return info
+
+    def check(self, nombre_archivo: str) -> Optional[Dict]:
+        """Devuelve el bloqueo de escritura vigente (o None) sin modificarlo."""
+        with self.cond:
+            self._expire_locked(self.clock())
+            for info in self.locks.get(nombre_archivo, {}).values():
+                if info["operation"] == WRITE:
+                    return dict(info)
+            return None
+
+    def holders(self, nombre_archivo: str) -> List[Dict]:
+        """Todos los titulares vigentes (lectores o el escritor)."""
+        with self.cond:
+            self._expire_locked(self.clock())
+            return [dict(info) for info in self.locks.get(nombre_archivo, {}).values()]
+
+    def queue_length(self, nombre_archivo: str) -> int:
+        with self.cond:
+            return len(self.waiters.get(nombre_archivo, ()))
+
+    def validate(self, nombre_archivo: str, owner: str, token: int, mode: str = None) -> bool:
+        """True si el token es de un bloqueo vigente de ese titular (y del modo indicado)."""
+        with self.cond:
+            self._expire_locked(self.clock())
+            info = self.locks.get(nombre_archivo, {}).get(token)
+            return info is not None and info["locked_by"] == owner and (mode is None or info["operation"] == mode)
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        with self.cond:
+            self._expire_locked(self.clock())
+            return {nombre: [dict(info) for info in holders.values()] for nombre, holders in self.locks.items()}
+
+    def restore(self, nombre_archivo: str, holders: List[Dict]):
+        """Reemplaza los titulares de un archivo con los de otra copia del estado (réplica de un grupo)."""
+        with self.cond:
+            now = self.clock()
+            vigentes = {info["token"]: dict(info) for info in holders if info["expires_at"] > now}
+            if vigentes:
+                self.locks[nombre_archivo] = vigentes
+            else:
+                self.locks.pop(nombre_archivo, None)
+            for token, info in vigentes.items():
+                heapq.heappush(self.expiry_heap, (info["expires_at"], token, nombre_archivo))
+            # Los tokens que emita esta copia si pasa a conceder deben superar a los ya vistos
+            self.last_token = max([self.last_token] + list(vigentes))
+            self.cond.notify()
+
+    def advance_tokens(self, token: int):
+        """Los próximos tokens superarán a token (emitido por otra copia o visto por un servidor)."""
+        with self.cond:
+            self.last_token = max(self.last_token, token)
+
+    # --- Concesión y cola de espera ---
+
+    @staticmethod
+    def _compatible(holders: Dict[int, Dict], mode: str) -> bool:
+        if not holders:
+            return True
+        return mode == READ and all(info["operation"] == READ for info in holders.values())
+
+    @staticmethod
+    def _blocking_holder(holders: Dict[int, Dict]) -> Dict:
+        """Titular a reportar a quien no obtuvo el bloqueo (el escritor si lo hay)."""
+        for info in holders.values():
+            if info["operation"] == WRITE:
+                return dict(info)
+        return dict(next(iter(holders.values()), {}))
+
+    def _grant_locked(self, nombre_archivo: str, owner: str, client_id: str, lease: float, mode: str, now: float) -> Dict:
+        info = {
+            "locked_by": owner,
+            "client_id": client_id or f"{owner}_client",
+            "token": self._next_token_locked(),
+            "timestamp": now,
+            "expires_at": now + lease,
+            "operation": mode
+        }
+        self.locks.setdefault(nombre_archivo, {})[info["token"]] = info
+        heapq.heappush(self.expiry_heap, (info["expires_at"], info["token"], nombre_archivo))
+        self.cond.notify()
+        self._changed(nombre_archivo, "adquirido", info)
+        return info
+
+    def _next_token_locked(self) -> int:
+        self.last_token += 1
+        return self.last_token
+
+    def _remove_holder_locked(self, nombre_archivo: str, token: int, now: float):
+        holders = self.locks.get(nombre_archivo, {})
+        info = holders.pop(token, None)
+        if info is not None:
+            self._changed(nombre_archivo, "liberado", info)
+        if not holders:
+            self.locks.pop(nombre_archivo, None)
+        self._promote_locked(nombre_archivo, now)
+
+    def _promote_locked(self, nombre_archivo: str, now: float):
+        """Concede en orden FIFO a los primeros de la cola mientras sean compatibles."""
+        cola = self.waiters.get(nombre_archivo)
+        while cola and self._compatible(self.locks.get(nombre_archivo, {}), cola[0]["operation"]):
+            waiter = cola.popleft()
+            info = self._grant_locked(nombre_archivo, waiter["owner"], waiter["client_id"],
+                                      waiter["lease"], waiter["operation"], now)
+            self._notify(waiter, "BLOQUEO_CONCEDIDO", info)
+        if not cola:
+            self.waiters.pop(nombre_archivo, None)
+
+    def _changed(self, nombre_archivo: str, evento: str, info: Dict):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(nombre_archivo, evento, dict(info))
+        except Exception as e:
+            log.error("[LockManager] Error publicando evento '%s' de '%s': %s", evento, nombre_archivo, e)
+
+    @staticmethod
+    def _notify(waiter: Dict, status: str, info: Dict):
+        if waiter["on_grant"] is None:
+            return
+        try:
+            waiter["on_grant"](status, dict(info))
+        except Exception as e:
+            log.error("[LockManager] Error notificando a %s: %s", waiter["owner"], e)
+
+    # --- Expiración ---
+
+    def _expire_locked(self, now: float) -> List[str]:
+        """Saca de los heaps los leases y esperas vencidos. Debe llamarse con self.cond tomado."""
+        expirados = []
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            expires_at, token, nombre_archivo = heapq.heappop(self.expiry_heap)
+            info = self.locks.get(nombre_archivo, {}).get(token)
+            # Entradas obsoletas: el bloqueo se liberó o se renovó
+            if info is None or info["expires_at"] > now:
+                continue
+            self._remove_holder_locked(nombre_archivo, token, now)
+            expirados.append((nombre_archivo, info))
+
+        while self.wait_heap and self.wait_heap[0][0] <= now:
+            deadline, ticket, nombre_archivo = heapq.heappop(self.wait_heap)
+            cola = self.waiters.get(nombre_archivo)
+            waiter = next((w for w in cola or () if w["ticket"] == ticket), None)
+            if waiter is None:
+                continue  # ya fue concedido
+            cola.remove(waiter)
+            self._notify(waiter, "BLOQUEO_TIMEOUT", {"locked_by": waiter["owner"], "operation": waiter["operation"]})
+            # Un escritor que se rinde puede desbloquear a los lectores que esperaban detrás
+            self._promote_locked(nombre_archivo, now)
+
+        for nombre_archivo, info in expirados:
+            if self.on_expire:
+                self.on_expire(nombre_archivo, info)
+        return [nombre for nombre, _ in expirados]
+
+    def _next_deadline(self) -> Optional[float]:
+        tops = [heap[0][0] for heap in (self.expiry_heap, self.wait_heap) if heap]
+        return min(tops) if tops else None
+
+    def sweep_loop(self):
+        """Hilo barredor: duerme hasta el próximo vencimiento de los heaps."""
+        with self.cond:
+            self.running = True
+            while self.running:
+                self._expire_locked(self.clock())
+                timeout = None
+                proximo = self._next_deadline()
+                if proximo is not None:
+                    timeout = max(0.0, proximo - self.clock())
+                self.cond.wait(timeout)
+
+    def start(self):
+        thread = threading.Thread(target=self.sweep_loop, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
@@ -0,0 +1,179 @@
+# /src/core/log_pipeline.py
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Formato de texto de siempre; los campos estructurados se añaden al final como clave=valor
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# El escritor vacía sus handlers cuando la cola queda vacía o cada FLUSH_EVERY registros
+FLUSH_EVERY = 256
+
+# Variables de entorno: nivel (DEBUG, INFO, ...) y formato de salida (text o json)
+LEVEL_ENV = "DFS_LOG_LEVEL"
+FORMAT_ENV = "DFS_LOG_FORMAT"
+
+_listener: Optional["BatchingQueueListener"] = None
+_setup_lock = threading.Lock()
+
+def log_fields(sample_every: int = 1, sample_key=None, **fields) -> Dict:
+    """
+    Argumento extra= para un registro estructurado. Con sample_every > 1 solo se
+    emite uno de cada sample_every registros de ese punto del código (y de
+    sample_key, si se indica); WARNING o superior nunca se descarta.
+    """
+    return {"fields": fields, "sample_every": sample_every, "sample_key": sample_key}
+
+class SamplingFilter(logging.Filter):
+    """Muestreo por punto de llamada: deja pasar el primero y luego uno de cada sample_every."""
+
+    def __init__(self):
+        super().__init__()
+        self.counters: Dict = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = getattr(record, "sample_every", 1)
+        if every <= 1 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno, getattr(record, "sample_key", None))
+        with self.lock:
+            n = self.counters.get(key, 0)
+            self.counters[key] = n + 1
+        return n % every == 0
+
+class StructuredFormatter(logging.Formatter):
+    """Texto con los campos como clave=valor, o una línea JSON por registro."""
+
+    def __init__(self, json_output: bool = False):
+        super().__init__(TEXT_FORMAT)
+        self.json_output = json_output
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        every = getattr(record, "sample_every", 1)
+        if self.json_output:
+            data = {
+                "ts": self.formatTime(record),
+                "nivel": record.levelname,
+                "logger": record.name,
+                "hilo": record.threadName,
+                "mensaje": record.getMessage(),
+                **fields
+            }
+            if every > 1:
+                data["muestreo"] = every
+            return json.dumps(data, ensure_ascii=False, default=str)
+
+        text = super().format(record)
+        if fields:
+            text += " | " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if every > 1:
+            text += f" (1 de cada {every})"
+        return text
+
+class _DeferredFlush:
+    """Mezcla para handlers de flujo: emit() solo escribe en el búfer y el escritor vacía por lotes."""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+class BufferedFileHandler(_DeferredFlush, logging.FileHandler):
+    pass
+
+class BufferedStreamHandler(_DeferredFlush, logging.StreamHandler):
+    pass
+
+class BatchingQueueListener(QueueListener):
+    """
+    Escritor en segundo plano: saca registros de la cola y los pasa a sus
+    handlers, pero solo los vacía (una llamada al sistema por lote) cuando
+    la cola se queda vacía o tras FLUSH_EVERY registros seguidos.
+    """
+
+    def __init__(self, q, *handlers, flush_every: int = FLUSH_EVERY):
+        super().__init__(q, *handlers, respect_handler_level=True)
+        self.flush_every = flush_every
+        self.pending = 0
+
+    def dequeue(self, block):
+        if self.pending < self.flush_every:
+            try:
+                record = self.queue.get_nowait()
+                self.pending += 1
+                return record
+            except queue.Empty:
+                pass
+        self.flush_handlers()
+        record = self.queue.get(block)
+        self.pending = 1
+        return record
+
+    def flush_handlers(self):
+        for handler in self.handlers:
+            try:
+                getattr(handler, "flush_batch", handler.flush)()
+            except (OSError, ValueError):
+                pass  # igual que logging.shutdown: un destino cerrado no detiene al escritor
+        self.pending = 0
+
+    def stop(self):
+        if self._thread is None:
+            return
+        super().stop()
+        self.flush_handlers()
+
+def setup_logging(log_file: str = None, level=None, console: bool = True,
+                  json_output: bool = None) -> BatchingQueueListener:
+    """
+    Configura el logging del proceso: los hilos que registran solo encolan
+    (QueueHandler) y un hilo escritor formatea y escribe por lotes. Como
+    basicConfig, solo la primera llamada del proceso tiene efecto. Por
+    debajo de INFO no se muestrea nada (se está depurando).
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        if level is None:
+            level = os.environ.get(LEVEL_ENV, "INFO").upper()
+        level = logging.getLevelName(level) if isinstance(level, str) else level
+        if json_output is None:
+            json_output = os.environ.get(FORMAT_ENV, "text").lower() == "json"
+
+        formatter = StructuredFormatter(json_output)
+        handlers = []
+        if log_file:
+            handlers.append(BufferedFileHandler(log_file, encoding="utf-8"))
+        if console:
+            handlers.append(BufferedStreamHandler(sys.stderr))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        cola = queue.SimpleQueue()
+        queue_handler = QueueHandler(cola)
+        if level > logging.DEBUG:
+            queue_handler.addFilter(SamplingFilter())
+
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _listener = BatchingQueueListener(cola, *handlers)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
@@ -0,0 +1,223 @@
+# /src/core/metrics.py
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Histogramas estilo HDR: 2^SUB_BITS sub-cubetas lineales por potencia de dos (error relativo < 1/2^(SUB_BITS-1))
+SUB_BITS = 5
+HIST_UNIT = 1e-6  # los valores se guardan en microsegundos enteros
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, n: float = 1):
+        with self.lock:
+            self.value += n
+
+class Gauge:
+    """Valor que sube y baja; con fn se lee en el momento de exportar."""
+
+    def __init__(self, fn: Optional[Callable[[], float]] = None):
+        self.value = 0
+        self.fn = fn
+
+    def set(self, value: float):
+        self.value = value
+
+    def read(self) -> float:
+        if self.fn is None:
+            return self.value
+        try:
+            return self.fn()
+        except Exception:
+            return math.nan
+
+class Histogram:
+    """
+    Histograma log-lineal (como HdrHistogram): cubetas exactas hasta 2^SUB_BITS
+    y luego 2^(SUB_BITS-1) cubetas por potencia de dos, así que memoria y
+    precisión relativa no dependen del rango. Registrar es O(1).
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _index(v: int) -> int:
+        if v < (1 << SUB_BITS):
+            return v
+        shift = v.bit_length() - SUB_BITS
+        return (shift << (SUB_BITS - 1)) + (v >> shift)
+
+    @staticmethod
+    def _bounds(idx: int) -> Tuple[int, int]:
+        if idx < (1 << SUB_BITS):
+            return idx, idx
+        half = 1 << (SUB_BITS - 1)
+        shift = idx // half - 1
+        low = (idx - shift * half) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, seconds: float):
+        idx = self._index(max(0, int(seconds / HIST_UNIT)))
+        with self.lock:
+            self.counts[idx] = self.counts.get(idx, 0) + 1
+            self.count += 1
+            self.sum += seconds
+            self.min = min(self.min, seconds)
+            self.max = max(self.max, seconds)
+
+    def quantiles(self, qs=QUANTILES) -> Dict[float, float]:
+        """Valor (punto medio de la cubeta, en segundos) de cada cuantil pedido."""
+        with self.lock:
+            cubetas = sorted(self.counts.items())
+            total, maximo = self.count, self.max
+        resultado = {}
+        if not total:
+            return {q: 0.0 for q in qs}
+        acumulado, i = 0, 0
+        for q in sorted(qs):
+            objetivo = max(1, math.ceil(q * total))
+            while acumulado + cubetas[i][1] < objetivo:
+                acumulado += cubetas[i][1]
+                i += 1
+            low, high = self._bounds(cubetas[i][0])
+            resultado[q] = min(maximo, (low + high) / 2 * HIST_UNIT)
+        return resultado
+
+    def snapshot(self) -> Dict:
+        cuantiles = self.quantiles()
+        with self.lock:
+            datos = {"count": self.count, "sum": self.sum,
+                     "min": 0.0 if self.count == 0 else self.min, "max": self.max}
+        datos.update({f"p{q * 100:g}".replace(".", ""): v for q, v in cuantiles.items()})
+        return datos
+
+class MetricsRegistry:
+    """
+    Registro de métricas en memoria de un componente. Cada métrica se
+    identifica por nombre y etiquetas; pedirla de nuevo devuelve la misma
+    instancia. Se exporta como dict (acción "metricas") o como texto de
+    Prometheus.
+    """
+
+    def __init__(self, **const_labels):
+        self.const_labels = const_labels
+        self.metrics: Dict[Tuple[str, Tuple], object] = {}
+        self.kinds: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, labels: Dict, factory):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        metric = self.metrics.get(key)
+        if metric is not None:
+            return metric
+        with self.lock:
+            if self.kinds.setdefault(name, kind) != kind:
+                raise ValueError(f"La métrica {name} ya existe como {self.kinds[name]}")
+            return self.metrics.setdefault(key, factory())
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get("counter", name, labels, Counter)
+
+    def gauge(self, name: str, fn: Callable[[], float] = None, **labels) -> Gauge:
+        return self._get("gauge", name, labels, lambda: Gauge(fn))
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self._get("summary", name, labels, Histogram)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Registra en el histograma name lo que tarda el bloque (también si lanza)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name, **labels).record(time.perf_counter() - inicio)
+
+    # --- Exportación ---
+
+    def _items(self) -> List[Tuple[str, Dict, object]]:
+        with self.lock:
+            items = list(self.metrics.items())
+        return [(name, {**self.const_labels, **dict(labels)}, metric)
+                for (name, labels), metric in sorted(items, key=lambda kv: (kv[0][0], kv[0][1]))]
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        """{nombre: [{"etiquetas": {...}, "valor": v} o {"etiquetas": {...}, count, sum, p50, ...}]}"""
+        datos: Dict[str, List[Dict]] = {}
+        for name, labels, metric in self._items():
+            if isinstance(metric, Histogram):
+                entrada = {"etiquetas": labels, **metric.snapshot()}
+            elif isinstance(metric, Gauge):
+                entrada = {"etiquetas": labels, "valor": metric.read()}
+            else:
+                entrada = {"etiquetas": labels, "valor": metric.value}
+            datos.setdefault(name, []).append(entrada)
+        return datos
+
+    def prometheus(self) -> str:
+        """Formato de exposición de texto de Prometheus (los histogramas como summary)."""
+        lineas, tipos_escritos = [], set()
+        for name, labels, metric in self._items():
+            if name not in tipos_escritos:
+                lineas.append(f"# TYPE {name} {self.kinds[name]}")
+                tipos_escritos.add(name)
+            if isinstance(metric, Histogram):
+                for q, v in metric.quantiles().items():
+                    lineas.append(f"{name}{_labels({**labels, 'quantile': q})} {_num(v)}")
+                lineas.append(f"{name}_sum{_labels(labels)} {_num(metric.sum)}")
+                lineas.append(f"{name}_count{_labels(labels)} {metric.count}")
+            elif isinstance(metric, Gauge):
+                lineas.append(f"{name}{_labels(labels)} {_num(metric.read())}")
+            else:
+                lineas.append(f"{name}{_labels(labels)} {_num(metric.value)}")
+        return "\n".join(lineas) + "\n"
+
+def _labels(labels: Dict) -> str:
+    if not labels:
+        return ""
+    pares = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pares.append(f'{k}="{v}"')
+    return "{" + ",".join(pares) + "}"
+
+def _num(v: float) -> str:
+    if isinstance(v, float) and math.isnan(v):
+        return "NaN"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+def serve_prometheus(registry: MetricsRegistry, host: str, port: int) -> ThreadingHTTPServer:
+    """Sirve GET /metrics con el texto de Prometheus en un hilo aparte."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            cuerpo = registry.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, format, *args):
+            pass  # los scrapes no van al log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
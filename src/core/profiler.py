@@ -0,0 +1,148 @@
+# /src/core/profiler.py
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Muestreo por defecto: 200 muestras por segundo y pilas de hasta 64 marcos
+PROFILE_INTERVAL = 0.005
+PROFILE_MAX_DEPTH = 64
+
+# Límites de una sesión pedida por red: duración máxima y tamaño de la respuesta (un datagrama)
+PROFILE_MAX_SECONDS = 60
+PROFILE_REPLY_BYTES = 48000
+
+class SamplingProfiler:
+    """
+    Perfilador por muestreo que se enciende y apaga en caliente. Un hilo
+    aparte lee cada `interval` segundos la pila de todos los hilos
+    (sys._current_frames) y cuenta cada pila distinta; los hilos atendidos
+    no se instrumentan, así que el coste no depende de cuántas llamadas
+    hagan. Es tiempo de reloj: un hilo bloqueado en recvfrom también suma
+    muestras en la función que espera. El resultado se exporta en formato
+    de pilas colapsadas (flamegraph.pl, speedscope, inferno).
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, max_depth: int = PROFILE_MAX_DEPTH):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.elapsed = 0.0
+        self.labels: Dict = {}  # code object -> "funcion (archivo:línea)"
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, duration: float = None, interval: float = None) -> bool:
+        """Empieza una sesión nueva (se para sola tras duration segundos). False si ya hay una en marcha."""
+        with self.lock:
+            if self.running:
+                return False
+            if interval:
+                self.interval = interval
+            self.stacks = Counter()
+            self.samples = 0
+            self.elapsed = 0.0
+            self.started_at = time.time()
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, args=(duration,),
+                                           name="perfilador", daemon=True)
+            self.thread.start()
+            return True
+
+    def stop(self):
+        """Detiene la sesión en curso y espera la última muestra."""
+        self.stop_event.set()
+        thread = self.thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self, duration: Optional[float]):
+        inicio = time.perf_counter()
+        fin = inicio + duration if duration else None
+        propio = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            self._sample(propio)
+            if fin is not None and time.perf_counter() >= fin:
+                break
+        self.elapsed = time.perf_counter() - inicio
+
+    def _sample(self, propio: int):
+        nombres = {t.ident: t.name for t in threading.enumerate()}
+        pilas = []
+        for ident, frame in sys._current_frames().items():
+            if ident == propio:
+                continue
+            pila = []
+            while frame is not None and len(pila) < self.max_depth:
+                pila.append(self._label(frame.f_code))
+                frame = frame.f_back
+            pila.append(nombres.get(ident, f"hilo-{ident}"))
+            pila.reverse()
+            pilas.append(";".join(pila))
+        with self.lock:
+            self.stacks.update(pilas)
+            self.samples += 1
+
+    def _label(self, code) -> str:
+        label = self.labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self.labels[code] = label
+        return label
+
+    def collapsed(self, limit: int = None, max_bytes: int = None) -> List[str]:
+        """Líneas "hilo;raíz;...;hoja cuenta", las pilas más frecuentes primero."""
+        with self.lock:
+            stacks = Counter(self.stacks)
+        lineas, tamano = [], 0
+        for pila, cuenta in stacks.most_common(limit):
+            linea = f"{pila} {cuenta}"
+            tamano += len(linea.encode("utf-8")) + 1
+            if max_bytes is not None and tamano > max_bytes:
+                break
+            lineas.append(linea)
+        return lineas
+
+    def status(self) -> Dict:
+        return {
+            "activo": self.running,
+            "inicio": self.started_at,
+            "duracion": round(self.elapsed, 3) if not self.running else round(time.time() - self.started_at, 3),
+            "intervalo": self.interval,
+            "muestras": self.samples,
+            "pilas_distintas": len(self.stacks)
+        }
+
+    def report(self, limit: int = None, max_bytes: int = PROFILE_REPLY_BYTES) -> Dict:
+        """Estado de la sesión y sus pilas colapsadas (recortadas para caber en max_bytes)."""
+        pilas = self.collapsed(limit, max_bytes)
+        return {**self.status(), "pilas": pilas, "omitidas": len(self.stacks) - len(pilas)}
+
+    def handle(self, request: Dict) -> Dict:
+        """
+        Acción "perfilar" de un nodo. operacion: "iniciar" (segundos,
+        intervalo), "detener" o "estado"; las dos últimas devuelven las
+        pilas de la última sesión.
+        """
+        operacion = request.get("operacion", "estado")
+        if operacion == "iniciar":
+            segundos = min(float(request.get("segundos") or 10), PROFILE_MAX_SECONDS)
+            intervalo = max(float(request.get("intervalo") or PROFILE_INTERVAL), 0.001)
+            if not self.start(segundos, intervalo):
+                return {"status": "ERROR", "mensaje": "Ya hay una sesión de perfilado en marcha"}
+            return {"status": "ACK", "mensaje": f"Perfilando durante {segundos:g} s", **self.status()}
+        if operacion == "detener":
+            self.stop()
+        elif operacion != "estado":
+            return {"status": "ERROR", "mensaje": f"Operación '{operacion}' no reconocida"}
+        limite = request.get("limite")
+        return {"status": "ACK", **self.report(int(limite) if limite else None)}
@@ -0,0 +1,695 @@
+# /src/core/raft.py
+import os
+import json
+import base64
+import random
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+FOLLOWER = "seguidor"
+CANDIDATE = "candidato"
+LEADER = "lider"
+
+# Tiempos del protocolo (segundos): el líder late varias veces dentro de un timeout de elección
+ELECTION_TIMEOUT = (1.5, 3.0)
+HEARTBEAT_INTERVAL = 0.3
+TICK = 0.05
+
+# Bytes de entradas por "anexar" y entradas aplicadas que se conservan antes de compactar el log
+MAX_APPEND_BYTES = 32 * 1024
+LOG_RETAIN = 1000
+
+# La instantánea viaja en partes: en base64 cada una cabe en un datagrama UDP
+SNAPSHOT_CHUNK_BYTES = 24 * 1024
+SNAPSHOT_WINDOW = 4  # partes sin confirmar por seguidor
+
+# Lease del líder: parte del timeout mínimo de elección (margen por la deriva de los relojes)
+LEASE_FRACTION = 0.8
+
+class NotLeader(Exception):
+    """La operación solo la acepta el líder; leader es el id del líder conocido (o None)."""
+
+    def __init__(self, leader: Optional[str]):
+        super().__init__(f"No soy el líder (líder actual: {leader})")
+        self.leader = leader
+
+def _write_atomic(path: str, data: Any):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class RaftStorage:
+    """
+    Estado durable de un RaftNode en una carpeta: término y voto (meta.json),
+    el log con una entrada JSON por línea tras una cabecera con el punto de
+    compactación (log.jsonl) y la instantánea de la aplicación (estado.json).
+    Cada escritura termina en fsync, así que lo ya respondido sobrevive a un reinicio.
+    """
+
+    def __init__(self, folder: str):
+        self.meta_path = os.path.join(folder, "meta.json")
+        self.log_path = os.path.join(folder, "log.jsonl")
+        self.state_path = os.path.join(folder, "estado.json")
+        os.makedirs(folder, exist_ok=True)
+
+    def _read(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> Dict:
+        meta = self._read(self.meta_path) or {}
+        datos = {"term": meta.get("term", 0), "voted_for": meta.get("voted_for"), "log_start": 0,
+                 "start_term": 0, "entries": [], "snapshot": self._read(self.state_path)}
+        try:
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                lineas = f.read().split("\n")
+        except FileNotFoundError:
+            return datos
+        cabecera = json.loads(lineas[0])
+        datos.update(log_start=cabecera["inicio"], start_term=cabecera["term_inicio"])
+        for linea in lineas[1:]:
+            if not linea:
+                continue
+            try:
+                datos["entries"].append(json.loads(linea))
+            except ValueError:
+                break  # línea a medio escribir: el nodo cayó antes de confirmarla
+        return datos
+
+    def save_meta(self, term: int, voted_for: Optional[str]):
+        _write_atomic(self.meta_path, {"term": term, "voted_for": voted_for})
+
+    def append(self, entries: List[Dict]):
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(e) + "\n" for e in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def rewrite_log(self, log_start: int, start_term: int, entries: List[Dict]):
+        """Reescribe el log completo (al arrancar, truncar un conflicto o compactar)."""
+        tmp_path = self.log_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"inicio": log_start, "term_inicio": start_term}) + "\n")
+            f.write("".join(json.dumps(e) + "\n" for e in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+
+    def save_snapshot(self, indice: int, term_indice: int, estado: Any):
+        _write_atomic(self.state_path, {"indice": indice, "term_indice": term_indice, "estado": estado})
+
+class RaftNode:
+    """
+    Nodo de un grupo replicado estilo Raft sobre UDP: elección de líder por
+    términos y votos, replicación del log con AppendEntries y avance del
+    commit por mayoría. Las entradas confirmadas se entregan en orden a
+    apply(comando) desde un único hilo, que es también el que llama a
+    snapshot() y restore(), siempre fuera del candado del protocolo. Un
+    seguidor demasiado atrasado (o un ex líder con estado sin confirmar)
+    recibe en partes el estado completo que dio snapshot(), vía restore().
+    Con data_dir, término, voto y log se guardan en disco antes de responder
+    a un voto o a un "anexar", y al compactar se guarda también snapshot():
+    un nodo reiniciado no vuelve a votar en un término en el que ya votó ni
+    olvida entradas que confirmó. Sin data_dir todo vive en memoria (pruebas).
+    """
+
+    def __init__(self, node_id: str, peers: Dict[str, Tuple[str, int]], apply: Callable[[Any], None],
+                 snapshot: Callable[[], Any] = None, restore: Callable[[Any], None] = None,
+                 on_leader: Callable[[], None] = None, election_timeout: Tuple[float, float] = ELECTION_TIMEOUT,
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL, data_dir: str = None,
+                 log: Callable[[str], None] = print):
+        self.node_id = node_id
+        self.addresses = dict(peers)  # {id: (ip, puerto raft)}, incluye este nodo
+        self.peers = [p for p in sorted(peers) if p != node_id]
+        self.apply_fn = apply
+        self.snapshot_fn = snapshot
+        self.restore_fn = restore
+        self.on_leader = on_leader
+        self.election_timeout = election_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.log = log
+
+        self.term = 0
+        self.voted_for: Optional[str] = None
+        self.role = FOLLOWER
+        self.leader_id: Optional[str] = None
+        self.votes = set()
+
+        # Log: la entrada i (1..) está en entries[i - log_start - 1]; hasta log_start ya está compactado
+        self.entries: List[Dict] = []  # [{"term", "comando"}]
+        self.log_start = 0
+        self.start_term = 0
+        self.commit_index = 0
+        self.last_applied = 0
+        self.needs_state = False  # ex líder: puede tener cambios locales que nunca se confirmaron
+
+        self.next_index: Dict[str, int] = {}
+        self.match_index: Dict[str, int] = {}
+        self.acked_at: Dict[str, float] = {}  # envío del último "anexar" que respondió cada seguidor
+        self.transfers: Dict[str, Dict] = {}  # instantáneas en envío por seguidor
+        self.incoming: Optional[Dict] = None  # partes recibidas de una instantánea
+        self.pending_state: Optional[Dict] = None  # instantánea recibida que falta entregar a restore()
+        self.snapshot_cache: Optional[Dict] = None  # última instantánea tomada, en partes para enviar
+        self.snapshot_wanted = False  # un seguidor necesita una instantánea más nueva que la guardada
+        self.last_contact = time.monotonic()
+        self.election_deadline = self._new_deadline()
+        self.last_broadcast = 0.0
+
+        self.cond = threading.Condition()
+        self.disk_lock = threading.Lock()  # instantáneas en disco: nunca se pisa una nueva con una vieja
+        self.saved_index = 0
+        self.sock = None
+        self.running = False
+        self.threads: List[threading.Thread] = []
+
+        self.storage = RaftStorage(data_dir) if data_dir else None
+        self.recovered_state = None
+        if self.storage is not None:
+            self._load_storage()
+
+    # --- Persistencia ---
+
+    def _load_storage(self):
+        datos = self.storage.load()
+        self.term, self.voted_for = datos["term"], datos["voted_for"]
+        self.entries = datos["entries"]
+        self.log_start, self.start_term = datos["log_start"], datos["start_term"]
+        # Lo anterior a log_start ya estaba aplicado; se recupera de la instantánea al arrancar
+        self.commit_index = self.last_applied = self.log_start
+        self.recovered_state = datos["snapshot"]
+        if self.recovered_state is not None:
+            self.commit_index = self.last_applied = self.saved_index = self.recovered_state["indice"]
+        # Deja el archivo sin una posible última línea a medias
+        self.storage.rewrite_log(self.log_start, self.start_term, self.entries)
+        if self.term or self.entries:
+            self.log(f"Raft: recuperado del disco (término {self.term}, índice {self._last()[0]})")
+
+    def _persist_meta_locked(self):
+        if self.storage is not None:
+            self.storage.save_meta(self.term, self.voted_for)
+
+    def _append_locked(self, entradas: List[Dict]):
+        self.entries.extend(entradas)
+        if self.storage is not None:
+            self.storage.append(entradas)
+
+    # --- Consultas de estado ---
+
+    def is_leader(self) -> bool:
+        return self.role == LEADER
+
+    def leader(self) -> Optional[str]:
+        return self.node_id if self.role == LEADER else self.leader_id
+
+    def staleness(self) -> float:
+        """Segundos desde el último contacto con el líder (0 si este nodo es el líder)."""
+        if self.role == LEADER:
+            return 0.0
+        if self.leader_id is None or self.needs_state or self.pending_state is not None:
+            return float("inf")
+        return time.monotonic() - self.last_contact
+
+    def status(self) -> Dict:
+        with self.cond:
+            return {
+                "nodo": self.node_id, "rol": self.role, "term": self.term, "lider": self.leader(),
+                "commit": self.commit_index, "aplicado": self.last_applied,
+                "ultimo_indice": self._last()[0], "inicio_log": self.log_start
+            }
+
+    # --- Propuestas y lecturas (solo el líder) ---
+
+    def _lease_valid_locked(self) -> bool:
+        desde = time.monotonic() - self.election_timeout[0] * LEASE_FRACTION
+        vigentes = 1 + sum(1 for p in self.peers if self.acked_at.get(p, 0) > desde)
+        return vigentes * 2 > len(self.addresses)
+
+    def read_index(self, timeout: float = 1) -> int:
+        """
+        Índice confirmado hasta el que el líder puede responder sin quedar obsoleto.
+        Vale mientras una mayoría haya respondido a un "anexar" enviado hace menos
+        que el timeout mínimo de elección (nadie pudo elegir otro líder entretanto)
+        y ya se confirmó una entrada de este término; si no, late y espera.
+        NotLeader si en timeout la mayoría no lo confirma.
+        """
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while True:
+                if self.role != LEADER:
+                    raise NotLeader(self.leader_id)
+                if self._lease_valid_locked() and self._term_at(self.commit_index) == self.term:
+                    return self.commit_index
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise NotLeader(None)
+                if time.monotonic() - self.last_broadcast >= TICK:
+                    self._broadcast_locked()
+                self.cond.wait(min(remaining, TICK))
+
+    def step_down(self):
+        """Deja el liderazgo (sin cambiar de término): el estado vuelve a copiarse del próximo líder."""
+        with self.cond:
+            if self.role == LEADER:
+                self._step_down_locked(self.term)
+
+    def propose(self, comando: Any) -> int:
+        """Agrega un comando al log y lo envía a los seguidores. Devuelve su índice."""
+        with self.cond:
+            if self.role != LEADER:
+                raise NotLeader(self.leader_id)
+            self._append_locked([{"term": self.term, "comando": comando}])
+            index = self._last()[0]
+            self.match_index[self.node_id] = index
+            self._advance_commit_locked()
+            self._broadcast_locked()
+        return index
+
+    def wait_committed(self, index: int, timeout: float = 5) -> bool:
+        """Espera a que la entrada quede confirmada por mayoría en el término en que se propuso."""
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            term = self.term
+            while self.commit_index < index:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.role != LEADER or self.term != term:
+                    return False
+                self.cond.wait(remaining)
+            return True
+
+    # --- Log ---
+
+    def _last(self) -> Tuple[int, int]:
+        if self.entries:
+            return self.log_start + len(self.entries), self.entries[-1]["term"]
+        return self.log_start, self.start_term
+
+    def _term_at(self, index: int) -> Optional[int]:
+        if index == self.log_start:
+            return self.start_term
+        if index < self.log_start or index > self.log_start + len(self.entries):
+            return None
+        return self.entries[index - self.log_start - 1]["term"]
+
+    def _compaction_due_locked(self) -> bool:
+        exceso = self.last_applied - self.log_start - LOG_RETAIN
+        # En disco se compacta por tandas: cada una guarda la instantánea y reescribe el log
+        return exceso > 0 and (self.storage is None or exceso >= LOG_RETAIN)
+
+    def _take_snapshot(self):
+        """Compacta el log y, si hace falta, toma la instantánea en last_applied (hilo que aplica, sin cond)."""
+        with self.cond:
+            indice, term_indice = self.last_applied, self._term_at(self.last_applied)
+            compactar = self._compaction_due_locked()
+            tomar = self.snapshot_fn is not None and (self.snapshot_wanted or (compactar and self.storage is not None))
+            self.snapshot_wanted = False
+        foto = None
+        if tomar:
+            estado = self.snapshot_fn()
+            datos = json.dumps(estado).encode('utf-8')
+            foto = {"indice": indice, "term_indice": term_indice,
+                    "partes": [base64.b64encode(datos[i:i + SNAPSHOT_CHUNK_BYTES]).decode('ascii')
+                               for i in range(0, len(datos), SNAPSHOT_CHUNK_BYTES)]}
+            if self.storage is not None:
+                with self.disk_lock:
+                    if indice > self.saved_index:
+                        self.storage.save_snapshot(indice, term_indice, estado)
+                        self.saved_index = indice
+        with self.cond:
+            if foto is not None:
+                self.snapshot_cache = foto
+            hasta = indice - LOG_RETAIN
+            # Sin la instantánea en disco no se borra nada del log guardado
+            guardada = self.storage is None or self.snapshot_fn is None or self.saved_index >= indice
+            if not compactar or hasta <= self.log_start or not guardada:
+                return
+            self.start_term = self._term_at(hasta)
+            del self.entries[:hasta - self.log_start]
+            self.log_start = hasta
+            if self.storage is not None:
+                self.storage.rewrite_log(self.log_start, self.start_term, self.entries)
+
+    # --- Roles ---
+
+    def _new_deadline(self) -> float:
+        return time.monotonic() + random.uniform(*self.election_timeout)
+
+    def _step_down_locked(self, term: int):
+        if self.role == LEADER:
+            self.log(f"Raft: deja de ser líder (término {term})")
+            self.needs_state = True
+        if term > self.term:
+            self.term = term
+            self.voted_for = None
+            self._persist_meta_locked()
+        self.role = FOLLOWER
+        self.election_deadline = self._new_deadline()
+        self.cond.notify_all()
+
+    def _start_election_locked(self):
+        self.term += 1
+        self.role = CANDIDATE
+        self.voted_for = self.node_id
+        self._persist_meta_locked()
+        self.votes = {self.node_id}
+        self.leader_id = None
+        self.election_deadline = self._new_deadline()
+        ultimo_indice, ultimo_term = self._last()
+        self.log(f"Raft: elección para el término {self.term}")
+        for peer in self.peers:
+            self._send(peer, {"tipo": "pedir_voto", "term": self.term, "candidato": self.node_id,
+                              "ultimo_indice": ultimo_indice, "ultimo_term": ultimo_term})
+        self._check_votes_locked()
+
+    def _check_votes_locked(self):
+        if self.role == CANDIDATE and len(self.votes) * 2 > len(self.addresses):
+            self.role = LEADER
+            self.leader_id = self.node_id
+            self.needs_state = False
+            self.transfers = {}
+            siguiente = self._last()[0] + 1
+            self.next_index = {p: siguiente for p in self.peers}
+            self.match_index = {p: 0 for p in self.peers}
+            self.acked_at = {}
+            self.match_index[self.node_id] = self._last()[0]
+            self.log(f"Raft: líder del término {self.term}")
+            # Entrada vacía del término: permite confirmar lo heredado de términos anteriores
+            self._append_locked([{"term": self.term, "comando": None}])
+            self.match_index[self.node_id] = self._last()[0]
+            self._advance_commit_locked()
+            self._broadcast_locked()
+            if self.on_leader:
+                threading.Thread(target=self.on_leader, daemon=True).start()
+
+    def _advance_commit_locked(self):
+        for index in range(self._last()[0], self.commit_index, -1):
+            if self._term_at(index) != self.term:
+                break
+            replicas = sum(1 for n in self.addresses if self.match_index.get(n, 0) >= index)
+            if replicas * 2 > len(self.addresses):
+                self.commit_index = index
+                self.cond.notify_all()
+                break
+
+    # --- Mensajes ---
+
+    def _send(self, peer: str, message: Dict):
+        try:
+            self.sock.sendto(json.dumps(message).encode('utf-8'), self.addresses[peer])
+        except Exception as e:
+            self.log(f"Raft: error enviando a {peer}: {e}")
+
+    def _broadcast_locked(self):
+        self.last_broadcast = time.monotonic()
+        for peer in self.peers:
+            self._send_append_locked(peer)
+
+    def _send_append_locked(self, peer: str):
+        siguiente = self.next_index.get(peer, self._last()[0] + 1)
+        if siguiente <= self.log_start:
+            self._send_state_locked(peer)
+            return
+        previo = siguiente - 1
+        entradas, tamano = [], 0
+        for entrada in self.entries[previo - self.log_start:]:
+            tamano += len(json.dumps(entrada))
+            if entradas and tamano > MAX_APPEND_BYTES:
+                break
+            entradas.append(entrada)
+        self._send(peer, {
+            "tipo": "anexar", "term": self.term, "lider": self.node_id,
+            "previo_indice": previo, "previo_term": self._term_at(previo),
+            "entradas": entradas, "commit": self.commit_index, "enviado": time.monotonic()
+        })
+
+    def _send_state_locked(self, peer: str):
+        """Empieza o retoma el envío de la instantánea desde la primera parte sin confirmar."""
+        if self.snapshot_fn is None:
+            return
+        envio = self.transfers.get(peer)
+        if envio is None or envio["indice"] < self.log_start:
+            foto = self.snapshot_cache
+            if foto is None or foto["indice"] < self.log_start:
+                # La toma el hilo que aplica; el próximo latido la envía
+                self.snapshot_wanted = True
+                self.cond.notify_all()
+                return
+            envio = self.transfers[peer] = {"indice": foto["indice"], "term_indice": foto["term_indice"],
+                                            "siguiente": 0, "enviadas": 0, "partes": foto["partes"]}
+        # Si ya se confirmaron todas, se repite la última para que el seguidor vuelva a responder
+        self._send_state_window_locked(peer, envio, min(envio["siguiente"], len(envio["partes"]) - 1))
+
+    def _send_state_window_locked(self, peer: str, envio: Dict, desde: int):
+        hasta = min(envio["siguiente"] + SNAPSHOT_WINDOW, len(envio["partes"]))
+        for parte in range(desde, hasta):
+            self._send(peer, {
+                "tipo": "instalar", "term": self.term, "lider": self.node_id,
+                "indice": envio["indice"], "term_indice": envio["term_indice"],
+                "parte": parte, "total": len(envio["partes"]), "datos": envio["partes"][parte]
+            })
+        envio["enviadas"] = max(envio["enviadas"], hasta)
+
+    def handle(self, message: Dict):
+        tipo = message.get("tipo")
+        with self.cond:
+            term = message.get("term", 0)
+            if term > self.term:
+                self._step_down_locked(term)
+
+            if tipo == "pedir_voto":
+                candidato = message["candidato"]
+                al_dia = (message["ultimo_term"], message["ultimo_indice"]) >= tuple(reversed(self._last()))
+                concedido = term == self.term and self.voted_for in (None, candidato) and al_dia
+                if concedido:
+                    self.voted_for = candidato
+                    self._persist_meta_locked()
+                    self.election_deadline = self._new_deadline()
+                self._send(candidato, {"tipo": "voto", "term": self.term, "de": self.node_id, "concedido": concedido})
+
+            elif tipo == "voto":
+                if self.role == CANDIDATE and term == self.term and message.get("concedido"):
+                    self.votes.add(message["de"])
+                    self._check_votes_locked()
+
+            elif tipo == "anexar":
+                self._handle_append_locked(message)
+
+            elif tipo == "anexar_resp":
+                self._handle_append_response_locked(message)
+
+            elif tipo == "instalar":
+                if term < self.term:
+                    return
+                self._follow_locked(message["lider"])
+                self._receive_state_part_locked(message)
+
+            elif tipo == "instalar_resp":
+                envio = self.transfers.get(message["de"])
+                if self.role != LEADER or term != self.term or envio is None or message["indice"] != envio["indice"]:
+                    return
+                envio["siguiente"] = max(envio["siguiente"], message["siguiente"])
+                self._send_state_window_locked(message["de"], envio, envio["enviadas"])
+
+    def _follow_locked(self, leader: str):
+        if self.role != FOLLOWER:
+            self._step_down_locked(self.term)
+        self.leader_id = leader
+        self.last_contact = time.monotonic()
+        self.election_deadline = self._new_deadline()
+
+    def _receive_state_part_locked(self, message: Dict):
+        lider, indice = message["lider"], message["indice"]
+        instalado = {"tipo": "anexar_resp", "term": self.term, "de": self.node_id, "exito": True, "indice": indice}
+        if not self.needs_state and max(self.last_applied, self.log_start) >= indice:
+            # Ya aplicado (se perdió la confirmación o es una parte repetida)
+            self._send(lider, instalado)
+            return
+        clave = (lider, message["term"], indice)
+        if self.incoming is None or self.incoming["clave"] != clave:
+            self.incoming = {"clave": clave, "partes": {}}
+        partes = self.incoming["partes"]
+        partes[message["parte"]] = message["datos"]
+        faltante = next((p for p in range(message["total"]) if p not in partes), None)
+        if faltante is not None:
+            self._send(lider, {"tipo": "instalar_resp", "term": self.term, "de": self.node_id,
+                               "indice": indice, "siguiente": faltante})
+            return
+
+        self.incoming = None
+        estado = json.loads(b"".join(base64.b64decode(partes[p]) for p in range(message["total"])).decode('utf-8'))
+        self.entries = []
+        self.log_start = self.commit_index = indice
+        self.start_term = message["term_indice"]
+        self.needs_state = False
+        # restore() lo llama el hilo que aplica, antes que cualquier entrada posterior
+        self.pending_state = {"indice": indice, "estado": estado}
+        self.cond.notify_all()
+        if self.storage is not None:
+            with self.disk_lock:
+                self.storage.save_snapshot(indice, self.start_term, estado)
+                self.saved_index = indice
+            self.storage.rewrite_log(self.log_start, self.start_term, self.entries)
+        self.log(f"Raft: estado completo instalado desde {lider} (índice {indice}, {message['total']} partes)")
+        self._send(lider, instalado)
+
+    def _handle_append_locked(self, message: Dict):
+        lider = message["lider"]
+        respuesta = {"tipo": "anexar_resp", "term": self.term, "de": self.node_id, "exito": False,
+                     "enviado": message.get("enviado")}
+        if message["term"] < self.term:
+            self._send(lider, respuesta)
+            return
+        self._follow_locked(lider)
+        if self.needs_state:
+            respuesta["necesita_estado"] = True
+            self._send(lider, respuesta)
+            return
+
+        previo, previo_term = message["previo_indice"], message["previo_term"]
+        entradas = message["entradas"]
+        if previo < self.log_start:
+            # Lo anterior a log_start ya está confirmado y aplicado aquí
+            entradas = entradas[self.log_start - previo:]
+            previo, previo_term = self.log_start, self.start_term
+        if self._term_at(previo) != previo_term:
+            respuesta["indice"] = min(previo - 1, self._last()[0])
+            self._send(lider, respuesta)
+            return
+
+        nuevas, truncado = [], False
+        for i, entrada in enumerate(entradas, start=previo + 1):
+            actual = self._term_at(i)
+            if actual == entrada["term"]:
+                continue
+            if actual is not None:
+                del self.entries[i - self.log_start - 1:]  # conflicto: se descarta lo no confirmado
+                truncado = True
+            nuevas.append(entrada)
+        # En disco antes de responder: el líder cuenta esta copia para el quórum
+        if truncado:
+            self.entries.extend(nuevas)
+            if self.storage is not None:
+                self.storage.rewrite_log(self.log_start, self.start_term, self.entries)
+        elif nuevas:
+            self._append_locked(nuevas)
+        ultimo_nuevo = previo + len(entradas)
+        if message["commit"] > self.commit_index:
+            self.commit_index = min(message["commit"], ultimo_nuevo)
+            self.cond.notify_all()
+        respuesta.update(exito=True, indice=ultimo_nuevo)
+        self._send(lider, respuesta)
+
+    def _handle_append_response_locked(self, message: Dict):
+        peer = message["de"]
+        if self.role != LEADER or message["term"] != self.term:
+            return
+        if message.get("enviado"):
+            # Sigue a este líder en este término: cuenta para el lease
+            self.acked_at[peer] = max(self.acked_at.get(peer, 0), message["enviado"])
+            self.cond.notify_all()
+        if message.get("necesita_estado"):
+            self._send_state_locked(peer)
+            return
+        if message["exito"]:
+            self.transfers.pop(peer, None)
+            self.match_index[peer] = max(self.match_index.get(peer, 0), message["indice"])
+            self.next_index[peer] = self.match_index[peer] + 1
+            self._advance_commit_locked()
+            if self.next_index[peer] <= self._last()[0]:
+                self._send_append_locked(peer)
+        else:
+            self.next_index[peer] = max(1, min(self.next_index.get(peer, 1) - 1, message.get("indice", 0) + 1))
+            self._send_append_locked(peer)
+
+    # --- Hilos ---
+
+    def _apply_ready_locked(self) -> bool:
+        return (self.pending_state is not None or self.snapshot_wanted or self._compaction_due_locked()
+                or (self.last_applied < self.commit_index and not self.needs_state))
+
+    def apply_loop(self):
+        """Único hilo que toca el estado de la aplicación: instantáneas recibidas, entradas confirmadas en orden
+        y las instantáneas que se toman para compactar o enviar, todo fuera de cond."""
+        while self.running:
+            with self.cond:
+                while self.running and not self._apply_ready_locked():
+                    self.cond.wait(0.5)
+                instalar, self.pending_state = self.pending_state, None
+                entrada = None
+                if instalar is None and self.last_applied < self.commit_index and not self.needs_state:
+                    index = self.last_applied + 1
+                    entrada = self.entries[index - self.log_start - 1]
+            if not self.running:
+                return
+            if instalar is not None:
+                if self.restore_fn is not None:
+                    self.restore_fn(instalar["estado"])
+                index = instalar["indice"]
+            elif entrada is not None:
+                if entrada["comando"] is not None:
+                    try:
+                        self.apply_fn(entrada["comando"])
+                    except Exception as e:
+                        self.log(f"Raft: error aplicando la entrada {index}: {e}")
+            else:
+                self._take_snapshot()
+                continue
+            with self.cond:
+                self.last_applied = index
+                self.cond.notify_all()
+
+    def tick_loop(self):
+        while self.running:
+            time.sleep(TICK)
+            with self.cond:
+                now = time.monotonic()
+                if self.role == LEADER:
+                    if now - self.last_broadcast >= self.heartbeat_interval:
+                        self._broadcast_locked()
+                elif now >= self.election_deadline:
+                    self._start_election_locked()
+
+    def receive_loop(self):
+        while self.running:
+            try:
+                data, _ = self.sock.recvfrom(65535)
+                self.handle(json.loads(data.decode('utf-8')))
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            except Exception as e:
+                self.log(f"Raft: mensaje inválido: {e}")
+
+    def start(self):
+        if self.recovered_state is not None:
+            if self.restore_fn is not None:
+                self.restore_fn(self.recovered_state["estado"])
+            self.recovered_state = None
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(self.addresses[self.node_id])
+        self.sock.settimeout(0.5)
+        self.running = True
+        self.threads = [threading.Thread(target=self.receive_loop, daemon=True),
+                        threading.Thread(target=self.tick_loop, daemon=True),
+                        threading.Thread(target=self.apply_loop, daemon=True)]
+        for hilo in self.threads:
+            hilo.start()
+
+    def stop(self):
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
+        if self.sock is not None:
+            self.sock.close()
+        # Nada más escribe en data_dir después de volver: otro nodo puede arrancar sobre él
+        for hilo in self.threads:
+            if hilo is not threading.current_thread():
+                hilo.join()
@@ -0,0 +1,67 @@
+# /src/core/replication.py
+import time
+import threading
+from typing import Callable, Dict, List
+
+class TokenBucket:
+    """
+    Limitador de ancho de banda por cubeta de tokens (bytes por segundo).
+    Permite endeudarse: una copia grande se cobra después y retrasa la siguiente.
+    """
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def consume(self, amount: float):
+        """Cobra bytes ya transferidos (el saldo puede quedar negativo)."""
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+
+    def wait_time(self) -> float:
+        """Segundos a esperar hasta que el saldo vuelva a ser positivo."""
+        with self.lock:
+            self._refill()
+            if self.tokens > 0 or self.rate <= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+def plan_replicas(global_file_index: Dict[str, List[Dict]], registered_servers: Dict[str, Dict],
+                  factor_for: Callable[[str], int]) -> List[Dict]:
+    """
+    Calcula las copias necesarias para que cada archivo alcance su factor de replicación.
+    El destino es siempre el servidor con menos archivos que aún no tiene la copia.
+    Devuelve una lista de {"nombre_archivo", "origen", "destino"}.
+    """
+    carga = {server_id: 0 for server_id in registered_servers}
+    for entries in global_file_index.values():
+        for entry in entries:
+            if entry["server_id"] in carga:
+                carga[entry["server_id"]] += 1
+
+    plan = []
+    for nombre_archivo, entries in global_file_index.items():
+        holders = [e["server_id"] for e in entries if e["server_id"] in registered_servers]
+        if not holders:
+            continue
+        deseado = min(factor_for(nombre_archivo), len(registered_servers))
+        faltan = deseado - len(holders)
+        if faltan <= 0:
+            continue
+
+        candidatos = sorted(
+            (s for s in registered_servers if s not in holders),
+            key=lambda s: (carga[s], s)
+        )
+        for destino in candidatos[:faltan]:
+            plan.append({"nombre_archivo": nombre_archivo, "origen": holders[0], "destino": destino})
+            carga[destino] += 1
+    return plan
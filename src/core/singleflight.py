@@ -0,0 +1,81 @@
+# /src/core/singleflight.py
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Agrupa llamadas idénticas concurrentes: la primera ejecuta la función y
+    las demás con la misma clave esperan y comparten su resultado. Tras
+    terminar, el resultado se conserva durante una ventana corta para las
+    peticiones que llegan justo después.
+    """
+
+    def __init__(self, cache_window: float = 0.5, clock: Callable[[], float] = time.monotonic):
+        self.cache_window = cache_window
+        self.clock = clock
+        self.inflight: Dict[Hashable, _Call] = {}
+        self.recent: Dict[Hashable, Tuple[float, Any]] = {}  # {clave: (expira, resultado)}
+        self.lock = threading.Lock()
+        self.stats = {"ejecutadas": 0, "compartidas": 0, "desde_ventana": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any],
+           cacheable: Callable[[Any], bool] = lambda result: True) -> Tuple[Any, bool]:
+        """Devuelve (resultado, compartido). Las excepciones de fn llegan a todos los que esperaban."""
+        with self.lock:
+            now = self.clock()
+            reciente = self.recent.get(key)
+            if reciente is not None:
+                if reciente[0] > now:
+                    self.stats["desde_ventana"] += 1
+                    return reciente[1], True
+                del self.recent[key]
+
+            call = self.inflight.get(key)
+            if call is not None:
+                self.stats["compartidas"] += 1
+                lider = False
+            else:
+                call = self.inflight[key] = _Call()
+                self.stats["ejecutadas"] += 1
+                lider = True
+
+        if not lider:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+        with self.lock:
+            del self.inflight[key]
+            if call.error is None and self.cache_window > 0 and cacheable(call.result):
+                self._purge_locked()
+                self.recent[key] = (self.clock() + self.cache_window, call.result)
+        call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result, False
+
+    def forget(self, key: Hashable):
+        """Descarta el resultado reciente de una clave (p. ej. tras una escritura)."""
+        with self.lock:
+            self.recent.pop(key, None)
+
+    def _purge_locked(self):
+        now = self.clock()
+        for key in [k for k, (expira, _) in self.recent.items() if expira <= now]:
+            del self.recent[key]
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {"en_curso": len(self.inflight), "recientes": len(self.recent), **self.stats}
@@ -0,0 +1,129 @@
+# /src/core/tracing.py
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Campo del sobre JSON que lleva la traza: {"trace_id": ..., "span_id": span del que envía}
+TRACE_FIELD = "traza"
+
+# Spans que recuerda cada componente (los más viejos se descartan)
+SPAN_BUFFER = 4096
+
+# Span activo en este hilo: (trace_id, span_id)
+_current: contextvars.ContextVar = contextvars.ContextVar("traza_actual", default=None)
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+def inject(request: Dict) -> Dict:
+    """Copia de la petición con la traza del span activo (la misma petición si no hay ninguno)."""
+    ctx = _current.get()
+    if ctx is None:
+        return request
+    return {**request, TRACE_FIELD: {"trace_id": ctx[0], "span_id": ctx[1]}}
+
+def extract(request: Dict) -> Optional[Tuple[str, str]]:
+    """(trace_id, span_id del remitente) si la petición trae traza."""
+    traza = request.get(TRACE_FIELD) if isinstance(request, dict) else None
+    if not isinstance(traza, dict) or not traza.get("trace_id"):
+        return None
+    return traza["trace_id"], traza.get("span_id")
+
+def current_trace_id() -> Optional[str]:
+    ctx = _current.get()
+    return ctx[0] if ctx else None
+
+class Tracer:
+    """
+    Spans de un componente (cliente, servidor, nodo del DNS General). Cada
+    span hereda la traza del span activo o del padre indicado (el extraído
+    de la petición) y al terminar se guarda en un buffer circular, de donde
+    se exporta como JSON de eventos de traza de Chrome (chrome://tracing o
+    Perfetto).
+    """
+
+    def __init__(self, service: str, capacity: int = SPAN_BUFFER):
+        self.service = service
+        self.buffer: deque = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Tuple[str, str]] = None, **attrs):
+        """Abre un span; el dict que devuelve admite más atributos en span["atributos"]."""
+        parent = parent or _current.get()
+        span = {
+            "trace_id": parent[0] if parent else _new_id(128),
+            "span_id": _new_id(64),
+            "parent_id": parent[1] if parent else None,
+            "nombre": name,
+            "servicio": self.service,
+            "inicio": time.time(),
+            "hilo": threading.current_thread().name,
+            "atributos": attrs
+        }
+        token = _current.set((span["trace_id"], span["span_id"]))
+        inicio = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            attrs["error"] = str(e)
+            raise
+        finally:
+            span["duracion"] = time.perf_counter() - inicio
+            _current.reset(token)
+            with self.lock:
+                self.buffer.append(span)
+
+    def spans(self, trace_id: str = None, limit: int = None) -> List[Dict]:
+        """Spans guardados (de una traza si se indica), los más recientes al final."""
+        with self.lock:
+            spans = [s for s in self.buffer if trace_id is None or s["trace_id"] == trace_id]
+        return spans[-limit:] if limit else spans
+
+    def export(self, trace_id: str = None, limit: int = None) -> Dict:
+        return chrome_trace(self.spans(trace_id, limit))
+
+def chrome_trace(spans: Iterable[Dict]) -> Dict:
+    """Eventos completos ("X") por span; un proceso por servicio y un hilo por hilo de origen."""
+    eventos, procesos, hilos = [], {}, {}
+    for span in spans:
+        pid = procesos.setdefault(span["servicio"], len(procesos) + 1)
+        tid = hilos.setdefault((pid, span["hilo"]), len(hilos) + 1)
+        eventos.append({
+            "name": span["nombre"],
+            "cat": span["servicio"],
+            "ph": "X",
+            "ts": round(span["inicio"] * 1e6),
+            "dur": round(span["duracion"] * 1e6),
+            "pid": pid,
+            "tid": tid,
+            "args": {"trace_id": span["trace_id"], "span_id": span["span_id"],
+                     "parent_id": span["parent_id"], **span["atributos"]}
+        })
+    for servicio, pid in procesos.items():
+        eventos.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": servicio}})
+    for (pid, hilo), tid in hilos.items():
+        eventos.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": hilo}})
+    return {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+def merge_chrome_traces(traces: Iterable[Dict]) -> Dict:
+    """Une las exportaciones de varios componentes en una sola línea de tiempo."""
+    spans = []
+    for trace in traces:
+        nombres = {e["pid"]: e["args"]["name"] for e in trace.get("traceEvents", []) if e.get("name") == "process_name"}
+        hilos = {(e["pid"], e["tid"]): e["args"]["name"] for e in trace.get("traceEvents", []) if e.get("name") == "thread_name"}
+        for e in trace.get("traceEvents", []):
+            if e.get("ph") != "X":
+                continue
+            args = dict(e["args"])
+            spans.append({
+                "trace_id": args.pop("trace_id"), "span_id": args.pop("span_id"), "parent_id": args.pop("parent_id"),
+                "nombre": e["name"], "servicio": nombres.get(e["pid"], e.get("cat")),
+                "hilo": hilos.get((e["pid"], e["tid"]), str(e["tid"])),
+                "inicio": e["ts"] / 1e6, "duracion": e["dur"] / 1e6, "atributos": args
+            })
+    return chrome_trace(sorted(spans, key=lambda s: s["inicio"]))
@@ -0,0 +1,116 @@
+# /src/network/async_peer_conector.py
+
+import asyncio
+import itertools
+import logging
+from typing import Callable, Dict, Tuple
+
+from .async_transport import AsyncReliableTransport
+from .peer_conector import REPLY_TO, REQUEST_ID, PeerConnector
+from src.core.metrics import MetricsRegistry
+
+log = logging.getLogger(__name__)
+
+# Espera por defecto de una respuesta, como la del cliente síncrono
+REQUEST_TIMEOUT = 10.0
+
+class AsyncPeerConnector(PeerConnector):
+    """
+    PeerConnector sobre AsyncReliableTransport: el mismo handshake y el
+    mismo cifrado, pero connect_and_secure() y request() se esperan con
+    await en lugar de sondear listen(). Cada petición lleva un REQUEST_ID
+    que el servidor devuelve como REPLY_TO, y por él se empareja la
+    respuesta; una respuesta tardía a una petición ya vencida se descarta.
+    Los mensajes que no responden a nada van a on_message_callback.
+    """
+
+    def __init__(self, transport_layer: AsyncReliableTransport, server_id: str, on_message_callback: Callable = None,
+                 metrics: MetricsRegistry = None):
+        super().__init__(transport_layer, server_id, on_message_callback, metrics)
+        transport_layer.on_data = self.handle_incoming_packet
+        self.handshake_waiters: Dict[Tuple[str, int], asyncio.Future] = {}
+        # id de petición -> (peer, futuro de la respuesta)
+        self.pending_requests: Dict[int, Tuple[Tuple[str, int], asyncio.Future]] = {}
+        self._request_ids = itertools.count(1)
+        self._timeouts = self.metrics.counter("seguridad_peticiones_sin_respuesta_total")
+        self._tardias = self.metrics.counter("seguridad_respuestas_descartadas_total")
+
+    @classmethod
+    async def create(cls, host: str, port: int, server_id: str = None, on_message_callback: Callable = None,
+                     metrics: MetricsRegistry = None) -> "AsyncPeerConnector":
+        transport = await AsyncReliableTransport.create(host, port, metrics)
+        ip, puerto = transport.sock.getsockname()[:2]
+        return cls(transport, server_id or f"{ip}:{puerto}", on_message_callback, metrics)
+
+    async def connect_and_secure(self, peer_addr: Tuple[str, int], timeout: float = REQUEST_TIMEOUT) -> bool:
+        """Conexión de transporte + handshake; True cuando hay sesión segura con el peer."""
+        if peer_addr in self.sessions:
+            return True
+        fut = self.handshake_waiters.get(peer_addr)
+        if fut is None:
+            if not await self.transport.connect(peer_addr):
+                log.warning("[PeerConnector] No se pudo establecer conexión de transporte con %s", peer_addr)
+                return False
+            if peer_addr in self.sessions:
+                return True  # otra corrutina completó el handshake mientras tanto
+            fut = self.handshake_waiters.get(peer_addr)
+            if fut is None:
+                fut = self.handshake_waiters[peer_addr] = asyncio.get_running_loop().create_future()
+                self._send_hello(peer_addr)
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            log.warning("[PeerConnector] Timeout en el handshake de seguridad con %s", peer_addr)
+            self.pending_handshakes.pop(peer_addr, None)
+            if not fut.done():
+                fut.set_result(False)  # también para las demás corrutinas que esperaban este handshake
+            return False
+        finally:
+            if fut.done() and self.handshake_waiters.get(peer_addr) is fut:
+                del self.handshake_waiters[peer_addr]
+
+    def _handle_handshake_reply(self, payload: Dict, addr: Tuple[str, int]):
+        super()._handle_handshake_reply(payload, addr)
+        fut = self.handshake_waiters.get(addr)
+        if fut is not None and not fut.done():
+            fut.set_result(addr in self.sessions)
+
+    async def request(self, message: Dict, peer_addr: Tuple[str, int], timeout: float = REQUEST_TIMEOUT) -> Dict:
+        """Envía una petición cifrada y espera su respuesta (se asegura la sesión si aún no existe)."""
+        if peer_addr not in self.sessions and not await self.connect_and_secure(peer_addr, timeout):
+            return {"status": "ERROR", "mensaje": "No se pudo establecer una sesión segura"}
+        rid = next(self._request_ids)
+        fut = asyncio.get_running_loop().create_future()
+        self.pending_requests[rid] = (peer_addr, fut)
+        try:
+            if not self.send_message(dict(message, **{REQUEST_ID: rid}), peer_addr):
+                return {"status": "ERROR", "mensaje": "No se pudo enviar la petición"}
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            self._timeouts.inc()
+            return {"status": "ERROR", "mensaje": "Timeout esperando respuesta"}
+        finally:
+            # Sin hueco pendiente una respuesta tardía ya no puede confundirse con otra
+            self.pending_requests.pop(rid, None)
+            fut.cancel()
+
+    def _deliver_message(self, request: Dict, addr: Tuple[str, int]):
+        rid = request.get(REPLY_TO)
+        if rid is None:
+            if self.on_message_callback:
+                self.on_message_callback(request, addr)
+            return
+        pendiente = self.pending_requests.get(rid)
+        if pendiente is None or pendiente[0] != addr:
+            log.debug("[PeerConnector] Respuesta %s de %s sin petición pendiente, descartada", rid, addr)
+            self._tardias.inc()
+            return
+        fut = pendiente[1]
+        if not fut.done():
+            fut.set_result(request)
+
+    async def close(self):
+        for _, fut in self.pending_requests.values():
+            fut.cancel()
+        self.pending_requests.clear()
+        self.stop()
@@ -0,0 +1,137 @@
+# /src/network/async_transport.py
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.core.metrics import MetricsRegistry
+from src.network.transport import ReliableTransport, RTO
+
+log = logging.getLogger(__name__)
+
+class _LoopTimers:
+    """Lo que el protocolo pide al Reactor (temporizadores) servido por el bucle de asyncio."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+
+    def call_later(self, delay: float, callback: Callable, *args) -> asyncio.TimerHandle:
+        return self.loop.call_later(delay, callback, *args)
+
+    def cancel(self, timer: Optional[asyncio.TimerHandle]):
+        if timer is not None:
+            timer.cancel()
+
+class AsyncReliableTransport(ReliableTransport, asyncio.DatagramProtocol):
+    """
+    El mismo protocolo que ReliableTransport (handshake, ACK, retransmisión,
+    duplicados, limpieza por inactividad) como DatagramProtocol de asyncio:
+    los datagramas llegan por datagram_received y los temporizadores son los
+    del bucle, así que miles de conexiones comparten un hilo sin sondeo.
+    Los DATA recibidos van a on_data(payload, origen) si está definido o a
+    la cola que devuelve recv().
+    """
+
+    def __init__(self, metrics: MetricsRegistry = None, on_data: Callable[[Any, Tuple[str, int]], None] = None):
+        loop = asyncio.get_running_loop()
+        self.reactor = _LoopTimers(loop)
+        self._init_state(metrics, loop.time)
+        self.on_data = on_data
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.waiters: Dict[Tuple[str, int], asyncio.Future] = {}
+        self.dgram: Optional[asyncio.DatagramTransport] = None
+        self.sock = None
+
+    @classmethod
+    async def create(cls, host: str, port: int, metrics: MetricsRegistry = None,
+                     on_data: Callable[[Any, Tuple[str, int]], None] = None) -> "AsyncReliableTransport":
+        """Abre el endpoint UDP en host:port (0 = puerto libre) en el bucle actual."""
+        loop = asyncio.get_running_loop()
+        _, protocol = await loop.create_datagram_endpoint(lambda: cls(metrics, on_data), local_addr=(host, port))
+        log.info("[Transport] Servidor asyncio escuchando en %s:%s", *protocol.sock.getsockname()[:2])
+        return protocol
+
+    # --- asyncio.DatagramProtocol ---
+
+    def connection_made(self, transport: asyncio.DatagramTransport):
+        self.dgram = transport
+        self.sock = transport.get_extra_info("socket")
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]):
+        self._handle_datagram(data, addr)
+
+    def error_received(self, exc: Exception):
+        log.debug("[Transport] Error de socket: %s", exc)  # p. ej. ICMP de puerto inalcanzable
+
+    def connection_lost(self, exc: Optional[Exception]):
+        for st in list(self.connections.values()):
+            self._close_connection(st)
+        for fut in self.waiters.values():
+            if not fut.done():
+                fut.set_result(False)
+        self.dgram = None
+
+    # --- Enlaces con el protocolo común ---
+
+    def _sendto(self, data: bytes, addr: Tuple[str, int]):
+        # El transporte de asyncio ya encola lo que el núcleo no acepta
+        if self.dgram is not None:
+            self.dgram.sendto(data, addr)
+
+    def _deliver(self, payload: Any, addr: Tuple[str, int]):
+        if self.on_data is not None:
+            try:
+                self.on_data(payload, addr)
+            except Exception as e:
+                log.error("[Transport] Error entregando datos de %s: %s", addr, e)
+        else:
+            self.queue.put_nowait((payload, addr))
+
+    def _handle_synack(self, msg: Dict, addr: Tuple[str, int]):
+        super()._handle_synack(msg, addr)
+        st = self.connections.get(addr)
+        fut = self.waiters.get(addr)
+        if st is not None and st.state == "ESTABLISHED" and fut is not None and not fut.done():
+            fut.set_result(True)
+
+    # --- API asíncrona ---
+
+    async def connect(self, addr: Tuple[str, int], timeout: float = RTO * 3) -> bool:
+        """Handshake de transporte (lado cliente); las llamadas concurrentes al mismo destino lo comparten."""
+        st = self.connections.get(addr)
+        if st is not None and st.state == "ESTABLISHED" and not st.dead:
+            return True
+        fut = self.waiters.get(addr)
+        if fut is None:
+            if st is not None and st.dead:
+                self._close_connection(st)  # peer dado por caído: handshake nuevo
+            fut = self.waiters[addr] = asyncio.get_running_loop().create_future()
+            self._start_connect(addr)
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            st = self.connections.get(addr)
+            if st is not None and st.state != "ESTABLISHED":
+                log.warning("[Transport] Timeout estableciendo conexión de transporte con %s", addr)
+                self._handshake_timeouts.inc()
+                self._close_connection(st)
+            return False
+        finally:
+            if self.waiters.get(addr) is fut:
+                del self.waiters[addr]
+
+    async def recv(self) -> Tuple[Any, Tuple[str, int]]:
+        """Siguiente (payload, origen) recibido cuando no hay on_data."""
+        return await self.queue.get()
+
+    def listen(self, timeout: float = 0) -> Tuple[Optional[Dict], Optional[Tuple[str, int]]]:
+        """Lo ya recibido sin esperar (la espera es recv())."""
+        try:
+            return self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None, None
+
+    def stop(self):
+        log.info("[Transport] Cerrando el socket.")
+        if self.dgram is not None:
+            self.dgram.close()
@@ -0,0 +1,264 @@
+# /src/network/batch_io.py
+import ctypes
+import errno
+import logging
+import os
+import socket
+import struct
+import sys
+from typing import Dict, List, Tuple
+
+log = logging.getLogger(__name__)
+
+# Datagramas por llamada al sistema y tamaño de cada búfer de recepción preasignado
+BATCH_SIZE = 32
+RECV_BUFSIZE = 65535
+
+# Búferes de recepción sueltos que el pool conserva para reutilizar
+POOL_SIZE = 4
+
+MSG_DONTWAIT = getattr(socket, "MSG_DONTWAIT", 0x40)
+SOCKADDR_SIZE = 128  # sizeof(struct sockaddr_storage)
+
+class BufferPool:
+    """Búferes de recepción reutilizables para recvfrom_into: sin un bytes nuevo de 64 KB por datagrama."""
+
+    def __init__(self, size: int = RECV_BUFSIZE, keep: int = POOL_SIZE):
+        self.size = size
+        self.keep = keep
+        self.free: List[bytearray] = []
+
+    def acquire(self) -> bytearray:
+        return self.free.pop() if self.free else bytearray(self.size)
+
+    def release(self, buf: bytearray):
+        if len(self.free) < self.keep:
+            self.free.append(buf)
+
+# --- recvmmsg/sendmmsg por ctypes (solo Linux) ---
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p), ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(_IoVec)), ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p), ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags", ctypes.c_int)]
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+        libc.recvmmsg.restype = ctypes.c_int
+        libc.sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+        libc.sendmmsg.restype = ctypes.c_int
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+_libc = _load_libc()
+HAVE_MMSG = _libc is not None
+
+def _raise_errno():
+    err = ctypes.get_errno()
+    if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+        raise BlockingIOError(err, os.strerror(err))
+    if err == errno.EINTR:
+        raise InterruptedError(err, os.strerror(err))
+    raise OSError(err, os.strerror(err))
+
+def _decode_sockaddr(raw: bytes) -> Tuple:
+    familia = struct.unpack_from("=H", raw)[0]
+    puerto = struct.unpack_from("!H", raw, 2)[0]
+    if familia == socket.AF_INET:
+        return socket.inet_ntop(socket.AF_INET, raw[4:8]), puerto
+    if familia == socket.AF_INET6:
+        flowinfo, = struct.unpack_from("!I", raw, 4)
+        scope_id, = struct.unpack_from("=I", raw, 24)
+        return socket.inet_ntop(socket.AF_INET6, raw[8:24]), puerto, flowinfo, scope_id
+    raise OSError(errno.EAFNOSUPPORT, "familia de direcciones no soportada")
+
+def _is_ip(host: str) -> bool:
+    for familia in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(familia, host)
+            return True
+        except OSError:
+            pass
+    return False
+
+def _encode_sockaddr(addr: Tuple, family: int = socket.AF_INET) -> bytes:
+    host, puerto = addr[0], addr[1]
+    if not _is_ip(host):
+        host = socket.getaddrinfo(host, puerto, family, socket.SOCK_DGRAM)[0][4][0]  # como sendto con un nombre
+    try:
+        return struct.pack("=H", socket.AF_INET) + struct.pack("!H", puerto) + socket.inet_pton(socket.AF_INET, host) + bytes(8)
+    except OSError:
+        flowinfo, scope_id = (addr[2], addr[3]) if len(addr) == 4 else (0, 0)
+        return (struct.pack("=H", socket.AF_INET6) + struct.pack("!HI", puerto, flowinfo)
+                + socket.inet_pton(socket.AF_INET6, host) + struct.pack("=I", scope_id))
+
+class _MmsgReceiver:
+    """recvmmsg sobre `batch` búferes preasignados: hasta `batch` datagramas por llamada."""
+
+    def __init__(self, sock: socket.socket, batch: int, bufsize: int):
+        self.sock = sock
+        self.batch = batch
+        self.buffers = [bytearray(bufsize) for _ in range(batch)]
+        self.names = (ctypes.c_char * (SOCKADDR_SIZE * batch))()
+        self.iovecs = (_IoVec * batch)()
+        self.msgs = (_MMsgHdr * batch)()
+        for i, buf in enumerate(self.buffers):
+            self.iovecs[i].iov_base = ctypes.addressof((ctypes.c_char * bufsize).from_buffer(buf))
+            self.iovecs[i].iov_len = bufsize
+            hdr = self.msgs[i].msg_hdr
+            hdr.msg_name = ctypes.addressof(self.names) + i * SOCKADDR_SIZE
+            hdr.msg_namelen = SOCKADDR_SIZE
+            hdr.msg_iov = ctypes.pointer(self.iovecs[i])
+            hdr.msg_iovlen = 1
+        # Las cabeceras solo cambian en msg_namelen/msg_len: se restauran con un memmove y las
+        # longitudes se leen con un único unpack (acceder campo a campo por ctypes cuesta más que la llamada)
+        self.template = bytes(self.msgs)
+        paso = ctypes.sizeof(_MMsgHdr)
+        off_namelen = _MsgHdr.msg_namelen.offset
+        off_len = _MMsgHdr.msg_len.offset
+        formato, pos = "=", 0
+        for i in range(batch):
+            for off in (i * paso + off_namelen, i * paso + off_len):
+                formato += f"{off - pos}xI"
+                pos = off + 4
+        self.lens = struct.Struct(formato)
+        self.view = memoryview(self.msgs).cast("B")
+        self.names_view = memoryview(self.names).cast("B")
+        self.views = [memoryview(buf) for buf in self.buffers]
+        self.addr_cache: Dict[bytes, Tuple] = {}
+
+    def recv(self) -> List[Tuple[memoryview, Tuple]]:
+        """Datagramas como vistas sobre los búferes propios: válidas hasta la siguiente llamada."""
+        ctypes.memmove(self.msgs, self.template, len(self.template))
+        n = _libc.recvmmsg(self.sock.fileno(), self.msgs, self.batch, MSG_DONTWAIT, None)
+        if n < 0:
+            _raise_errno()
+        campos = self.lens.unpack_from(self.view)
+        datagramas = []
+        for i in range(n):
+            namelen, largo = campos[2 * i], campos[2 * i + 1]
+            clave = bytes(self.names_view[i * SOCKADDR_SIZE:i * SOCKADDR_SIZE + namelen])
+            addr = self.addr_cache.get(clave)
+            if addr is None:
+                if len(self.addr_cache) > 4096:
+                    self.addr_cache.clear()
+                addr = self.addr_cache[clave] = _decode_sockaddr(clave)
+            datagramas.append((self.views[i][:largo], addr))
+        return datagramas
+
+class _RecvmsgIntoReceiver:
+    """Sin recvmmsg: recvmsg_into en bucle sobre los mismos búferes preasignados."""
+
+    def __init__(self, sock: socket.socket, batch: int, bufsize: int):
+        self.sock = sock
+        self.batch = batch
+        self.buffers = [bytearray(bufsize) for _ in range(batch)]
+
+    def recv(self) -> List[Tuple[memoryview, Tuple]]:
+        datagramas = []
+        for buf in self.buffers:
+            try:
+                n, _, _, addr = self.sock.recvmsg_into([buf])
+            except (BlockingIOError, InterruptedError):
+                if datagramas:
+                    break
+                raise
+            datagramas.append((memoryview(buf)[:n], addr))
+        return datagramas
+
+class _MmsgSender:
+    """sendmmsg: hasta `batch` datagramas (a destinos cualesquiera) por llamada."""
+
+    def __init__(self, sock: socket.socket, batch: int):
+        self.sock = sock
+        self.batch = batch
+        self.iovecs = (_IoVec * batch)()
+        self.msgs = (_MMsgHdr * batch)()
+        for i in range(batch):
+            self.msgs[i].msg_hdr.msg_iov = ctypes.pointer(self.iovecs[i])
+            self.msgs[i].msg_hdr.msg_iovlen = 1
+        # Los campos variables se escriben con pack_into: asignarlos por ctypes es más lento que la llamada
+        self.iov_view = memoryview(self.iovecs).cast("B")
+        self.msgs_view = memoryview(self.msgs).cast("B")
+        self.iov_struct = struct.Struct("@PN")  # iov_base, iov_len
+        self.name_struct = struct.Struct("@PI")  # msg_name, msg_namelen
+        self.addr_cache: Dict[Tuple, Tuple] = {}
+
+    def _sockaddr(self, addr: Tuple) -> Tuple[int, int]:
+        """(dirección en memoria, longitud) de la sockaddr de addr; el búfer vive en la caché."""
+        entrada = self.addr_cache.get(addr)
+        if entrada is None:
+            if len(self.addr_cache) > 4096:
+                self.addr_cache.clear()
+            raw = _encode_sockaddr(addr, self.sock.family)
+            buf = ctypes.create_string_buffer(raw, len(raw))
+            entrada = self.addr_cache[addr] = (ctypes.addressof(buf), len(raw), buf)
+        return entrada[0], entrada[1]
+
+    def send(self, datagramas: List[Tuple[bytes, Tuple]]) -> int:
+        """Envía en orden; devuelve cuántos aceptó el núcleo (BlockingIOError si ninguno)."""
+        enviados = 0
+        while enviados < len(datagramas):
+            lote = datagramas[enviados:enviados + self.batch]
+            # Un solo búfer contiguo por lote: cada iovec apunta a su tramo
+            contiguo = b"".join(data for data, _ in lote)
+            base = ctypes.cast(ctypes.c_char_p(contiguo), ctypes.c_void_p).value
+            desplazamiento = 0
+            paso_iov, paso_msg = ctypes.sizeof(_IoVec), ctypes.sizeof(_MMsgHdr)
+            for i, (data, addr) in enumerate(lote):
+                self.iov_struct.pack_into(self.iov_view, i * paso_iov, base + desplazamiento, len(data))
+                desplazamiento += len(data)
+                self.name_struct.pack_into(self.msgs_view, i * paso_msg, *self._sockaddr(addr))
+            n = _libc.sendmmsg(self.sock.fileno(), self.msgs, len(lote), MSG_DONTWAIT)
+            if n < 0:
+                if enviados:
+                    return enviados
+                _raise_errno()
+            enviados += n
+            if n < len(lote):
+                break
+        return enviados
+
+class _SendtoSender:
+    def __init__(self, sock, batch: int):
+        self.sock = sock
+
+    def send(self, datagramas: List[Tuple[bytes, Tuple]]) -> int:
+        enviados = 0
+        for data, addr in datagramas:
+            try:
+                self.sock.sendto(data, addr)
+            except (BlockingIOError, InterruptedError):
+                if enviados:
+                    return enviados
+                raise
+            enviados += 1
+        return enviados
+
+def batch_receiver(sock, batch: int = BATCH_SIZE, bufsize: int = RECV_BUFSIZE):
+    """Lector por lotes para un socket no bloqueante: recvmmsg en Linux, recvmsg_into en el resto."""
+    if HAVE_MMSG and isinstance(sock, socket.socket):
+        return _MmsgReceiver(sock, batch, bufsize)
+    return _RecvmsgIntoReceiver(sock, batch, bufsize)
+
+def batch_sender(sock, batch: int = BATCH_SIZE):
+    """Escritor por lotes: sendmmsg en Linux, sendto en bucle en el resto."""
+    if HAVE_MMSG and isinstance(sock, socket.socket):
+        return _MmsgSender(sock, batch)
+    return _SendtoSender(sock, batch)
+
+def supports_batching(sock) -> bool:
+    """Solo sockets reales con recvmsg_into (no los de la red simulada)."""
+    return isinstance(sock, socket.socket) and hasattr(sock, "recvmsg_into")
@@ -0,0 +1,196 @@
+# /src/network/compression.py
+import io
+import zlib
+import threading
+from typing import Dict, List, Optional
+
+from src.core.metrics import MetricsRegistry
+
+# --- Códecs opcionales (solo si están instalados) ---
+try:
+    import zstandard as _zstd
+except ImportError:
+    _zstd = None
+
+try:
+    import lz4.frame as _lz4
+except ImportError:
+    _lz4 = None
+
+# Payloads menores a este tamaño se envían sin comprimir
+COMPRESSION_THRESHOLD = 512
+# Si la muestra no baja de esta proporción, el payload se considera incompresible
+INCOMPRESSIBLE_RATIO = 0.9
+# Tamaño de la muestra usada para detectar datos incompresibles
+SAMPLE_SIZE = 4096
+# Tope del texto descomprimido: un datagrama pequeño no puede inflarse hasta agotar la memoria
+MAX_DECOMPRESSED_SIZE = 8 * 1024 * 1024
+
+# Cabecera de 1 byte antepuesta al texto plano (queda protegida por el MAC)
+FLAG_RAW = b"\x00"
+FLAG_COMPRESSED = b"\x01"
+
+# ===================== Registro de Códecs =====================
+
+class Codec:
+    """
+    Par de funciones compress/decompress identificado por nombre.
+    decompress(data, max_length) no produce más de max_length + 1 bytes,
+    así que basta con mirar la longitud para detectar un exceso.
+    """
+    def __init__(self, name: str, compress, decompress):
+        self.name = name
+        self.compress = compress
+        self.decompress = decompress
+
+def _zlib_decompress(data: bytes, max_length: int) -> bytes:
+    d = zlib.decompressobj()
+    out = d.decompress(data, max_length + 1)
+    if len(out) <= max_length and not d.eof:
+        raise ValueError("Payload zlib truncado")
+    return out
+
+def _zstd_decompress(data: bytes, max_length: int) -> bytes:
+    # stream_reader no confía en el tamaño declarado en la cabecera del frame
+    with _zstd.ZstdDecompressor().stream_reader(io.BytesIO(data)) as reader:
+        return reader.read(max_length + 1)
+
+def _lz4_decompress(data: bytes, max_length: int) -> bytes:
+    return _lz4.LZ4FrameDecompressor().decompress(data, max_length=max_length + 1)
+
+def _build_codecs() -> Dict[str, Codec]:
+    codecs = {}
+    if _zstd is not None:
+        codecs["zstd"] = Codec("zstd", _zstd.ZstdCompressor(level=3).compress, _zstd_decompress)
+    if _lz4 is not None:
+        codecs["lz4"] = Codec("lz4", _lz4.compress, _lz4_decompress)
+    codecs["zlib"] = Codec("zlib", lambda data: zlib.compress(data, 6), _zlib_decompress)
+    return codecs
+
+# Orden de preferencia: zstd > lz4 > zlib (zlib siempre disponible)
+CODECS = _build_codecs()
+
+def supported_codecs() -> List[str]:
+    """Lista de códecs disponibles localmente, en orden de preferencia."""
+    return list(CODECS.keys())
+
+def negotiate_codec(offered: Optional[List[str]]) -> Optional[str]:
+    """Elige el primer códec local preferido que también ofrece el peer."""
+    if not offered:
+        return None
+    for name in CODECS:
+        if name in offered:
+            return name
+    return None
+
+# ===================== Métricas =====================
+
+# Resultado de pack() -> etiqueta de compresion_mensajes_total
+RESULT_LABELS = {"compressed": "comprimido", "small": "pequeno", "incompressible": "incompresible"}
+
+class CompressionStats:
+    """
+    Contadores de compresión para calcular la razón obtenida. Con metrics
+    también se publican en ese registro (acción "metricas" y /metrics):
+    bytes originales y enviados, mensajes por resultado y la razón.
+    """
+    def __init__(self, metrics: MetricsRegistry = None):
+        self.lock = threading.Lock()
+        self.messages_compressed = 0
+        self.messages_raw = 0
+        self.skipped_small = 0
+        self.skipped_incompressible = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._metrics = None
+        if metrics is not None:
+            self._metrics = (
+                metrics.counter("compresion_bytes_originales_total"),
+                metrics.counter("compresion_bytes_enviados_total"),
+                {r: metrics.counter("compresion_mensajes_total", resultado=e) for r, e in RESULT_LABELS.items()}
+            )
+            metrics.gauge("compresion_razon", fn=self.ratio)
+
+    def record(self, original: int, sent: int, reason: str):
+        if self._metrics is not None:
+            originales, enviados, mensajes = self._metrics
+            originales.inc(original)
+            enviados.inc(sent)
+            mensajes[reason].inc()
+        with self.lock:
+            self.bytes_in += original
+            self.bytes_out += sent
+            if reason == "compressed":
+                self.messages_compressed += 1
+            else:
+                self.messages_raw += 1
+                if reason == "small":
+                    self.skipped_small += 1
+                elif reason == "incompressible":
+                    self.skipped_incompressible += 1
+
+    def ratio(self) -> float:
+        """Razón bytes originales / bytes enviados (1.0 = sin ganancia)."""
+        with self.lock:
+            if self.bytes_out == 0:
+                return 1.0
+            return self.bytes_in / self.bytes_out
+
+    def snapshot(self) -> Dict:
+        ratio = self.ratio()
+        with self.lock:
+            return {
+                "mensajes_comprimidos": self.messages_compressed,
+                "mensajes_sin_comprimir": self.messages_raw,
+                "omitidos_pequenos": self.skipped_small,
+                "omitidos_incompresibles": self.skipped_incompressible,
+                "bytes_originales": self.bytes_in,
+                "bytes_enviados": self.bytes_out,
+                "razon_compresion": round(ratio, 3)
+            }
+
+# ===================== Empaquetado =====================
+
+def _looks_incompressible(codec: Codec, data: bytes) -> bool:
+    """Comprime una muestra para descartar rápido datos ya comprimidos o aleatorios."""
+    if len(data) <= SAMPLE_SIZE * 2:
+        return False
+    sample = data[:SAMPLE_SIZE]
+    return len(codec.compress(sample)) > len(sample) * INCOMPRESSIBLE_RATIO
+
+def pack(data: bytes, codec_name: Optional[str], stats: Optional[CompressionStats] = None) -> bytes:
+    """Antepone la bandera de compresión y comprime si vale la pena."""
+    codec = CODECS.get(codec_name) if codec_name else None
+    original = len(data)
+
+    if codec is None or original < COMPRESSION_THRESHOLD:
+        out, reason = FLAG_RAW + data, "small"
+    elif _looks_incompressible(codec, data):
+        out, reason = FLAG_RAW + data, "incompressible"
+    else:
+        compressed = codec.compress(data)
+        if len(compressed) > original * INCOMPRESSIBLE_RATIO:
+            out, reason = FLAG_RAW + data, "incompressible"
+        else:
+            out, reason = FLAG_COMPRESSED + compressed, "compressed"
+
+    if stats is not None:
+        stats.record(original, len(out), reason)
+    return out
+
+def unpack(data: bytes, codec_name: Optional[str], max_length: int = MAX_DECOMPRESSED_SIZE) -> bytes:
+    """Inverso de pack(): lee la bandera y descomprime si corresponde, sin pasar de max_length bytes."""
+    if not data:
+        raise ValueError("Payload vacío: falta la bandera de compresión")
+    flag, body = data[:1], data[1:]
+    if flag == FLAG_RAW:
+        return body
+    if flag == FLAG_COMPRESSED:
+        codec = CODECS.get(codec_name) if codec_name else None
+        if codec is None:
+            raise ValueError(f"Payload comprimido sin códec negociado ({codec_name})")
+        out = codec.decompress(body, max_length)
+        if len(out) > max_length:
+            raise ValueError(f"Payload descomprimido excede {max_length} bytes")
+        return out
+    raise ValueError(f"Bandera de compresión desconocida: {flag!r}")
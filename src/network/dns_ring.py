@@ -0,0 +1,231 @@
+# /src/network/dns_ring.py
+import os
+import json
+import random
+import socket
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from src.core.hash_ring import HashRing
+from src.core.tracing import inject
+
+# Nodo semilla por defecto; DNS_GENERAL_NODES="ip:puerto,ip:puerto" define el grupo completo
+DEFAULT_SEEDS = [("127.0.0.5", 50005)]
+
+# Acciones sin nombre de archivo que deben llegar a todos los nodos del anillo
+FANOUT_ACTIONS = {"registrar_servidor", "heartbeat", "heartbeat_batch", "suscribir", "suscribir_bloqueos"}
+
+# Campos que identifican al servidor que envía: cualquier petición con ellos cuenta como heartbeat
+SENDER_FIELDS = ("server_id", "requesting_server", "origen_server_id")
+
+# Consultas que puede responder cualquier miembro del grupo de una partición (no solo el líder)
+READ_ACTIONS = {"consultar", "listar_archivos"}
+
+def node_id(addr: Tuple[str, int]) -> str:
+    return f"{addr[0]}:{addr[1]}"
+
+def parse_node(node: str) -> Tuple[str, int]:
+    ip, port = node.rsplit(":", 1)
+    return ip, int(port)
+
+def seeds_from_env(default: List[Tuple[str, int]] = None) -> List[Tuple[str, int]]:
+    spec = os.environ.get("DNS_GENERAL_NODES", "").strip()
+    if not spec:
+        return list(default or DEFAULT_SEEDS)
+    return [parse_node(n.strip()) for n in spec.split(",") if n.strip()]
+
+class DNSGeneralRing:
+    """
+    Cliente del DNS General particionado. Envía cada petición al nodo dueño
+    del nombre de archivo según el anillo, reparte a todos los nodos las
+    acciones globales (registro, heartbeat, suscripciones), une los listados
+    y sigue las respuestas REDIRECT actualizando los miembros del anillo.
+    Si la partición es un grupo replicado, las escrituras van al líder
+    (aprendido de las respuestas REDIRECT_LIDER) y las consultas se reparten
+    entre los miembros.
+    """
+
+    def __init__(self, seeds: List[Tuple[str, int]] = None, metrics=None, tracer=None):
+        self.ring = HashRing(node_id(a) for a in (seeds or seeds_from_env()))
+        self.metrics = metrics  # MetricsRegistry opcional: latencia y fallos por salto al DNS General
+        self.tracer = tracer  # Tracer opcional: un span por salto (la traza activa viaja siempre en la petición)
+        self.groups: Dict[str, List[str]] = {}  # {partición: [miembros del grupo]}
+        self.leaders: Dict[str, str] = {}  # {partición: líder conocido}
+        self.contacts: Dict[str, float] = {}  # {partición: última petición identificada que atendió el líder}
+        self.lock = threading.Lock()
+
+    # --- Miembros ---
+
+    def members(self) -> List[Tuple[str, int]]:
+        with self.lock:
+            return [parse_node(n) for n in self.ring.nodes]
+
+    def update_members(self, nodos: List[str]) -> bool:
+        """Adopta una nueva lista de nodos. Devuelve True si cambió."""
+        if not nodos:
+            return False
+        with self.lock:
+            if sorted(nodos) == self.ring.nodes:
+                return False
+            self.ring = HashRing(nodos)
+            return True
+
+    def refresh(self, timeout: float = 2) -> bool:
+        """Pregunta los miembros actuales a cualquier nodo conocido."""
+        for addr in self.members():
+            try:
+                response = self._send(addr, {"accion": "miembros_anillo"}, timeout)
+            except Exception:
+                continue
+            if response.get("status") == "ACK":
+                self.update_members(response.get("nodos", []))
+                self._learn(response.get("nodo", node_id(addr)), response)
+                return True
+        return False
+
+    def _learn(self, nodo: str, response: Dict):
+        """Recuerda los miembros y el líder del grupo de una partición que trae la respuesta."""
+        with self.lock:
+            if response.get("grupo"):
+                self.groups[nodo] = list(response["grupo"])
+            if response.get("lider"):
+                self.leaders[nodo] = response["lider"]
+
+    def note_redirect(self, response: Dict):
+        """Aprende de un REDIRECT (anillo nuevo) o un REDIRECT_LIDER (otro líder del grupo)."""
+        if response.get("status") == "REDIRECT":
+            self.update_members(response.get("anillo", []))
+        elif response.get("status") == "REDIRECT_LIDER" and response.get("nodo"):
+            self._learn(response["nodo"], response)
+
+    def owner(self, nombre_archivo: str = None) -> str:
+        """Nodo dueño del archivo (sin nombre, el primero del anillo)."""
+        with self.lock:
+            return self.ring.node_for(nombre_archivo) if nombre_archivo else self.ring.nodes[0]
+
+    def addr_for(self, nombre_archivo: str = None) -> Tuple[str, int]:
+        """Dirección del líder conocido de la partición dueña del archivo."""
+        nodo = self.owner(nombre_archivo)
+        with self.lock:
+            return parse_node(self.leaders.get(nodo, nodo))
+
+    # --- Peticiones ---
+
+    def _send(self, addr: Tuple[str, int], request: Dict, timeout: float, bufsize: int = 65535,
+              sock: socket.socket = None) -> Dict:
+        if self.tracer is not None:
+            with self.tracer.span(f"salto {request.get('accion')}", destino=node_id(addr)):
+                return self._send_datagram(addr, request, timeout, bufsize, sock)
+        return self._send_datagram(addr, request, timeout, bufsize, sock)
+
+    def _send_datagram(self, addr: Tuple[str, int], request: Dict, timeout: float, bufsize: int,
+                       sock: socket.socket = None) -> Dict:
+        propio = sock is None
+        if propio:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        inicio = time.perf_counter()
+        try:
+            sock.settimeout(timeout)
+            sock.sendto(json.dumps(inject(request)).encode('utf-8'), addr)
+            data, _ = sock.recvfrom(bufsize)
+            return json.loads(data.decode('utf-8'))
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.counter("saltos_fallidos_total", destino="dns_general", accion=request.get("accion")).inc()
+            raise
+        finally:
+            if propio:
+                sock.close()
+            if self.metrics is not None:
+                self.metrics.histogram("salto_segundos", destino="dns_general",
+                                       accion=request.get("accion")).record(time.perf_counter() - inicio)
+
+    def _send_partition(self, nodo: str, request: Dict, timeout: float, sock: socket.socket = None) -> Dict:
+        """Envía a la partición: al líder conocido (o a cualquier miembro si es una consulta) y sigue REDIRECT_LIDER."""
+        lectura = request.get("accion") in READ_ACTIONS
+        with self.lock:
+            miembros = list(self.groups.get(nodo, [nodo]))
+            lider = self.leaders.get(nodo, nodo)
+        if lectura:
+            candidatos = random.sample(miembros, len(miembros))
+        else:
+            candidatos = [lider] + [m for m in miembros if m != lider]
+
+        error = None
+        for miembro in candidatos:
+            try:
+                response = self._send(parse_node(miembro), request, timeout, sock=sock)
+                if response.get("status") == "REDIRECT_LIDER" and response.get("lider") not in (None, miembro):
+                    self._learn(nodo, response)
+                    miembro = response["lider"]
+                    response = self._send(parse_node(miembro), request, timeout, sock=sock)
+            except Exception as e:
+                error = e  # miembro caído: probar con el siguiente del grupo
+                continue
+            self._learn(nodo, response)
+            if response.get("status") == "REDIRECT_LIDER":
+                error = Exception(response.get("mensaje"))  # elección en curso
+                continue
+            if not lectura:
+                with self.lock:
+                    self.leaders[nodo] = miembro
+                    if any(campo in request for campo in SENDER_FIELDS):
+                        self.contacts[nodo] = time.monotonic()
+            return response
+        raise error
+
+    def request(self, request: Dict, timeout: float = 5, sock: socket.socket = None) -> Dict:
+        """Envía la petición al nodo que corresponde (las excepciones de red se propagan).
+        Con sock, las peticiones a la partición salen de ese socket: los avisos push
+        que el DNS General mande después a quien preguntó llegan a él."""
+        accion = request.get("accion")
+        if accion == "listar_archivos":
+            return self.listar(timeout)
+        if accion in FANOUT_ACTIONS:
+            respuestas = self.broadcast(request, timeout)
+            return next((r for r in respuestas.values() if r.get("status") == "ACK"), next(iter(respuestas.values())))
+
+        nodo = self.owner(request.get("nombre_archivo"))
+        response = self._send_partition(nodo, request, timeout, sock)
+        for _ in range(2):
+            if response.get("status") != "REDIRECT":
+                break
+            # Anillo desactualizado: adoptar el del nodo y reintentar en el dueño
+            self.update_members(response.get("anillo", []))
+            response = self._send_partition(response["nodo"], request, timeout, sock)
+        return response
+
+    def idle(self, nodo: str) -> float:
+        """Segundos desde la última petición identificada que atendió la partición (inf si ninguna)."""
+        with self.lock:
+            contacto = self.contacts.get(nodo)
+        return float("inf") if contacto is None else time.monotonic() - contacto
+
+    def broadcast(self, request: Dict, timeout: float = 5, nodos: List[str] = None) -> Dict[str, Dict]:
+        """Envía la petición a todos los nodos (o solo a los indicados). {nodo: respuesta}"""
+        respuestas = {}
+        for addr in self.members():
+            if nodos is not None and node_id(addr) not in nodos:
+                continue
+            try:
+                respuestas[node_id(addr)] = self._send_partition(node_id(addr), request, timeout)
+            except Exception as e:
+                respuestas[node_id(addr)] = {"status": "ERROR", "mensaje": str(e)}
+        return respuestas
+
+    def listar(self, timeout: float = 5) -> Dict:
+        """Une los listados de todas las particiones"""
+        archivos, servidores, errores = [], 0, []
+        for nodo, response in self.broadcast({"accion": "listar_archivos"}, timeout).items():
+            if response.get("status") != "ACK":
+                errores.append(nodo)
+                continue
+            archivos.extend(response.get("archivos", []))
+            servidores = max(servidores, response.get("servidores_activos", 0))
+        if errores and not archivos:
+            return {"status": "ERROR", "mensaje": f"Sin respuesta de {', '.join(errores)}"}
+        result = {"status": "ACK", "archivos": archivos, "total": len(archivos), "servidores_activos": servidores}
+        if errores:
+            result["particiones_sin_respuesta"] = errores
+        return result
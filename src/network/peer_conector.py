@@ -1,51 +1,81 @@
 # /src/network/peer_conector.py
 
 import json
+import logging
+import time
 from typing import Dict, Tuple, Optional, Callable
 
 # --- Importaciones ---
 from .transport import ReliableTransport
 from .security import SecureSession, dh_generate_private_key, dh_generate_public_key, dh_calculate_shared_secret
+from .compression import CompressionStats, supported_codecs, negotiate_codec, pack, unpack
+from src.core.metrics import MetricsRegistry
+
+# Los mensajes por paquete van a DEBUG: con el nivel por defecto no cuestan ni el formateo
+log = logging.getLogger(__name__)
+
+# Claves del sobre para emparejar respuestas: el cliente numera la petición en
+# REQUEST_ID y el servidor devuelve ese número en REPLY_TO (ver reply())
+REQUEST_ID = "id_peticion"
+REPLY_TO = "en_respuesta_a"
 
 class PeerConnector:
-    def __init__(self, transport_layer: ReliableTransport, server_id: str, on_message_callback: Callable):
+    def __init__(self, transport_layer: ReliableTransport, server_id: str, on_message_callback: Callable,
+                 metrics: MetricsRegistry = None):
         self.transport = transport_layer
         self.server_id = server_id
         self.sessions: Dict[Tuple[str, int], SecureSession] = {}
         self.pending_handshakes: Dict[Tuple[str, int], dict] = {}
         self.on_message_callback = on_message_callback
+        # Sesiones que negociaron compresión -> códec elegido (None = ningún códec en común).
+        # Los peers ausentes de este dict usan el formato antiguo, sin bandera.
+        self.session_codecs: Dict[Tuple[str, int], Optional[str]] = {}
+        # Por defecto comparte el registro de métricas del transporte
+        self.metrics = metrics or getattr(transport_layer, "metrics", None) or MetricsRegistry()
+        self.compression_stats = CompressionStats(self.metrics)
+        self._errores_entrada = self.metrics.counter("seguridad_errores_total", tipo="mensaje_entrante")
+        self._sin_sesion = self.metrics.counter("seguridad_errores_total", tipo="sin_sesion")
+        self._cifrado = self.metrics.histogram("seguridad_cifrado_segundos", sentido="salida")
+        self._descifrado = self.metrics.histogram("seguridad_cifrado_segundos", sentido="entrada")
+        self._compresion = self.metrics.histogram("compresion_segundos", sentido="salida")
+        self._descompresion = self.metrics.histogram("compresion_segundos", sentido="entrada")
 
     def connect_and_secure(self, peer_addr: Tuple[str, int]):
         """Inicia un handshake de seguridad con un peer cuya dirección ya conocemos."""
         if peer_addr in self.sessions:
-            print(f"[PeerConnector] Ya existe una sesión segura con {peer_addr}.")
+            log.debug("[PeerConnector] Ya existe una sesión segura con %s.", peer_addr)
             return
 
         try:
             # Primero establecer conexión de transporte
             if not self.transport.connect(peer_addr):
-                print(f"No se pudo establecer conexión de transporte con {peer_addr}")
+                log.warning("[PeerConnector] No se pudo establecer conexión de transporte con %s", peer_addr)
                 return
 
-            print(f"[PeerConnector] Iniciando handshake de seguridad con {peer_addr}...")
-            private_key = dh_generate_private_key()
-            public_key = dh_generate_public_key(private_key)
-            
-            # Guardar información del handshake
-            self.pending_handshakes[peer_addr] = {
-                'private_key': private_key,
-                'client_id': self.server_id,
-                'is_client': True
-            }
-            
-            hello_msg = {
-                "type": "HANDSHAKE_HELLO",
-                "server_id": self.server_id,
-                "public_key": public_key
-            }
-            self.transport.send_data(hello_msg, peer_addr)
+            self._send_hello(peer_addr)
         except Exception as e:
-            print(f"Error al iniciar el handshake: {e}")
+            log.error("[PeerConnector] Error al iniciar el handshake: %s", e)
+
+    def _send_hello(self, peer_addr: Tuple[str, int]):
+        """Envía el HANDSHAKE_HELLO sobre una conexión de transporte ya establecida."""
+        log.info("[PeerConnector] Iniciando handshake de seguridad con %s...", peer_addr)
+        private_key = dh_generate_private_key()
+        public_key = dh_generate_public_key(private_key)
+        
+        # Guardar información del handshake
+        self.pending_handshakes[peer_addr] = {
+            'private_key': private_key,
+            'client_id': self.server_id,
+            'is_client': True
+        }
+        
+        hello_msg = {
+            "type": "HANDSHAKE_HELLO",
+            "server_id": self.server_id,
+            "public_key": public_key,
+            "compression": supported_codecs()
+        }
+        self.transport.send_data(hello_msg, peer_addr)
 
     def handle_incoming_packet(self, payload: Dict, addr: Tuple[str, int]):
         """Punto de entrada que delega los paquetes entrantes."""
@@ -60,7 +90,7 @@ class PeerConnector:
 
     def _handle_handshake_hello(self, payload: Dict, addr: Tuple[str, int]):
         """Manejador para el lado servidor del handshake."""
-        print(f"[PeerConnector] Recibido HANDSHAKE_HELLO de {addr}")
+        log.debug("[PeerConnector] Recibido HANDSHAKE_HELLO de %s", addr)
         try:
             private_key = dh_generate_private_key()
             public_key = dh_generate_public_key(private_key)
@@ -70,25 +100,37 @@ class PeerConnector:
             client_id = payload["server_id"]
             server_id = self.server_id
             
-            print(f"[PeerConnector] Derivando claves del servidor: client_id={client_id}, server_id={server_id}")
+            log.debug("[PeerConnector] Derivando claves del servidor: client_id=%s, server_id=%s", client_id, server_id)
             
             session = SecureSession()
             session.derive_keys(shared_secret, client_id, server_id, is_client=False)
             self.sessions[addr] = session
             
+            # Negociar compresión: solo si el cliente la ofreció
+            offered = payload.get("compression")
+            codec = negotiate_codec(offered)
+            if offered is not None:
+                self.session_codecs[addr] = codec
+            else:
+                self.session_codecs.pop(addr, None)
+            
             reply_msg = {
                 "type": "HANDSHAKE_REPLY",
                 "server_id": self.server_id,
                 "public_key": public_key
             }
+            if offered is not None:
+                reply_msg["compression"] = codec
             self.transport.send_data(reply_msg, addr)
-            print(f"[PeerConnector] Sesión segura establecida con {addr} (lado servidor).")
+            log.info("[PeerConnector] Sesión segura establecida con %s (lado servidor).", addr)
+            self.metrics.counter("seguridad_handshakes_total", lado="servidor", resultado="ok").inc()
         except Exception as e:
-            print(f"Error en handshake (servidor): {e}")
+            log.error("[PeerConnector] Error en handshake (servidor): %s", e)
+            self.metrics.counter("seguridad_handshakes_total", lado="servidor", resultado="error").inc()
 
     def _handle_handshake_reply(self, payload: Dict, addr: Tuple[str, int]):
         """Manejador para el lado cliente del handshake."""
-        print(f"[PeerConnector] Recibido HANDSHAKE_REPLY de {addr}")
+        log.debug("[PeerConnector] Recibido HANDSHAKE_REPLY de %s", addr)
         if addr not in self.pending_handshakes:
             return
 
@@ -101,45 +143,82 @@ class PeerConnector:
             # Crear IDs para la derivación de claves
             server_id = payload["server_id"]
             
-            print(f"[PeerConnector] Derivando claves del cliente: client_id={client_id}, server_id={server_id}")
+            log.debug("[PeerConnector] Derivando claves del cliente: client_id=%s, server_id=%s", client_id, server_id)
             
             session = SecureSession()
             session.derive_keys(shared_secret, client_id, server_id, is_client=True)
             self.sessions[addr] = session
-            print(f"[PeerConnector] Sesión segura establecida con {addr} (lado cliente).")
+            
+            # Un peer sin soporte no incluye el campo: se mantiene el formato sin bandera
+            if "compression" in payload:
+                codec = payload.get("compression")
+                self.session_codecs[addr] = codec if codec in supported_codecs() else None
+            else:
+                self.session_codecs.pop(addr, None)
+            log.info("[PeerConnector] Sesión segura establecida con %s (lado cliente).", addr)
+            self.metrics.counter("seguridad_handshakes_total", lado="cliente", resultado="ok").inc()
         except Exception as e:
-            print(f"Error en handshake (cliente): {e}")
+            log.error("[PeerConnector] Error en handshake (cliente): %s", e)
+            self.metrics.counter("seguridad_handshakes_total", lado="cliente", resultado="error").inc()
 
     def _process_application_message(self, encrypted_payload: Dict, addr: Tuple[str, int]):
         """Descifra y delega el mensaje de aplicación al MainServer."""
         session = self.sessions.get(addr)
         if not session:
-            print(f"No hay sesión segura con {addr} para descifrar mensaje")
+            log.warning("[PeerConnector] No hay sesión segura con %s para descifrar mensaje", addr)
+            self._sin_sesion.inc()
             return
 
         try:
+            inicio = time.perf_counter()
             plaintext_bytes = session.decrypt(encrypted_payload)
+            if addr in self.session_codecs:
+                inicio_unpack = time.perf_counter()
+                plaintext_bytes = unpack(plaintext_bytes, self.session_codecs[addr])
+                self._descompresion.record(time.perf_counter() - inicio_unpack)
             request = json.loads(plaintext_bytes.decode('utf-8'))
-            print(f"[PeerConnector] Mensaje descifrado de {addr}: {request.get('accion', 'unknown')}")
-            if self.on_message_callback:
-                self.on_message_callback(request, addr)
+            self._descifrado.record(time.perf_counter() - inicio)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("[PeerConnector] Mensaje descifrado de %s: %s", addr, request.get('accion', 'unknown'))
+            self._deliver_message(request, addr)
         except Exception as e:
-            print(f"Error al descifrar mensaje de {addr}: {e}")
+            log.warning("[PeerConnector] Error al descifrar mensaje de %s: %s", addr, e)
+            self._errores_entrada.inc()
+
+    def _deliver_message(self, request: Dict, addr: Tuple[str, int]):
+        if self.on_message_callback:
+            self.on_message_callback(request, addr)
 
-    def send_message(self, message: Dict, peer_addr: Tuple[str, int]):
-        """Cifra y envía un mensaje de aplicación."""
+    def send_message(self, message: Dict, peer_addr: Tuple[str, int]) -> bool:
+        """Cifra y envía un mensaje de aplicación; False si no pudo salir."""
         session = self.sessions.get(peer_addr)
         if not session:
-            print(f"No hay sesión segura con {peer_addr}.")
-            return
+            log.warning("[PeerConnector] No hay sesión segura con %s.", peer_addr)
+            self._sin_sesion.inc()
+            return False
 
         try:
+            inicio = time.perf_counter()
             message_bytes = json.dumps(message).encode('utf-8')
-            print(f"[PeerConnector] Enviando mensaje cifrado a {peer_addr}: {message.get('accion', 'unknown')}")
+            # Comprimir antes de cifrar (el texto cifrado ya no es compresible)
+            if peer_addr in self.session_codecs:
+                inicio_pack = time.perf_counter()
+                message_bytes = pack(message_bytes, self.session_codecs[peer_addr], self.compression_stats)
+                self._compresion.record(time.perf_counter() - inicio_pack)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("[PeerConnector] Enviando mensaje cifrado a %s: %s", peer_addr, message.get('accion', 'unknown'))
             encrypted_payload = session.encrypt(message_bytes)
-            self.transport.send_data(encrypted_payload, peer_addr)
+            self._cifrado.record(time.perf_counter() - inicio)
+            return self.transport.send_data(encrypted_payload, peer_addr) is not False
         except Exception as e:
-            print(f"Error al enviar mensaje cifrado: {e}")
+            log.error("[PeerConnector] Error al enviar mensaje cifrado: %s", e)
+            return False
+
+    def reply(self, request: Dict, response: Dict, peer_addr: Tuple[str, int]) -> bool:
+        """Envía la respuesta a una petición devolviendo su identificador, si lo traía."""
+        if REQUEST_ID in request:
+            response = dict(response, **{REPLY_TO: request[REQUEST_ID]})
+        return self.send_message(response, peer_addr)
 
     def stop(self):
         """Detiene la capa de transporte subyacente."""
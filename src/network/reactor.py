@@ -0,0 +1,172 @@
+# /src/network/reactor.py
+import heapq
+import itertools
+import logging
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+log = logging.getLogger(__name__)
+
+EVENT_READ = selectors.EVENT_READ
+EVENT_WRITE = selectors.EVENT_WRITE
+
+class Timer:
+    """Temporizador de la cola del reactor; cancel() lo anula sin buscarlo en el heap."""
+
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when: float, callback: Callable, args: tuple):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class Reactor:
+    """
+    Bucle de eventos mínimo: un selector (epoll/kqueue/poll según la
+    plataforma) con interés de lectura/escritura por socket y una cola de
+    temporizadores en un heap. Cada vuelta espera como mucho hasta el
+    próximo temporizador, atiende los sockets listos y luego los
+    temporizadores vencidos, así que los plazos se cumplen aunque el socket
+    esté siempre ocupado y no hay despertares si no vence nada.
+    """
+
+    def __init__(self, selector: selectors.BaseSelector = None, clock: Callable[[], float] = time.monotonic):
+        self.selector = selector or selectors.DefaultSelector()
+        self.clock = clock
+        self.timers: List = []  # heap de (when, orden, Timer)
+        self.counter = itertools.count()
+        self.cancelled = 0
+        self.ready = deque()
+        self.ready_lock = threading.Lock()
+        self.running = False
+        # Despertador para call_soon_threadsafe (solo con un selector real)
+        self.wakeup_r = self.wakeup_w = None
+        if selector is None:
+            self.wakeup_r, self.wakeup_w = socket.socketpair()
+            self.wakeup_r.setblocking(False)
+            self.wakeup_w.setblocking(False)
+            self.selector.register(self.wakeup_r, EVENT_READ, self._drain_wakeup)
+
+    # --- Temporizadores ---
+
+    def call_at(self, when: float, callback: Callable, *args) -> Timer:
+        timer = Timer(when, callback, args)
+        heapq.heappush(self.timers, (when, next(self.counter), timer))
+        return timer
+
+    def call_later(self, delay: float, callback: Callable, *args) -> Timer:
+        return self.call_at(self.clock() + delay, callback, *args)
+
+    def cancel(self, timer: Optional[Timer]):
+        if timer is not None and not timer.cancelled:
+            timer.cancel()
+            self.cancelled += 1
+            # Con muchos anulados el heap se reconstruye para no crecer sin límite
+            if self.cancelled > 512 and self.cancelled * 2 > len(self.timers):
+                self.timers = [t for t in self.timers if not t[2].cancelled]
+                heapq.heapify(self.timers)
+                self.cancelled = 0
+
+    def call_soon_threadsafe(self, callback: Callable, *args):
+        with self.ready_lock:
+            self.ready.append((callback, args))
+        if self.wakeup_w is not None:
+            try:
+                self.wakeup_w.send(b"\0")
+            except (BlockingIOError, OSError):
+                pass  # ya hay un despertar pendiente
+
+    def _drain_wakeup(self, mask: int):
+        try:
+            while self.wakeup_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    # --- Sockets ---
+
+    def register(self, fileobj, events: int, callback: Callable[[int], None]):
+        """callback(mask) se llama cuando fileobj está listo para los eventos pedidos."""
+        self.selector.register(fileobj, events, callback)
+
+    def modify(self, fileobj, events: int, callback: Callable[[int], None] = None):
+        key = self.selector.get_key(fileobj)
+        if key.events != events or (callback is not None and callback is not key.data):
+            self.selector.modify(fileobj, events, callback or key.data)
+
+    def unregister(self, fileobj):
+        try:
+            self.selector.unregister(fileobj)
+        except (KeyError, ValueError):
+            pass
+
+    # --- Bucle ---
+
+    def _next_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        if self.ready:
+            return 0
+        while self.timers and self.timers[0][2].cancelled:
+            heapq.heappop(self.timers)
+            self.cancelled = max(0, self.cancelled - 1)
+        if self.timers:
+            hasta_timer = max(0.0, self.timers[0][0] - self.clock())
+            return hasta_timer if timeout is None else min(timeout, hasta_timer)
+        return timeout
+
+    def run_once(self, timeout: Optional[float] = None) -> int:
+        """Una vuelta: espera eventos (como mucho timeout o hasta el próximo temporizador) y los atiende."""
+        eventos = self.selector.select(self._next_timeout(timeout))
+        for key, mask in eventos:
+            key.data(mask)
+
+        if self.ready:
+            with self.ready_lock:
+                pendientes, self.ready = self.ready, deque()
+            for callback, args in pendientes:
+                callback(*args)
+
+        return len(eventos) + self.run_due()
+
+    def run_due(self) -> int:
+        """Ejecuta los temporizadores vencidos sin esperar ni consultar el selector."""
+        if not self.timers:
+            return 0
+        ahora = self.clock()
+        atendidos = 0
+        while self.timers and self.timers[0][0] <= ahora:
+            _, _, timer = heapq.heappop(self.timers)
+            if timer.cancelled:
+                self.cancelled = max(0, self.cancelled - 1)
+                continue
+            atendidos += 1
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                log.error("[Reactor] Error en temporizador %s: %s", getattr(timer.callback, "__name__", timer.callback), e)
+        return atendidos
+
+    def run_forever(self):
+        self.running = True
+        while self.running:
+            self.run_once()
+
+    def stop(self):
+        self.running = False
+        self.call_soon_threadsafe(lambda: None)
+
+    def close(self):
+        self.running = False
+        if self.wakeup_r is not None:
+            self.unregister(self.wakeup_r)
+            self.wakeup_r.close()
+            self.wakeup_w.close()
+            self.wakeup_r = self.wakeup_w = None
+        self.selector.close()
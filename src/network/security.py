@@ -1,9 +1,13 @@
 # /src/network/security.py
 import hashlib
 import hmac
+import logging
 import secrets
 from typing import Dict, Tuple
 
+# Cifrar y descifrar registran solo en DEBUG; nunca se registra material de claves
+log = logging.getLogger(__name__)
+
 # ===================== Utilidades Criptográficas (SHA256, HKDF, PRF) =====================
 
 def H(x: bytes) -> bytes:
@@ -107,7 +111,7 @@ class SecureSession:
         Deriva las claves de cifrado y MAC de manera determinística.
         Ambos lados deben usar los mismos parámetros para generar las mismas claves.
         """
-        print(f"[Security] Derivando claves: shared_secret={shared_secret}, client_id={client_id}, server_id={server_id}, is_client={is_client}")
+        log.debug("[Security] Derivando claves: client_id=%s, server_id=%s, is_client=%s", client_id, server_id, is_client)
         
         # Crear contexto único pero determinístico
         context = f"{client_id}:{server_id}".encode()
@@ -140,7 +144,7 @@ class SecureSession:
         self.seq_send = 0
         self.seq_recv = 0
         self.state = "ESTABLISHED"
-        print(f"[Security] Claves derivadas correctamente. Estado: {self.state}")
+        log.debug("[Security] Claves derivadas correctamente. Estado: %s", self.state)
 
     def encrypt(self, plaintext: bytes) -> Dict:
         """
@@ -165,7 +169,7 @@ class SecureSession:
             "tag": tag.hex()
         }
         
-        print(f"[Security] Mensaje cifrado: seq={encrypted_record['seq']}, ct_len={len(ciphertext)}")
+        log.debug("[Security] Mensaje cifrado: seq=%s, ct_len=%s", encrypted_record['seq'], len(ciphertext))
         return encrypted_record
 
     def decrypt(self, record: Dict) -> bytes:
@@ -181,25 +185,16 @@ class SecureSession:
         
         seq_header = seq.to_bytes(8, "big")
         
-        print(f"[Security] Descifrando mensaje: seq={seq}, ct_len={len(ciphertext)}")
-        
         # Recalcular el MAC y verificar la integridad
         expected_tag = hmac256(self.keys["key_mac"], seq_header, ciphertext)
         
-        print(f"[Security] MAC recibido: {received_tag.hex()[:16]}...")
-        print(f"[Security] MAC esperado: {expected_tag.hex()[:16]}...")
-        
         if not hmac.compare_digest(expected_tag, received_tag):
-            print(f"[Security] ERROR: MAC no válido")
-            print(f"[Security] Claves actuales:")
-            print(f"  key_enc: {self.keys['key_enc'].hex()[:16]}...")
-            print(f"  key_mac: {self.keys['key_mac'].hex()[:16]}...")
-            print(f"  nonce_base: {self.keys['nonce_base'].hex()}")
+            log.warning("[Security] MAC no válido: seq=%s, ct_len=%s", seq, len(ciphertext))
             raise ValueError("Error de integridad: El MAC no es válido.")
         
         # Descifrar el payload
         keystream = prf_keystream(self.keys["key_enc"], self.keys["nonce_base"] + seq_header, len(ciphertext))
         plaintext = xor_bytes(ciphertext, keystream)
         
-        print(f"[Security] Mensaje descifrado correctamente")
+        log.debug("[Security] Mensaje descifrado: seq=%s, ct_len=%s", seq, len(ciphertext))
         return plaintext
\ No newline at end of file
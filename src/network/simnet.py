@@ -0,0 +1,309 @@
+# /src/network/simnet.py
+import errno
+import heapq
+import itertools
+import random
+import selectors
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Mayor datagrama UDP sobre IPv4; uno más grande falla como en un socket real (EMSGSIZE)
+MAX_DATAGRAM = 65507
+
+# Retraso extra (máximo) de un datagrama elegido para llegar desordenado
+REORDER_DELAY = 0.01
+
+# Direcciones que reparte la red a los sockets sin bind explícito
+SIM_HOST = "10.0.0.1"
+FIRST_PORT = 40000
+
+class LinkProfile:
+    """Deterioro de un sentido de un enlace (todas las probabilidades por datagrama)."""
+
+    def __init__(self, loss: float = 0.0, latency: float = 0.0, jitter: float = 0.0, reorder: float = 0.0,
+                 duplicate: float = 0.0, bandwidth: float = None, reorder_delay: float = REORDER_DELAY):
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self.reorder = reorder
+        self.duplicate = duplicate
+        self.bandwidth = bandwidth  # bytes/s; None = sin límite
+        self.reorder_delay = reorder_delay
+
+class SimulatedNetwork:
+    """
+    Red de datagramas en memoria con pérdidas, latencia, jitter, desorden,
+    duplicados y límite de ancho de banda por enlace. Cada sentido de cada
+    enlace tiene su propio generador sembrado con (seed, origen, destino):
+    el destino de cada datagrama depende solo del orden de envío en ese
+    enlace, no de cómo se intercalen los hilos.
+
+    Con virtual_time (por defecto) el reloj es simulado y recvfrom avanza
+    hasta la próxima entrega o hasta su timeout sin dormir: pensado para
+    pruebas que mueven todos los extremos desde un solo hilo. Con
+    virtual_time=False los retrasos son de tiempo real y los extremos
+    pueden vivir en hilos distintos.
+    """
+
+    def __init__(self, seed: int = 0, virtual_time: bool = True, mtu: int = MAX_DATAGRAM, **impairments):
+        self.seed = seed
+        self.virtual_time = virtual_time
+        self.mtu = mtu
+        self.default = LinkProfile(**impairments)
+        self.links: Dict[Tuple, LinkProfile] = {}
+        self.rngs: Dict[Tuple, random.Random] = {}
+        self.busy_until: Dict[Tuple, float] = {}
+        self.sockets: Dict[Tuple[str, int], "SimulatedSocket"] = {}
+        self.now = 0.0
+        self.seq = 0
+        self.next_port = FIRST_PORT
+        self.cond = threading.Condition()
+        self.stats = {"enviados": 0, "entregados": 0, "perdidos": 0, "duplicados": 0,
+                      "desordenados": 0, "sin_destino": 0}
+
+    def time(self) -> float:
+        """Reloj de la red: se pasa como clock a los transportes que la usan."""
+        return self.now if self.virtual_time else time.monotonic()
+
+    def advance(self, seconds: float):
+        """Avanza el reloj virtual (las entregas pendientes quedan disponibles)."""
+        with self.cond:
+            self.now += seconds
+            self.cond.notify_all()
+
+    def set_link(self, src: Tuple[str, int], dst: Tuple[str, int], **impairments):
+        """Deterioro propio del sentido src -> dst (el resto usa el de la red)."""
+        with self.cond:
+            self.links[(tuple(src), tuple(dst))] = LinkProfile(**impairments)
+
+    def socket(self, addr: Tuple[str, int] = None) -> "SimulatedSocket":
+        """Socket de datagramas de esta red, ya enlazado a addr (o a una dirección libre)."""
+        sock = SimulatedSocket(self)
+        sock.bind(addr or (SIM_HOST, 0))
+        return sock
+
+    def selector(self) -> "SimulatedSelector":
+        """Selector para un Reactor cuyos sockets son de esta red."""
+        return SimulatedSelector(self)
+
+    def _bind(self, sock: "SimulatedSocket", addr: Tuple[str, int]) -> Tuple[str, int]:
+        with self.cond:
+            host, port = addr
+            if port == 0:
+                while (host, self.next_port) in self.sockets:
+                    self.next_port += 1
+                port = self.next_port
+                self.next_port += 1
+            if (host, port) in self.sockets:
+                raise OSError(errno.EADDRINUSE, "Address already in use")
+            self.sockets[(host, port)] = sock
+            return host, port
+
+    def _unbind(self, addr: Tuple[str, int]):
+        with self.cond:
+            self.sockets.pop(addr, None)
+            self.cond.notify_all()
+
+    def _rng(self, link: Tuple) -> random.Random:
+        rng = self.rngs.get(link)
+        if rng is None:
+            rng = self.rngs[link] = random.Random(f"{self.seed}:{link[0]}:{link[1]}")
+        return rng
+
+    def _transmit(self, src: Tuple[str, int], data: bytes, dst: Tuple[str, int]):
+        if len(data) > self.mtu:
+            raise OSError(errno.EMSGSIZE, "Message too long")
+        link = (src, tuple(dst))
+        with self.cond:
+            self.stats["enviados"] += 1
+            perfil = self.links.get(link, self.default)
+            rng = self._rng(link)
+            if perfil.loss and rng.random() < perfil.loss:
+                self.stats["perdidos"] += 1
+                return
+            copias = 2 if perfil.duplicate and rng.random() < perfil.duplicate else 1
+            self.stats["duplicados"] += copias - 1
+
+            # Con límite de ancho de banda los datagramas salen uno tras otro por el enlace
+            salida = self.time()
+            if perfil.bandwidth:
+                salida = max(salida, self.busy_until.get(link, 0.0)) + len(data) / perfil.bandwidth
+                self.busy_until[link] = salida
+
+            destino = self.sockets.get(link[1])
+            for _ in range(copias):
+                retraso = perfil.latency
+                if perfil.jitter:
+                    retraso = max(0.0, retraso + rng.uniform(-perfil.jitter, perfil.jitter))
+                if perfil.reorder and rng.random() < perfil.reorder:
+                    retraso += rng.uniform(0, perfil.reorder_delay)
+                    self.stats["desordenados"] += 1
+                if destino is None:
+                    self.stats["sin_destino"] += 1  # como UDP: nadie escucha, se descarta en silencio
+                    continue
+                self.seq += 1
+                heapq.heappush(destino.inbox, (salida + retraso, self.seq, data, src))
+            self.cond.notify_all()
+
+class SimulatedSocket:
+    """Misma interfaz que un socket UDP para lo que usa el transporte (sendto, recvfrom[_into], timeouts)."""
+
+    _fds = itertools.count(1 << 20)  # descriptores ficticios para las claves del selector
+
+    def __init__(self, network: SimulatedNetwork):
+        self.network = network
+        self.addr: Optional[Tuple[str, int]] = None
+        self.inbox: List = []  # heap de (instante de entrega, orden, datos, origen)
+        self.timeout: Optional[float] = None
+        self.closed = False
+        self.fd = next(SimulatedSocket._fds)
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def selector(self) -> "SimulatedSelector":
+        return self.network.selector()
+
+    def _deliverable(self) -> bool:
+        return bool(self.inbox) and self.inbox[0][0] <= self.network.time()
+
+    def bind(self, addr: Tuple[str, int]):
+        if self.addr is not None:
+            raise OSError(errno.EINVAL, "Invalid argument")
+        self.addr = self.network._bind(self, tuple(addr))
+
+    def getsockname(self) -> Tuple[str, int]:
+        return self.addr
+
+    def settimeout(self, timeout: Optional[float]):
+        self.timeout = timeout
+
+    def gettimeout(self) -> Optional[float]:
+        return self.timeout
+
+    def setblocking(self, flag: bool):
+        self.timeout = None if flag else 0.0
+
+    def sendto(self, data: bytes, addr: Tuple[str, int]) -> int:
+        if self.closed:
+            raise OSError(errno.EBADF, "Bad file descriptor")
+        self.network._transmit(self.addr, bytes(data), addr)
+        return len(data)
+
+    def recvfrom(self, bufsize: int) -> Tuple[bytes, Tuple[str, int]]:
+        red = self.network
+        with red.cond:
+            limite = None if self.timeout is None else red.time() + self.timeout
+            while True:
+                if self.closed:
+                    raise OSError(errno.EBADF, "Bad file descriptor")
+                ahora = red.time()
+                if self.inbox and self.inbox[0][0] <= ahora:
+                    _, _, data, src = heapq.heappop(self.inbox)
+                    red.stats["entregados"] += 1
+                    return data[:bufsize], src
+                if self.timeout == 0.0:
+                    raise BlockingIOError(errno.EAGAIN, "Resource temporarily unavailable")
+                siguiente = self.inbox[0][0] if self.inbox else None
+
+                if red.virtual_time:
+                    # Reloj simulado: saltar a la próxima entrega o agotar el timeout al instante
+                    if siguiente is not None and (limite is None or siguiente <= limite):
+                        red.now = max(red.now, siguiente)
+                        continue
+                    if limite is None:
+                        raise socket.timeout("sin datagramas en tránsito hacia este socket")
+                    red.now = max(red.now, limite)
+                    raise socket.timeout("timed out")
+
+                espera = None if siguiente is None else siguiente - ahora
+                if limite is not None:
+                    if limite <= ahora:
+                        raise socket.timeout("timed out")
+                    espera = limite - ahora if espera is None else min(espera, limite - ahora)
+                red.cond.wait(espera)
+
+    def recvfrom_into(self, buffer, nbytes: int = 0) -> Tuple[int, Tuple[str, int]]:
+        data, src = self.recvfrom(nbytes or len(buffer))
+        buffer[:len(data)] = data
+        return len(data), src
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            if self.addr is not None:
+                self.network._unbind(self.addr)
+
+class SimulatedSelector(selectors.BaseSelector):
+    """
+    Selector sobre sockets de una SimulatedNetwork: un socket está listo
+    para leer cuando tiene un datagrama entregable y siempre para escribir.
+    Con reloj virtual, select() salta a la próxima entrega o al timeout.
+    """
+
+    def __init__(self, network: SimulatedNetwork):
+        self.network = network
+        self.keys: Dict[int, selectors.SelectorKey] = {}
+
+    def register(self, fileobj, events, data=None):
+        if fileobj.fd in self.keys:
+            raise KeyError(f"{fileobj!r} ya está registrado")
+        key = selectors.SelectorKey(fileobj, fileobj.fd, events, data)
+        self.keys[fileobj.fd] = key
+        return key
+
+    def unregister(self, fileobj):
+        return self.keys.pop(fileobj.fd)
+
+    def modify(self, fileobj, events, data=None):
+        key = self.keys[fileobj.fd]._replace(events=events, data=data)
+        self.keys[fileobj.fd] = key
+        return key
+
+    def get_map(self):
+        return {fd: key for fd, key in self.keys.items()}
+
+    def _ready(self) -> List:
+        listos = []
+        for key in self.keys.values():
+            mask = 0
+            if key.events & selectors.EVENT_READ and key.fileobj._deliverable():
+                mask |= selectors.EVENT_READ
+            if key.events & selectors.EVENT_WRITE and not key.fileobj.closed:
+                mask |= selectors.EVENT_WRITE
+            if mask:
+                listos.append((key, mask))
+        return listos
+
+    def select(self, timeout=None):
+        red = self.network
+        with red.cond:
+            limite = None if timeout is None else red.time() + max(0.0, timeout)
+            while True:
+                listos = self._ready()
+                if listos or (timeout is not None and timeout <= 0):
+                    return listos
+                entregas = [key.fileobj.inbox[0][0] for key in self.keys.values()
+                            if key.events & selectors.EVENT_READ and key.fileobj.inbox]
+                siguiente = min(entregas) if entregas else None
+
+                if red.virtual_time:
+                    if siguiente is not None and (limite is None or siguiente <= limite):
+                        red.now = max(red.now, siguiente)
+                        continue
+                    if limite is not None:
+                        red.now = max(red.now, limite)
+                    return []
+
+                ahora = red.time()
+                if limite is not None and limite <= ahora:
+                    return []
+                espera = None if siguiente is None else siguiente - ahora
+                if limite is not None:
+                    espera = limite - ahora if espera is None else min(espera, limite - ahora)
+                red.cond.wait(espera)
+
+    def close(self):
+        self.keys.clear()
@@ -2,20 +2,41 @@
 
 import socket
 import json
+import logging
 import random
+import re
 import time
-from typing import Dict, Tuple, Any, Optional
+from collections import deque
+from typing import Dict, List, Tuple, Any, Optional
+
+from src.core.metrics import MetricsRegistry
+from src.network.reactor import Reactor, EVENT_READ, EVENT_WRITE
+from src.network.batch_io import BufferPool, batch_receiver, batch_sender, supports_batching
+
+log = logging.getLogger(__name__)
 
-# ... (constantes y jsend no cambian) ...
 RTO = 1.0
+MAX_RTO = 8.0               # tope del backoff exponencial de las retransmisiones
+MAX_RETRIES = 5             # retransmisiones de un DATA sin ACK antes de dar al peer por caído
+SEND_WINDOW = 8             # DATA sin ACK en vuelo por conexión
+SEND_QUEUE_LIMIT = 256      # payloads esperando sitio en la ventana; con la cola llena send_data devuelve False
 CLEANUP_IDLE = 60
 FAST_RETX_DUPS = 3
+LISTEN_TIMEOUT = 0.2        # espera máxima de listen() sin datos, como el antiguo timeout del socket
+RECV_BUDGET = 64            # datagramas leídos por evento antes de volver a atender temporizadores
+DELIVERED_WINDOW = 256      # seqs recientes por conexión para descartar DATA duplicados o retransmitidos
+
+# Cabecera de un DATA tal como lo serializa _jsend (payload al final): se lee sobre el búfer recibido
+# sin decodificar el resto, y el payload solo se decodifica si se entrega
+DATA_HEADER = re.compile(rb'\{"type": "DATA", "seq": (\d+), "cid": (\d+), "sid": (\d+), "payload": ')
+NEWLINE = re.compile(rb"\n")
+_SIN_DECODIFICAR = object()  # duplicado ya entregado: el payload no hace falta
+_ILEGIBLE = object()
 
 def jsend(sock: socket.socket, msg: Dict, addr: Tuple[str, int]):
     sock.sendto((json.dumps(msg) + "\n").encode("utf-8"), addr)
 
 class ConnectionState:
-    # ... (esta clase no cambia) ...
     def __init__(self, addr: Tuple[str, int], cid: int, sid: int = 0):
         self.addr = addr
         self.cid = cid
@@ -23,103 +44,480 @@ class ConnectionState:
         self.state = "SYN_SENT" if sid == 0 else "SYN_RCVD"
         self.expected_final_ack = sid + 1 if sid != 0 else 0
         self.next_seq_to_send = sid + 1 if sid != 0 else cid
-        self.waiting_ack_for = None
-        self.last_sent_payload = None
-        self.last_send_time = 0.0
         self.dup_ack_count = 0
         self.last_ack_val = None
         self.last_activity = time.time()
         self.fin_sent = False
         self.fin_acked = False
+        # Temporizadores del reactor y DATA ya entregados (para no entregar dos veces)
+        self.retx_timer = None  # reenvío del SYN
+        self.idle_timer = None
+        self.delivered = deque()
+        self.delivered_set = set()
+        # DATA en vuelo por ACK esperado, en orden de envío: {"msg", "sent", "retries", "timer"}
+        self.in_flight: Dict[int, Dict] = {}
+        self.send_queue = deque()  # payloads a la espera de sitio en la ventana
+        self.dead = False  # un DATA agotó los reintentos: los envíos fallan hasta que el peer dé señales
+
+    @property
+    def waiting_ack_for(self) -> Optional[int]:
+        """ACK que espera el DATA en vuelo más antiguo (None si no hay ninguno)."""
+        return next(iter(self.in_flight), None)
 
 class ReliableTransport:
-    # ... (el __init__ no cambia) ...
-    def __init__(self, host: str, port: int):
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.bind((host, port))
-        self.sock.settimeout(0.2)
+    """
+    Transporte sobre un único socket de datagramas no bloqueante atendido
+    por un Reactor (selectors + cola de temporizadores). Los envíos que el
+    núcleo no acepta se encolan y se vacían cuando el socket vuelve a ser
+    escribible; los reintentos de SYN y DATA y la limpieza de conexiones
+    inactivas son temporizadores, así que se cumplen con el socket ocupado
+    y no cuestan nada mientras no vencen. listen() y connect() conservan su
+    interfaz síncrona y hacen girar el reactor mientras esperan.
+    Cada conexión tiene hasta SEND_WINDOW DATA en vuelo (cada uno con su
+    ACK y su reintento; si se pierde uno, los siguientes pueden entregarse
+    antes) y una cola acotada detrás; si un DATA agota los reintentos, el
+    peer se da por caído y todo lo pendiente para él falla de inmediato.
+    """
+
+    def __init__(self, host: str, port: int, metrics: MetricsRegistry = None, sock=None, clock=time.monotonic,
+                 reactor: Reactor = None, batch: int = 0):
+        # sock: socket de datagramas ya enlazado (p. ej. de src.network.simnet); por defecto UDP real en host:port
+        # clock: reloj de los plazos y del RTT (el de la red simulada para pruebas reproducibles)
+        # reactor: se puede compartir entre transportes; por defecto uno propio con el selector adecuado al socket
+        # batch: datagramas por llamada al sistema (recvmmsg/sendmmsg en Linux); 0 = uno por llamada
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((host, port))
+        self.sock = sock
+        self.sock.setblocking(False)
+        # Solo se cierra en stop() el reactor propio; uno compartido es de quien lo creó
+        self.owns_reactor = reactor is None
+        if reactor is None:
+            selector = getattr(sock, "selector", None)
+            reactor = Reactor(selector() if selector else None, clock)
+        self.reactor = reactor
+        self._init_state(metrics, clock)
+        if batch and supports_batching(sock):
+            self._rx = batch_receiver(sock, batch)
+            self._tx = batch_sender(sock, batch)
+        self.reactor.register(self.sock, EVENT_READ, self._on_event)
+        log.info("[Transport] Servidor escuchando en %s:%s", host, port)
+
+    def _init_state(self, metrics: Optional[MetricsRegistry], clock):
+        """Estado del protocolo y métricas, comunes a la variante síncrona y a la de asyncio."""
+        self.clock = clock
         self.connections: Dict[Tuple[str, int], ConnectionState] = {}
-        print(f"[Transport]   Servidor escuchando en {host}:{port}")
+        self.out_queue = deque()  # (datos, destino) que el socket aún no aceptó
+        self.inbox = deque()      # (payload, origen) de DATA recibidos que listen() aún no devolvió
+        self._rx = self._tx = None
+        self._tx_pending = None   # envíos acumulados mientras se procesa un lote recibido
+        self.buffers = BufferPool()
+
+        # Eventos del transporte (se crean una vez: el camino de cada datagrama solo incrementa)
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.metrics.gauge("transporte_conexiones", fn=lambda: len(self.connections))
+        self._bytes_sent = self.metrics.counter("transporte_bytes_enviados_total")
+        self._bytes_recv = self.metrics.counter("transporte_bytes_recibidos_total")
+        self._dup_acks = self.metrics.counter("transporte_acks_duplicados_total")
+        self._window_stalls = self.metrics.counter("transporte_esperas_ventana_total")
+        self._handshake_timeouts = self.metrics.counter("transporte_handshakes_fallidos_total")
+        self._retransmits = self.metrics.counter("transporte_retransmisiones_total")
+        self._give_ups = self.metrics.counter("transporte_datos_perdidos_total")
+        self._rejected = self.metrics.counter("transporte_envios_rechazados_total")
+        self._dup_data = self.metrics.counter("transporte_datos_duplicados_total")
+        self._idle_closed = self.metrics.counter("transporte_conexiones_inactivas_total")
+        self._send_queued = self.metrics.counter("transporte_envios_encolados_total")
+        self._rx_calls = self.metrics.counter("transporte_lotes_recibidos_total")
+        self._tx_calls = self.metrics.counter("transporte_lotes_enviados_total")
+        self._bad_payloads = self.metrics.counter("transporte_payloads_invalidos_total")
+        self._sent_by_type: Dict[Any, Any] = {}
+        self._recv_by_type: Dict[Any, Any] = {}
+        self._rtt = self.metrics.histogram("transporte_rtt_segundos")
+
+    # --- Envío no bloqueante ---
+
+    def _jsend(self, msg: Dict, addr: Tuple[str, int]):
+        data = (json.dumps(msg) + "\n").encode("utf-8")
+        self._bytes_sent.inc(len(data))
+        mtype = msg.get("type")
+        contador = self._sent_by_type.get(mtype)
+        if contador is None:
+            contador = self._sent_by_type[mtype] = self.metrics.counter("transporte_datagramas_enviados_total", tipo=mtype)
+        contador.inc()
+        self._sendto(data, addr)
+
+    def _sendto(self, data: bytes, addr: Tuple[str, int]):
+        if self._tx_pending is not None:
+            self._tx_pending.append((data, addr))  # sale con el resto del lote en un solo sendmmsg
+            return
+        if not self.out_queue:
+            try:
+                self.sock.sendto(data, addr)
+                return
+            except (BlockingIOError, InterruptedError):
+                pass
+        # Búfer del núcleo lleno: encolar y pedir aviso de escritura
+        self.out_queue.append((data, addr))
+        self._send_queued.inc()
+        self.reactor.modify(self.sock, EVENT_READ | EVENT_WRITE)
+
+    def _flush(self):
+        while self.out_queue:
+            data, addr = self.out_queue[0]
+            try:
+                self.sock.sendto(data, addr)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                log.debug("[Transport] Envío descartado a %s: %s", addr, e)
+            self.out_queue.popleft()
+        self.reactor.modify(self.sock, EVENT_READ)
+
+    # --- Recepción ---
+
+    def _on_event(self, mask: int):
+        if mask & EVENT_WRITE:
+            self._flush()
+        if mask & EVENT_READ:
+            self._drain(RECV_BUDGET)
+
+    def _drain(self, budget: int, until_data: bool = False):
+        if self._rx is not None:
+            self._drain_batched(budget, until_data)
+            return
+        # Un búfer del pool para toda la ráfaga (otra lectura anidada tomaría otro)
+        buf = self.buffers.acquire()
+        vista = memoryview(buf)
+        try:
+            for _ in range(budget):
+                try:
+                    n, addr = self.sock.recvfrom_into(buf)
+                except (BlockingIOError, InterruptedError):
+                    return
+                except OSError:
+                    return  # p. ej. ICMP de puerto inalcanzable de un envío anterior
+                self._handle_datagram(vista[:n], addr)
+                if until_data and self.inbox:
+                    return
+        finally:
+            vista.release()
+            self.buffers.release(buf)
+
+    def _drain_batched(self, budget: int, until_data: bool):
+        leidos = 0
+        while leidos < budget:
+            try:
+                lote = self._rx.recv()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            self._rx_calls.inc()
+            # Las respuestas (ACK, SYN-ACK) del lote se envían juntas al terminarlo
+            self._tx_pending = []
+            try:
+                for data, addr in lote:
+                    self._handle_datagram(data, addr)
+            finally:
+                pendientes, self._tx_pending = self._tx_pending, None
+                if pendientes:
+                    self._send_batch(pendientes)
+            leidos += len(lote)
+            if len(lote) < self._rx.batch or (until_data and self.inbox):
+                return  # lote incompleto: el socket ya está vacío
+
+    def _send_batch(self, datagramas: List[Tuple[bytes, Tuple[str, int]]]):
+        resto = datagramas
+        while resto and not self.out_queue:
+            try:
+                enviados = self._tx.send(resto)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                log.debug("[Transport] Envío descartado a %s: %s", resto[0][1], e)
+                enviados = 1
+            self._tx_calls.inc()
+            resto = resto[enviados:]
+        if resto:
+            self.out_queue.extend(resto)
+            self._send_queued.inc(len(resto))
+            self.reactor.modify(self.sock, EVENT_READ | EVENT_WRITE)
+
+    def _handle_datagram(self, data, addr: Tuple[str, int]):
+        """data: bytes o memoryview sobre un búfer reutilizable (no se guarda ninguna referencia a él)."""
+        n = len(data)
+        self._bytes_recv.inc(n)
+        m = DATA_HEADER.match(data)
+        if m is not None and data[n - 2:] == b"}\n" and NEWLINE.search(data, m.end(), n - 1) is None:
+            self._handle_data_view(m, data[m.end():n - 2], addr)
+            return
+
+        # Handshake, ACK y DATA de otros formatos: línea a línea con json
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        for line in data.decode("utf-8").splitlines():
+            if not line.strip(): continue
+            try:
+                msg = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            mtype = msg.get("type")
+            self._count_received(mtype)
+            if mtype == "SYN-ACK":
+                self._handle_synack(msg, addr)
+                continue
+            st = self._get_or_create_connection(addr, msg)
+            if not st: continue
+            st.last_activity = self.clock()
+
+            if mtype == "ACK":
+                self._handle_ack(st, msg)
+            elif mtype == "DATA":
+                self._handle_data(st, msg, addr)
+
+    def _count_received(self, mtype):
+        contador = self._recv_by_type.get(mtype)
+        if contador is None:
+            contador = self._recv_by_type[mtype] = self.metrics.counter("transporte_datagramas_recibidos_total", tipo=mtype)
+        contador.inc()
+
+    def _handle_data_view(self, m, payload_raw, addr: Tuple[str, int]):
+        """DATA con la cabecera ya leída: el payload solo se decodifica si no es un duplicado ya entregado."""
+        self._count_received("DATA")
+        seq = int(m[1])
+        header = {"type": "DATA", "seq": seq, "cid": int(m[2]), "sid": int(m[3])}
+        st = self.connections.get(addr)
+        payload = _SIN_DECODIFICAR
+        if st is None or seq not in st.delivered_set:
+            payload = self._decode_payload(payload_raw, addr)
+            if payload is _ILEGIBLE:
+                return
+        st = self._get_or_create_connection(addr, header)
+        if not st:
+            return
+        if payload is _SIN_DECODIFICAR and seq not in st.delivered_set:
+            # Conexión reemplazada (otro CID): el seq ya no es un duplicado de esta
+            payload = self._decode_payload(payload_raw, addr)
+            if payload is _ILEGIBLE:
+                return
+        st.last_activity = self.clock()
+        # El tramo en el datagrama es exactamente json.dumps(payload): mismo ACK sin volver a serializar
+        if self._accept_data(st, seq, len(payload_raw), addr):
+            self._deliver(payload, addr)
+
+    def _decode_payload(self, payload_raw, addr: Tuple[str, int]) -> Any:
+        """Se valida antes de confirmar: un payload ilegible cuenta como no recibido (sin ACK, el emisor reenvía)."""
+        try:
+            return json.loads(bytes(payload_raw))
+        except ValueError:
+            log.debug("[Transport] Payload ilegible de %s descartado sin ACK", addr)
+            self._bad_payloads.inc()
+            return _ILEGIBLE
+
+    def _handle_data(self, st: ConnectionState, msg: Dict, addr: Tuple[str, int]):
+        if self._accept_data(st, msg["seq"], len(json.dumps(msg.get("payload"))), addr):
+            self._deliver(msg.get("payload"), addr)
+
+    def _accept_data(self, st: ConnectionState, seq: int, payload_len: int, addr: Tuple[str, int]) -> bool:
+        """Confirma el DATA; True si es nuevo (hay que entregarlo), False si ya se entregó."""
+        ack_msg = {"type": "ACK", "ack": seq + payload_len, "cid": st.cid, "sid": st.sid}
+        self._jsend(ack_msg, addr)
+        st.dead = False
+        if st.state == "SYN_RCVD":
+            st.state = "ESTABLISHED"  # el ACK final se perdió, pero el DATA confirma la conexión
+
+        # Un DATA repetido (duplicado en la red o retransmitido porque se perdió el ACK) se confirma sin entregarlo
+        if seq in st.delivered_set:
+            self._dup_data.inc()
+            return False
+        st.delivered.append(seq)
+        st.delivered_set.add(seq)
+        if len(st.delivered) > DELIVERED_WINDOW:
+            st.delivered_set.discard(st.delivered.popleft())
+        return True
+
+    def _deliver(self, payload: Any, addr: Tuple[str, int]):
+        self.inbox.append((payload, addr))
+
+    # --- Conexiones ---
 
-    # --- NUEVO MÉTODO PARA EL CLIENTE ---
     def connect(self, addr: Tuple[str, int]) -> bool:
         """Inicia el handshake de transporte (lado cliente)."""
-        if addr in self.connections:
+        st = self.connections.get(addr)
+        if st is not None and not st.dead:
             return True # Ya conectado
+        if st is not None:
+            self._close_connection(st)  # peer dado por caído: handshake nuevo
 
+        st = self._start_connect(addr)
+
+        # Esperar por el SYN-ACK (el SYN se reenvía cada RTO)
+        limite = self.clock() + RTO * 3
+        while st.state != "ESTABLISHED" and self.clock() < limite:
+            self.reactor.run_once(limite - self.clock())
+        if st.state == "ESTABLISHED":
+            return True
+
+        log.warning("[Transport] Timeout estableciendo conexión de transporte con %s", addr)
+        self._handshake_timeouts.inc()
+        self._close_connection(st)
+        return False
+
+    def _start_connect(self, addr: Tuple[str, int]) -> ConnectionState:
         cid = random.randint(1000, 999999)
         st = ConnectionState(addr, cid)
+        st.last_activity = self.clock()
         self.connections[addr] = st
-        
-        print(f"[Transport] Enviando SYN a {addr} con CID={cid}")
-        syn_msg = {"type": "SYN", "seq": cid}
-        jsend(self.sock, syn_msg, addr)
-        st.last_activity = time.time()
-        
-        # Esperar por el SYN-ACK
-        start_time = time.time()
-        while time.time() - start_time < RTO * 3: # Esperar un tiempo razonable
-            try:
-                data, _ = self.sock.recvfrom(65535)
-                msg = json.loads(data.decode("utf-8").strip())
-                if msg.get("type") == "SYN-ACK" and msg.get("ack") == cid + 1:
-                    st.state = "ESTABLISHED"
-                    st.sid = msg["sid"]
-                    st.next_seq_to_send = msg["ack"]
-                    ack_msg = {"type": "ACK", "ack": msg["seq"] + 1, "cid": cid, "sid": st.sid}
-                    jsend(self.sock, ack_msg, addr)
-                    print(f"[Transport] ✅ Conexión establecida con {addr}")
-                    return True
-            except (socket.timeout, json.JSONDecodeError):
-                continue
-        
-        print(f"❌ Timeout estableciendo conexión de transporte con {addr}")
-        del self.connections[addr]
-        return False
 
-    # --- MÉTODOS EXISTENTES (con pequeñas correcciones) ---
+        log.debug("[Transport] Enviando SYN a %s con CID=%s", addr, cid)
+        self._send_syn(st)
+        return st
+
+    def _send_syn(self, st: ConnectionState):
+        if self.connections.get(st.addr) is not st or st.state != "SYN_SENT":
+            return
+        self._jsend({"type": "SYN", "seq": st.cid}, st.addr)
+        st.retx_timer = self.reactor.call_later(RTO, self._send_syn, st)
+
+    def _handle_synack(self, msg: Dict, addr: Tuple[str, int]):
+        st = self.connections.get(addr)
+        if not st or msg.get("ack") != st.cid + 1:
+            return
+        if st.state == "SYN_SENT":
+            self.reactor.cancel(st.retx_timer)
+            st.retx_timer = None
+            st.state = "ESTABLISHED"
+            st.sid = msg["sid"]
+            st.next_seq_to_send = msg["ack"]
+            log.info("[Transport] Conexión establecida con %s", addr)
+        # También ante un SYN-ACK repetido: nuestro ACK final pudo perderse
+        ack_msg = {"type": "ACK", "ack": msg["seq"] + 1, "cid": st.cid, "sid": st.sid}
+        self._jsend(ack_msg, addr)
+        st.last_activity = self.clock()
+
     def _get_or_create_connection(self, addr: Tuple[str, int], msg: Dict) -> ConnectionState:
-        if addr in self.connections:
-            return self.connections[addr]
-        
-        if msg.get("type") == "SYN":
+        st = self.connections.get(addr)
+        mtype = msg.get("type")
+        if st is not None:
+            if mtype != "SYN":
+                return st
+            if msg.get("seq") == st.cid:
+                if st.state == "SYN_RCVD":
+                    self._send_synack(st)  # nuestro SYN-ACK se perdió y el cliente repite el SYN
+                return st
+            self._close_connection(st)  # mismo origen con otro CID: el cliente se reinició
+
+        if mtype == "SYN":
             cid = msg.get("seq")
             if cid is None: return None
-            
+
             sid = random.randint(1000, 999999)
             st = ConnectionState(addr, cid, sid)
             self.connections[addr] = st
-            
-            print(f"[Transport] SYN recibido de {addr}, CID={cid}, generando SID={sid}")
-            synack = {"type": "SYN-ACK", "seq": sid, "ack": cid + 1, "cid": cid, "sid": sid}
-            jsend(self.sock, synack, addr)
-            st.last_activity = time.time()
+
+            log.debug("[Transport] SYN recibido de %s, CID=%s, generando SID=%s", addr, cid, sid)
+            self._send_synack(st)
+            st.last_activity = self.clock()
+            self._watch_idle(st)
+            return st
+
+        if mtype == "DATA" and msg.get("cid") is not None and msg.get("sid") is not None:
+            # Conexión aceptada y olvidada por inactividad: se retoma con los identificadores del DATA
+            st = ConnectionState(addr, msg["cid"], msg["sid"])
+            st.state = "ESTABLISHED"
+            self.connections[addr] = st
+            st.last_activity = self.clock()
+            self._watch_idle(st)
             return st
         return None
 
+    def _send_synack(self, st: ConnectionState):
+        synack = {"type": "SYN-ACK", "seq": st.sid, "ack": st.cid + 1, "cid": st.cid, "sid": st.sid}
+        self._jsend(synack, st.addr)
+
+    def _watch_idle(self, st: ConnectionState):
+        """Solo las conexiones aceptadas se olvidan por inactividad (el cliente las retoma al enviar)."""
+        st.idle_timer = self.reactor.call_later(CLEANUP_IDLE, self._check_idle, st)
+
+    def _check_idle(self, st: ConnectionState):
+        if self.connections.get(st.addr) is not st:
+            return
+        inactiva = self.clock() - st.last_activity
+        if inactiva >= CLEANUP_IDLE and not st.in_flight:
+            log.debug("[Transport] Conexión inactiva con %s cerrada tras %.0f s", st.addr, inactiva)
+            self._idle_closed.inc()
+            self._close_connection(st)
+            return
+        st.idle_timer = self.reactor.call_later(max(CLEANUP_IDLE - inactiva, RTO), self._check_idle, st)
+
+    def _close_connection(self, st: ConnectionState):
+        self.reactor.cancel(st.retx_timer)
+        self.reactor.cancel(st.idle_timer)
+        st.retx_timer = st.idle_timer = None
+        for segmento in st.in_flight.values():
+            self.reactor.cancel(segmento["timer"])
+        st.in_flight.clear()
+        if self.connections.get(st.addr) is st:
+            del self.connections[st.addr]
+
     def _handle_ack(self, st: ConnectionState, msg: Dict):
         ack = msg.get("ack")
         if ack is None: return
-        st.last_activity = time.time()
+        st.last_activity = self.clock()
+        st.dead = False
 
         if st.state == "SYN_RCVD" and ack == st.expected_final_ack:
             st.state = "ESTABLISHED"
-            print(f"[Transport] ✅ Conexión establecida con {st.addr}")
+            log.info("[Transport] Conexión establecida con %s", st.addr)
+            return
+        if st.state != "ESTABLISHED":
+            return
+
+        # Cada DATA se confirma con su propio ACK (seq + longitud del payload)
+        segmento = st.in_flight.pop(ack, None)
+        if segmento is None:
+            if ack == st.last_ack_val:
+                st.dup_ack_count += 1
+                self._dup_acks.inc()
             return
+        if segmento["retries"] == 0:
+            self._rtt.record(self.clock() - segmento["sent"])  # sin ambigüedad (Karn)
+        self.reactor.cancel(segmento["timer"])
+        st.dup_ack_count = 0
+        st.last_ack_val = ack
+        self._fill_window(st)
 
-        if st.state == "ESTABLISHED" and st.waiting_ack_for is not None:
-            if ack >= st.waiting_ack_for:
-                st.waiting_ack_for = None
-                st.last_sent_payload = None
-                st.dup_ack_count = 0
-                st.last_ack_val = ack
+    # --- Datos ---
 
-    def send_data(self, payload: Dict, addr: Tuple[str, int]):
+    def send_data(self, payload: Dict, addr: Tuple[str, int]) -> bool:
+        """Envía o encola un DATA; False si no hay conexión establecida con addr, si el peer
+        se dio por caído o si su cola de envío está llena."""
         st = self.connections.get(addr)
         if not st or st.state != "ESTABLISHED":
-            print(f"❌ [Transport] Error: Conexión con {addr} no está establecida. Estado: {st.state if st else 'N/A'}")
-            return
-            
+            log.warning("[Transport] Conexión con %s no está establecida. Estado: %s", addr, st.state if st else 'N/A')
+            return False
+        if st.dead:
+            log.debug("[Transport] %s no responde; se rechaza el envío", addr)
+            self._rejected.inc()
+            return False
+
+        if len(st.in_flight) >= SEND_WINDOW or st.send_queue:
+            if len(st.send_queue) >= SEND_QUEUE_LIMIT:
+                log.warning("[Transport] Cola de envío llena para %s; se rechaza el envío", addr)
+                self._rejected.inc()
+                return False
+            self._window_stalls.inc()  # ventana llena: sale cuando llegue un ACK
+            st.send_queue.append(payload)
+            return True
+        self._send_segment(st, payload)
+        return True
+
+    def _fill_window(self, st: ConnectionState):
+        while st.send_queue and len(st.in_flight) < SEND_WINDOW:
+            self._send_segment(st, st.send_queue.popleft())
+
+    def _send_segment(self, st: ConnectionState, payload: Dict):
         msg = {
             "type": "DATA",
             "seq": st.next_seq_to_send,
@@ -127,48 +525,68 @@ class ReliableTransport:
             "sid": st.sid,
             "payload": payload
         }
-        jsend(self.sock, msg, addr)
-        
-        st.last_sent_payload = payload
-        st.waiting_ack_for = st.next_seq_to_send + 1 # Esperamos ACK para este paquete
+        self._jsend(msg, st.addr)
+
         st.next_seq_to_send += len(json.dumps(payload)) # Simulación de tamaño de paquete
-        st.last_send_time = time.time()
-        st.last_activity = st.last_send_time
+        ack = st.next_seq_to_send  # el receptor confirma seq + longitud del payload
+        ahora = self.clock()
+        st.last_activity = ahora
+        st.in_flight[ack] = {"msg": msg, "sent": ahora, "retries": 0,
+                             "timer": self.reactor.call_later(RTO, self._retransmit, st, ack)}
 
-    def listen(self) -> Tuple[Optional[Dict], Optional[Tuple[str, int]]]:
-        try:
-            data, addr = self.sock.recvfrom(65535)
-        except socket.timeout:
-            self._check_timeouts()
-            return None, None
-        except OSError:
-            return None, None
+    def _retransmit(self, st: ConnectionState, ack: int):
+        """Reenvía un DATA sin ACK con backoff exponencial; tras MAX_RETRIES da al peer por caído."""
+        segmento = st.in_flight.get(ack)
+        if self.connections.get(st.addr) is not st or segmento is None:
+            return
+        segmento["timer"] = None
+        if segmento["retries"] >= MAX_RETRIES:
+            self._declare_dead(st)
+            return
+        segmento["retries"] += 1
+        self._retransmits.inc()
+        self._jsend(segmento["msg"], st.addr)
+        segmento["timer"] = self.reactor.call_later(min(RTO * 2 ** segmento["retries"], MAX_RTO),
+                                                    self._retransmit, st, ack)
 
-        for line in data.decode("utf-8").splitlines():
-            if not line.strip(): continue
-            try:
-                msg = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            
-            mtype = msg.get("type")
-            st = self._get_or_create_connection(addr, msg)
-            if not st: continue
-            
-            if mtype == "ACK":
-                self._handle_ack(st, msg)
-            elif mtype == "DATA":
-                ack_msg = {"type": "ACK", "ack": msg["seq"] + len(json.dumps(msg.get("payload"))), "cid": st.cid, "sid": st.sid}
-                jsend(self.sock, ack_msg, addr)
-                return msg.get("payload"), addr
+    def _declare_dead(self, st: ConnectionState):
+        """Lo en vuelo y lo encolado se descarta ya, en lugar de esperar los reintentos de cada DATA."""
+        perdidos = len(st.in_flight) + len(st.send_queue)
+        log.warning("[Transport] Sin ACK de %s tras %s reintentos; se descartan %s envíos", st.addr, MAX_RETRIES, perdidos)
+        self._give_ups.inc(perdidos)
+        for segmento in st.in_flight.values():
+            self.reactor.cancel(segmento["timer"])
+        st.in_flight.clear()
+        st.send_queue.clear()
+        st.dead = True
+
+    def listen(self, timeout: float = LISTEN_TIMEOUT) -> Tuple[Optional[Dict], Optional[Tuple[str, int]]]:
+        """Siguiente payload recibido, haciendo girar el reactor hasta timeout segundos; (None, None) si no llega."""
+        try:
+            if not self.inbox and self.sock is not None:
+                # Lectura directa antes de select(): con tráfico continuo el datagrama ya está en el búfer
+                self._drain(RECV_BUDGET, until_data=True)
+            if self.inbox:
+                self.reactor.run_due()  # los plazos se cumplen aunque nunca haga falta esperar
+            limite = self.clock() + timeout
+            while not self.inbox and self.sock is not None:
+                resto = limite - self.clock()
+                if resto <= 0:
+                    break
+                self.reactor.run_once(resto)
+        except (OSError, ValueError):
+            return None, None  # socket cerrado por stop() desde otro hilo
+        if self.inbox:
+            return self.inbox.popleft()
         return None, None
 
-    def _check_timeouts(self):
-        # ... (este método no necesita cambios) ...
-        pass
-    
     def stop(self):
-        print("[Transport] Cerrando el socket.")
+        log.info("[Transport] Cerrando el socket.")
         if self.sock:
+            for st in list(self.connections.values()):
+                self._close_connection(st)
+            self.reactor.unregister(self.sock)
             self.sock.close()
-            self.sock = None
\ No newline at end of file
+            self.sock = None
+            if self.owns_reactor:
+                self.reactor.close()
@@ -0,0 +1,90 @@
+# /tests/test_async_transport.py
+
+import sys
+import os
+import asyncio
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.network.async_transport import AsyncReliableTransport
+from src.network.async_peer_conector import AsyncPeerConnector
+
+async def escenario():
+    # 1. Transporte: connect + send_data y recv() sin hilos ni sondeo
+    servidor = await AsyncReliableTransport.create("127.0.0.1", 0)
+    cliente = await AsyncReliableTransport.create("127.0.0.1", 0)
+    destino = servidor.sock.getsockname()
+    assert await cliente.connect(destino)
+    cliente.send_data({"accion": "consultar"}, destino)
+    cliente.send_data({"accion": "listar_archivos"}, destino)  # en vuelo junto al primero (ventana)
+    recibidos = [await asyncio.wait_for(servidor.recv(), 2) for _ in range(2)]
+    assert [p for p, _ in recibidos] == [{"accion": "consultar"}, {"accion": "listar_archivos"}]
+    assert recibidos[0][1] == cliente.sock.getsockname()
+    cliente.stop()
+    servidor.stop()
+
+    # Sin nadie escuchando el handshake se rinde
+    huerfano = await AsyncReliableTransport.create("127.0.0.1", 0)
+    assert not await huerfano.connect(destino, timeout=0.3)
+    assert huerfano.metrics.snapshot()["transporte_handshakes_fallidos_total"][0]["valor"] == 1
+    huerfano.stop()
+
+    # 2. Peers seguros: un servidor de eco y muchos clientes concurrentes en el mismo bucle
+    eco = await AsyncPeerConnector.create("127.0.0.1", 0, "servidor")
+    eco.on_message_callback = lambda req, addr: eco.reply(req, {"status": "ACK", "eco": req}, addr)
+    addr_eco = eco.transport.sock.getsockname()
+
+    clientes = [await AsyncPeerConnector.create("127.0.0.1", 0) for _ in range(50)]
+
+    async def sesion(i, peer):
+        assert await peer.connect_and_secure(addr_eco)
+        # Peticiones en tubería: cada respuesta se empareja por su id
+        return await asyncio.gather(*(peer.request({"accion": "consultar", "n": i * 10 + k}, addr_eco) for k in range(3)))
+
+    respuestas = await asyncio.gather(*(sesion(i, p) for i, p in enumerate(clientes)))
+    for i, lote in enumerate(respuestas):
+        assert [r["eco"]["n"] for r in lote] == [i * 10 + k for k in range(3)], lote
+    assert len(eco.sessions) == 50
+    print(f"Sesiones seguras concurrentes: {len(eco.sessions)}")
+
+    # request() sin respuesta devuelve un error en lugar de bloquear
+    eco.on_message_callback = None
+    r = await clientes[0].request({"accion": "consultar"}, addr_eco, timeout=0.2)
+    assert r["status"] == "ERROR"
+
+    # 3. Una petición vencida no se queda con la respuesta de la siguiente
+    loop = asyncio.get_running_loop()
+    def eco_selectivo(req, addr):
+        if req["accion"] == "lenta":
+            loop.call_later(0.4, eco.reply, req, {"status": "ACK", "eco": req}, addr)
+        elif req["accion"] != "perdida":
+            eco.reply(req, {"status": "ACK", "eco": req}, addr)
+    eco.on_message_callback = eco_selectivo
+    cliente = clientes[1]
+    assert (await cliente.request({"accion": "perdida"}, addr_eco, timeout=0.2))["status"] == "ERROR"
+    assert (await cliente.request({"accion": "consultar", "n": 1}, addr_eco, timeout=2))["eco"]["n"] == 1
+    assert (await cliente.request({"accion": "lenta"}, addr_eco, timeout=0.2))["status"] == "ERROR"
+    assert (await cliente.request({"accion": "consultar", "n": 2}, addr_eco, timeout=2))["eco"]["n"] == 2
+    await asyncio.sleep(0.4)  # llega la respuesta tardía a "lenta": se descarta
+    assert cliente.metrics.snapshot()["seguridad_respuestas_descartadas_total"][0]["valor"] == 1
+    assert (await cliente.request({"accion": "consultar", "n": 3}, addr_eco, timeout=2))["eco"]["n"] == 3
+    assert not cliente.pending_requests
+
+    # Si el envío falla no queda hueco pendiente
+    cliente.transport.send_data = lambda payload, addr: False
+    r = await cliente.request({"accion": "consultar"}, addr_eco, timeout=2)
+    assert r["status"] == "ERROR" and not cliente.pending_requests
+
+    for p in clientes:
+        await p.close()
+    await eco.close()
+
+def test_async_transport():
+    """Test básico del transporte y el PeerConnector sobre asyncio."""
+    print("Iniciando test del transporte asyncio...")
+    asyncio.run(escenario())
+    print("\nTest del transporte asyncio completado exitosamente!")
+
+if __name__ == "__main__":
+    test_async_transport()
@@ -0,0 +1,100 @@
+# /tests/test_block_store.py
+
+import sys
+import os
+import random
+import tempfile
+import threading
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.block_store import BlockStore, split_chunks, chunk_boundaries, chunk_id, MAX_CHUNK, MIN_CHUNK, GEAR, CHUNK_MASK, MASK_64
+
+def cortes_byte_a_byte(data):
+    """Gear hash recorrido byte a byte: los cortes rápidos deben coincidir exactamente."""
+    cuts, start = [], 0
+    while start < len(data):
+        end = min(start + MAX_CHUNK, len(data))
+        h, cut = 0, end
+        for i in range(start + MIN_CHUNK, end):
+            h = ((h << 1) + GEAR[data[i]]) & MASK_64
+            if h & CHUNK_MASK == 0:
+                cut = i + 1
+                break
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+def test_block_store():
+    """Test básico del BlockStore."""
+    print("Iniciando test del BlockStore...")
+
+    rng = random.Random(42)
+    palabras = ["libro", "capitulo", "servidor", "archivo", "dns", "bloque", "texto"]
+    contenido = " ".join(rng.choice(palabras) for _ in range(40000)).encode("utf-8")
+
+    with tempfile.TemporaryDirectory() as folder:
+        # 1. Crear almacén y guardar un archivo
+        store = BlockStore(folder)
+        manifest = store.put_file("libro1.txt", contenido)
+        print(f"Archivo guardado en {len(manifest['bloques'])} bloques")
+        assert all(len(c) <= MAX_CHUNK for c in split_chunks(contenido))
+        assert store.get_file("libro1.txt") == contenido
+
+        # 2. Un archivo idéntico no ocupa espacio adicional
+        fisico_antes = store.get_stats()["bytes_fisicos"]
+        store.put_file("copia.txt", contenido)
+        assert store.get_stats()["bytes_fisicos"] == fisico_antes
+
+        # 3. Una versión casi idéntica reutiliza casi todos los bloques
+        editado = contenido[:1000] + b"EDICION " + contenido[1000:]
+        nuevos = store.missing_chunks([chunk_id(c) for c in split_chunks(editado)])
+        print(f"Bloques nuevos tras la edición: {len(nuevos)}")
+        assert len(nuevos) <= 2
+        store.put_file("libro1.txt", editado)
+        assert store.get_file("libro1.txt") == editado
+        assert store.get_file("libro1.txt", version=0) == contenido
+
+        # 4. Eliminar libera solo los bloques sin referencias
+        store.delete_file("libro1.txt")
+        assert store.get_file("copia.txt") == contenido
+        store.delete_file("copia.txt")
+        assert store.get_stats()["bloques"] == 0
+
+        # 5. El índice persiste entre instancias
+        store.put_file("persistente.txt", b"hola mundo")
+        assert BlockStore(folder).get_file("persistente.txt") == b"hola mundo"
+
+    # 6. Guardar y borrar en paralelo archivos que comparten bloques no pierde ninguno
+    with tempfile.TemporaryDirectory() as folder:
+        store = BlockStore(folder)
+        compartido = contenido[:20000]
+        errores = []
+
+        def ciclo(nombre):
+            try:
+                for _ in range(150):
+                    store.put_file(nombre, compartido)
+                    assert store.get_file(nombre) == compartido
+                    store.delete_file(nombre)
+            except Exception as e:
+                errores.append(e)
+
+        hilos = [threading.Thread(target=ciclo, args=(f"c{i}.txt",)) for i in range(4)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        assert not errores, errores
+        assert store.get_stats()["bloques"] == 0
+
+    # 7. Los cortes coinciden con el gear hash byte a byte (los servidores deben cortar igual)
+    aleatorio = rng.randbytes(3 * 1024 * 1024)
+    for datos in (contenido, aleatorio, b"a" * 100000, contenido[:MIN_CHUNK + 5]):
+        assert chunk_boundaries(datos) == cortes_byte_a_byte(datos)
+
+    print("\nTest del BlockStore completado exitosamente!")
+
+if __name__ == "__main__":
+    test_block_store()
@@ -0,0 +1,47 @@
+# /tests/test_cluster_bench.py
+
+import sys
+import os
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.cluster_bench import dataset, parse_mix, percentile, summarize
+
+def test_cluster_bench():
+    """Test básico del informe del benchmark de carga."""
+    print("Iniciando test del benchmark de carga...")
+
+    # 1. La mezcla se normaliza y rechaza acciones desconocidas
+    mezcla = parse_mix("consultar=3, leer=1,escribir=0")
+    assert mezcla == {"consultar": 0.75, "leer": 0.25}
+    try:
+        parse_mix("borrar=1")
+        assert False, "acción no soportada"
+    except ValueError:
+        pass
+
+    # 2. Percentiles por rango más cercano
+    valores = [i / 1000 for i in range(1, 101)]
+    assert percentile(valores, 50) == 0.05 and percentile(valores, 99) == 0.099
+    assert percentile([0.2], 95) == 0.2 and percentile([], 50) == 0.0
+
+    # 3. Informe por acción y total
+    informe = summarize({"leer": valores, "escribir": []}, {"escribir": 2}, duracion=10,
+                        mensajes={"escribir": "Timeout esperando respuesta"})
+    leer = informe["operaciones"]["leer"]
+    assert leer["ops"] == 100 and leer["ops_por_segundo"] == 10.0
+    assert leer["latencia_ms"]["p95"] == 95.0 and leer["latencia_ms"]["max"] == 100.0
+    assert informe["operaciones"]["escribir"]["ejemplo_error"] == "Timeout esperando respuesta"
+    assert informe["total"]["tasa_errores"] == round(2 / 102, 4)
+    print(f"Total: {informe['total']}")
+
+    # 4. Nombres de archivo distintos por servidor
+    datos = dataset(3, 4)
+    nombres = [n for lista in datos.values() for n in lista]
+    assert len(datos) == 3 and len(set(nombres)) == 12
+
+    print("\nTest del benchmark de carga completado exitosamente!")
+
+if __name__ == "__main__":
+    test_cluster_bench()
@@ -0,0 +1,103 @@
+# /tests/test_compression.py
+
+import sys
+import os
+import json
+import zlib
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.network.compression import CompressionStats, negotiate_codec, pack, unpack, supported_codecs
+from src.network.peer_conector import PeerConnector
+
+class FakeTransport:
+    """Transporte en memoria que entrega los paquetes directamente al peer."""
+    def __init__(self):
+        self.peer = None
+        self.peer_addr = None
+        self.my_addr = None
+
+    def connect(self, addr):
+        return True
+
+    def send_data(self, payload, addr):
+        self.peer.handle_incoming_packet(json.loads(json.dumps(payload)), self.my_addr)
+
+    def stop(self):
+        pass
+
+def test_compression():
+    """Test básico de compresión negociada."""
+    print("Iniciando test de compresión...")
+
+    # 1. Negociación: zlib siempre está disponible
+    assert "zlib" in supported_codecs()
+    assert negotiate_codec(["zlib"]) == "zlib"
+    assert negotiate_codec(["desconocido"]) is None
+    assert negotiate_codec(None) is None
+
+    # 2. Texto repetitivo se comprime y se recupera intacto
+    stats = CompressionStats()
+    texto = ("Capitulo 1. Habia una vez un libro distribuido. " * 200).encode("utf-8")
+    empaquetado = pack(texto, "zlib", stats)
+    assert len(empaquetado) < len(texto) / 3
+    assert unpack(empaquetado, "zlib") == texto
+
+    # 3. Payloads pequeños e incompresibles viajan sin comprimir
+    pequeno = b'{"accion": "salir"}'
+    assert unpack(pack(pequeno, "zlib", stats), "zlib") == pequeno
+    aleatorio = os.urandom(20000)
+    assert pack(aleatorio, "zlib", stats)[1:] == aleatorio
+
+    # Bomba de descompresión: se rechaza al pasar del tope sin inflarla entera
+    bomba = b"\x01" + zlib.compress(b"\0" * (64 * 1024 * 1024), 9)
+    print(f"Bomba: {len(bomba)} bytes comprimidos")
+    try:
+        unpack(bomba, "zlib")
+        assert False, "la bomba debió rechazarse"
+    except ValueError:
+        pass
+    assert unpack(empaquetado, "zlib", max_length=len(texto)) == texto
+    for tope, cortado in ((len(texto) - 1, empaquetado), (len(texto), empaquetado[:-4])):
+        try:
+            unpack(cortado, "zlib", max_length=tope)
+            assert False, "debió rechazarse"
+        except ValueError:
+            pass
+
+    snapshot = stats.snapshot()
+    print(f"Métricas: {snapshot}")
+    assert snapshot["mensajes_comprimidos"] == 1
+    assert snapshot["omitidos_pequenos"] == 1
+    assert snapshot["omitidos_incompresibles"] == 1
+
+    # 4. Handshake completo entre dos PeerConnector en memoria
+    recibidos = []
+    t_cliente, t_servidor = FakeTransport(), FakeTransport()
+    cliente = PeerConnector(t_cliente, "cliente", lambda msg, addr: recibidos.append(msg))
+    servidor = PeerConnector(t_servidor, "servidor", lambda msg, addr: recibidos.append(msg))
+    addr_cliente, addr_servidor = ("127.0.0.1", 1), ("127.0.0.1", 2)
+    t_cliente.peer, t_cliente.my_addr = servidor, addr_cliente
+    t_servidor.peer, t_servidor.my_addr = cliente, addr_servidor
+
+    cliente.connect_and_secure(addr_servidor)
+    assert cliente.session_codecs[addr_servidor] == servidor.session_codecs[addr_cliente]
+
+    mensaje = {"accion": "escribir", "contenido": texto.decode("utf-8")}
+    cliente.send_message(mensaje, addr_servidor)
+    assert recibidos == [mensaje]
+    # Razón y coste publicados en el registro de métricas (acción "metricas")
+    metricas = cliente.metrics.snapshot()
+    assert metricas["compresion_razon"][0]["valor"] > 3
+    assert metricas["compresion_mensajes_total"][0]["etiquetas"]["resultado"] == "comprimido"
+    assert metricas["compresion_mensajes_total"][0]["valor"] == 1
+    salida = next(m for m in metricas["compresion_segundos"] if m["etiquetas"]["sentido"] == "salida")
+    assert salida["count"] == 1 and salida["sum"] > 0
+    entrada = servidor.metrics.snapshot()["compresion_segundos"]
+    assert next(m for m in entrada if m["etiquetas"]["sentido"] == "entrada")["count"] == 1
+
+    print("\nTest de compresión completado exitosamente!")
+
+if __name__ == "__main__":
+    test_compression()
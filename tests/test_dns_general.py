@@ -0,0 +1,196 @@
+# /tests/test_dns_general.py
+
+import sys
+import os
+import threading
+import time
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dns_general import DNSGeneral
+from src.core.lock_manager import READ, WRITE
+
+def _dns_con_archivo(nombre_archivo, servidores):
+    """DNS General sin sockets: los servidores registrados y una copia del archivo en cada uno."""
+    dns = DNSGeneral(port=0)
+    for i, server_id in enumerate(servidores):
+        dns.registered_servers[server_id] = {"ip": "127.0.0.1", "port": 6000 + i, "archivos": [nombre_archivo]}
+    dns.global_file_index[nombre_archivo] = [
+        {"server_id": s, "ip": "127.0.0.1", "port": 6000 + i, "ttl": 3600, "bandera": 0 if i == 0 else 1, "version": 0}
+        for i, s in enumerate(servidores)
+    ]
+    dns._verificar_archivo_existe = lambda server_id, nombre: True
+    return dns
+
+class Replicas:
+    """Servidores simulados: aplican escrituras con la misma regla de versiones que _handle_escribir_directo."""
+    def __init__(self):
+        self.versiones, self.contenido, self.caidas = {}, {}, set()
+
+    def __call__(self, req):
+        sid = req["server_id"]
+        if sid in self.caidas:
+            return {"status": "ERROR", "mensaje": f"{sid} no responde"}
+        if req["accion"] == "leer":
+            return {"status": "EXITO", "contenido": self.contenido.get(sid)}
+        if req["version"] < self.versiones.get(sid, 0):
+            return {"status": "VERSION_OBSOLETA", "mensaje": f"'{req['nombre_archivo']}' ya está en la versión {self.versiones[sid]}"}
+        self.versiones[sid], self.contenido[sid] = req["version"], req["contenido"]
+        return {"status": "EXITO"}
+
+def _entrada(dns, nombre_archivo, server_id):
+    return next(e for e in dns.global_file_index[nombre_archivo] if e["server_id"] == server_id)
+
+def esperar(condicion, limite=5):
+    """Las réplicas que responden después del quórum se procesan en los hilos de escritura."""
+    fin = time.time() + limite
+    while not condicion() and time.time() < fin:
+        time.sleep(0.01)
+    return condicion()
+
+def test_dns_general():
+    """Test básico del check-in y las escrituras replicadas del DNS General."""
+    print("Iniciando test del DNS General...")
+
+    dns = _dns_con_archivo("libro1.txt", ["S1"])
+    escrituras = []
+    dns.solicitar_accion_remota = lambda req: escrituras.append(req) or {"status": "EXITO"}
+    checkin = {"accion": "checkin_archivo", "nombre_archivo": "libro1.txt", "contenido": "nuevo", "requesting_server": "S2"}
+
+    # 1. Sin bloqueo, el check-in sin token sigue permitido
+    assert dns.procesar_checkin_archivo(dict(checkin))["status"] == "CHECKIN_EXITOSO"
+
+    # 2. Archivo bloqueado: sin token, con un token ajeno o con uno de lectura se rechaza sin escribir
+    escritor = dns.lock_manager.acquire("libro1.txt", "S2", mode=WRITE)
+    escrituras.clear()
+    r = dns.procesar_checkin_archivo(dict(checkin))
+    print(f"Check-in sin token de un archivo bloqueado: {r}")
+    assert r["status"] == "ERROR" and not escrituras
+    assert dns.procesar_checkin_archivo(dict(checkin, requesting_server="S3", token_bloqueo=escritor["token"]))["status"] == "ERROR"
+    dns.lock_manager.release("libro1.txt", "S2", escritor["token"])
+    lector = dns.lock_manager.acquire("libro1.txt", "S2", mode=READ)
+    assert dns.procesar_checkin_archivo(dict(checkin, token_bloqueo=lector["token"]))["status"] == "ERROR"
+    assert dns.procesar_checkin_archivo(dict(checkin))["status"] == "ERROR"
+    assert not escrituras
+    dns.lock_manager.release("libro1.txt", "S2", lector["token"])
+
+    # 3. Con el token de escritura vigente se escribe
+    escritor = dns.lock_manager.acquire("libro1.txt", "S2", mode=WRITE)
+    r = dns.procesar_checkin_archivo(dict(checkin, token_bloqueo=escritor["token"]))
+    assert r["status"] == "CHECKIN_EXITOSO"
+    assert escrituras[-1]["token_bloqueo"] == escritor["token"]
+
+    # 4. Escritura directa de un archivo bloqueado por otro: BLOQUEADO sin tocar las réplicas
+    escrituras.clear()
+    r = dns.escribir_archivo_distribuido({"nombre_archivo": "libro1.txt", "contenido": "x", "requesting_server": "S1"})
+    assert r["status"] == "BLOQUEADO" and r["bloqueado_por"] == "S2" and not escrituras
+    dns.lock_manager.release("libro1.txt", "S2", escritor["token"])
+    dns.write_executor.shutdown()
+    dns.read_executor.shutdown()
+
+    # 5. Quórum (2 de 3) con una réplica caída: la versión se publica y la caída queda para reparar
+    dns = _dns_con_archivo("guia.txt", ["S1", "S2", "S3"])
+    replicas = Replicas()
+    dns.solicitar_accion_remota = replicas
+    escribir = {"nombre_archivo": "guia.txt", "requesting_server": "S1"}
+    replicas.caidas = {"S3"}
+    r = dns.escribir_archivo_distribuido(dict(escribir, contenido="v1"))
+    print(f"Escritura con quórum: {r['mensaje']}")
+    assert r["status"] == "EXITO" and r["version"] == 1 and sorted(r["confirmado_por"]) == ["S1", "S2"]
+    assert dns.file_versions["guia.txt"] == 1
+    assert [_entrada(dns, "guia.txt", s)["version"] for s in ("S1", "S2", "S3")] == [1, 1, 0]
+    assert esperar(lambda: ("guia.txt", "S3") in list(dns.repair_queue.queue))
+
+    # 6. Sin quórum: la versión reservada no se publica y la réplica que la aplicó se marca para revertir
+    replicas.caidas = {"S2", "S3"}
+    r = dns.escribir_archivo_distribuido(dict(escribir, contenido="v2 sin quórum"))
+    assert r["status"] == "ERROR" and r["version"] == 2
+    assert dns.file_versions["guia.txt"] == 1
+    assert esperar(lambda: _entrada(dns, "guia.txt", "S1").get("revertir"))
+    assert _entrada(dns, "guia.txt", "S1")["version"] == 1
+
+    # Las lecturas con version_minima no usan la réplica por revertir ni las atrasadas
+    replicas.caidas = set()
+    r = dns.leer_archivo_distribuido({"nombre_archivo": "guia.txt", "version_minima": 1, "requesting_server": "S3"})
+    assert r["status"] == "EXITO" and r["servidor_origen"] == "S2" and r["contenido"] == "v1"
+    r = dns.leer_archivo_distribuido({"nombre_archivo": "guia.txt", "version_minima": 2, "requesting_server": "S3"})
+    assert r["status"] == "ERROR" and "versión 2" in r["mensaje"]
+
+    # 7. Una réplica que ya vio una versión mayor responde VERSION_OBSOLETA y no cuenta para el quórum
+    replicas.versiones.update({"S2": 99, "S3": 99})
+    r = dns.escribir_archivo_distribuido(dict(escribir, contenido="v3"))
+    print(f"Escritura con réplicas más nuevas: {r['mensaje']}")
+    assert r["status"] == "ERROR" and r["version"] == 3 and "ya está en la versión 99" in r["mensaje"]
+    assert dns.file_versions["guia.txt"] == 1
+    assert esperar(lambda: replicas.versiones.get("S1") == 3)
+
+    # La siguiente escritura no reutiliza números reservados y, al confirmarse, limpia la marca
+    replicas.versiones.update({"S2": 0, "S3": 0})
+    r = dns.escribir_archivo_distribuido(dict(escribir, contenido="v4"))
+    assert r["status"] == "EXITO" and r["version"] == 4 and dns.file_versions["guia.txt"] == 4
+    assert "revertir" not in _entrada(dns, "guia.txt", "S1")
+
+    # 8. La reparación devuelve a la versión publicada la réplica marcada, aunque tenga una mayor
+    replicas.caidas = {"S2", "S3"}
+    assert dns.escribir_archivo_distribuido(dict(escribir, contenido="v5 sin quórum"))["status"] == "ERROR"
+    assert esperar(lambda: _entrada(dns, "guia.txt", "S1").get("revertir"))
+    replicas.caidas = set()
+    reparaciones = []
+    def enviar_replicar(nombre, origen, destino, revertir=False):
+        reparaciones.append((destino, origen, revertir))
+        return {"status": "EXITO", "version": dns.file_versions[nombre]}
+    dns._enviar_replicar = enviar_replicar
+    hilo = threading.Thread(target=dns.repair_loop, daemon=True)
+    hilo.start()
+    esperar(lambda: not _entrada(dns, "guia.txt", "S1").get("revertir"))
+    dns.running = False
+    hilo.join()
+    print(f"Reparaciones: {reparaciones}")
+    assert "revertir" not in _entrada(dns, "guia.txt", "S1") and _entrada(dns, "guia.txt", "S1")["version"] == 4
+    assert any(d == "S1" and o != "S1" and revertir for d, o, revertir in reparaciones)
+
+    # 9. Los factores de replicación viajan en el estado del grupo (el nuevo líder no vuelve al de arranque)
+    dns.configurar_replicacion({"factor": 3})
+    dns.configurar_replicacion({"factor": 2, "nombre_archivo": "guia.txt"})
+    seguidor = DNSGeneral(port=0)
+    seguidor._restaurar_estado(dns._estado_completo())
+    assert seguidor.replication_factor == 3 and seguidor.replication_overrides == {"guia.txt": 2}
+    seguidor._aplicar_estado(dns._estado_de({"guia.txt"}, ()) | {"factor_global": 1})
+    assert seguidor.replication_factor == 1 and seguidor._replication_factor_for("guia.txt") == 2
+    seguidor.write_executor.shutdown()
+    seguidor.read_executor.shutdown()
+
+    dns.write_executor.shutdown()
+    dns.read_executor.shutdown()
+
+    # 10. Check-in por bloques: a las réplicas llega el manifiesto y la dirección del escritor, no el contenido
+    dns = _dns_con_archivo("mapa.txt", ["S1", "S2"])
+    escrituras = []
+    dns.solicitar_accion_remota = lambda req: escrituras.append(req) or {"status": "EXITO"}
+    manifiesto = {"bloques": ["ab" * 32, "cd" * 32], "tamano": 9000, "origen_ip": "127.0.0.1", "origen_port": 6005}
+    r = dns.procesar_checkin_archivo({"accion": "checkin_archivo", "nombre_archivo": "mapa.txt",
+                                      "requesting_server": "S3", **manifiesto})
+    assert r["status"] == "CHECKIN_EXITOSO" and esperar(lambda: len(escrituras) == 2)
+    assert all(e["contenido"] is None and all(e[k] == v for k, v in manifiesto.items()) for e in escrituras)
+    dns.write_executor.shutdown()
+    dns.read_executor.shutdown()
+
+    # 11. Tokens de fencing sin reloj: superan los que reporta un servidor y el grupo no los reutiliza
+    dns = DNSGeneral(port=0)
+    dns.register_server({"server_id": "S1", "ip": "127.0.0.1", "port": 6000, "archivos": [
+        {"nombre_archivo": "mapa.txt", "publicado": True, "version": 3, "token_fencing": 41}]})
+    token = dns.lock_manager.acquire("mapa.txt", "S1", mode=WRITE)["token"]
+    print(f"Token tras registrar un servidor que vio el 41: {token}")
+    assert token == 42
+    dns.lock_manager.release("mapa.txt", "S1", token)
+    seguidor = DNSGeneral(port=0)
+    seguidor._restaurar_estado(dns._estado_completo())
+    assert seguidor.lock_manager.acquire("mapa.txt", "S2", mode=WRITE)["token"] == 43
+    for nodo in (dns, seguidor):
+        nodo.write_executor.shutdown()
+        nodo.read_executor.shutdown()
+    print("\nTest del DNS General completado exitosamente!")
+
+if __name__ == "__main__":
+    test_dns_general()
@@ -0,0 +1,89 @@
+# /tests/test_dns_ring.py
+
+import sys
+import os
+import json
+import socket
+import threading
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.network.dns_ring import DNSGeneralRing, node_id
+
+class MiembroFalso:
+    """Miembro de un grupo del DNS General: el seguidor redirige al líder salvo en consultas."""
+    def __init__(self, lider=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.2)
+        self.id = node_id(self.sock.getsockname())
+        self.lider, self.recibidas, self.running = lider, [], True
+        threading.Thread(target=self.loop, daemon=True).start()
+
+    def loop(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            request = json.loads(data)
+            self.recibidas.append(request["accion"])
+            if self.lider and request["accion"] != "consultar":
+                response = {"status": "REDIRECT_LIDER", "nodo": self.id, "lider": self.lider.id,
+                            "grupo": [self.id, self.lider.id]}
+            elif request["accion"] == "verificar_bloqueo":
+                response = {"status": "BLOQUEADO", "bloqueado": True, "bloqueado_por": "S9"}
+            elif request["accion"] == "solicitar_bloqueo":
+                response = {"status": "EN_COLA", "posicion": 1}
+            else:
+                response = {"status": "ACK", "server_id": "S1"}
+            self.sock.sendto(json.dumps(response).encode('utf-8'), addr)
+            if response["status"] == "EN_COLA":
+                # Aviso push de concesión: llega a la dirección que hizo la petición
+                aviso = {"status": "BLOQUEO_CONCEDIDO", "nombre_archivo": request["nombre_archivo"], "token": 7}
+                self.sock.sendto(json.dumps(aviso).encode('utf-8'), addr)
+
+    def stop(self):
+        self.running = False
+        self.sock.close()
+
+def test_dns_ring():
+    """Test básico del cliente del DNS General particionado."""
+    print("Iniciando test del cliente del anillo del DNS General...")
+
+    lider = MiembroFalso()
+    seguidor = MiembroFalso(lider=lider)
+    # La partición se conoce por el seguidor, que no es el líder del grupo
+    ring = DNSGeneralRing([seguidor.sock.getsockname()])
+    try:
+        # 1. Un REDIRECT_LIDER del seguidor no se toma como respuesta: se repite en el líder
+        r = ring.request({"accion": "verificar_bloqueo", "nombre_archivo": "libro1.txt"}, timeout=2)
+        print(f"verificar_bloqueo vía seguidor: {r}")
+        assert r["status"] == "BLOQUEADO" and r["bloqueado"] is True
+        assert ring.addr_for("libro1.txt") == lider.sock.getsockname()
+
+        # 2. Con un socket propio el aviso push posterior llega a quien preguntó
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        r = ring.request({"accion": "solicitar_bloqueo", "nombre_archivo": "libro1.txt"}, timeout=2, sock=sock)
+        assert r["status"] == "EN_COLA"
+        sock.settimeout(2)
+        aviso = json.loads(sock.recvfrom(4096)[0])
+        sock.close()
+        assert aviso["status"] == "BLOQUEO_CONCEDIDO" and aviso["token"] == 7
+
+        # 3. Las consultas se reparten entre los miembros del grupo
+        for _ in range(20):
+            assert ring.request({"accion": "consultar", "nombre_archivo": "libro1.txt"}, timeout=2)["status"] == "ACK"
+        print(f"Consultas: seguidor {seguidor.recibidas.count('consultar')}, líder {lider.recibidas.count('consultar')}")
+        assert seguidor.recibidas.count("consultar") > 0 and lider.recibidas.count("consultar") > 0
+    finally:
+        seguidor.stop()
+        lider.stop()
+
+    print("\nTest del cliente del anillo del DNS General completado exitosamente!")
+
+if __name__ == "__main__":
+    test_dns_ring()
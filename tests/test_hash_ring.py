@@ -0,0 +1,43 @@
+# /tests/test_hash_ring.py
+
+import sys
+import os
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.hash_ring import HashRing
+
+def test_hash_ring():
+    """Test básico del anillo de hashing consistente."""
+    print("Iniciando test del anillo de hashing consistente...")
+
+    nodos = ["127.0.0.5:50005", "127.0.0.6:50006", "127.0.0.7:50007"]
+    claves = [f"libro{i}.txt" for i in range(3000)]
+    anillo = HashRing(nodos, vnodes=128)
+
+    # 1. Reparto equilibrado entre los nodos
+    reparto = anillo.distribution(claves)
+    print(f"Reparto con 3 nodos: {reparto}")
+    assert all(600 < n < 1400 for n in reparto.values())
+
+    # 2. El orden de alta no cambia el dueño de las claves
+    assert all(HashRing(reversed(nodos), vnodes=128).node_for(c) == anillo.node_for(c) for c in claves)
+
+    # 3. Al unirse un nodo solo se mueven claves hacia él (~1/4)
+    antes = {c: anillo.node_for(c) for c in claves}
+    anillo.add_node("127.0.0.8:50008")
+    movidas = [c for c in claves if anillo.node_for(c) != antes[c]]
+    print(f"Claves movidas al unirse un nodo: {len(movidas)}")
+    assert all(anillo.node_for(c) == "127.0.0.8:50008" for c in movidas)
+    assert len(movidas) < len(claves) / 2
+
+    # 4. Al salir vuelve exactamente el reparto anterior
+    anillo.remove_node("127.0.0.8:50008")
+    assert all(anillo.node_for(c) == antes[c] for c in claves)
+    assert HashRing().node_for("libro1.txt") is None
+
+    print("\nTest del anillo de hashing consistente completado exitosamente!")
+
+if __name__ == "__main__":
+    test_hash_ring()
@@ -0,0 +1,109 @@
+# /tests/test_index_feed.py
+
+import sys
+import os
+import json
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.index_feed import IndexFeed, IndexReplica, index_view, diff_index, SNAPSHOT_PAGE_BYTES
+
+def _entry(server_id, bandera=0, version=1):
+    return {"server_id": server_id, "ip": "127.0.0.1", "port": 5000, "ttl": 3600, "bandera": bandera, "version": version}
+
+def test_index_feed():
+    """Test básico de los deltas numerados del índice."""
+    print("Iniciando test de deltas del índice...")
+
+    indice = {"libro1.txt": [_entry("S1")], "guia.txt": [_entry("S2"), _entry("S3", 1)]}
+    feed = IndexFeed()
+    replica = IndexReplica()
+
+    # 1. Sin vista base la réplica pide suscribirse; con la vista se aplican lotes en orden
+    feed.publish(index_view(indice))
+    assert replica.apply_batch({"seq": 1, "deltas": []}) == "sin_base"
+    replica.load(feed.snapshot())
+    assert set(replica.lookup("guia.txt")) == {"S2", "S3"}
+
+    # 2. Cambios: versión, copia nueva, cambio de propietario y archivo eliminado
+    indice["libro1.txt"] = [_entry("S1", version=2), _entry("S2", 1, version=2)]
+    indice["guia.txt"] = [_entry("S3", 0)]
+    lote = feed.publish(index_view(indice))[0]
+    tipos = sorted(d["tipo"] for d in lote["deltas"])
+    print(f"Deltas del lote {lote['seq']}: {tipos}")
+    assert tipos == ["agregado", "eliminado", "propietario", "version"]
+    assert replica.apply_batch(lote) == "aplicado"
+    assert replica.apply_batch(lote) == "duplicado"
+    assert replica.view == feed.snapshot()["indice"]
+
+    del indice["guia.txt"]
+    assert diff_index(index_view(indice), index_view(indice)) == []
+    lote_perdido = feed.publish(index_view(indice))[0]
+    indice["nuevo.txt"] = [_entry("S1")]
+    lote_siguiente = feed.publish(index_view(indice))[0]
+
+    # 3. Un lote perdido se detecta como hueco y se recupera con since()
+    assert replica.apply_batch(lote_siguiente) == "hueco"
+    pendientes = feed.since(replica.seq)
+    assert [l["seq"] for l in pendientes] == [lote_perdido["seq"], lote_siguiente["seq"]]
+    for l in pendientes:
+        assert replica.apply_batch(l) == "aplicado"
+    assert replica.lookup("guia.txt") is None and replica.lookup("nuevo.txt")
+    assert replica.view == feed.snapshot()["indice"]
+
+    # 4. Si el hueco ya no está en el registro hay que enviar la vista completa
+    pequeno = IndexFeed(log_size=1)
+    pequeno.publish(index_view(indice))
+    pequeno.publish({})
+    assert pequeno.since(0) is None
+
+    # 5. Índice grande: cada lote cabe en el recvfrom(8192) del servidor y la vista va por páginas
+    grande = {f"libro_{i:04d}.txt": [_entry("S1"), _entry("S2", 1)] for i in range(1000)}
+    feed = IndexFeed()
+    lotes = feed.publish(index_view(grande))
+    tamanos = [len(json.dumps({"accion": "delta_indice", "via_dns_general": True, "nodo": "127.0.0.5:50005", **l}))
+               for l in lotes]
+    print(f"{len(lotes)} lotes para 2000 copias, el mayor de {max(tamanos)} bytes")
+    assert max(tamanos) < 8192
+    assert sum(len(l["deltas"]) for l in lotes) == 2000
+
+    def cargar_por_paginas(feed, entre_paginas=lambda: None):
+        pagina = feed.snapshot_page()
+        vista, seq_base = dict(pagina["indice"]), pagina["seq"]
+        paginas = 1
+        while pagina["cursor"] is not None:
+            assert len(json.dumps(pagina)) < SNAPSHOT_PAGE_BYTES + 1024
+            entre_paginas()
+            pagina = feed.snapshot_page(pagina["cursor"])
+            vista.update(pagina["indice"])
+            paginas += 1
+        replica = IndexReplica()
+        replica.load({"seq": seq_base, "indice": vista})
+        # Los lotes se recuperan por tramos acotados y se reaplican desde la primera página
+        while replica.seq < feed.seq:
+            tramo = feed.since(replica.seq, max_bytes=8192)
+            assert len(tramo) == 1 or sum(len(json.dumps(l)) + 2 for l in tramo) <= 8192
+            for l in tramo:
+                assert replica.apply_batch(l) == "aplicado"
+        return replica, paginas
+
+    replica, paginas = cargar_por_paginas(feed)
+    print(f"Vista completa en {paginas} páginas")
+    assert paginas > 1 and replica.view == feed.snapshot()["indice"]
+
+    # Cambios entre páginas (archivos ya enviados y por enviar): la réplica converge igual
+    cambios = iter(range(100))
+    def modificar():
+        i = next(cambios)
+        grande[f"libro_{i:04d}.txt"] = [_entry("S3", version=2)]
+        grande.pop(f"libro_{999 - i:04d}.txt", None)
+        grande[f"nuevo_{i}.txt"] = [_entry("S1")]
+        feed.publish(index_view(grande))
+    replica, _ = cargar_por_paginas(feed, modificar)
+    assert replica.view == feed.snapshot()["indice"] == index_view(grande)
+
+    print("\nTest de deltas del índice completado exitosamente!")
+
+if __name__ == "__main__":
+    test_index_feed()
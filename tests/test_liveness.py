@@ -0,0 +1,69 @@
+# /tests/test_liveness.py
+
+import sys
+import os
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.liveness import TimingWheel, LivenessTracker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_liveness():
+    """Test básico de la rueda de tiempos y el seguimiento de vida."""
+    print("Iniciando test de la rueda de tiempos...")
+
+    clock = FakeClock()
+
+    # 1. La rueda devuelve solo lo vencido, también tras más de una vuelta
+    rueda = TimingWheel(tick=1.0, slots=8, clock=clock)
+    rueda.schedule("a", clock.now + 3)
+    rueda.schedule("b", clock.now + 20)  # misma ranura que otra vuelta posterior
+    rueda.schedule("c", clock.now + 5)
+    rueda.cancel("c")
+    assert rueda.advance(clock.now + 2) == []
+    assert rueda.advance(clock.now + 4) == ["a"]
+    assert rueda.advance(clock.now + 12) == [] and "b" in rueda
+    assert rueda.advance(clock.now + 40) == ["b"] and len(rueda) == 0
+
+    # 2. Sin historia el plazo es el intervalo comprometido más la pausa tolerada
+    vida = LivenessTracker(interval=30, clock=clock)
+    vida.touch("S1")
+    vida.touch("S2", interval=90)
+    clock.now += 20
+    vida.touch("S1")
+    clock.now += 20
+    assert vida.expired() == []
+    clock.now += 15
+    assert vida.expired() == ["S1"]
+    assert "S1" not in vida and vida.idle("S2") == 55
+
+    # 3. Con llegadas regulares la sospecha crece poco a poco y el plazo se ajusta a ellas
+    for _ in range(20):
+        clock.now += 10
+        vida.touch("S3", interval=10)
+    assert vida.phi("S3") < 1
+    clock.now += 10
+    assert vida.phi("S3") < 1
+    clock.now += 4
+    assert vida.phi("S3") > 8 and vida.expired() == ["S2"]
+    clock.now += 1
+    assert vida.expired() == ["S3"] and vida.phi("S3") is None
+
+    # 4. Un servidor dado de baja ya no vence
+    vida.touch("S4")
+    vida.remove("S4")
+    clock.now += 100
+    assert vida.expired() == []
+    print(f"Servidores seguidos: {len(vida)}")
+
+    print("\nTest de la rueda de tiempos completado exitosamente!")
+
+if __name__ == "__main__":
+    test_liveness()
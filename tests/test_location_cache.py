@@ -0,0 +1,59 @@
+# /tests/test_location_cache.py
+
+import sys
+import os
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.location_cache import LocationCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_location_cache():
+    """Test básico de la caché de ubicaciones."""
+    print("Iniciando test de la caché de ubicaciones...")
+
+    clock = FakeClock()
+    cache = LocationCache(max_entries=2, negative_ttl=5, clock=clock)
+    ubicacion = {"found": True, "local": False, "server_id": "S1", "ip": "127.0.0.1", "port": 5000}
+
+    # 1. Fallo, inserción y acierto dentro del TTL
+    assert cache.get("libro1.txt") == (False, None)
+    cache.put("libro1.txt", ubicacion, ttl=60)
+    assert cache.get("libro1.txt") == (True, ubicacion)
+
+    # 2. La entrada caduca con el TTL del DNS General
+    clock.now += 61
+    assert cache.get("libro1.txt") == (False, None)
+
+    # 3. Los NACK se recuerdan poco tiempo
+    cache.put_negative("fantasma.txt")
+    assert cache.get("fantasma.txt") == (True, None)
+    clock.now += 6
+    assert cache.get("fantasma.txt") == (False, None)
+
+    # 4. Expulsión LRU: el menos usado sale primero
+    cache.put("a.txt", ubicacion, ttl=60)
+    cache.put("b.txt", ubicacion, ttl=60)
+    cache.get("a.txt")
+    cache.put("c.txt", ubicacion, ttl=60)
+    assert cache.get("b.txt") == (False, None)
+    assert cache.get("a.txt")[0] and cache.get("c.txt")[0]
+
+    # 5. Invalidación explícita (propietario movido)
+    assert cache.invalidate("a.txt")
+    assert not cache.invalidate("a.txt")
+    stats = cache.snapshot()
+    print(f"Estadísticas: {stats}")
+    assert stats["expulsiones"] == 1 and stats["aciertos_negativos"] == 1
+
+    print("\nTest de la caché de ubicaciones completado exitosamente!")
+
+if __name__ == "__main__":
+    test_location_cache()
@@ -0,0 +1,104 @@
+# /tests/test_lock_manager.py
+
+import sys
+import os
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.lock_manager import LockManager, READ, WRITE
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_lock_manager():
+    """Test básico del LockManager con leases y tokens de fencing."""
+    print("Iniciando test del LockManager...")
+
+    clock = FakeClock()
+    expirados = []
+    manager = LockManager(lease_seconds=30, on_expire=lambda nombre, info: expirados.append(nombre), clock=clock)
+
+    # 1. Concesión y conflicto
+    concedido = manager.acquire("libro1.txt", "SERVER1")
+    assert concedido["granted"] and concedido["token"] == 1
+    conflicto = manager.acquire("libro1.txt", "SERVER2")
+    assert not conflicto["granted"] and conflicto["locked_by"] == "SERVER1"
+
+    # 2. Renovar extiende el lease solo al titular con el token vigente
+    clock.now += 20
+    assert manager.renew("libro1.txt", "SERVER1", 1) is not None
+    assert manager.renew("libro1.txt", "SERVER2", 1) is None
+    clock.now += 20
+    assert manager.validate("libro1.txt", "SERVER1", 1)
+
+    # 3. Sin renovación el lease vence y se notifica
+    clock.now += 31
+    assert manager.check("libro1.txt") is None
+    assert expirados == ["libro1.txt"]
+    assert not manager.validate("libro1.txt", "SERVER1", 1)
+
+    # 4. El nuevo titular recibe un token mayor; el antiguo no puede liberar
+    nuevo = manager.acquire("libro1.txt", "SERVER2")
+    print(f"Nuevo token tras la expiración: {nuevo['token']}")
+    assert nuevo["token"] > concedido["token"]
+    assert manager.release("libro1.txt", "SERVER2", token=1) is None
+    assert manager.release("libro1.txt", "SERVER2", token=nuevo["token"]) is not None
+    assert manager.snapshot() == {}
+
+    # 5. Tokens vistos en otra parte (otra copia del grupo, un servidor): los siguientes los superan
+    manager.advance_tokens(500)
+    manager.advance_tokens(7)
+    assert manager.acquire("libro2.txt", "SERVER1")["token"] == 501 and manager.last_token == 501
+
+    print("\nTest del LockManager completado exitosamente!")
+
+def test_lock_queue():
+    """Test básico de lectores compartidos y la cola FIFO de espera."""
+    print("Iniciando test de la cola de bloqueos...")
+
+    clock = FakeClock()
+    manager = LockManager(lease_seconds=30, clock=clock)
+    avisos = []
+    avisar = lambda quien: (lambda status, info: avisos.append((quien, status, info.get("token"))))
+
+    # 1. Los lectores comparten el bloqueo
+    r1 = manager.acquire("libro1.txt", "SERVER1", mode=READ)
+    r2 = manager.acquire("libro1.txt", "SERVER2", mode=READ)
+    assert r1["granted"] and r2["granted"]
+    assert manager.check("libro1.txt") is None  # no hay escritor
+
+    # 2. Un escritor espera; los lectores posteriores quedan detrás de él (FIFO)
+    w = manager.acquire("libro1.txt", "SERVER3", mode=WRITE, wait_timeout=60, on_grant=avisar("W"))
+    r3 = manager.acquire("libro1.txt", "SERVER4", mode=READ, wait_timeout=60, on_grant=avisar("R3"))
+    assert w["queued"] and w["posicion"] == 1
+    assert r3["queued"] and r3["posicion"] == 2
+    assert not manager.acquire("libro1.txt", "SERVER5", mode=READ)["granted"]  # sin espera: rechazo inmediato
+
+    # 3. Al salir el último lector se concede al escritor, y al liberarlo al lector encolado
+    manager.release("libro1.txt", "SERVER1", r1["token"])
+    assert avisos == []
+    manager.release("libro1.txt", "SERVER2", r2["token"])
+    assert avisos[0][:2] == ("W", "BLOQUEO_CONCEDIDO")
+    assert manager.check("libro1.txt")["locked_by"] == "SERVER3"
+    manager.release("libro1.txt", "SERVER3")
+    assert avisos[1][:2] == ("R3", "BLOQUEO_CONCEDIDO")
+    print(f"Avisos recibidos: {avisos}")
+
+    # 4. Una espera que vence se notifica y deja pasar a los siguientes
+    manager.acquire("libro2.txt", "SERVER1", mode=WRITE)
+    manager.acquire("libro2.txt", "SERVER2", mode=WRITE, wait_timeout=5, on_grant=avisar("W2"))
+    clock.now += 6
+    manager.snapshot()
+    assert avisos[-1][:2] == ("W2", "BLOQUEO_TIMEOUT")
+    assert manager.queue_length("libro2.txt") == 0
+
+    print("\nTest de la cola de bloqueos completado exitosamente!")
+
+if __name__ == "__main__":
+    test_lock_manager()
+    test_lock_queue()
@@ -0,0 +1,72 @@
+# /tests/test_log_pipeline.py
+
+import sys
+import os
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.log_pipeline import (BatchingQueueListener, SamplingFilter, StructuredFormatter,
+                                   log_fields)
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.flushes = 0
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+    def flush_batch(self):
+        self.flushes += 1
+
+def test_log_pipeline():
+    """Test básico del logging por cola con muestreo y registros estructurados."""
+    print("Iniciando test del logging por lotes...")
+
+    destino = RecordingHandler()
+    destino.setFormatter(StructuredFormatter())
+    cola = queue.SimpleQueue()
+    frente = QueueHandler(cola)
+    frente.addFilter(SamplingFilter())
+
+    logger = logging.getLogger("test_log_pipeline")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(frente)
+
+    # 1. Sin el escritor en marcha, registrar solo encola; el muestreo es por punto de llamada y clave
+    for i in range(100):
+        logger.info("petición %s", i, extra=log_fields(10, "consultar", accion="consultar"))
+        if i % 50 == 0:
+            logger.info("petición rara %s", i, extra=log_fields(10, "escribir", accion="escribir"))
+    logger.warning("aviso", extra=log_fields(10))
+    logger.debug("no debe llegar")
+    assert cola.qsize() == 10 + 1 + 1
+
+    # 2. El escritor vacía por lotes, no una vez por registro
+    escritor = BatchingQueueListener(cola, destino, flush_every=4)
+    escritor.start()
+    escritor.stop()
+    assert len(destino.lines) == 12
+    assert 3 <= destino.flushes <= 5
+    assert destino.lines[0].endswith("petición 0 | accion=consultar (1 de cada 10)")
+    assert "petición 10 |" in destino.lines[2]
+    print(f"Registros: {len(destino.lines)}, vaciados: {destino.flushes}")
+
+    # 3. Formato JSON con los campos al nivel superior
+    registro = logging.makeLogRecord({"msg": "hola", "levelno": logging.INFO, "levelname": "INFO",
+                                      "fields": {"accion": "listar"}, "sample_every": 1})
+    data = json.loads(StructuredFormatter(json_output=True).format(registro))
+    assert data["mensaje"] == "hola" and data["accion"] == "listar" and "muestreo" not in data
+
+    logger.removeHandler(frente)
+    print("\nTest del logging por lotes completado exitosamente!")
+
+if __name__ == "__main__":
+    test_log_pipeline()
@@ -0,0 +1,57 @@
+# /tests/test_metrics.py
+
+import sys
+import os
+import random
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.metrics import Histogram, MetricsRegistry
+
+def test_metrics():
+    """Test básico del registro de métricas y los histogramas de latencia."""
+    print("Iniciando test de métricas...")
+
+    # 1. Los cuantiles del histograma quedan dentro del error relativo de sus cubetas
+    rng = random.Random(7)
+    valores = sorted(rng.expovariate(1 / 0.02) for _ in range(20000))
+    hist = Histogram()
+    for v in valores:
+        hist.record(v)
+    for q, estimado in hist.quantiles().items():
+        exacto = valores[int(q * len(valores)) - 1]
+        assert abs(estimado - exacto) <= exacto * 0.07 + 2e-6, (q, estimado, exacto)
+    assert hist.count == len(valores)
+    print(f"p99 estimado: {hist.quantiles()[0.99]:.5f}s")
+
+    # 2. Misma métrica con las mismas etiquetas = misma instancia
+    registro = MetricsRegistry(nodo="n1")
+    registro.counter("peticiones_total", accion="leer").inc()
+    registro.counter("peticiones_total", accion="leer").inc(2)
+    registro.counter("peticiones_total", accion=None).inc()
+    registro.gauge("servidores", fn=lambda: 4)
+    with registro.timer("peticion_segundos", accion="leer"):
+        pass
+    datos = registro.snapshot()
+    leer = next(m for m in datos["peticiones_total"] if m["etiquetas"]["accion"] == "leer")
+    assert leer["valor"] == 3 and leer["etiquetas"]["nodo"] == "n1"
+    assert datos["servidores"][0]["valor"] == 4
+    assert datos["peticion_segundos"][0]["count"] == 1
+    try:
+        registro.gauge("peticiones_total")
+        assert False, "un nombre no puede cambiar de tipo"
+    except ValueError:
+        pass
+
+    # 3. Texto de Prometheus
+    texto = registro.prometheus()
+    assert "# TYPE peticiones_total counter" in texto
+    assert 'peticiones_total{nodo="n1",accion="leer"} 3' in texto
+    assert 'peticion_segundos{nodo="n1",accion="leer",quantile="0.99"}' in texto
+    assert 'peticion_segundos_count{nodo="n1",accion="leer"} 1' in texto
+
+    print("\nTest de métricas completado exitosamente!")
+
+if __name__ == "__main__":
+    test_metrics()
@@ -0,0 +1,43 @@
+# /tests/test_micro_bench.py
+
+import sys
+import os
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.micro_bench import compare, count_label, measure, security_cases, size_label
+
+def test_micro_bench():
+    """Test básico de la medición y la comparación con la línea base."""
+    print("Iniciando test de los micro-benchmarks...")
+
+    # 1. La medición calibra los bucles hasta superar el tiempo mínimo
+    llamadas = []
+    resultado = measure(lambda: llamadas.append(1), min_time=0.01, repeat=3)
+    assert resultado["repeticiones"] == 3 and resultado["bucles"] > 1
+    assert len(llamadas) >= resultado["bucles"] * 3  # más las pasadas de calibración
+    assert 0 < resultado["min"] <= resultado["mediana"]
+
+    # 2. Regresión solo por encima del umbral (global o del caso)
+    base = {"umbral": 1.25, "resultados": {"a": {"mediana": 1.0}, "b": {"mediana": 1.0, "umbral": 2.0},
+                                           "c": {"mediana": 1.0}}}
+    actual = {"a": {"mediana": 1.3}, "b": {"mediana": 1.3}, "c": {"mediana": 0.5}, "d": {"mediana": 1.0}}
+    comparacion = compare(actual, base)
+    assert comparacion["a"]["estado"] == "regresion"
+    assert comparacion["b"]["estado"] == "igual"
+    assert comparacion["c"]["estado"] == "mejora"
+    assert comparacion["d"]["estado"] == "sin_base"
+
+    # 3. Nombres estables de los casos (son las claves de la línea base)
+    assert size_label(64) == "64B" and size_label(16 * 1024 ** 2) == "16MB" and count_label(1000000) == "1M"
+    nombres = [nombre for nombre, _ in security_cases([1024])]
+    assert "seguridad.encrypt[1KB]" in nombres and len(nombres) == 4
+    descifrar = dict(security_cases([64]))["seguridad.decrypt[64B]"]()
+    assert len(descifrar()) == 64
+    print(f"Casos de seguridad: {nombres}")
+
+    print("\nTest de los micro-benchmarks completado exitosamente!")
+
+if __name__ == "__main__":
+    test_micro_bench()
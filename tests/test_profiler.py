@@ -0,0 +1,59 @@
+# /tests/test_profiler.py
+
+import sys
+import os
+import threading
+import time
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.profiler import SamplingProfiler
+
+def calculo_pesado(fin):
+    total = 0
+    while time.perf_counter() < fin:
+        total += sum(i * i for i in range(200))
+    return total
+
+def test_profiler():
+    """Test básico del perfilador por muestreo."""
+    print("Iniciando test del perfilador...")
+
+    perfilador = SamplingProfiler(interval=0.002)
+    trabajador = threading.Thread(target=calculo_pesado, args=(time.perf_counter() + 0.5,), name="trabajador")
+    trabajador.start()
+
+    # 1. Una sesión por vez; se para sola al cumplir su duración
+    assert perfilador.start(duration=0.3)
+    assert not perfilador.start(duration=0.3)
+    perfilador.thread.join(2)
+    assert not perfilador.running
+    trabajador.join()
+
+    # 2. Pilas colapsadas: hilo primero, raíz a la izquierda, cuenta al final
+    lineas = perfilador.collapsed()
+    assert perfilador.samples > 10
+    pila = next(l for l in lineas if l.startswith("trabajador;"))
+    marcos, cuenta = pila.rsplit(" ", 1)
+    assert "calculo_pesado (test_profiler.py:" in marcos and int(cuenta) > 0
+    assert not any(l.startswith("perfilador;") for l in lineas)
+    print(f"{perfilador.samples} muestras, {len(lineas)} pilas distintas")
+
+    # 3. La respuesta por red se recorta para caber en un datagrama
+    informe = perfilador.report(max_bytes=len(lineas[0]) + 1)
+    assert informe["pilas"] == lineas[:1] and informe["omitidas"] == len(lineas) - 1
+
+    # 4. Acción "perfilar": iniciar, detener y estado
+    respuesta = perfilador.handle({"operacion": "iniciar", "segundos": 30})
+    assert respuesta["status"] == "ACK" and respuesta["activo"]
+    assert perfilador.handle({"operacion": "iniciar"})["status"] == "ERROR"
+    time.sleep(0.05)
+    respuesta = perfilador.handle({"operacion": "detener", "limite": 1})
+    assert respuesta["status"] == "ACK" and not respuesta["activo"] and len(respuesta["pilas"]) <= 1
+    assert perfilador.handle({"operacion": "reiniciar"})["status"] == "ERROR"
+
+    print("\nTest del perfilador completado exitosamente!")
+
+if __name__ == "__main__":
+    test_profiler()
@@ -0,0 +1,190 @@
+# /tests/test_raft.py
+
+import sys
+import os
+import time
+import json
+import shutil
+import tempfile
+import threading
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.core.raft as raft
+from src.core.raft import RaftNode, NotLeader, MAX_APPEND_BYTES
+
+def esperar(condicion, timeout=8):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        if condicion():
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_raft():
+    """Test básico de la elección y replicación del grupo Raft."""
+    print("Iniciando test del grupo Raft...")
+
+    peers = {f"n{i}": ("127.0.0.1", 53101 + i) for i in range(3)}
+    aplicados = {n: [] for n in peers}
+    nodos = {
+        n: RaftNode(n, peers, apply=aplicados[n].append, election_timeout=(0.3, 0.6),
+                    heartbeat_interval=0.05, log=lambda m: None)
+        for n in peers
+    }
+    for nodo in nodos.values():
+        nodo.start()
+
+    try:
+        # 1. Se elige exactamente un líder
+        assert esperar(lambda: sum(n.is_leader() for n in nodos.values()) == 1)
+        lider = next(n for n in nodos.values() if n.is_leader())
+        seguidor = next(n for n in nodos.values() if not n.is_leader())
+        print(f"Líder: {lider.node_id}, término {lider.term}")
+        try:
+            seguidor.propose({"x": 1})
+            assert False, "un seguidor no debe aceptar propuestas"
+        except NotLeader:
+            pass
+
+        # 2. Lo confirmado llega en orden a todos los nodos
+        for i in range(5):
+            assert lider.wait_committed(lider.propose({"x": i}), timeout=3)
+        assert esperar(lambda: all(len(a) == 5 for a in aplicados.values()))
+        assert all(a == [{"x": i} for i in range(5)] for a in aplicados.values())
+        assert esperar(lambda: seguidor.staleness() < 1)
+
+        # 3. Líder aislado: su lease vence y deja de servir lecturas (read-index)
+        assert lider.read_index(timeout=1) >= 5
+        lider._send = lambda peer, message: None
+        time.sleep(0.3)  # vence el lease (0.8 del timeout mínimo de elección)
+        try:
+            lider.read_index(timeout=1)
+            assert False, "un líder aislado no debe confirmar lecturas"
+        except NotLeader:
+            pass
+
+        # 4. Cae el líder: los otros dos eligen uno nuevo que conserva el log
+        lider.stop()
+        restantes = [n for n in nodos.values() if n is not lider]
+        assert esperar(lambda: any(n.is_leader() for n in restantes))
+        nuevo = next(n for n in restantes if n.is_leader())
+        print(f"Nuevo líder: {nuevo.node_id}, término {nuevo.term}")
+        assert nuevo.wait_committed(nuevo.propose({"x": 5}), timeout=3)
+        assert esperar(lambda: all(aplicados[n.node_id][-1] == {"x": 5} for n in restantes))
+    finally:
+        for nodo in nodos.values():
+            nodo.stop()
+
+    probar_disco()
+    print("\nTest del grupo Raft completado exitosamente!")
+
+def probar_disco():
+    """Grupo con data_dir: reinicios, lotes por bytes e instantáneas en partes."""
+    carpeta = tempfile.mkdtemp()
+    peers = {f"d{i}": ("127.0.0.1", 53111 + i) for i in range(3)}
+    estados = {n: {} for n in peers}
+    enviados = []
+    fotos_bajo_cond = []
+
+    def crear(n, data_dir=None):
+        estado = estados[n]
+        def aplicar(comando):
+            nodo.hilos_aplicar.add(threading.current_thread().ident)
+            estado.update(comando)
+        def tomar():
+            fotos_bajo_cond.append(nodo.cond._is_owned())
+            return dict(estado)
+        nodo = RaftNode(n, peers, apply=aplicar, snapshot=tomar,
+                        restore=lambda e: (estado.clear(), estado.update(e)), election_timeout=(0.3, 0.6),
+                        heartbeat_interval=0.05, data_dir=data_dir or os.path.join(carpeta, n), log=lambda m: None)
+        nodo.hilos_aplicar = set()
+        envio_original = nodo._send
+        def enviar(peer, message):
+            enviados.append(len(json.dumps(message)))
+            envio_original(peer, message)
+        nodo._send = enviar
+        return nodo
+
+    # 5. El voto concedido sobrevive al reinicio: no se vota a otro candidato en el mismo término
+    votos = []
+    nodo = crear("d0")
+    nodo._send = lambda peer, m: votos.append(m)
+    pedir = {"tipo": "pedir_voto", "term": 7, "ultimo_indice": 0, "ultimo_term": 0}
+    nodo.handle(dict(pedir, candidato="d1"))
+    reiniciado = crear("d0")
+    reiniciado._send = lambda peer, m: votos.append(m)
+    assert (reiniciado.term, reiniciado.voted_for) == (7, "d1")
+    reiniciado.handle(dict(pedir, candidato="d2"))
+    assert [v["concedido"] for v in votos] == [True, False]
+
+    nodos = {n: crear(n) for n in peers}
+    for nodo in nodos.values():
+        nodo.start()
+    try:
+        # 6. Se reinicia todo el grupo: término, log y estado vuelven del disco
+        assert esperar(lambda: any(n.is_leader() for n in nodos.values()))
+        lider = next(n for n in nodos.values() if n.is_leader())
+        for i in range(5):
+            assert lider.wait_committed(lider.propose({f"k{i}": i}), timeout=3)
+        assert esperar(lambda: all(len(e) == 5 for e in estados.values()))
+        for nodo in nodos.values():
+            nodo.stop()
+        terminos = {n: nodo.term for n, nodo in nodos.items()}
+        for estado in estados.values():
+            estado.clear()
+        nodos = {n: crear(n) for n in peers}
+        assert all(nodos[n].term == terminos[n] and nodos[n]._last()[0] >= 6 for n in peers)
+        for nodo in nodos.values():
+            nodo.start()
+        assert esperar(lambda: any(n.is_leader() for n in nodos.values()))
+        lider = next(n for n in nodos.values() if n.is_leader())
+        print(f"Tras reiniciar el grupo: líder {lider.node_id}, término {lider.term}")
+        assert lider.wait_committed(lider.propose({"k5": 5}), timeout=3)
+        assert esperar(lambda: all(e == {f"k{i}": i for i in range(6)} for e in estados.values()))
+
+        # 7. Un seguidor atrasado se pone al día con entradas grandes: ningún "anexar" excede el tope
+        caido = next(n for n in nodos.values() if n is not lider)
+        caido.stop()
+        grande = "x" * 20000
+        for i in range(6, 12):
+            assert lider.wait_committed(lider.propose({f"k{i}": grande}), timeout=3)
+        enviados.clear()
+        nodos[caido.node_id] = caido = crear(caido.node_id)
+        caido.start()
+        assert esperar(lambda: estados[caido.node_id] == estados[lider.node_id])
+        print(f"Seguidor al día: el mayor mensaje fue de {max(enviados)} bytes")
+        assert max(enviados) < MAX_APPEND_BYTES + 1024
+
+        # 8. Disco perdido y log compactado: la instantánea (~400 KB) llega en partes
+        raft.LOG_RETAIN = 4
+        caido.stop()
+        for i in range(12, 24):
+            assert lider.wait_committed(lider.propose({f"k{i}": grande}), timeout=3)
+        assert esperar(lambda: lider.log_start > 0)
+        enviados.clear()
+        estados[caido.node_id].clear()
+        nodos[caido.node_id] = caido = crear(caido.node_id, data_dir=os.path.join(carpeta, "vacio"))
+        caido.start()
+        assert esperar(lambda: estados[caido.node_id] == estados[lider.node_id])
+        print(f"Instantánea instalada: {len(json.dumps(estados[lider.node_id]))} bytes, mayor mensaje {max(enviados)}")
+        assert max(enviados) < 65507 and caido.log_start > 0
+        # Y queda en su disco: reiniciado vuelve con el estado sin pedirlo al líder
+        caido.stop()
+        estados[caido.node_id].clear()
+        recuperado = crear(caido.node_id, data_dir=os.path.join(carpeta, "vacio"))
+        recuperado.start()
+        nodos[caido.node_id] = recuperado
+        assert estados[caido.node_id].get("k0") == 0 and recuperado.last_applied >= recuperado.log_start > 0
+        # Cada nodo aplica desde un solo hilo y las instantáneas se toman fuera del candado del protocolo
+        assert all(len(nodo.hilos_aplicar) <= 1 for nodo in nodos.values())
+        assert fotos_bajo_cond and not any(fotos_bajo_cond)
+    finally:
+        raft.LOG_RETAIN = 1000
+        for nodo in nodos.values():
+            nodo.stop()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_raft()
@@ -0,0 +1,135 @@
+# /tests/test_reactor.py
+
+import sys
+import os
+import time
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.network.reactor import Reactor
+from src.network.simnet import SimulatedNetwork
+from src.network.transport import ReliableTransport, SEND_WINDOW, SEND_QUEUE_LIMIT
+
+def test_reactor():
+    """Test básico del reactor y del transporte sobre él."""
+    print("Iniciando test del reactor...")
+
+    # 1. Temporizadores en orden, los anulados no se ejecutan y la espera no se pasa del plazo
+    reactor = Reactor()
+    orden = []
+    reactor.call_later(0.03, orden.append, "c")
+    reactor.call_later(0.01, orden.append, "a")
+    anulado = reactor.call_later(0.02, orden.append, "x")
+    reactor.call_later(0.02, orden.append, "b")
+    reactor.cancel(anulado)
+    inicio = time.monotonic()
+    while len(orden) < 3 and time.monotonic() - inicio < 1:
+        reactor.run_once(1)
+    assert orden == ["a", "b", "c"], orden
+    assert time.monotonic() - inicio < 0.5
+
+    # Despertar desde otro hilo sin esperar al timeout
+    reactor.call_soon_threadsafe(orden.append, "d")
+    reactor.run_once(5)
+    assert orden[-1] == "d"
+    reactor.close()
+
+    # 2. Un solo reactor para un servidor y 500 clientes sobre la red simulada
+    red = SimulatedNetwork(seed=7, latency=0.001)
+    compartido = Reactor(red.selector(), red.time)
+    destino = ("10.0.0.1", 7000)
+    servidor = ReliableTransport(*destino, sock=red.socket(destino), clock=red.time, reactor=compartido)
+    clientes = [ReliableTransport("10.0.1.1", 0, sock=red.socket(("10.0.1.1", 0)), clock=red.time, reactor=compartido)
+                for _ in range(500)]
+    for i, cliente in enumerate(clientes):
+        assert cliente.connect(destino)
+        cliente.send_data({"cliente": i}, destino)
+    recibidos = set()
+    for _ in range(600):
+        payload, _ = servidor.listen()
+        if payload is None:
+            break
+        recibidos.add(payload["cliente"])
+    assert recibidos == set(range(500))
+    assert len(servidor.connections) == 500
+    print(f"Conexiones atendidas con un reactor: {len(servidor.connections)}")
+
+    # 3. Con pérdidas y duplicados tras el handshake: cada DATA se entrega exactamente una vez
+    red = SimulatedNetwork(seed=11, latency=0.005)
+    compartido = Reactor(red.selector(), red.time)
+    servidor = ReliableTransport(*destino, sock=red.socket(destino), clock=red.time, reactor=compartido)
+    cliente = ReliableTransport("10.0.0.2", 0, sock=red.socket(("10.0.0.2", 1)), clock=red.time, reactor=compartido)
+    assert cliente.connect(destino)
+    red.set_link(("10.0.0.2", 1), destino, loss=0.2, duplicate=0.3, latency=0.005)
+    red.set_link(destino, ("10.0.0.2", 1), loss=0.2, latency=0.005)
+    entregados = []
+    for i in range(30):
+        cliente.send_data({"n": i}, destino)
+        # El reactor compartido atiende a ambos lados (y las retransmisiones) hasta que el DATA está confirmado
+        while cliente.connections[destino].waiting_ack_for is not None:
+            payload, _ = servidor.listen(0.05)
+            if payload is not None:
+                entregados.append(payload["n"])
+    while True:
+        payload, _ = servidor.listen(0.5)
+        if payload is None:
+            break
+        entregados.append(payload["n"])
+    assert entregados == list(range(30)), entregados
+    snapshot = cliente.metrics.snapshot()
+    assert snapshot["transporte_retransmisiones_total"][0]["valor"] > 0
+    assert snapshot["transporte_datos_perdidos_total"][0]["valor"] == 0
+    print(f"Retransmisiones: {snapshot['transporte_retransmisiones_total'][0]['valor']}")
+
+    # 4. Ventana de envío: varios DATA en vuelo a la vez; el resto espera en una cola con tope
+    red = SimulatedNetwork(seed=3, latency=0.01)
+    compartido = Reactor(red.selector(), red.time)
+    servidor = ReliableTransport(*destino, sock=red.socket(destino), clock=red.time, reactor=compartido)
+    emisor = ReliableTransport("10.0.0.3", 0, sock=red.socket(("10.0.0.3", 1)), clock=red.time, reactor=compartido)
+    assert emisor.connect(destino)
+    st = emisor.connections[destino]
+    for i in range(SEND_WINDOW + 4):
+        assert emisor.send_data({"n": i}, destino)
+    assert len(st.in_flight) == SEND_WINDOW and len(st.send_queue) == 4
+    inicio, recibidos = red.time(), []
+    while len(recibidos) < SEND_WINDOW + 4:
+        payload, _ = servidor.listen(0.5)
+        if payload is not None:
+            recibidos.append(payload["n"])
+    assert sorted(recibidos) == list(range(SEND_WINDOW + 4))
+    assert red.time() - inicio < 0.1  # dos vueltas de 20 ms, no una por mensaje
+    while st.in_flight:
+        compartido.run_once(0.1)
+
+    # Peer caído: con la cola llena se rechaza; al agotar los reintentos falla todo a la vez
+    red.set_link(("10.0.0.3", 1), destino, loss=1.0)
+    assert all(emisor.send_data({"n": i}, destino) for i in range(SEND_WINDOW + SEND_QUEUE_LIMIT))
+    assert not emisor.send_data({"n": -1}, destino)
+    inicio = red.time()
+    while not st.dead:
+        compartido.run_once(1)
+    print(f"Peer dado por caído a los {red.time() - inicio:.0f} s con {SEND_WINDOW + SEND_QUEUE_LIMIT} envíos pendientes")
+    assert red.time() - inicio < 40 and not st.in_flight and not st.send_queue
+    assert not emisor.send_data({"n": -1}, destino)
+    snapshot = emisor.metrics.snapshot()
+    assert snapshot["transporte_datos_perdidos_total"][0]["valor"] == SEND_WINDOW + SEND_QUEUE_LIMIT
+    assert snapshot["transporte_envios_rechazados_total"][0]["valor"] == 2
+    # Vuelve el enlace: connect() rehace el handshake y se envía de nuevo
+    red.set_link(("10.0.0.3", 1), destino, latency=0.01)
+    assert emisor.connect(destino) and emisor.send_data({"n": "otra vez"}, destino)
+    assert servidor.listen(1)[0] == {"n": "otra vez"}
+
+    # 5. stop() cierra el reactor propio (selector y socketpair) pero no uno compartido
+    cliente.stop()
+    assert compartido.selector.get_map() is not None and servidor.sock is not None
+    if os.path.isdir("/proc/self/fd"):
+        antes = len(os.listdir("/proc/self/fd"))
+        for _ in range(100):
+            ReliableTransport("127.0.0.1", 0).stop()
+        assert len(os.listdir("/proc/self/fd")) <= antes + 2
+
+    print("\nTest del reactor completado exitosamente!")
+
+if __name__ == "__main__":
+    test_reactor()
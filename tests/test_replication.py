@@ -0,0 +1,56 @@
+# /tests/test_replication.py
+
+import sys
+import os
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.replication import TokenBucket, plan_replicas
+
+def _entry(server_id, bandera=0):
+    return {"server_id": server_id, "ip": "127.0.0.1", "port": 5000, "ttl": 3600, "bandera": bandera}
+
+def test_replication():
+    """Test básico de la planificación de réplicas."""
+    print("Iniciando test de replicación...")
+
+    servidores = {s: {"ip": "127.0.0.1", "port": 5000} for s in ["S1", "S2", "S3"]}
+    indice = {
+        "libro1.txt": [_entry("S1")],
+        "libro2.txt": [_entry("S1")],
+        "guia.txt": [_entry("S2"), _entry("S3", 1)],
+    }
+
+    # 1. Factor 1: nada que copiar
+    assert plan_replicas(indice, servidores, lambda nombre: 1) == []
+
+    # 2. Factor 2: cada archivo con una sola copia recibe otra en el servidor menos cargado
+    plan = plan_replicas(indice, servidores, lambda nombre: 2)
+    print(f"Plan con factor 2: {plan}")
+    assert len(plan) == 2
+    assert all(c["origen"] == "S1" and c["destino"] != "S1" for c in plan)
+    # S3 tiene menos archivos que S2, así que recibe la primera copia y luego se equilibra
+    assert sorted(c["destino"] for c in plan) == ["S2", "S3"]
+
+    # 3. El factor nunca supera el número de servidores vivos
+    plan = plan_replicas(indice, servidores, lambda nombre: 5)
+    assert len(plan) == 5  # 2 + 2 + 1
+
+    # 4. Copias en servidores caídos no cuentan como réplicas
+    del servidores["S3"]
+    plan = plan_replicas(indice, servidores, lambda nombre: 2)
+    assert {"nombre_archivo": "guia.txt", "origen": "S2", "destino": "S1"} in plan
+
+    # 5. La cubeta de tokens se endeuda y pide esperar
+    bucket = TokenBucket(rate=1000)
+    assert bucket.wait_time() == 0.0
+    bucket.consume(3000)
+    espera = bucket.wait_time()
+    print(f"Espera tras consumir 3000 bytes a 1000 B/s: {espera:.2f}s")
+    assert 1.9 < espera <= 2.0
+
+    print("\nTest de replicación completado exitosamente!")
+
+if __name__ == "__main__":
+    test_replication()
@@ -0,0 +1,103 @@
+# /tests/test_simnet.py
+
+import sys
+import os
+import errno
+import socket
+import threading
+import time
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.network.simnet import SimulatedNetwork
+from src.network.transport import ReliableTransport
+
+def recibir_todo(sock):
+    recibidos = []
+    while True:
+        try:
+            data, _ = sock.recvfrom(65535)
+        except socket.timeout:
+            return recibidos
+        recibidos.append(int(data))
+
+def ejecutar(seed):
+    red = SimulatedNetwork(seed=seed, loss=0.1, duplicate=0.1, reorder=0.3, latency=0.005, jitter=0.002)
+    a, b = red.socket(), red.socket()
+    b.settimeout(1)
+    for i in range(200):
+        a.sendto(str(i).encode(), b.getsockname())
+    return recibir_todo(b), red.stats
+
+def test_simnet():
+    """Test básico de la red simulada con deterioro reproducible."""
+    print("Iniciando test de la red simulada...")
+
+    # 1. Misma semilla = mismas pérdidas, duplicados y orden de llegada
+    recibidos, stats = ejecutar(7)
+    assert (recibidos, stats) == ejecutar(7)
+    assert recibidos != ejecutar(8)[0]
+    assert recibidos != sorted(recibidos) and len(set(recibidos)) < 200
+    assert stats["entregados"] == len(recibidos) == stats["enviados"] - stats["perdidos"] + stats["duplicados"]
+    print(f"Estadísticas: {stats}")
+
+    # 2. Límite de ancho de banda: 10 datagramas de 1000 bytes a 10 kB/s tardan 1 s (virtual, sin dormir)
+    red = SimulatedNetwork(bandwidth=10000)
+    a, b = red.socket(), red.socket()
+    b.settimeout(5)
+    inicio = time.perf_counter()
+    for _ in range(10):
+        a.sendto(b"x" * 1000, b.getsockname())
+    for _ in range(10):
+        b.recvfrom(2048)
+    assert abs(red.time() - 1.0) < 1e-9 and time.perf_counter() - inicio < 0.5
+
+    # 3. Datagrama mayor que la MTU y socket no bloqueante como los reales
+    try:
+        a.sendto(b"x" * 70000, b.getsockname())
+        assert False, "debió fallar por tamaño"
+    except OSError as e:
+        assert e.errno == errno.EMSGSIZE
+    b.setblocking(False)
+    try:
+        b.recvfrom(10)
+        assert False, "no hay nada que leer"
+    except BlockingIOError:
+        pass
+
+    # 4. Transporte sobre la red simulada: sin servidor, el handshake reenvía el SYN cada RTO y se rinde tras RTO * 3
+    red = SimulatedNetwork(seed=1)
+    cliente = ReliableTransport("10.0.0.2", 0, sock=red.socket(("10.0.0.2", 1)), clock=red.time)
+    assert not cliente.connect(("10.0.0.3", 9))
+    assert red.time() >= 3.0 and red.stats["sin_destino"] >= 3
+    assert cliente.metrics.snapshot()["transporte_handshakes_fallidos_total"][0]["valor"] == 1
+
+    # 5. Con tiempo real, servidor en otro hilo y un enlace con latencia y jitter
+    red = SimulatedNetwork(seed=3, virtual_time=False, latency=0.002, jitter=0.001)
+    servidor = ReliableTransport("10.0.0.1", 7000, sock=red.socket(("10.0.0.1", 7000)), clock=red.time)
+    cliente = ReliableTransport("10.0.0.2", 0, sock=red.socket(), clock=red.time)
+    recibido, corriendo = [], True
+
+    def atender():
+        while corriendo:
+            payload, addr = servidor.listen()
+            if payload:
+                recibido.append((payload, addr))
+    hilo = threading.Thread(target=atender, daemon=True)
+    hilo.start()
+    try:
+        assert cliente.connect(("10.0.0.1", 7000))
+        cliente.send_data({"accion": "consultar"}, ("10.0.0.1", 7000))
+        limite = time.time() + 2
+        while not recibido and time.time() < limite:
+            time.sleep(0.01)
+        assert recibido == [({"accion": "consultar"}, cliente.sock.getsockname())]
+    finally:
+        corriendo = False
+        hilo.join(1)
+
+    print("\nTest de la red simulada completado exitosamente!")
+
+if __name__ == "__main__":
+    test_simnet()
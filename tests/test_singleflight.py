@@ -0,0 +1,59 @@
+# /tests/test_singleflight.py
+
+import sys
+import os
+import threading
+import time
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.singleflight import SingleFlight
+
+def test_singleflight():
+    """Test básico del agrupamiento de lecturas idénticas."""
+    print("Iniciando test de SingleFlight...")
+
+    flights = SingleFlight(cache_window=0.3)
+    transferencias = []
+    liberar = threading.Event()
+
+    def leer():
+        transferencias.append(1)
+        liberar.wait(2)
+        return {"status": "EXITO", "contenido": "hola"}
+
+    # 1. Diez lectores concurrentes de la misma clave: una sola transferencia
+    resultados = []
+    hilos = [
+        threading.Thread(target=lambda: resultados.append(flights.do(("leer", "libro1.txt", 3), leer)))
+        for _ in range(10)
+    ]
+    for h in hilos:
+        h.start()
+    time.sleep(0.2)
+    liberar.set()
+    for h in hilos:
+        h.join()
+    print(f"Transferencias: {len(transferencias)}, estadísticas: {flights.snapshot()}")
+    assert len(transferencias) == 1
+    assert sum(1 for _, compartido in resultados if compartido) == 9
+    assert all(r["contenido"] == "hola" for r, _ in resultados)
+
+    # 2. Dentro de la ventana se reutiliza el resultado; otra versión es otra clave
+    assert flights.do(("leer", "libro1.txt", 3), leer) == ({"status": "EXITO", "contenido": "hola"}, True)
+    flights.do(("leer", "libro1.txt", 4), leer)
+    assert len(transferencias) == 2
+
+    # 3. Pasada la ventana se vuelve a transferir; los errores no se guardan
+    time.sleep(0.35)
+    flights.do(("leer", "libro1.txt", 3), leer)
+    assert len(transferencias) == 3
+    error = lambda: {"status": "ERROR"}
+    flights.do(("leer", "otro.txt", 0), error, cacheable=lambda r: r["status"] == "EXITO")
+    assert flights.do(("leer", "otro.txt", 0), error, cacheable=lambda r: r["status"] == "EXITO")[1] is False
+
+    print("\nTest de SingleFlight completado exitosamente!")
+
+if __name__ == "__main__":
+    test_singleflight()
@@ -0,0 +1,67 @@
+# /tests/test_tracing.py
+
+import sys
+import os
+import json
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.tracing import Tracer, chrome_trace, extract, inject, merge_chrome_traces
+
+def test_tracing():
+    """Test básico de la propagación de trazas entre componentes."""
+    print("Iniciando test de trazas...")
+
+    cliente = Tracer("cliente")
+    servidor = Tracer("servidor")
+    dns = Tracer("dns_general", capacity=3)
+
+    # 1. Sin span activo la petición no cambia; con span, inject devuelve una copia con la traza
+    peticion = {"accion": "leer", "nombre_archivo": "a.txt"}
+    assert inject(peticion) is peticion and extract(peticion) is None
+
+    with cliente.span("cliente leer") as raiz:
+        enviada = json.loads(json.dumps(inject(peticion)))
+        assert "traza" not in peticion
+
+        # 2. Cada salto sigue la traza del remitente aunque el span activo sea otro
+        with servidor.span("servidor leer", parent=extract(enviada)) as s:
+            with servidor.span("salto leer", destino="dns_general") as salto:
+                al_dns = inject(enviada)
+                with dns.span("dns_general leer", parent=extract(al_dns)) as d:
+                    pass
+    assert s["trace_id"] == salto["trace_id"] == d["trace_id"] == raiz["trace_id"]
+    assert s["parent_id"] == raiz["span_id"]
+    assert salto["parent_id"] == s["span_id"] and d["parent_id"] == salto["span_id"]
+    assert raiz["parent_id"] is None and raiz["duracion"] >= d["duracion"]
+    print(f"Traza {raiz['trace_id']}: {len(servidor.spans(raiz['trace_id']))} spans en el servidor")
+
+    # 3. Los errores quedan en el span y el buffer circular guarda solo los últimos
+    try:
+        with dns.span("dns_general escribir"):
+            raise RuntimeError("sin espacio")
+    except RuntimeError:
+        pass
+    for i in range(3):
+        with dns.span(f"dns_general consultar {i}"):
+            pass
+    nombres = [x["nombre"] for x in dns.spans()]
+    assert nombres == ["dns_general consultar 0", "dns_general consultar 1", "dns_general consultar 2"]
+    assert dns.spans(limit=1)[0]["nombre"] == "dns_general consultar 2"
+
+    # 4. Exportación como eventos de Chrome y unión de varios componentes
+    traza = servidor.export(raiz["trace_id"])
+    completos = [e for e in traza["traceEvents"] if e["ph"] == "X"]
+    assert len(completos) == 2 and completos[0]["args"]["trace_id"] == raiz["trace_id"]
+    assert any(e["name"] == "process_name" and e["args"]["name"] == "servidor" for e in traza["traceEvents"])
+    unida = merge_chrome_traces([cliente.export(), traza])
+    eventos = [e for e in unida["traceEvents"] if e["ph"] == "X"]
+    assert [e["name"] for e in eventos][0] == "cliente leer"
+    assert len({e["pid"] for e in eventos}) == 2
+    assert chrome_trace([])["traceEvents"] == []
+
+    print("\nTest de trazas completado exitosamente!")
+
+if __name__ == "__main__":
+    test_tracing()
@@ -0,0 +1,83 @@
+# /tests/test_transport.py
+
+import sys
+import os
+import json
+import socket
+
+# Añade la carpeta raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.network.batch_io import BufferPool
+from src.network.transport import ConnectionState, ReliableTransport
+
+def test_transport():
+    """Test básico de la ruta de recepción del transporte."""
+    print("Iniciando test de recepción del transporte...")
+
+    # 1. El pool reutiliza los búferes devueltos y no guarda más de los pedidos
+    pool = BufferPool(size=16, keep=1)
+    a, b = pool.acquire(), pool.acquire()
+    pool.release(a)
+    pool.release(b)
+    assert pool.acquire() is a and len(pool.free) == 0
+
+    receptor = ReliableTransport("127.0.0.1", 0)
+    emisor = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    emisor.bind(("127.0.0.1", 0))
+    emisor.settimeout(1)
+    origen, destino = emisor.getsockname(), receptor.sock.getsockname()
+    st = ConnectionState(origen, 1000, 2000)
+    st.state = "ESTABLISHED"
+    receptor.connections[origen] = st
+
+    def enviar(texto, espera=1):
+        emisor.sendto(texto.encode("utf-8"), destino)
+        return receptor.listen(espera)[0]
+
+    def ack():
+        return json.loads(emisor.recvfrom(65535)[0])
+
+    # 2. DATA con el formato de _jsend: cabecera leída sobre el búfer y el mismo ACK que con json
+    payload = {"ct": "ab" * 100, "texto": "línea 1\nlínea 2 }\n", "lista": [1, {"x": None}]}
+    msg = {"type": "DATA", "seq": 7, "cid": 1000, "sid": 2000, "payload": payload}
+    assert enviar(json.dumps(msg) + "\n") == payload
+    assert ack()["ack"] == 7 + len(json.dumps(payload))
+
+    # Repetido: se confirma otra vez pero no se entrega
+    assert enviar(json.dumps(msg) + "\n", 0.2) is None
+    assert ack()["ack"] == 7 + len(json.dumps(payload))
+
+    # 3. Otros formatos (orden de claves distinto, sin salto final) siguen por la ruta json
+    otro = {"payload": {"n": 1}, "sid": 2000, "cid": 1000, "seq": 9, "type": "DATA"}
+    assert enviar(json.dumps(otro)) == {"n": 1}
+    ack()
+
+    # Dos DATA en un mismo datagrama: se entregan ambos
+    dos = [{"type": "DATA", "seq": s, "cid": 1000, "sid": 2000, "payload": {"n": s}} for s in (20, 21)]
+    assert enviar("".join(json.dumps(m) + "\n" for m in dos)) == {"n": 20}
+    assert receptor.listen(1)[0] == {"n": 21}
+    assert sorted(ack()["ack"] for _ in dos) == [20 + len('{"n": 20}'), 21 + len('{"n": 21}')]
+
+    # 4. Payload ilegible con cabecera válida: cuenta como no recibido (sin ACK ni seq registrado)
+    emisor.sendto(b'{"type": "DATA", "seq": 30, "cid": 1000, "sid": 2000, "payload": {roto}\n', destino)
+    assert receptor.listen(0.2)[0] is None
+    assert receptor.metrics.snapshot()["transporte_payloads_invalidos_total"][0]["valor"] == 1
+    emisor.settimeout(0.2)
+    try:
+        emisor.recvfrom(65535)
+        assert False, "no debió confirmarse"
+    except socket.timeout:
+        pass
+    # La retransmisión íntegra del mismo seq sí se entrega
+    emisor.settimeout(1)
+    bueno = {"type": "DATA", "seq": 30, "cid": 1000, "sid": 2000, "payload": {"n": 30}}
+    assert enviar(json.dumps(bueno) + "\n") == {"n": 30}
+    assert ack()["ack"] == 30 + len(json.dumps({"n": 30}))
+
+    receptor.stop()
+    emisor.close()
+    print("\nTest de recepción del transporte completado exitosamente!")
+
+if __name__ == "__main__":
+    test_transport()
@@ -4,10 +4,15 @@ import socket
 import logging
 from typing import Dict, Optional, Tuple, List
 
+from src.network.dns_ring import DNSGeneralRing, seeds_from_env
+
 # Configuración del DNS General
 DNS_GENERAL_IP = "127.0.0.5"
 DNS_GENERAL_PORT = 50005
 
+# Un cliente del anillo por dirección semilla del DNS General
+_dns_general_rings: Dict[Tuple[str, int], DNSGeneralRing] = {}
+
 # ==============================================================================
 # ==                            DRIVERS ESPECÍFICOS                           ==
 # ==============================================================================
@@ -307,20 +312,17 @@ def driver_servidor_gus(request: Dict, dns_address: Tuple[str, int]) -> Dict:
 def driver_dns_general(request: Dict, dns_address: Tuple[str, int]) -> Dict:
     """Driver para DNS General (sistema distribuido)"""
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-            sock.settimeout(5)
-            
-            # El DNS General ya usa formato estándar
-            sock.sendto(json.dumps(request).encode('utf-8'), dns_address)
-            data, addr = sock.recvfrom(8192)
-            response = json.loads(data.decode('utf-8'))
-            
-            return response
-            
+        ring = _dns_general_rings.get(dns_address)
+        if ring is None:
+            ring = _dns_general_rings[dns_address] = DNSGeneralRing(seeds_from_env([dns_address]))
+
+        # El DNS General ya usa formato estándar; el anillo elige el nodo dueño del archivo
+        return ring.request(request, timeout=5)
+
     except Exception as e:
         logging.error(f"Error en driver_dns_general: {e}")
         return {"status": "ERROR", "mensaje": str(e)}
-    
+
 # ==============================================================================
 # ==                           CLASE DNSTranslator MEJORADA                   ==
 # ==============================================================================